@@ -0,0 +1,161 @@
+## @file bench_indexes.py
+## @brief Benchmark of the hot filters with and without the indexes of schema version 4.
+## @details Seeds a SQLite database of realistic size, times every access path with the indexes dropped and
+## again after the migration creates them, and prints the query plan used with the indexes.
+## Usage: python benchmarks/bench_indexes.py [--recetas N] [--proyecciones N] [--costos N] [--repeticiones N]
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.database.migrations import load_models, _create_indexes
+from src.Recipes.model import Receta
+from src.Recipes.controller import RecetasController
+from src.Projections.model import Proyeccion
+from src.Costs.model import Costos
+from src.Costs.controller import CostController
+from src.Ingredients.model import Ingrediente
+from src.Ingredients.controller import IngredienteController
+from src.Providers.model import Proveedor
+from src.Users.model import Usuario
+
+PERIODOS = ["Desayuno", "Comida", "Cena"]
+CLASIFICACIONES = ["Platillo principal", "Guarnicion", "Postre", "Bebida", "Entrada", "Sopa"]
+UNIDADES = ["g", "kg", "ml", "L", "pza"]
+HOY = date.today()
+
+
+## @brief Fill the database with recipes, projections, ingredients, providers, costs and users
+def seed(engine, recetas: int, proyecciones: int, costos: int, ingredientes: int, usuarios: int) -> None:
+    azar = random.Random(2025)
+    with engine.begin() as connection:
+        connection.execute(insert(Receta), [{
+            "nombre_receta": f"Receta {i}",
+            "clasificacion": azar.choice(CLASIFICACIONES),
+            "periodo": azar.choice(PERIODOS),
+            "comensales_base": azar.randint(2, 20),
+            "estatus": azar.random() > 0.05,
+            "fecha_eliminado": HOY - timedelta(days=azar.randint(0, 200)) if azar.random() < 0.05 else None,
+        } for i in range(recetas)])
+        connection.execute(insert(Proyeccion), [{
+            "nombre": f"Proyeccion {i}",
+            "periodo": azar.choice(PERIODOS),
+            "comensales": azar.randint(20, 500),
+            "fecha": HOY - timedelta(days=azar.randint(0, 3 * 365)),
+            "estatus": azar.random() > 0.05,
+            "fecha_eliminado": HOY - timedelta(days=azar.randint(0, 200)) if azar.random() < 0.05 else None,
+            "totales_obsoletos": True,
+        } for i in range(proyecciones)])
+        connection.execute(insert(Ingrediente), [{
+            "nombre": f"Ingrediente {i // len(UNIDADES)}",
+            "clasificacion": "General",
+            "unidad_medida": UNIDADES[i % len(UNIDADES)],
+        } for i in range(ingredientes)])
+        connection.execute(insert(Proveedor), [{"nombre": f"Proveedor {i}", "categoria": "General"} for i in range(200)])
+        connection.execute(insert(Costos), [{
+            "id_proveedor": azar.randint(1, 200),
+            "nombre_ingrediente": f"Ingrediente {azar.randrange(ingredientes // len(UNIDADES))}",
+            "precio": round(azar.uniform(1, 500), 2),
+        } for _ in range(costos)])
+        connection.execute(insert(Usuario), [{
+            "nombre_usuario": f"usuario{i}",
+            "nombre_completo": f"Usuario {i}",
+            "contrasenia": "x",
+            "rol": "invitado",
+        } for i in range(usuarios)])
+
+
+## @brief Access paths under test: (name, function of the session, SQL whose plan is printed)
+def access_paths(ingredientes: int):
+    limite = HOY - timedelta(weeks=12)
+    ultimo = f"Ingrediente {ingredientes // len(UNIDADES) - 1}"
+    return [
+        ("search_recipes (periodo, clasificacion)",
+         lambda s: RecetasController.search_recipes(s, periodo="Cena", clasificacion="Postre"),
+         "SELECT id_receta FROM recetas WHERE estatus = 1 AND periodo = 'Cena' AND clasificacion = 'Postre'"),
+        ("search_projections (fecha)",
+         lambda s: s.query(Proyeccion).filter(Proyeccion.estatus == True, Proyeccion.fecha == HOY).all(),
+         f"SELECT id_proyeccion FROM proyecciones WHERE estatus = 1 AND fecha = '{HOY}'"),
+        ("fetch_costs_by_name",
+         lambda s: CostController.fetch_costs_by_name(s, ultimo),
+         f"SELECT id_costo FROM Costos WHERE nombre_ingrediente = '{ultimo}'"),
+        ("get_ingrediente_by_name_and_unit",
+         lambda s: IngredienteController.get_ingrediente_by_name_and_unit(s, ultimo, "pza"),
+         f"SELECT id_ingrediente FROM ingredientes WHERE nombre = '{ultimo}' AND unidad_medida = 'pza'"),
+        ("login (nombre_usuario)",
+         lambda s: s.query(Usuario).filter(Usuario.nombre_usuario == "usuario_inexistente").first(),
+         "SELECT numero_usuario FROM Usuarios WHERE nombre_usuario = 'usuario_inexistente'"),
+        ("clear_trashcan (fecha_eliminado)",
+         lambda s: (s.query(Receta.id_receta).filter(Receta.estatus == False, Receta.fecha_eliminado != None,
+                                                     Receta.fecha_eliminado <= limite).all(),
+                    s.query(Proyeccion.id_proyeccion).filter(Proyeccion.estatus == False, Proyeccion.fecha_eliminado != None,
+                                                             Proyeccion.fecha_eliminado <= limite).all()),
+         f"SELECT id_receta FROM recetas WHERE estatus = 0 AND fecha_eliminado <= '{limite}'"),
+    ]
+
+
+## @brief Average time in milliseconds of each access path
+def measure(engine, caminos, repeticiones: int) -> list[float]:
+    Session = sessionmaker(bind=engine)
+    tiempos = []
+    for _, consulta, _ in caminos:
+        with Session() as session:
+            consulta(session)
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                consulta(session)
+                session.expunge_all()
+            tiempos.append((time.perf_counter() - inicio) / repeticiones * 1000)
+    return tiempos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los indices de las busquedas")
+    parser.add_argument("--recetas", type=int, default=20000)
+    parser.add_argument("--proyecciones", type=int, default=100000)
+    parser.add_argument("--costos", type=int, default=100000)
+    parser.add_argument("--ingredientes", type=int, default=10000)
+    parser.add_argument("--usuarios", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        engine = create_engine(f"sqlite:///{os.path.join(carpeta, 'bench.db')}")
+        load_models()
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for tabla in Base.metadata.sorted_tables:
+                for indice in tabla.indexes:
+                    indice.drop(connection)
+        print("Sembrando datos...")
+        seed(engine, args.recetas, args.proyecciones, args.costos, args.ingredientes, args.usuarios)
+        caminos = access_paths(args.ingredientes)
+
+        sin_indices = measure(engine, caminos, args.repeticiones)
+        with engine.begin() as connection:
+            _create_indexes(connection)
+            connection.execute(text("ANALYZE"))
+        con_indices = measure(engine, caminos, args.repeticiones)
+
+        print(f"\n{'Consulta':<42}{'Sin indices':>14}{'Con indices':>14}{'Mejora':>10}")
+        for (nombre, _, _), antes, despues in zip(caminos, sin_indices, con_indices):
+            print(f"{nombre:<42}{antes:>11.2f} ms{despues:>11.2f} ms{antes / max(despues, 1e-6):>9.1f}x")
+
+        print("\nPlanes con indices:")
+        with engine.connect() as connection:
+            for nombre, _, sql in caminos:
+                plan = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+                print(f"  {nombre}: {'; '.join(fila[-1] for fila in plan)}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
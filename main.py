@@ -6,14 +6,18 @@ pymysql.install_as_MySQLdb()
 from ast import main
 import os
 import customtkinter as ctk
-from src.database.connector import Connector
+from src.database.connector import Connector, dispose_engines
+from src.database.migrations import bootstrap_schema
+from src.database.worker import shutdown_worker
+from src.Projections.report_jobs import shutdown_report_queue
 import src.utils.constants as constants
 from src.utils.constants import env as env  ## Import environment constants
 
 ROOT_PATH = os.path.dirname(os.path.abspath(__file__))  ## Define ROOT_PATH
 constants.init(ROOT_PATH)  ## Initialize constants and resource paths
 
-from src.Trashcan.controller import TrashcanController
+from src.Trashcan.maintenance import start_trash_purge
+from src.Projections.maintenance import start_totals_refresh
 from src.Users.Login.view import LoginApp
 from src.Users.Dashboard.admin_dashboard import AdminDashboard
 from src.Users.Dashboard.invitado_dashboard import InvitadoDashboard
@@ -21,20 +25,31 @@ from src.Users.Dashboard.invitado_dashboard import InvitadoDashboard
 ## @brief Main function
 ## @details Initializes the database, launches the login window, and opens the dashboard based on the authenticated user's role.
 if __name__ == '__main__':
-    print("database initialized")
     connector = Connector()
-    session = connector.get_session()
+    avisos = []
+    bootstrap_schema(connector.engine, avisos)
+    for aviso in avisos:
+        print(f"Aviso de migración: {aviso}")
+    print("database initialized")
+    mantenimiento = []
 
     login_view = LoginApp()
     login_view.mainloop()
-    TrashcanController.clear_trashcan(session)
+
+    ## The expired trash can items are purged, and the stale projection totals recomputed, in the background
+    ## once the dashboard is on screen
+    def iniciar_mantenimiento():
+        mantenimiento.append(start_trash_purge())
+        mantenimiento.append(start_totals_refresh())
 
     if hasattr(login_view, 'user_role') and login_view.user_role is not None:
         if login_view.user_role == 'admin':
             admin_app = AdminDashboard(usuario=login_view.user_data)
+            admin_app.after_idle(iniciar_mantenimiento)
             admin_app.mainloop()
         elif login_view.user_role == 'invitado':
             invitado_app = InvitadoDashboard(usuario=login_view.user_data)
+            invitado_app.after_idle(iniciar_mantenimiento)
             invitado_app.mainloop()
         else:
             print("Unknown role or login was not completed successfully.")
@@ -42,5 +57,12 @@ if __name__ == '__main__':
     else:
         print("No user_role found; the user might have closed the login window.")
         exit()
-    # connector.close_connection()
+    for hilo in mantenimiento:
+        ## Each batch is its own transaction: the thread stops after the one in course and the next session
+        ## continues it, so the engines are disposed only once no thread uses a connection
+        hilo.stop()
+        hilo.join()
+    shutdown_report_queue()
+    shutdown_worker()
+    dispose_engines()
     print("database closed")
\ No newline at end of file
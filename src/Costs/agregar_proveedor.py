@@ -1,14 +1,49 @@
 import customtkinter as ctk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import io
 import sys
 import os
-import re
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from src.Costs.controller import CostController
+from src.Costs.importer import ImportReport, leer_lista_precios, validar_bloque
 from src.Providers.controller import ProveedorController
+from src.Providers.model import Proveedor
 from src.database.connector import Connector
+from src.database.worker import run_in_background
+
+## Rows of the price list shown in the preview table
+FILAS_VISTA_PREVIA = 500
+
+
+## Preview executed on the database worker: validates the whole price list without touching the database
+def previsualizar_lista(session, origen, formato=None):
+    productos, rechazos, validas = [], [], 0
+    for bloque, primera in leer_lista_precios(origen, formato):
+        aceptadas, rechazadas = validar_bloque(bloque, primera)
+        validas += len(aceptadas)
+        rechazos.extend(rechazadas)
+        faltantes = FILAS_VISTA_PREVIA - len(productos)
+        if faltantes > 0:
+            for fila in aceptadas.head(faltantes).to_dict("records"):
+                productos.append((fila["nombre"], fila.get("unidad", ""), fila["precio"]))
+    return {"productos": productos, "validas": validas, "rechazos": rechazos}
+
+
+## Save executed on the database worker: the provider and its price list in a single transaction
+def guardar_proveedor_con_lista(session, nombre, origen=None, formato=None, on_progress=None):
+    if ProveedorController.get_provider_by_name(session, nombre):
+        raise ValueError(f"Ya existe un proveedor con el nombre '{nombre}'.")
+
+    nuevo = Proveedor(nombre=nombre, categoria="General")
+    session.add(nuevo)
+    session.flush()
+
+    if origen is None:
+        session.commit()
+        return ImportReport()
+    return CostController.import_price_list(session, nuevo.id_proveedor, origen, formato, on_progress=on_progress)
 
 ## Class AgregarProveedorView
 ## This class creates a view for adding a new provider.
@@ -25,8 +60,11 @@ class AgregarProveedorView(ctk.CTkFrame):
         self.fuente_card = fuente_card
         self.fuente_button = fuente_button
         
-        self.cost_controller = CostController()
-        self.productos = []
+        self.texto_pegado = None
+        self.archivo = None
+        self.productos_validos = 0
+        self.filas_importadas = 0
+        self.guardando = False
 
         self.build_interface()
     ## End of constructor
@@ -84,6 +122,16 @@ class AgregarProveedorView(ctk.CTkFrame):
         )
         info_label.pack(pady=(10, 0))
 
+        ctk.CTkButton(
+            scroll,
+            text="Importar lista de precios (xlsx, csv)",
+            font=self.fuente_card,
+            fg_color="#3A3A3A",
+            hover_color="#2A2A2A",
+            corner_radius=50,
+            command=self.importar_archivo
+        ).pack(pady=(10, 0))
+
         self.tabla_frame = ctk.CTkFrame(scroll, fg_color="white", corner_radius=25)
         self.tabla_frame.pack(padx=20, pady=20, fill="both", expand=True)
 
@@ -114,62 +162,89 @@ class AgregarProveedorView(ctk.CTkFrame):
         self.tabla_frame.bind("<Control-V>", self.pegar_desde_excel)
 
 
-        btn_guardar = ctk.CTkButton(scroll, text="Guardar proveedor", font=self.fuente_button, width=500, corner_radius=50, fg_color="#b8191a", hover_color="#991416", command=self.guardar_proveedor)
-        btn_guardar.pack(pady=(10, 20))
+        self.resumen_label = ctk.CTkLabel(scroll, text="", font=self.fuente_card, text_color="#3A3A3A")
+        self.resumen_label.pack()
+
+        self.btn_guardar = ctk.CTkButton(scroll, text="Guardar proveedor", font=self.fuente_button, width=500, corner_radius=50, fg_color="#b8191a", hover_color="#991416", command=self.guardar_proveedor)
+        self.btn_guardar.pack(pady=(10, 20))
 
     ## End of build_interface method
     ## Method to handle pasting from Excel
-    ## This method processes the data from the clipboard and populates the treeview.
+    ## This method validates the data from the clipboard and shows it in the treeview.
     def pegar_desde_excel(self, event=None):
-        import tkinter as tk
-        import re
-
         try:
-            root = tk.Tk()
-            root.withdraw()
-            raw = root.clipboard_get()
-            root.destroy()
+            raw = self.clipboard_get()
+        except Exception:
+            raw = ""
 
-            if not raw.strip():
-                messagebox.showwarning("Portapapeles vacío", "No hay datos para pegar.")
-                return
+        if not raw.strip():
+            messagebox.showwarning("Portapapeles vacío", "No hay datos para pegar.")
+            return
 
-            rows = raw.strip().split("\n")
-            self.tree.delete(*self.tree.get_children())
-            self.productos.clear()
-            count = 0
-
-            for row in rows:
-                parts = [p.strip() for p in row.split("\t")]
-                if len(parts) < 3:
-                    continue
-
-                descripcion = parts[0]
-                unidad = parts[1]
-                precio_str = re.sub(r"[^\d.,]", "", parts[2]).replace(",", ".")
-
-                try:
-                    precio = float(precio_str)
-                except ValueError:
-                    continue
-
-                self.tree.insert("", "end", values=(descripcion, unidad, f"{precio:.2f}"))
-                self.productos.append({
-                    "descripcion": descripcion,
-                    "unidad": unidad,
-                    "precio": precio
-                })
-                count += 1
-
-            if count == 0:
-                messagebox.showwarning("Sin datos", "No se encontraron datos válidos para pegar.")
-            else:
-                messagebox.showinfo("Pegado exitoso", f"Se pegaron {count} productos.")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo pegar: {str(e)}")
+        self.texto_pegado = raw
+        self.archivo = None
+        self.cargar_vista_previa()
     ## End of pegar_desde_excel method
+    ## Method to choose a price list file
+    def importar_archivo(self):
+        ruta = filedialog.askopenfilename(
+            title="Selecciona la lista de precios",
+            filetypes=[("Listas de precios", "*.xlsx *.xlsm *.csv *.tsv *.txt"), ("Todos los archivos", "*.*")]
+        )
+        if not ruta:
+            return
+
+        self.archivo = ruta
+        self.texto_pegado = None
+        self.cargar_vista_previa()
+    ## End of importar_archivo method
+    ## Source of the price list for the importer: the chosen file or the pasted text
+    def origen_lista(self):
+        if self.archivo:
+            return self.archivo, None
+        if self.texto_pegado:
+            return io.StringIO(self.texto_pegado), "tsv"
+        return None, None
+    ## Method to validate the price list in the background and show the preview
+    def cargar_vista_previa(self):
+        origen, formato = self.origen_lista()
+        self.tree.delete(*self.tree.get_children())
+        self.productos_validos = 0
+        self.resumen_label.configure(text="Leyendo lista de precios...")
+        run_in_background(
+            self.tree, "proveedor.vista_previa", previsualizar_lista, origen, formato,
+            on_success=self.mostrar_vista_previa,
+            on_error=self.error_vista_previa
+        )
+    ## Method to show the validated rows of the price list
+    def mostrar_vista_previa(self, vista):
+        for descripcion, unidad, precio in vista["productos"]:
+            self.tree.insert("", "end", values=(descripcion, unidad, f"{precio:.2f}"))
+        self.productos_validos = vista["validas"]
+
+        resumen = f"{vista['validas']} productos válidos, {len(vista['rechazos'])} filas rechazadas"
+        if vista["validas"] > len(vista["productos"]):
+            resumen += f" (se muestran los primeros {len(vista['productos'])})"
+        self.resumen_label.configure(text=resumen)
+
+        if vista["validas"] == 0:
+            messagebox.showwarning("Sin datos", "No se encontraron datos válidos para pegar.")
+        elif vista["rechazos"]:
+            reporte = ImportReport()
+            reporte.insertadas = vista["validas"]
+            reporte.rechazos = vista["rechazos"]
+            messagebox.showwarning("Filas rechazadas", reporte.resumen())
+    ## Method to show an error reading the price list
+    def error_vista_previa(self, e):
+        self.texto_pegado = None
+        self.archivo = None
+        self.resumen_label.configure(text="")
+        messagebox.showerror("Error", f"No se pudo leer la lista de precios: {str(e)}")
     ## Method to handle saving the provider
     def guardar_proveedor(self):
+        if self.guardando:
+            return
+
         nombre = self.entry_nombre.get().strip()
         contacto = self.entry_contacto.get().strip()
 
@@ -177,34 +252,45 @@ class AgregarProveedorView(ctk.CTkFrame):
             messagebox.showerror("Campos incompletos", "Por favor llena todos los campos obligatorios.")
             return
             
-        if not self.productos:
+        if not self.productos_validos:
             respuesta = messagebox.askyesno("Advertencia", "No hay productos en la lista. ¿Desea continuar sin productos?")
             if not respuesta:
                 return
 
-        try:
-            proveedor_existente = ProveedorController.get_provider_by_name(self.session, nombre)
-            if proveedor_existente:
-                messagebox.showerror("Error", f"Ya existe un proveedor con el nombre '{nombre}'.")
-                return
-            
-            nuevo = ProveedorController.create_proveedor(self.session, nombre, "General")
-            self.session.refresh(nuevo)
-            
-            for producto in self.productos:
-                self.cost_controller.create_cost(
-                    self.session,
-                    nombre=producto["descripcion"],
-                    precio=producto["precio"],
-                    id_proveedor=nuevo.id_proveedor
-                )
-            
-            self.session.commit()
-            self.mostrar_mensaje_personalizado("Agregado", f"Proveedor '{nombre}' agregado correctamente.", "#b8191a")
-            self.volver_a_costos()
-        except Exception as e:
-            self.session.rollback()
-            self.mostrar_mensaje_personalizado("Error", f"No se pudo agregar el proveedor.\n\n{str(e)}", "#d9534f")
+        origen, formato = self.origen_lista() if self.productos_validos else (None, None)
+        self.guardando = True
+        self.filas_importadas = 0
+        self.btn_guardar.configure(state="disabled")
+        self.mostrar_progreso()
+        run_in_background(
+            self, "proveedor.guardar", guardar_proveedor_con_lista, nombre, origen, formato,
+            on_progress=self.registrar_progreso,
+            on_success=lambda reporte: self.proveedor_guardado(nombre, reporte),
+            on_error=self.error_guardado
+        )
+    ## Called from the worker after every chunk of the import
+    def registrar_progreso(self, reporte):
+        self.filas_importadas = reporte.leidas
+    ## Method to show the progress of the import while it runs
+    def mostrar_progreso(self):
+        if not self.guardando:
+            return
+        self.resumen_label.configure(text=f"Guardando... {self.filas_importadas} de {self.productos_validos} filas procesadas")
+        self.after(100, self.mostrar_progreso)
+    ## Method called when the provider and its price list were saved
+    def proveedor_guardado(self, nombre, reporte):
+        self.guardando = False
+        mensaje = f"Proveedor '{nombre}' agregado correctamente."
+        if reporte.leidas:
+            mensaje += "\n\n" + reporte.resumen()
+        self.mostrar_mensaje_personalizado("Agregado", mensaje, "#b8191a")
+        self.volver_a_costos()
+    ## Method called when the provider could not be saved; nothing was written
+    def error_guardado(self, e):
+        self.guardando = False
+        self.btn_guardar.configure(state="normal")
+        self.resumen_label.configure(text="")
+        self.mostrar_mensaje_personalizado("Error", f"No se pudo agregar el proveedor.\n\n{str(e)}", "#d9534f")
 
     ## End of guardar_proveedor method
     ## Method to show a custom message
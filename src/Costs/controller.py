@@ -1,11 +1,17 @@
 import sys
 import os
-import pandas as pd
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 from src.Costs.model import Costos
+from src.Providers.model import Proveedor
+from src.Ingredients.model import Ingrediente
+from src.Recipes.model import Receta_Ingredientes  # registers the mapper the Ingrediente relationship points to
+from src.Costs.importer import ImportReport, importar_lista_precios
+from src.database.pagination import Page, paginate
+from src.database.like import ESCAPE_LIKE, contains_pattern
 
 ## @brief CostController class
 ## @details This class is used to manage costs in the database.
@@ -110,14 +116,16 @@ class CostController:
 
     ## @brief Fetch all costs from the database.
     ## @param session: The database session.
-    ## @return: A list of Costos objects.
-    ## @details This method retrieves all costs from the database.
-    ## @note: This method uses the get_all_costs method of the Costos model to fetch all costs.
+    ## @return: A Page of Costos objects sorted by id.
+    ## @details This method retrieves all costs from the database, or one page of them.
+    ## @param despues: Cursor of the last cost already shown; with limite the costs are paged by id.
+    ## @param limite: Number of costs of the page, None for all of them.
+    ## @param contar: Also count every cost (Page.total).
     @staticmethod
-    def get_all_costs(session: Session) -> list[Costos]:
+    def get_all_costs(session: Session, despues=None, limite: int = None, contar: bool = False) -> Page:
         """Fetch all costs from the database."""
-        cost = Costos()
-        return cost.get_all_costs(session)  # Use the model's get_all_costs method
+        return paginate(session, session.query(Costos), [(Costos.id_costo, False)], lambda costo: (costo.id_costo,),
+                        despues=despues, limite=limite, contar=contar)
     
     ## @brief Fetch all costs by provider from the database.
     ## @param session: The database session.
@@ -152,6 +160,50 @@ class CostController:
         """Search for costs by name."""
         return session.query(Costos).filter(Costos.nombre_ingrediente.ilike(f"%{nombre}%")).all()
     
+    ## @brief List the cost catalog shown in the costs views: provider, ingredient, unit and price.
+    ## @param session: The database session.
+    ## @param texto: Optional text to filter the ingredient name (case-insensitive, % and _ matched literally).
+    ## @param descendente: Sort by price from highest to lowest instead of lowest to highest.
+    ## @return: A list of dicts with id_costo, id_proveedor, proveedor, ingrediente, unidad and precio.
+    ## @details Everything is resolved by a single query: the provider name comes from an outer join and the
+    ## unit from a correlated subquery on the ingredients by name, so rendering the catalog needs no per-row lookups.
+    ## When several ingredients share the name (one per unit) the unit of the oldest one is shown.
+    ## @param despues: Cursor of the last cost already shown (Page.cursor of the previous page).
+    ## @param limite: Number of costs of the page, None for all of them.
+    ## @param contar: Also count every cost matching the text (Page.total).
+    ## @note: Costs without provider are listed as "Desconocido" and ingredients without unit as "PZA".
+    @staticmethod
+    def list_cost_catalog(session: Session, texto: str = None, descendente: bool = False, despues=None,
+                          limite: int = None, contar: bool = False) -> Page:
+        """List the costs with their provider name and unit, sorted by price."""
+        unidad = (
+            select(Ingrediente.unidad_medida)
+            .where(Ingrediente.nombre == Costos.nombre_ingrediente)
+            .order_by(Ingrediente.id_ingrediente)
+            .limit(1)
+            .correlate(Costos)
+            .scalar_subquery()
+        )
+        orden = [(Costos.precio, descendente), (Costos.nombre_ingrediente, False), (Costos.id_costo, False)]
+
+        query = (
+            select(
+                Costos.id_costo,
+                Costos.id_proveedor,
+                func.coalesce(Proveedor.nombre, "Desconocido").label("proveedor"),
+                Costos.nombre_ingrediente.label("ingrediente"),
+                func.coalesce(unidad, "PZA").label("unidad"),
+                Costos.precio
+            )
+            .outerjoin(Proveedor, Proveedor.id_proveedor == Costos.id_proveedor)
+        )
+        if texto:
+            query = query.where(Costos.nombre_ingrediente.ilike(contains_pattern(texto), escape=ESCAPE_LIKE))
+
+        pagina = paginate(session, query, orden, lambda fila: (fila.precio, fila.ingrediente, fila.id_costo),
+                          despues=despues, limite=limite, contar=contar)
+        return pagina.con_items([dict(fila._mapping) for fila in pagina])
+
     ## @brief Compare multiple costs by their IDs and return them in order.
     ## @param session: The database session.
     ## @param ids: A list of cost IDs to compare.
@@ -168,19 +220,29 @@ class CostController:
         return sorted_costs
     
     
+    ## @brief Import a supplier price list into the costs of a provider.
+    ## @param session: The database session.
+    ## @param id_proveedor: The ID of the provider.
+    ## @param origen: Path of an xlsx, csv or tsv file, or a file-like object with text pasted from a spreadsheet.
+    ## @param formato: "xlsx", "csv" or "tsv"; detected from the extension when origen is a path.
+    ## @param on_progress: Optional callback receiving the ImportReport after every chunk.
+    ## @param commit: Commit at the end; False lets the caller add more work to the same transaction.
+    ## @return: The ImportReport with the inserted rows and the rejected ones with their reason.
+    ## @details The list is streamed in chunks, validated with vectorized operations and inserted with one
+    ## executemany per chunk inside a single transaction.
+    ## @note: See src/Costs/importer.py for the accepted columns and price formats.
     @staticmethod
-    def add_costs_for_provider_from_excel(session: Session, id_proveedor: int, file_location:str) -> list[Costos]:
-        """Add costs for a provider from an Excel file."""
-        
-        # Read the Excel file
-        df = pd.read_excel(file_location)
-        
-        costos = [Costos(nombre_ingrediente=row['nombre'], precio=row['precio'], id_proveedor=id_proveedor)]
-        
-        # Insert the costs into the database
-        CostController.create_costs(session, costos)
+    def import_price_list(session: Session, id_proveedor: int, origen, formato: str = None,
+                          on_progress=None, commit: bool = True) -> ImportReport:
+        """Import a price list for a provider."""
+        return importar_lista_precios(session, id_proveedor, origen, formato, on_progress=on_progress, commit=commit)
 
-        
-        
-        return costos
-        
\ No newline at end of file
+    ## @brief Add the costs of a provider from an Excel (or csv) price list.
+    ## @param session: The database session.
+    ## @param id_proveedor: The ID of the provider.
+    ## @param file_location: Path of the price list.
+    ## @return: The ImportReport of the import.
+    @staticmethod
+    def add_costs_for_provider_from_excel(session: Session, id_proveedor: int, file_location: str) -> ImportReport:
+        """Add costs for a provider from an Excel file."""
+        return CostController.import_price_list(session, id_proveedor, file_location)
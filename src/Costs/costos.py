@@ -9,6 +9,17 @@ import tkinter.messagebox as msgbox
 from .agregar_proveedor import AgregarProveedorView
 from src.Costs.controller import CostController
 from src.database.connector import Connector
+from src.components.busqueda import DebouncedSearch
+from src.components.virtual_list import VirtualList
+from src.database.pagination import PAGE_SIZE
+
+## Search executed on the database worker: costs matching the text with their provider name and unit, sorted by price
+def buscar_costos(session, texto, descendente=False, despues=None, limite=None):
+    return CostController.list_cost_catalog(session, texto or None, descendente=descendente, despues=despues, limite=limite)
+
+## Narrow an already loaded list of costs with a longer search text
+def filtrar_costos(costos, texto):
+    return [c for c in costos if texto in c["ingrediente"].lower()]
 
 ## Class CostosInvView
 ## This class creates a view for managing costs and ingredients.
@@ -59,12 +70,12 @@ class CostosAdminView(ctk.CTkFrame):
 
         self.search_entry = ctk.CTkEntry(top_search_frame, placeholder_text="Buscar ingrediente", width=500, height=30, fg_color="#dcd1cd", border_color="#b8191a", border_width=1, text_color="#3A3A3A", placeholder_text_color="#3A3A3A", font=self.fuente_small)
         self.search_entry.pack(side="left", padx=(0, 80))
-        self.search_entry.bind("<KeyRelease>", lambda event: self.actualizar_cards())
+        self.search_entry.bind("<KeyRelease>", lambda event: self.busqueda.schedule(self.search_entry.get(), **self.filtros_actuales()))
 
         self.sort_option = ctk.CTkOptionMenu(top_search_frame, values=["Menor precio", "Mayor precio"], fg_color="#dcd1cd", button_color="#b8191a", button_hover_color="#991416", text_color="#3A3A3A", dropdown_fg_color="#dcd1cd", dropdown_text_color="#3A3A3A", font=self.fuente_small, dropdown_font=self.fuente_small)
         self.sort_option.set("Menor precio")
         self.sort_option.pack(side="left")
-        self.sort_option.configure(command=self.actualizar_cards)
+        self.sort_option.configure(command=lambda choice: self.cargar_costos())
 
         btn_agregar = ctk.CTkButton(top_frame, image=self.img_add, text="Agregar nuevo proveedor", font=self.fuente_button, fg_color="#b8191a", hover_color="#991416", corner_radius=50, compound="left", command=self.mostrar_agregar_proveedor)
         btn_agregar.pack(side="right")
@@ -79,69 +90,84 @@ class CostosAdminView(ctk.CTkFrame):
 
         encabezado.grid_columnconfigure((1, 2, 3, 4, 5), weight=1)
 
-        self.costos_scroll_frame = ctk.CTkScrollableFrame(self.contenedor, fg_color="#dcd1cd", corner_radius=0)
+        self.costos_scroll_frame = VirtualList(
+            self.contenedor, self.crear_card_costo, self.llenar_card_costo,
+            altura_fila=50, mensaje_vacio="No se encontraron costos", fuente=self.fuente_card,
+            on_end_reached=lambda: self.busqueda.load_more()
+        )
         self.costos_scroll_frame.pack(fill="both", expand=True, padx=20, pady=10)
 
+        self.costos = []
+        self.busqueda = DebouncedSearch(
+            self.costos_scroll_frame, "costos.busqueda", buscar_costos,
+            on_results=self.mostrar_costos,
+            local_filter=filtrar_costos,
+            on_loading=lambda: self.costos_scroll_frame.mostrar_mensaje("Cargando..."),
+            on_error=lambda e: self.costos_scroll_frame.mostrar_mensaje(f"Error al cargar costos\n{e}", "#b8191a"),
+            page_size=PAGE_SIZE,
+            on_more=self.agregar_costos
+        )
         self.cargar_costos()
     ## Update method
     def actualizar_cards(self, *args):
-        self.cargar_costos()
+        self.busqueda.refresh(self.search_entry.get(), **self.filtros_actuales())
 
     ## Load costs
     def cargar_costos(self):
-        for widget in self.costos_scroll_frame.winfo_children():
-            widget.destroy()
-
-        costos = CostController.get_all_costs(self.session)
-
-        search_text = self.search_entry.get().strip().lower()
-        if search_text:
-            costos = CostController.search_costs(self.session, search_text)
+        self.busqueda.search_now(self.search_entry.get(), **self.filtros_actuales())
+
+    ## Filters of the search besides the text: the price order is applied by the query
+    def filtros_actuales(self):
+        return {"descendente": self.sort_option.get() != "Menor precio"}
+
+    ## Render the costs returned by the search, already sorted by the selected option
+    def mostrar_costos(self, costos):
+        self.costos = costos
+        self.costos_scroll_frame.set_rows(costos)
+
+    ## Render the next page of costs, loaded while scrolling
+    def agregar_costos(self, costos):
+        self.costos = list(self.costos) + costos
+        self.costos_scroll_frame.append_rows(costos)
+    ## Function to create an empty cost card, filled and recycled by llenar_card_costo
+    def crear_card_costo(self, parent):
+        card = ctk.CTkFrame(parent, fg_color="white", corner_radius=12)
+
+        card.proveedor_label = ctk.CTkLabel(card, text="", text_color="black", font=self.fuente_card, anchor="w")
+        card.proveedor_label.grid(row=0, column=1, padx=20)
+        card.ingrediente_label = ctk.CTkLabel(card, text="", text_color="black", font=self.fuente_card, anchor="w")
+        card.ingrediente_label.grid(row=0, column=2, padx=20)
+        card.unidad_label = ctk.CTkLabel(card, text="", text_color="black", font=self.fuente_card, anchor="w")
+        card.unidad_label.grid(row=0, column=3, padx=20)
+        card.precio_label = ctk.CTkLabel(card, text="", text_color="black", font=self.fuente_card, anchor="w")
+        card.precio_label.grid(row=0, column=4, padx=20)
+
+        card.btn_editar = ctk.CTkButton(card, image=self.img_pen, text="", width=30, height=40, fg_color="white", hover_color="#E8E8E8", corner_radius=5)
+        card.btn_editar.grid(row=0, column=6, padx=10)
+
+        card.btn_eliminar = ctk.CTkButton(card, image=self.img_bote, text="", width=28, height=35, fg_color="white", hover_color="#E8E8E8", corner_radius=5)
+        card.btn_eliminar.grid(row=0, column=7, padx=(0, 10))
 
-        sort_option = self.sort_option.get()
-        if sort_option == "Menor precio":
-            costos = sorted(costos, key=lambda x: x.precio)
-        else:
-            costos = sorted(costos, key=lambda x: x.precio, reverse=True)
-
-        for costo in costos:
-            self.cursor.execute("SELECT nombre FROM Proveedores WHERE id_proveedor = %s", (costo.id_proveedor,))
-            resultado = self.cursor.fetchone()
-            nombre_proveedor = resultado[0] if resultado else "Desconocido"
-
-            self.cursor.execute("SELECT unidad_medida FROM Ingredientes WHERE nombre = %s LIMIT 1", (costo.nombre_ingrediente,))
-            unidad_result = self.cursor.fetchone()
-            unidad = unidad_result[0] if unidad_result else "PZA"
-
-            self.crear_card_costo(nombre_proveedor, costo.nombre_ingrediente, unidad, costo.precio)
-    ## Function to create a cost card
-    def crear_card_costo(self, proveedor, ingrediente, unidad, precio):
-        card = ctk.CTkFrame(self.costos_scroll_frame, fg_color="white", corner_radius=12)
-        card.pack(fill="x", pady=8, padx=25)
-        
-        ctk.CTkLabel(card, text=proveedor, text_color="black", font=self.fuente_card, anchor="w").grid(row=0, column=1, padx=20)
-        ctk.CTkLabel(card, text=ingrediente, text_color="black", font=self.fuente_card, anchor="w").grid(row=0, column=2, padx=20)
-        ctk.CTkLabel(card, text=unidad, text_color="black", font=self.fuente_card, anchor="w").grid(row=0, column=3, padx=20)
-        ctk.CTkLabel(card, text=f"${float(precio):.2f}", text_color="black", font=self.fuente_card, anchor="w").grid(row=0, column=4, padx=20)
-
-
-        self.cursor.execute("SELECT id_proveedor FROM Proveedores WHERE nombre = %s", (proveedor,))
-        proveedor_result = self.cursor.fetchone()
-        proveedor_id = proveedor_result[0] if proveedor_result else None
-
-        btn_editar = ctk.CTkButton(card, image=self.img_pen, text="", width=30, height=40, fg_color="white", hover_color="#E8E8E8", corner_radius=5, command=lambda pid=proveedor_id, pname=proveedor: self.editar_proveedor(pid, pname))
-        btn_editar.grid(row=0, column=6, padx=10)
+        card.grid_columnconfigure((1, 2, 3, 4, 5), weight=1)
+        return card
+    ## Function to fill a cost card with the data of a cost
+    def llenar_card_costo(self, card, costo, index):
+        proveedor = costo["proveedor"]
+        proveedor_id = costo["id_proveedor"]
 
-        btn_eliminar = ctk.CTkButton(card, image=self.img_bote, text="", width=28, height=35, fg_color="white", hover_color="#E8E8E8", corner_radius=5, command=lambda pid=proveedor_id, pname=proveedor, w=card: self.confirmar_eliminacion(pid, pname, w))
-        btn_eliminar.grid(row=0, column=7, padx=(0, 10))
+        card.proveedor_label.configure(text=proveedor)
+        card.ingrediente_label.configure(text=costo["ingrediente"])
+        card.unidad_label.configure(text=costo["unidad"])
+        card.precio_label.configure(text=f"${float(costo['precio']):.2f}")
 
-        card.grid_columnconfigure((1, 2, 3, 4, 5), weight=1)
+        card.btn_editar.configure(command=lambda: self.editar_proveedor(proveedor_id, proveedor))
+        card.btn_eliminar.configure(command=lambda: self.confirmar_eliminacion(proveedor_id, proveedor))
 
     ## Function to edit a provider
     def editar_proveedor(self, proveedor_id, nombre_proveedor):
         print(f"Editar proveedor: {nombre_proveedor} (ID: {proveedor_id})")
     ## Function to confirm deletion of a provider
-    def confirmar_eliminacion(self, proveedor_id, proveedor_nombre, card_widget):
+    def confirmar_eliminacion(self, proveedor_id, proveedor_nombre):
         ventana = ctk.CTkToplevel(self)
         ventana.title("Confirmar eliminación")
         ventana.geometry("400x200")
@@ -162,15 +188,16 @@ class CostosAdminView(ctk.CTkFrame):
         botones.pack(pady=20)
 
         ctk.CTkButton(botones, text="Cancelar", font=self.fuente_button, fg_color="#a0a0a0", hover_color="#8c8c8c", width=100, command=ventana.destroy).pack(side="left", padx=10)
-        ctk.CTkButton(botones, text="Eliminar", font=self.fuente_button, fg_color="#d9534f", hover_color="#b52a25", width=100, command=lambda: self.eliminar_proveedor_confirmado(proveedor_id, proveedor_nombre, card_widget, ventana)).pack(side="left", padx=10)
+        ctk.CTkButton(botones, text="Eliminar", font=self.fuente_button, fg_color="#d9534f", hover_color="#b52a25", width=100, command=lambda: self.eliminar_proveedor_confirmado(proveedor_id, proveedor_nombre, ventana)).pack(side="left", padx=10)
     ## Function to confirm deletion of a provider
-    def eliminar_proveedor_confirmado(self, proveedor_id, proveedor_nombre, card_widget, ventana):
+    def eliminar_proveedor_confirmado(self, proveedor_id, proveedor_nombre, ventana):
         ventana.destroy()
         try:
             self.cursor.execute("DELETE FROM Costos WHERE id_proveedor = %s", (proveedor_id,))
             self.cursor.execute("DELETE FROM Proveedores WHERE id_proveedor = %s", (proveedor_id,))
             self.conn.commit()
-            card_widget.destroy()
+            self.costos_scroll_frame.remove_where(lambda c: c["id_proveedor"] == proveedor_id)
+            self.actualizar_cards()
             self.mostrar_mensaje_personalizado("Eliminado", f"Proveedor '{proveedor_nombre}' eliminado correctamente.", "#b8191a")
         except Exception as e:
             self.mostrar_mensaje_personalizado("Error", f"No se pudo eliminar el proveedor.\n\n{e}", "#d9534f")
@@ -89,28 +89,12 @@ class CostosInvView(ctk.CTkFrame):
         for widget in self.costos_scroll_frame.winfo_children():
             widget.destroy()
 
-        costos = CostController.get_all_costs(self.session)
-
         search_text = self.search_entry.get().strip().lower()
-        if search_text:
-            costos = CostController.search_costs(self.session, search_text)
-
-        sort_option = self.sort_option.get()
-        if sort_option == "Menor precio":
-            costos = sorted(costos, key=lambda x: x.precio)
-        else:
-            costos = sorted(costos, key=lambda x: x.precio, reverse=True)
+        descendente = self.sort_option.get() != "Menor precio"
+        costos = CostController.list_cost_catalog(self.session, search_text or None, descendente=descendente)
 
         for costo in costos:
-            self.cursor.execute("SELECT nombre FROM Proveedores WHERE id_proveedor = %s", (costo.id_proveedor,))
-            resultado = self.cursor.fetchone()
-            nombre_proveedor = resultado[0] if resultado else "Desconocido"
-
-            self.cursor.execute("SELECT unidad_medida FROM Ingredientes WHERE nombre = %s LIMIT 1", (costo.nombre_ingrediente,))
-            unidad_result = self.cursor.fetchone()
-            unidad = unidad_result[0] if unidad_result else "PZA"
-
-            self.crear_card_costo(nombre_proveedor, costo.nombre_ingrediente, unidad, costo.precio)
+            self.crear_card_costo(costo["proveedor"], costo["ingrediente"], costo["unidad"], costo["precio"])
     ## Function to create a card for the cost
     def crear_card_costo(self, proveedor, ingrediente, unidad, precio):
         card = ctk.CTkFrame(self.costos_scroll_frame, fg_color="white", corner_radius=12)
@@ -121,11 +105,6 @@ class CostosInvView(ctk.CTkFrame):
         ctk.CTkLabel(card, text=unidad, text_color="black", font=self.fuente_card, anchor="w").grid(row=0, column=3, padx=20)
         ctk.CTkLabel(card, text=f"${float(precio):.2f}", text_color="black", font=self.fuente_card, anchor="w").grid(row=0, column=4, padx=20)
 
-
-        self.cursor.execute("SELECT id_proveedor FROM Proveedores WHERE nombre = %s", (proveedor,))
-        proveedor_result = self.cursor.fetchone()
-        proveedor_id = proveedor_result[0] if proveedor_result else None
-
         card.grid_columnconfigure((1, 2, 3, 4, 5), weight=1)
 
     ## Function to edited the provider
@@ -0,0 +1,241 @@
+## @file importer.py
+## @brief Streaming bulk import of supplier price lists (xlsx, csv, tsv or text pasted from a spreadsheet).
+## @details The list is read in chunks of CHUNK_SIZE rows. Each chunk is validated and its prices normalized with
+## vectorized pandas operations, then inserted with a single executemany. All the chunks go into one transaction:
+## either the whole list is loaded or nothing is. Invalid rows don't abort the import, they are collected in the
+## report with their line number and the reason they were rejected.
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Costs.model import Costos
+
+## @brief Rows read, validated and inserted at a time
+CHUNK_SIZE = 2000
+
+## @brief Largest price that fits in Costos.precio, DECIMAL(10, 2)
+PRECIO_MAXIMO = 99999999.99
+
+## @brief Longest ingredient name that fits in Costos.nombre_ingrediente
+NOMBRE_MAXIMO = 100
+
+## @brief Accepted header names for each column of the price list
+ALIAS_COLUMNAS = {
+    "nombre": "nombre", "descripcion": "nombre", "descripción": "nombre", "producto": "nombre",
+    "ingrediente": "nombre", "descripcion del producto": "nombre", "descripción del producto": "nombre",
+    "unidad": "unidad", "unidad de medida": "unidad",
+    "precio": "precio", "costo": "precio", "precio unitario": "precio",
+}
+
+## @brief Prefix of the placeholder that keeps the place of a line with too many fields in its chunk
+LINEA_INVALIDA = "\x00linea_invalida:"
+
+## @brief Extensions of the files that can be imported and their format
+FORMATOS = {".xlsx": "xlsx", ".xlsm": "xlsx", ".csv": "csv", ".tsv": "tsv", ".txt": "tsv"}
+
+
+## @brief Result of an import: how many rows were read and inserted and why the rest were rejected
+class ImportReport:
+    def __init__(self) -> None:
+        self.leidas = 0
+        self.insertadas = 0
+        ## (line, reason, original content) of every rejected row
+        self.rechazos = []
+
+    @property
+    def rechazadas(self) -> int:
+        return len(self.rechazos)
+
+    ## @brief Text for the user with the totals and the first rejected rows
+    def resumen(self, max_rechazos: int = 10) -> str:
+        lineas = [f"Productos importados: {self.insertadas}", f"Filas rechazadas: {self.rechazadas}"]
+        for fila, motivo, contenido in self.rechazos[:max_rechazos]:
+            lineas.append(f"  Fila {fila}: {motivo} ({contenido})")
+        if self.rechazadas > max_rechazos:
+            lineas.append(f"  ... y {self.rechazadas - max_rechazos} más")
+        return "\n".join(lineas)
+
+    def __repr__(self) -> str:
+        return f"ImportReport(leidas={self.leidas}, insertadas={self.insertadas}, rechazadas={self.rechazadas})"
+
+
+## @brief Format of a price list file from its extension
+## @exception ValueError If the extension is not supported
+def detectar_formato(ruta) -> str:
+    formato = FORMATOS.get(Path(ruta).suffix.lower())
+    if formato is None:
+        raise ValueError(f"Formato de archivo no soportado: {Path(ruta).suffix}")
+    return formato
+
+
+## @brief Read a price list in chunks
+## @param origen Path of the file, or a file-like object (io.StringIO with the pasted text)
+## @param formato "xlsx", "csv" or "tsv"; detected from the extension when origen is a path
+## @param rechazos List that receives the (line, reason, content) of the csv/tsv lines with more fields than the
+## first one; they are left out of the chunks as blank rows so the line numbers of the rest don't shift
+## @return Generator of (chunk, line) where chunk has the columns nombre, precio (and unidad when present),
+## as text, and line is the line number of the first row of the chunk in the source
+def leer_lista_precios(origen, formato: str = None, chunksize: int = CHUNK_SIZE, rechazos: list = None):
+    if formato is None:
+        formato = detectar_formato(origen)
+
+    invalidas = []
+    if formato == "xlsx":
+        bloques = _bloques_xlsx(origen, chunksize)
+    elif formato in ("csv", "tsv"):
+        ## The parser drops a line the callable returns a shorter list for; a placeholder keeps its row instead
+        def linea_invalida(campos):
+            invalidas.append(campos)
+            return [f"{LINEA_INVALIDA}{len(invalidas) - 1}"]
+
+        bloques = pd.read_csv(origen, sep="," if formato == "csv" else "\t", header=None, dtype=str,
+                              keep_default_na=False, skip_blank_lines=False, chunksize=chunksize,
+                              encoding_errors="replace", on_bad_lines=linea_invalida, engine="python")
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    columnas = None
+    linea = 1
+    for bloque in bloques:
+        bloque = bloque.reset_index(drop=True)
+        primera = linea
+        linea += len(bloque)
+        if invalidas:
+            marcadas = bloque[0].fillna("").astype(str).str.startswith(LINEA_INVALIDA)
+            for i in bloque.index[marcadas]:
+                campos = invalidas[int(bloque.at[i, 0][len(LINEA_INVALIDA):])]
+                if rechazos is not None:
+                    rechazos.append((primera + int(i), f"Tiene {len(campos)} columnas, se esperaban {bloque.shape[1]}",
+                                     "\t".join(campos)))
+            bloque.loc[marcadas] = ""
+        if columnas is None:
+            columnas, con_encabezado = _columnas(bloque)
+            if con_encabezado:
+                bloque = bloque.iloc[1:]
+                primera += 1
+        if bloque.empty:
+            continue
+        bloque = bloque.iloc[:, :len(columnas)]
+        bloque.columns = columnas[:bloque.shape[1]]
+        yield bloque[[c for c in columnas if c is not None and c in bloque.columns]].reset_index(drop=True), primera
+
+
+## @brief Rows of the first sheet of a workbook in chunks, without loading the whole workbook
+def _bloques_xlsx(ruta, chunksize: int):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = []
+        for fila in libro.worksheets[0].iter_rows(values_only=True):
+            filas.append(["" if valor is None else str(valor) for valor in fila])
+            if len(filas) == chunksize:
+                yield pd.DataFrame(filas, dtype=str)
+                filas = []
+        if filas:
+            yield pd.DataFrame(filas, dtype=str)
+    finally:
+        libro.close()
+
+
+## @brief Names of the columns of the list: from its header when the first row is one, by position otherwise
+## @return (columns, whether the first row is a header); unknown columns are named None
+def _columnas(bloque) -> tuple:
+    encabezado = [ALIAS_COLUMNAS.get(str(valor).strip().lower()) for valor in bloque.iloc[0]]
+    if "nombre" in encabezado and "precio" in encabezado:
+        return encabezado, True
+
+    if bloque.shape[1] < 2:
+        raise ValueError("La lista de precios debe tener al menos las columnas de producto y precio")
+    if bloque.shape[1] == 2:
+        return ["nombre", "precio"], False
+    return ["nombre", "unidad", "precio"], False
+
+
+## @brief Parse prices written as text: currency symbols, thousands separators and decimal comma
+## @return Series of floats rounded to cents, NaN where the text is not a number
+def normalizar_precios(textos: pd.Series) -> pd.Series:
+    limpios = textos.fillna("").astype(str).str.replace(r"[^\d.,\-]", "", regex=True)
+    con_coma = limpios.str.contains(",", regex=False)
+    con_punto = limpios.str.contains(".", regex=False)
+    coma_decimal = con_coma & (~con_punto | (limpios.str.rfind(",") > limpios.str.rfind(".")))
+
+    limpios = limpios.where(coma_decimal, limpios.str.replace(",", "", regex=False))
+    limpios = limpios.where(~coma_decimal, limpios.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(limpios, errors="coerce").round(2)
+
+
+## @brief Validate a chunk of the list
+## @param bloque Chunk returned by leer_lista_precios
+## @param primera Line number of the first row of the chunk
+## @return (valid rows as a DataFrame with nombre, precio and unidad when present, list of (line, reason, content) of the rejected rows)
+def validar_bloque(bloque, primera: int) -> tuple:
+    nombres = bloque["nombre"].fillna("").astype(str).str.strip()
+    textos = bloque["precio"].fillna("").astype(str).str.strip()
+    precios = normalizar_precios(textos)
+
+    vacias = (nombres == "") & (textos == "")
+    motivos = pd.Series(np.select(
+        [nombres == "", nombres.str.len() > NOMBRE_MAXIMO, textos == "", precios.isna(),
+         (precios <= 0) | (precios > PRECIO_MAXIMO)],
+        ["Producto sin nombre", f"Nombre de más de {NOMBRE_MAXIMO} caracteres", "Precio vacío",
+         "Precio no numérico", "Precio fuera de rango"],
+        default=""
+    ), index=bloque.index)
+
+    rechazadas = (motivos != "") & ~vacias
+    rechazos = [
+        (primera + int(i), motivos[i], "\t".join(str(v) for v in bloque.loc[i].tolist()))
+        for i in bloque.index[rechazadas]
+    ]
+
+    validas = motivos == ""
+    resultado = pd.DataFrame({"nombre": nombres[validas], "precio": precios[validas]})
+    if "unidad" in bloque.columns:
+        resultado.insert(1, "unidad", bloque["unidad"][validas].fillna("").astype(str).str.strip())
+    return resultado, rechazos
+
+
+## @brief Import a price list for a provider
+## @param session The database session.
+## @param id_proveedor Provider the costs belong to.
+## @param origen Path of the file, or a file-like object with the pasted text.
+## @param formato "xlsx", "csv" or "tsv"; detected from the extension when origen is a path.
+## @param on_progress on_progress(report) called after every chunk.
+## @param commit Commit at the end; False lets the caller add more work to the same transaction.
+## @return The ImportReport of the import.
+## @details If the import fails halfway the transaction is rolled back and none of the rows are inserted.
+def importar_lista_precios(session: Session, id_proveedor: int, origen, formato: str = None,
+                           chunksize: int = CHUNK_SIZE, on_progress=None, commit: bool = True) -> ImportReport:
+    reporte = ImportReport()
+    try:
+        for bloque, primera in leer_lista_precios(origen, formato, chunksize, rechazos=reporte.rechazos):
+            validas, rechazos = validar_bloque(bloque, primera)
+            if not validas.empty:
+                filas = [
+                    {"id_proveedor": id_proveedor, "nombre_ingrediente": nombre, "precio": precio}
+                    for nombre, precio in zip(validas["nombre"].tolist(), validas["precio"].tolist())
+                ]
+                session.execute(insert(Costos), filas)
+
+            reporte.leidas += len(bloque)
+            reporte.insertadas += len(validas)
+            reporte.rechazos.extend(rechazos)
+            if on_progress is not None:
+                on_progress(reporte)
+
+        ## The lines the parser rejects are reported as they are read, before the rest of their chunk
+        reporte.rechazos.sort(key=lambda rechazo: rechazo[0])
+        if commit:
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return reporte
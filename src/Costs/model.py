@@ -1,15 +1,17 @@
 from typing import Self
-from sqlalchemy import Column, Integer, String, DECIMAL, ForeignKey
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, Integer, String, DECIMAL, ForeignKey, Index
+from src.database.connector import Base
 from src.Providers.model import Proveedor
 
-Base = declarative_base()
-
 ##@brief Cost model class
 ##@details This class is used to represent a cost in the database
 class Costos(Base):
 
     __tablename__ = "Costos"
+    ## Lookups by ingredient name (fetch_costs_by_name, the supplier plans), per provider
+    __table_args__ = (
+        Index("ix_costos_nombre_ingrediente_proveedor", "nombre_ingrediente", "id_proveedor"),
+    )
 
     id_costo = Column(Integer, primary_key=True)
     id_proveedor = Column(Integer, ForeignKey('Proveedores.id_proveedor'), nullable=False)
@@ -5,6 +5,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 from sqlalchemy.orm import Session
 from src.Ingredients.model import Ingrediente
+from src.Projections import totals
 
 ## @brief Class responsible for managing ingredients in the database.
 class IngredienteController:
@@ -44,6 +45,10 @@ class IngredienteController:
         if ingrediente is None:
             return None
 
+        ## The totals of the projections are keyed by the name and unit of the ingredient
+        if (nombre and nombre != ingrediente.nombre) or (unidad_medida and unidad_medida != ingrediente.unidad_medida):
+            totals.mark_stale(session, ingredientes=[id_ingrediente])
+
         if nombre:
             ingrediente.nombre = nombre
         if clasificacion:
@@ -61,6 +66,7 @@ class IngredienteController:
         if ingrediente is None:
             return False
         
+        totals.mark_stale(session, ingredientes=[id_ingrediente])
         session.delete(ingrediente)
         session.commit()
         return True
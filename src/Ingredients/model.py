@@ -4,13 +4,17 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from typing import Self
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from sqlalchemy.orm import relationship
 from src.database.connector import Base
 
 ##@brief Base class for all models, this class is used to represent an ingredient in the database
 class Ingrediente(Base):
     __tablename__ = "ingredientes"
+    ## An ingredient is identified by its name and unit, see get_ingrediente_by_name_and_unit
+    __table_args__ = (
+        Index("ux_ingredientes_nombre_unidad", "nombre", "unidad_medida", unique=True),
+    )
 
     id_ingrediente = Column(Integer, primary_key=True, autoincrement=True)
     nombre = Column(String(100), nullable=False)
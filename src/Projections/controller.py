@@ -1,14 +1,16 @@
 import os
 import sys
-from pdf_reports import pug_to_html, write_report
-from plotly import graph_objects as go
 from sqlalchemy import func
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from src.Projections.model import Proyeccion, ProyeccionReceta
-from src.Recipes.model import Receta, Receta_Ingredientes
-from src.Ingredients.model import Ingrediente
+from src.Recipes.model import Receta
+from src.Projections.snapshot import ProjectionSnapshot
+from src.Projections import totals
+from src.database.pagination import Page, paginate
+from src.Projections.engine import ProjectionEngine
+from src.Projections.reports import render_projection_report, render_projection_reports, nueva_carpeta_reporte
 from datetime import date
 
 ## Class for managing projections in the database.
@@ -81,6 +83,7 @@ class ProyeccionController:
         ##Update the projection
         proyeccion.nombre = nombre
         proyeccion.comensales = comensales
+        proyeccion.totales_obsoletos = True
         
         ##Delete existing recipe associations
         session.query(ProyeccionReceta).filter_by(id_proyeccion=id_proyeccion).delete()
@@ -98,56 +101,55 @@ class ProyeccionController:
         
         return proyeccion
     
+    ## Build the {nombre: {cantidad, unidad}} totals from (nombre, unidad, cantidad) rows.
+    ## @see src.Projections.totals.totals_by_name
+    @staticmethod
+    def _totals_by_name(rows) -> dict:
+        return totals.totals_by_name(rows)
+
     ## Calculate the total ingredients needed for a projection.
+    ## Each recipe contributes cantidad * comensales / comensales_base * porcentaje / 100.
+    ## With in_database=True the whole projection is aggregated by the database in a single query,
+    ## otherwise it is computed in memory from a ProjectionSnapshot.
     @staticmethod
-    def calculate_total_ingredients(session, id_proyeccion):
-        ##Validate that the projection exists.
-        proyeccion = session.get(Proyeccion, id_proyeccion)
-        if not proyeccion:
+    def calculate_total_ingredients(session, id_proyeccion, in_database: bool = True):
+        if in_database:
+            return ProyeccionController._calculate_total_ingredients_sql(session, id_proyeccion)
+
+        return ProyeccionController._totals_by_name(ProjectionSnapshot.load(session, id_proyeccion).totales())
+
+    ## Aggregate the ingredients of a projection in the database: one join of
+    ## Proyeccion_Recetas, proyecciones, recetas, receta_ingredientes and ingredientes grouped by ingredient and unit.
+    @staticmethod
+    def _calculate_total_ingredients_sql(session, id_proyeccion):
+        rows = totals.compute_rows(session, id_proyeccion)
+
+        ##Only an empty result needs a second query, to tell an empty projection from a missing one
+        if not rows and session.get(Proyeccion, id_proyeccion) is None:
             raise ValueError(f"No se encontro la proyeccion con ID {id_proyeccion}")
-        
-        ##Get the associated recipes
-        proyeccion_recetas = session.query(ProyeccionReceta).filter_by(id_proyeccion=id_proyeccion).all()
-        recetas_count = len(proyeccion_recetas)
-        
-        ##If no recipes are associated, return empty dictionary
-        if recetas_count == 0:
-            return {}
-        
-        porcentaje_por_receta = 100 / recetas_count
-        
-        ##Initialize a dictionary to store the total ingredients
-        total_ingredientes = {}
-        
-        ##Iterate through the recipes and calculate the total ingredients needed
-        for pr in proyeccion_recetas:
-            receta = session.get(Receta, pr.id_receta)
-            if not receta:
-                continue
-                
-            factor = (proyeccion.comensales / receta.comensales_base) * (porcentaje_por_receta / 100)
-            
-            ##Get recipe ingredients using proper query
-            receta_ingredientes = session.query(Receta_Ingredientes).filter_by(id_receta=receta.id_receta).all()
-            
-            for ri in receta_ingredientes:
-                ingrediente = session.get(Ingrediente, ri.id_ingrediente)
-                if not ingrediente:
-                    continue
-                
-                nombre = ingrediente.nombre
-                cantidad = ri.cantidad * factor
-                unidad = ingrediente.unidad_medida
-                
-                if nombre in total_ingredientes:
-                    total_ingredientes[nombre]["cantidad"] += cantidad
-                else:
-                    total_ingredientes[nombre] = {
-                        "cantidad": cantidad,
-                        "unidad": unidad
-                    }
-        
-        return total_ingredientes
+
+        return ProyeccionController._totals_by_name(rows)
+
+    ## What-if sweep: totals of a set of recipes for every combination of percentage splits and diner counts.
+    ## @details The quantities of the recipes are loaded once (one query); every scenario is computed in memory.
+    ## To recompute live while the user edits, keep the engine of load_sweep and call its sweep methods.
+    ## @param porcentajes List of {id_receta: porcentaje} splits, see ProjectionEngine.percentage_splits
+    ## @param comensales List of diner counts
+    ## @return One {"porcentajes", "comensales", "totales"} dict per scenario, all the diner counts of a split together
+    @staticmethod
+    def sweep_projection(session, recetas_ids, porcentajes, comensales) -> list[dict]:
+        return ProyeccionController.load_sweep(session, recetas_ids).sweep_dicts(porcentajes, comensales)
+
+    ## Load the ProjectionEngine of a set of recipes for sweeps, with a single query.
+    @staticmethod
+    def load_sweep(session, recetas_ids) -> ProjectionEngine:
+        return ProjectionEngine.load(session, list(recetas_ids))
+
+    ## Return the total ingredients of a projection from the materialized proyeccion_ingredientes table.
+    ## The totals are recomputed (and stored again) only when an input changed since they were stored.
+    @staticmethod
+    def get_total_ingredients(session, id_proyeccion):
+        return totals.get_totals(session, id_proyeccion)
     
     ## @brief Deactivate a projection (send it to the trash can).
     @staticmethod
@@ -175,17 +177,19 @@ class ProyeccionController:
         else:
             raise ValueError(f"No se encontro la proyeccion con ID {id_proyeccion}")
     
-    ## List all active projections including related recipes.
+    ## Build the dict payload of a list of projections, loading their recipes in one extra query.
     @staticmethod
-    def list_all_projections(session) -> list[dict]:
-        proyecciones = session.query(Proyeccion).filter(Proyeccion.estatus == True).all()
-        listado = []
-
-        for proyeccion in proyecciones:
-            recetas = []
-            for pr in proyeccion.proyeccion_recetas:
-                receta = session.query(Receta).filter(Receta.id_receta == pr.id_receta).first()
-                recetas.append({
+    def _projections_to_dicts(session, proyecciones) -> list[dict]:
+        ids = [proyeccion.id_proyeccion for proyeccion in proyecciones]
+        enlaces = {}
+        if ids:
+            filas = session.query(ProyeccionReceta, Receta)\
+                .join(Receta, Receta.id_receta == ProyeccionReceta.id_receta)\
+                .filter(ProyeccionReceta.id_proyeccion.in_(ids))\
+                .order_by(ProyeccionReceta.id_proyeccion, ProyeccionReceta.id_receta)\
+                .all()
+            for pr, receta in filas:
+                enlaces.setdefault(pr.id_proyeccion, []).append({
                     "id_receta": receta.id_receta,
                     "nombre_receta": receta.nombre_receta,
                     "clasificacion": receta.clasificacion,
@@ -193,22 +197,37 @@ class ProyeccionController:
                     "comensales_base": receta.comensales_base,
                     "porcentaje": pr.porcentaje
                 })
-            
-            proyeccion_data = {
+
+        return [{
             "id_proyeccion": proyeccion.id_proyeccion,
             "nombre": proyeccion.nombre,
             "periodo": proyeccion.periodo,
             "comensales": proyeccion.comensales,
             "fecha": proyeccion.fecha,
-            "recetas": recetas
-            }
-            listado.append(proyeccion_data)
+            "recetas": enlaces.get(proyeccion.id_proyeccion, [])
+        } for proyeccion in proyecciones]
+
+    ## One keyset page of a query of projections, sorted by date, see src.database.pagination.
+    @staticmethod
+    def _projections_page(session, query, despues, limite, contar) -> Page:
+        pagina = paginate(session, query, [(Proyeccion.fecha, False), (Proyeccion.id_proyeccion, False)],
+                          lambda proyeccion: (proyeccion.fecha, proyeccion.id_proyeccion),
+                          despues=despues, limite=limite, contar=contar)
+        return pagina.con_items(ProyeccionController._projections_to_dicts(session, pagina))
 
-        return listado
+    ## List all active projections including related recipes.
+    ## @param despues Cursor of the last projection already shown (Page.cursor of the previous page)
+    ## @param limite Number of projections of the page, None for all of them
+    ## @param contar Also count every active projection (Page.total)
+    @staticmethod
+    def list_all_projections(session, despues=None, limite=None, contar=False) -> Page:
+        query = session.query(Proyeccion).filter(Proyeccion.estatus == True)
+        return ProyeccionController._projections_page(session, query, despues, limite, contar)
     
     ## Return list of projections according to search filters
+    ## @details Same pagination parameters as list_all_projections.
     @staticmethod
-    def search_projections(session, nombre=None, fecha:date=None) -> list[dict]:
+    def search_projections(session, nombre=None, fecha:date=None, despues=None, limite=None, contar=False) -> Page:
         query = session.query(Proyeccion).filter(Proyeccion.estatus == True)
         if nombre:
             nombre = f"%{nombre.lower()}%"
@@ -216,104 +235,64 @@ class ProyeccionController:
         if fecha:
             query = query.filter(Proyeccion.fecha == fecha)
 
-        proyecciones = query.all()
+        return ProyeccionController._projections_page(session, query, despues, limite, contar)
         
-        listado = []
-
-        for proyeccion in proyecciones:
-            recetas = []
-            for pr in proyeccion.proyeccion_recetas:
-                receta = session.query(Receta).filter(Receta.id_receta == pr.id_receta).first()
-                recetas.append({
-                    "id_receta": receta.id_receta,
-                    "nombre_receta": receta.nombre_receta,
-                    "clasificacion": receta.clasificacion,
-                    "periodo": receta.periodo,
-                    "comensales_base": receta.comensales_base,
-                    "porcentaje": pr.porcentaje
-                })
-            
-            proyeccion_data = {
-            "id_proyeccion": proyeccion.id_proyeccion,
-            "nombre": proyeccion.nombre,
-            "periodo": proyeccion.periodo,
-            "comensales": proyeccion.comensales,
-            "fecha": proyeccion.fecha,
-            "recetas": recetas
-            }
-            listado.append(proyeccion_data)
-
-        return listado
-        
-    ## Generate a report of the projection.
+    ## Load the data of the projection report: recipes with their ingredients, totals and chart data.
+    ## @details The projection is read once as a ProjectionSnapshot (three queries) and everything else is
+    ## derived from it in memory, except the totals of a projection whose materialized totals are fresh, which
+    ## are read from proyeccion_ingredientes (one more query). Nothing is written: stale totals are computed
+    ## from the snapshot and left to totals.refresh_stale, which runs in the background.
+    ## @return Plain picklable data that src.Projections.reports renders without touching the database
     @staticmethod
-    def generate_projection_report(session, id_proyeccion):
-        proyeccion = session.get(Proyeccion, id_proyeccion)
-        if not proyeccion:
-            raise ValueError(f"No se encontro la proyeccion con ID {id_proyeccion}")
-        
-        ##Get the associated recipes
-        proyeccion_recetas = session.query(ProyeccionReceta).filter_by(id_proyeccion=id_proyeccion).all()
-        
-        ##Initialize a list to store the report data
-        report_data = []
-        
-        for pr in proyeccion_recetas:
-            receta = session.get(Receta, pr.id_receta)
-            if not receta:
-                continue
+    def load_report_data(session, id_proyeccion) -> dict:
+        return ProyeccionController.load_reports_data(session, [id_proyeccion])[0]
 
-            ingredientes = session.query(Receta_Ingredientes).filter_by(id_receta=receta.id_receta).all()
-            ingredientes_list = []
-            for ing in ingredientes:
-                ingrediente = session.get(Ingrediente, ing.id_ingrediente)
-                if not ingrediente:
-                    continue
-                
-                ingredientes_list.append({
-                    "nombre": ingrediente.nombre,
-                    "cantidad": ing.cantidad,
-                    "unidad": ingrediente.unidad_medida
-                })
-            
-            report_data.append({
-                "receta": receta.nombre_receta,
-                "ingredientes": ingredientes_list,
-                "porcentaje": pr.porcentaje,
-                "comensales": proyeccion.comensales,
-                "fecha": proyeccion.fecha
-            })
-        
-        ##Calculate total ingredients needed
-        total_ingredientes = ProyeccionController.calculate_total_ingredients(session, id_proyeccion)
+    ## (nombre, unidad, cantidad) totals of each snapshot: stored when fresh, computed in memory when stale
+    @staticmethod
+    def _snapshot_totals(session, snapshots) -> list:
+        almacenados = totals.stored_rows(session, [s.id_proyeccion for s in snapshots if not s.totales_obsoletos])
+        return [
+            snapshot.totales() if snapshot.totales_obsoletos else almacenados.get(snapshot.id_proyeccion, [])
+            for snapshot in snapshots
+        ]
 
+    ## Build the report data of a projection from its snapshot, without queries.
+    ## @param rows Totals of the projection as (nombre, unidad, cantidad) rows, computed from the snapshot if None
+    @staticmethod
+    def report_data_from_snapshot(snapshot: ProjectionSnapshot, rows=None) -> dict:
+        report_data = snapshot.recipe_tables()
         report_data.append({
-            "total_ingredientes": total_ingredientes
+            "total_ingredientes": ProyeccionController._totals_by_name(snapshot.totales() if rows is None else rows)
         })
+        return {
+            "id_proyeccion": snapshot.id_proyeccion,
+            "nombre": snapshot.nombre,
+            "fecha": snapshot.fecha,
+            "report_data": report_data,
+            "pie_chart_data": snapshot.pie_chart_data()
+        }
 
-        # Generate pie chart data for the report
-
-        pie_chart_data = []
-        for pr in proyeccion_recetas:
-            receta = session.get(Receta, pr.id_receta)
-            if not receta:
-                continue
-            
-            pie_chart_data.append({
-                "receta": receta.nombre_receta,
-                "porcentaje": pr.porcentaje
-            })
-        
-        # Generate pie chart using plotly
-        fig = go.Figure(data=[
-            go.Pie(labels=[d["receta"] for d in pie_chart_data], values=[d["porcentaje"] for d in pie_chart_data])
-        ])
-        fig.update_layout(title_text="Distribución de Porcentajes por Receta")
-        fig.write_image("pie_chart.png")
+    ## Generate a report of the projection.
+    ## @details Loads the data and renders it on the calling thread, into a new folder under REPORTS_DIR.
+    ## The views use the report job queue (src.Projections.report_jobs) to render in a worker process instead.
+    ## @return Path of the PDF
+    @staticmethod
+    def generate_projection_report(session, id_proyeccion, carpeta=None):
+        datos = ProyeccionController.load_report_data(session, id_proyeccion)
+        return render_projection_report(datos, carpeta or nueva_carpeta_reporte())
 
-        # Generate the report in pdf format
-        template_path = os.path.join(os.path.dirname(__file__), 'templates', 'report.pug')
+    ## Load the report data of several projections, in the order of ids, with the same queries as one.
+    @staticmethod
+    def load_reports_data(session, ids) -> list[dict]:
+        snapshots = ProjectionSnapshot.load_many(session, ids)
+        return [
+            ProyeccionController.report_data_from_snapshot(snapshot, rows)
+            for snapshot, rows in zip(snapshots, ProyeccionController._snapshot_totals(session, snapshots))
+        ]
 
-        html = pug_to_html(path=template_path, report_data=report_data, title="Reporte de Proyeccion")
-        write_report(html, f'proyeccion_report_{proyeccion.fecha}.pdf')
-        return f'proyeccion_report_{proyeccion.fecha}.pdf'
\ No newline at end of file
+    ## Generate the reports of several projections in one pass of the renderer.
+    ## @return List of (id_proyeccion, path of the PDF or None, exception or None)
+    @staticmethod
+    def generate_projection_reports(session, ids, carpeta=None):
+        lista_datos = ProyeccionController.load_reports_data(session, ids)
+        return render_projection_reports(lista_datos, carpeta or nueva_carpeta_reporte())
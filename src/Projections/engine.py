@@ -0,0 +1,163 @@
+## @file engine.py
+## @brief Vectorized projection engine over a recipe x ingredient matrix.
+## @details The ingredient quantities of a set of recipes are loaded once with a single query and stored
+## in a NumPy matrix normalized per comensales_base (quantity for one diner). The totals of any number of
+## (recipe percentages, comensales) scenarios are then computed with one matrix product.
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Projections.model import ProyeccionReceta, Proyeccion
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+from src.Projections import totals
+
+
+## @brief Recipe x ingredient matrix of per-diner quantities
+class ProjectionEngine:
+
+    ## @brief Build the engine from rows of (id_receta, comensales_base, id_ingrediente, nombre, unidad, cantidad)
+    ## @param recetas_ids Order of the recipe rows of the matrix
+    def __init__(self, recetas_ids: list[int], rows) -> None:
+        self.recetas_ids = list(recetas_ids)
+        self.recetas_index = {id_receta: i for i, id_receta in enumerate(self.recetas_ids)}
+        self.ingredientes = []
+        ingredientes_index = {}
+        entradas = []
+
+        for id_receta, comensales_base, id_ingrediente, nombre, unidad, cantidad in rows:
+            ## A recipe without comensales_base contributes nothing, like RecetaSnapshot.factor
+            if id_receta not in self.recetas_index or not comensales_base:
+                continue
+            if id_ingrediente not in ingredientes_index:
+                ingredientes_index[id_ingrediente] = len(self.ingredientes)
+                self.ingredientes.append((nombre, unidad))
+            entradas.append((self.recetas_index[id_receta], ingredientes_index[id_ingrediente],
+                             float(cantidad) / comensales_base))
+
+        self.matriz = np.zeros((len(self.recetas_ids), len(self.ingredientes)))
+        for fila, columna, cantidad in entradas:
+            self.matriz[fila, columna] += cantidad
+
+    ## @brief Load the matrix of the given recipes in a single query
+    @staticmethod
+    def load(session, recetas_ids: list[int]) -> "ProjectionEngine":
+        rows = []
+        if recetas_ids:
+            rows = session.query(
+                Receta.id_receta,
+                Receta.comensales_base,
+                Ingrediente.id_ingrediente,
+                Ingrediente.nombre,
+                Ingrediente.unidad_medida,
+                Receta_Ingredientes.cantidad
+            ).join(Receta_Ingredientes, Receta_Ingredientes.id_receta == Receta.id_receta)\
+                .join(Ingrediente, Ingrediente.id_ingrediente == Receta_Ingredientes.id_ingrediente)\
+                .filter(Receta.id_receta.in_(recetas_ids))\
+                .order_by(Receta.id_receta, Ingrediente.nombre, Ingrediente.unidad_medida)\
+                .all()
+        return ProjectionEngine(recetas_ids, rows)
+
+    ## @brief Load the matrix of every active recipe
+    @staticmethod
+    def load_active(session) -> "ProjectionEngine":
+        recetas_ids = [r.id_receta for r in session.query(Receta.id_receta).filter(Receta.estatus == True).all()]
+        return ProjectionEngine.load(session, recetas_ids)
+
+    ## @brief Turn {id_receta: porcentaje} dicts into an (S x R) array aligned with the matrix rows
+    def weights(self, porcentajes: list[dict]) -> np.ndarray:
+        pesos = np.zeros((len(porcentajes), len(self.recetas_ids)))
+        for s, escenario in enumerate(porcentajes):
+            for id_receta, porcentaje in escenario.items():
+                if id_receta in self.recetas_index:
+                    pesos[s, self.recetas_index[id_receta]] = porcentaje
+        return pesos
+
+    ## @brief Totals of a batch of scenarios as an (S x I) array
+    ## @param pesos (S x R) array of percentages (0-100) per recipe, or a list of {id_receta: porcentaje}
+    ## @param comensales (S,) array of diners per scenario, or a single number for all of them
+    def evaluate(self, pesos, comensales) -> np.ndarray:
+        if not isinstance(pesos, np.ndarray):
+            pesos = self.weights(pesos)
+        pesos = np.atleast_2d(np.asarray(pesos, dtype=float))
+        comensales = np.broadcast_to(np.asarray(comensales, dtype=float), (pesos.shape[0],))
+        return (pesos * (comensales[:, None] / 100.0)) @ self.matriz
+
+    ## @brief Totals of every combination of a set of percentage splits and a set of diner counts
+    ## @param porcentajes (P x R) array of percentages, or a list of P {id_receta: porcentaje} splits
+    ## @param comensales (C,) diner counts
+    ## @return (P x C x I) array; the totals of a split are computed once and scaled for each diner count
+    def sweep(self, porcentajes, comensales) -> np.ndarray:
+        pesos = porcentajes if isinstance(porcentajes, np.ndarray) else self.weights(porcentajes)
+        pesos = np.atleast_2d(np.asarray(pesos, dtype=float))
+        comensales = np.atleast_1d(np.asarray(comensales, dtype=float))
+        por_comensal = (pesos / 100.0) @ self.matriz
+        return por_comensal[:, None, :] * comensales[None, :, None]
+
+    ## @brief Like sweep, as one {"porcentajes", "comensales", "totales"} dict per scenario, splits first
+    def sweep_dicts(self, porcentajes: list[dict], comensales) -> list[dict]:
+        comensales = np.atleast_1d(comensales).tolist()
+        pesos = self.weights(porcentajes)
+        totales = self.sweep(pesos, comensales).reshape(len(porcentajes) * len(comensales), len(self.ingredientes))
+        dicts = self.to_dicts(totales, np.repeat(pesos, len(comensales), axis=0))
+        return [
+            {"porcentajes": dict(porcentajes[i // len(comensales)]),
+             "comensales": comensales[i % len(comensales)],
+             "totales": totales_escenario}
+            for i, totales_escenario in enumerate(dicts)
+        ]
+
+    ## @brief Every split of 100% among recipes_ids in multiples of paso, as {id_receta: porcentaje} dicts
+    @staticmethod
+    def percentage_splits(recetas_ids: list[int], paso: int = 10) -> list[dict]:
+        recetas_ids = list(recetas_ids)
+        if not recetas_ids or 100 % paso != 0:
+            raise ValueError("Se necesita al menos una receta y un paso que divida 100")
+
+        def repartir(restantes, total):
+            if len(restantes) == 1:
+                yield (total,)
+                return
+            for porcentaje in range(0, total + 1, paso):
+                for resto in repartir(restantes[1:], total - porcentaje):
+                    yield (porcentaje,) + resto
+
+        return [dict(zip(recetas_ids, reparto)) for reparto in repartir(recetas_ids, 100)]
+
+    ## @brief Totals of one scenario in the {nombre: {cantidad, unidad}} shape of calculate_total_ingredients
+    def totals(self, porcentajes: dict, comensales: int) -> dict:
+        pesos = self.weights([porcentajes])
+        return self.to_dicts(self.evaluate(pesos, comensales), pesos)[0]
+
+    ## @brief Convert an (S x I) array of totals into one {nombre: {cantidad, unidad}} dict per scenario
+    ## @param pesos Optional (S x R) weights; when given, only ingredients of the recipes in each scenario are listed
+    def to_dicts(self, totales: np.ndarray, pesos=None) -> list[dict]:
+        totales = np.atleast_2d(totales)
+        if pesos is None:
+            usados = np.broadcast_to(np.any(self.matriz != 0, axis=0), totales.shape)
+        else:
+            if not isinstance(pesos, np.ndarray):
+                pesos = self.weights(pesos)
+            usados = (np.atleast_2d(pesos) != 0).astype(float) @ (self.matriz != 0).astype(float) > 0
+
+        resultado = []
+        for fila, usados_fila in zip(totales, usados):
+            resultado.append(totals.totals_by_name(
+                (nombre, unidad, cantidad)
+                for (nombre, unidad), cantidad, usado in zip(self.ingredientes, fila, usados_fila) if usado
+            ))
+        return resultado
+
+    ## @brief Load the engine and the stored scenario (porcentajes, comensales) of a saved projection
+    @staticmethod
+    def from_projection(session, id_proyeccion: int) -> tuple["ProjectionEngine", dict, int]:
+        proyeccion = session.get(Proyeccion, id_proyeccion)
+        if not proyeccion:
+            raise ValueError(f"No se encontro la proyeccion con ID {id_proyeccion}")
+        porcentajes = {
+            pr.id_receta: float(pr.porcentaje)
+            for pr in session.query(ProyeccionReceta).filter_by(id_proyeccion=id_proyeccion).all()
+        }
+        return ProjectionEngine.load(session, list(porcentajes.keys())), porcentajes, proyeccion.comensales
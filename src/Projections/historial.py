@@ -13,6 +13,17 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 from src.Projections.controller import ProyeccionController
 from src.database.connector import Connector
+from src.database.worker import run_in_background, get_worker
+from src.database.pagination import PAGE_SIZE
+from src.Projections.report_jobs import get_report_queue, TERMINADO, ERROR, CANCELADO
+from src.components.virtual_list import VirtualList
+
+
+##@brief Query a page of the projections of the history, filtered by name and/or date when given
+def consultar_proyecciones(session, nombre=None, fecha=None, despues=None, limite=None):
+    if nombre or fecha:
+        return ProyeccionController.search_projections(session, nombre=nombre, fecha=fecha, despues=despues, limite=limite)
+    return ProyeccionController.list_all_projections(session, despues=despues, limite=limite)
 
 class HistorialAdminView(ctk.CTkFrame):
     ##brief History administration view class for projections
@@ -117,7 +128,27 @@ class HistorialAdminView(ctk.CTkFrame):
 
         self.date_entry.bind("<<DateEntrySelected>>", self.buscar_proyecciones)
 
-        self.scroll_container = ctk.CTkScrollableFrame(self.contenedor, fg_color="#dcd1cd", corner_radius=0)
+        self.btn_reportes_listado = ctk.CTkButton(search_frame, text="Reportes del listado", font=self.fuente_small,
+                                                  fg_color="#b8191a", hover_color="#991416", corner_radius=8,
+                                                  command=self.imprimir_listado)
+        self.btn_reportes_listado.pack(side="right")
+
+        self.estado_reporte_frame = ctk.CTkFrame(self.contenedor, fg_color="transparent")
+        self.estado_reporte_label = ctk.CTkLabel(self.estado_reporte_frame, text="", font=self.fuente_small, text_color="#3A3A3A")
+        self.estado_reporte_label.pack(side="left")
+        self.btn_cancelar_reporte = ctk.CTkButton(self.estado_reporte_frame, text="Cancelar", font=self.fuente_small,
+                                                  width=90, fg_color="#a0a0a0", hover_color="#8c8c8c",
+                                                  command=self.cancelar_reportes)
+        self.btn_cancelar_reporte.pack(side="left", padx=10)
+        self.trabajos_reporte = {}
+
+        self.scroll_container = VirtualList(
+            self.contenedor, self.crear_card_proyeccion, self.llenar_card_proyeccion,
+            altura_de=self.altura_card_proyeccion, mensaje_vacio="No se encontraron proyecciones", fuente=self.fuente_card,
+            on_end_reached=self.cargar_mas_proyecciones
+        )
+        self.filtros = {}
+        self.cursor = None
         self.scroll_container.pack(fill="both", expand=True, padx=20, pady=20)
    
     
@@ -126,18 +157,9 @@ class HistorialAdminView(ctk.CTkFrame):
         self.cargar_proyecciones()
     
     def cargar_proyecciones(self):
-        ##@brief Load projections from the database and display them
-        for widget in self.scroll_container.winfo_children():
-            widget.destroy()
-
+        ##@brief Load projections from the database in the background and display them
         if not self.session:
-            error_label = ctk.CTkLabel(
-                self.scroll_container,
-                text="Error de conexión a la base de datos",
-                font=self.fuente_card,
-                text_color="#b8191a"
-            )
-            error_label.pack(pady=50)
+            self.scroll_container.mostrar_mensaje("Error de conexión a la base de datos", "#b8191a")
             return
 
         search_text = self.search_entry.get().strip()
@@ -150,72 +172,73 @@ class HistorialAdminView(ctk.CTkFrame):
             except ValueError:
                 search_date = None
 
-        try:
-            if search_text or search_date:
-                print(f"Filtrando por texto: '{search_text}' y fecha: {search_date}")
-                proyecciones = ProyeccionController.search_projections(
-                    self.session,
-                    nombre=search_text if search_text else None,
-                    fecha=search_date if search_date else None
-                )
-            else:
-                print("Cargando todas las proyecciones sin filtros")
-                proyecciones = ProyeccionController.list_all_projections(self.session)
+        self.scroll_container.mostrar_mensaje("Cargando...")
+        get_worker().cancel("historial.pagina")
+        self.filtros = {"nombre": search_text if search_text else None, "fecha": search_date if search_date else None}
+        self.cursor = None
+        run_in_background(
+            self.scroll_container, "historial.proyecciones", consultar_proyecciones,
+            limite=PAGE_SIZE, **self.filtros,
+            on_success=self.mostrar_proyecciones,
+            on_error=self.error_carga_proyecciones
+        )
 
-            print(f"Total proyecciones encontradas: {len(proyecciones)}")
+    def mostrar_proyecciones(self, proyecciones):
+        ##@brief Display the first page of projections returned by the background query
+        print(f"Total proyecciones encontradas: {len(proyecciones)}")
+        self.cursor = proyecciones.cursor
+        self.scroll_container.set_rows(proyecciones)
 
-            if proyecciones:
-                for proyeccion in proyecciones:
-                    self.crear_card_proyeccion(proyeccion)
-            else:
-                no_results = ctk.CTkLabel(
-                    self.scroll_container,
-                    text="No se encontraron proyecciones",
-                    font=self.fuente_card,
-                    text_color="#3A3A3A"
-                )
-                no_results.pack(pady=50)
+    def cargar_mas_proyecciones(self):
+        ##@brief Load the next page of projections when the end of the list becomes visible
+        if self.cursor is None:
+            return
+        filtros, cursor = self.filtros, self.cursor
+        run_in_background(
+            self.scroll_container, "historial.pagina", consultar_proyecciones,
+            despues=cursor, limite=PAGE_SIZE, **filtros,
+            on_success=lambda pagina: self.agregar_proyecciones(filtros, cursor, pagina),
+            on_error=self.error_carga_proyecciones
+        )
 
-        except Exception as e:
-            print(f"Error al cargar proyecciones: {e}")
-            error_label = ctk.CTkLabel(
-                self.scroll_container,
-                text=f"Error al cargar proyecciones\n{str(e)}",
-                font=self.fuente_card,
-                text_color="#b8191a"
-            )
-            error_label.pack(pady=50)
+    def agregar_proyecciones(self, filtros, cursor, pagina):
+        ##@brief Append a page of projections, unless the search changed while it was loading
+        if filtros != self.filtros or cursor != self.cursor:
+            return
+        self.cursor = pagina.cursor
+        self.scroll_container.append_rows(pagina)
 
-    def crear_card_proyeccion(self, proyeccion):
-        ##@brief Create a card for each projection
-        print(f"Creating card for projection: {proyeccion}")
-        
-        card = ctk.CTkFrame(self.scroll_container, fg_color="white", corner_radius=12)
-        card.pack(fill="x", pady=8, padx=25)
+    def error_carga_proyecciones(self, e):
+        ##@brief Show the error raised by the background query
+        print(f"Error al cargar proyecciones: {e}")
+        self.scroll_container.mostrar_mensaje(f"Error al cargar proyecciones\n{str(e)}", "#b8191a")
+
+    def altura_card_proyeccion(self, proyeccion):
+        ##@brief Height of the card of a projection, one line per recipe
+        return 120 + max(60, 30 + 26 * len(proyeccion.get('recetas', [])))
+
+    def crear_card_proyeccion(self, parent):
+        ##@brief Create an empty projection card, filled and recycled by llenar_card_proyeccion
+        card = ctk.CTkFrame(parent, fg_color="white", corner_radius=12)
         
         content_frame = ctk.CTkFrame(card, fg_color="transparent")
         content_frame.pack(fill="x", padx=15, pady=10)
         
-        fecha = proyeccion.get('fecha', date.today())
-        fecha_str = fecha.strftime("Proyección %d/%m/%Y") if isinstance(fecha, date) else "Proyección"
-        
         title_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
         title_frame.pack(fill="x", pady=(0, 5))
         
-        titulo = ctk.CTkLabel(title_frame, 
-                            text=fecha_str, 
+        card.titulo = ctk.CTkLabel(title_frame, 
+                            text="", 
                             font=ctk.CTkFont(family="Port Lligat Slab", size=18, weight="bold"), 
                             text_color="#b8191a",
                             anchor="w")
-        titulo.pack(side="left")
+        card.titulo.pack(side="left")
         
-        if proyeccion.get('nombre'):
-            nombre = ctk.CTkLabel(title_frame, 
-                                text=f": {proyeccion.get('nombre')}", 
+        card.nombre = ctk.CTkLabel(title_frame, 
+                                text="", 
                                 font=ctk.CTkFont(family="Port Lligat Slab", size=16), 
                                 text_color="#3A3A3A",
                                 anchor="w")
-            nombre.pack(side="left", padx=5)
         
         details_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
         details_frame.pack(fill="x", pady=5)
@@ -223,79 +246,160 @@ class HistorialAdminView(ctk.CTkFrame):
         info_frame = ctk.CTkFrame(details_frame, fg_color="transparent")
         info_frame.pack(side="left", anchor="nw", padx=(0, 20), fill="y")
         
-        periodo_label = ctk.CTkLabel(info_frame, 
-                                   text=f"Periodo: {proyeccion.get('periodo', 'N/A')}", 
+        card.periodo_label = ctk.CTkLabel(info_frame, 
+                                   text="", 
                                    font=self.fuente_card, 
                                    text_color="#3A3A3A",
                                    anchor="w")
-        periodo_label.pack(anchor="w", pady=2)
+        card.periodo_label.pack(anchor="w", pady=2)
         
-        comensales_label = ctk.CTkLabel(info_frame, 
-                                      text=f"Comensales: {proyeccion.get('comensales', 0)}", 
+        card.comensales_label = ctk.CTkLabel(info_frame, 
+                                      text="", 
                                       font=self.fuente_card, 
                                       text_color="#3A3A3A",
                                       anchor="w")
-        comensales_label.pack(anchor="w", pady=2)
+        card.comensales_label.pack(anchor="w", pady=2)
         
-        recipes_frame = ctk.CTkFrame(details_frame, fg_color="transparent")
-        recipes_frame.pack(side="left", anchor="nw", fill="both", expand=True)
+        card.recipes_frame = ctk.CTkFrame(details_frame, fg_color="transparent")
+        card.recipes_frame.pack(side="left", anchor="nw", fill="both", expand=True)
         
-        recipes_title = ctk.CTkLabel(recipes_frame, 
+        recipes_title = ctk.CTkLabel(card.recipes_frame, 
                                    text="Recetas:", 
                                    font=ctk.CTkFont(family="Port Lligat Slab", size=15, weight="bold"), 
                                    text_color="#3A3A3A",
                                    anchor="w")
         recipes_title.pack(anchor="w", pady=(0, 5))
-        
-        recetas = proyeccion.get('recetas', [])
-        print(f"Recipe count for this projection: {len(recetas)}")
-        
-        for recipe in recetas:
-            recipe_label = ctk.CTkLabel(
-                recipes_frame, 
-                text=f"• {recipe.get('nombre_receta', '')}: {recipe.get('porcentaje', 0)}%",
-                font=self.fuente_small,
-                text_color="#3A3A3A",
-                anchor="w"
-            )
-            recipe_label.pack(anchor="w", pady=1)
+        card.recipe_labels = []
         
         actions_frame = ctk.CTkFrame(card, fg_color="transparent")
         actions_frame.pack(fill="x", padx=15, pady=(5, 10))
 
-        delete_btn = ctk.CTkButton(
+        card.delete_btn = ctk.CTkButton(
             actions_frame, image=self.img_bote, text="", width=30, height=30,
-            fg_color="white", hover_color="#E8E8E8", corner_radius=5,
-            command=lambda id=proyeccion.get('id_proyeccion'), name=fecha_str:
-                self.confirmar_eliminacion(id, name, card)
+            fg_color="white", hover_color="#E8E8E8", corner_radius=5
         )
-        delete_btn.pack(side="left", padx=5)
+        card.delete_btn.pack(side="left", padx=5)
 
-        report_btn = ctk.CTkButton(
+        card.report_btn = ctk.CTkButton(
             actions_frame, text="Generar reporte", width=140, height=30,
             font=self.fuente_button,  
-            fg_color="#b8191a", hover_color="#991416", corner_radius=8,
-            command=lambda id=proyeccion.get('id_proyeccion'): self.generar_reporte(id)
+            fg_color="#b8191a", hover_color="#991416", corner_radius=8
         )
-        report_btn.pack(side="right", padx=10)
+        card.report_btn.pack(side="right", padx=10)
+        return card
+
+    def llenar_card_proyeccion(self, card, proyeccion, index):
+        ##@brief Fill a projection card with the data of a projection
+        fecha = proyeccion.get('fecha', date.today())
+        fecha_str = fecha.strftime("Proyección %d/%m/%Y") if isinstance(fecha, date) else "Proyección"
+        id_proyeccion = proyeccion.get('id_proyeccion')
+
+        card.titulo.configure(text=fecha_str)
+        if proyeccion.get('nombre'):
+            card.nombre.configure(text=f": {proyeccion.get('nombre')}")
+            card.nombre.pack(side="left", padx=5)
+        else:
+            card.nombre.pack_forget()
+
+        card.periodo_label.configure(text=f"Periodo: {proyeccion.get('periodo', 'N/A')}")
+        card.comensales_label.configure(text=f"Comensales: {proyeccion.get('comensales', 0)}")
+
+        recetas = proyeccion.get('recetas', [])
+        while len(card.recipe_labels) < len(recetas):
+            card.recipe_labels.append(ctk.CTkLabel(
+                card.recipes_frame,
+                text="",
+                font=self.fuente_small,
+                text_color="#3A3A3A",
+                anchor="w"
+            ))
+        for i, recipe_label in enumerate(card.recipe_labels):
+            if i < len(recetas):
+                recipe = recetas[i]
+                recipe_label.configure(text=f"• {recipe.get('nombre_receta', '')}: {recipe.get('porcentaje', 0)}%")
+                recipe_label.pack(anchor="w", pady=1)
+            else:
+                recipe_label.pack_forget()
+
+        card.delete_btn.configure(command=lambda: self.confirmar_eliminacion(id_proyeccion, fecha_str))
+        card.report_btn.configure(command=lambda: self.generar_reporte(id_proyeccion))
 
     def imprimir_proyeccion(self, id_proyeccion):
-        ##@brief Print the projection
+        ##@brief Queue the report of the projection; it is rendered in a worker process
         try:
-            report_path = ProyeccionController.generate_projection_report(self.session, id_proyeccion)
+            trabajo = get_report_queue().submit(self, id_proyeccion, on_update=self.actualizar_reporte)
+        except Exception as e:
+            self.mostrar_mensaje_personalizado("Error", f"No se pudo generar el reporte.\n\n{str(e)}", "#d9534f")
+            return
+        self.trabajos_reporte[trabajo.id] = trabajo
+        self.mostrar_estado_reportes()
+
+    def imprimir_listado(self):
+        ##@brief Queue the reports of every projection in the list as one batch job
+        ids = [p['id_proyeccion'] for p in self.scroll_container.rows]
+        if not ids:
+            return
+        try:
+            trabajo = get_report_queue().submit_batch(self, ids, on_update=self.actualizar_reporte)
+        except Exception as e:
+            self.mostrar_mensaje_personalizado("Error", f"No se pudieron generar los reportes.\n\n{str(e)}", "#d9534f")
+            return
+        self.trabajos_reporte[trabajo.id] = trabajo
+        self.mostrar_estado_reportes()
+
+    def actualizar_reporte(self, trabajo):
+        ##@brief Progress of a report job, called on the Tk thread every time its state changes
+        if trabajo.estado == TERMINADO and trabajo.lote:
+            self.trabajos_reporte.pop(trabajo.id, None)
+            generados = [r for r in trabajo.resultados if r[1] is not None]
+            mensaje = f"Se generaron {len(generados)} de {len(trabajo.resultados)} reportes en:\n{trabajo.carpeta}"
+            fallidos = [r for r in trabajo.resultados if r[1] is None]
+            if fallidos:
+                mensaje += "\n\nNo se pudo generar: " + ", ".join(str(r[0]) for r in fallidos)
+            self.mostrar_mensaje_personalizado("Reportes Generados", mensaje, "#b8191a")
+        elif trabajo.estado == TERMINADO:
+            self.trabajos_reporte.pop(trabajo.id, None)
             self.mostrar_mensaje_personalizado(
                 "Reporte Generado", 
-                f"Se ha generado el reporte correctamente: {report_path}", 
+                f"Se ha generado el reporte correctamente: {trabajo.ruta_pdf}", 
                 "#b8191a"
             )
-        except Exception as e:
+        elif trabajo.estado == ERROR:
+            self.trabajos_reporte.pop(trabajo.id, None)
             self.mostrar_mensaje_personalizado(
                 "Error", 
-                f"No se pudo generar el reporte.\n\n{str(e)}", 
+                f"No se pudo generar el reporte.\n\n{str(trabajo.error)}", 
                 "#d9534f"
             )
+        elif trabajo.estado == CANCELADO:
+            self.trabajos_reporte.pop(trabajo.id, None)
+        self.mostrar_estado_reportes()
+
+    def mostrar_estado_reportes(self):
+        ##@brief Show the state of the reports in progress, hidden when there are none
+        if not hasattr(self, "estado_reporte_frame"):
+            return
+        if not self.trabajos_reporte:
+            self.estado_reporte_frame.pack_forget()
+            return
+        ultimo = list(self.trabajos_reporte.values())[-1]
+        texto = ultimo.descripcion
+        if len(self.trabajos_reporte) > 1:
+            texto = f"{len(self.trabajos_reporte)} reportes en proceso - {texto}"
+        self.estado_reporte_label.configure(text=texto)
+        if not self.estado_reporte_frame.winfo_ismapped():
+            self.estado_reporte_frame.pack(fill="x", padx=50, before=self.scroll_container)
+
+    def cancelar_reportes(self):
+        ##@brief Cancel the reports in progress of this view
+        for id_trabajo in list(self.trabajos_reporte):
+            get_report_queue().cancel(id_trabajo)
+
+    def generar_reporte(self, id_proyeccion):
+        ##@brief Handler of the "Generar reporte" button of each card
+        self.imprimir_proyeccion(id_proyeccion)
     
-    def confirmar_eliminacion(self, id_proyeccion, nombre_proyeccion, card_widget):
+    def confirmar_eliminacion(self, id_proyeccion, nombre_proyeccion):
         ##@brief Confirm the deletion of a projection
         ventana = ctk.CTkToplevel(self)
         ventana.title("Confirmar eliminación")
@@ -323,15 +427,15 @@ class HistorialAdminView(ctk.CTkFrame):
         ctk.CTkButton(botones, text="Eliminar", font=self.fuente_button, fg_color="#d9534f", 
                      hover_color="#b52a25", width=100, 
                      command=lambda: self.eliminar_proyeccion_confirmado(
-                         id_proyeccion, nombre_proyeccion, card_widget, ventana
+                         id_proyeccion, nombre_proyeccion, ventana
                      )).pack(side="left", padx=10)
     
-    def eliminar_proyeccion_confirmado(self, id_proyeccion, nombre_proyeccion, card_widget, ventana):
+    def eliminar_proyeccion_confirmado(self, id_proyeccion, nombre_proyeccion, ventana):
         ##@brief Confirm the deletion of a projection
         ventana.destroy()
         try:
             ProyeccionController.deactivate_projection(self.session, id_proyeccion)
-            card_widget.destroy()
+            self.scroll_container.remove_where(lambda p: p.get('id_proyeccion') == id_proyeccion)
             self.mostrar_mensaje_personalizado(
                 "Eliminado", 
                 f"Proyección '{nombre_proyeccion}' eliminada correctamente.", 
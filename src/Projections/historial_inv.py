@@ -13,6 +13,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 from src.Projections.controller import ProyeccionController
 from src.database.connector import Connector
+from src.Projections.report_jobs import get_report_queue, TERMINADO, ERROR
 
 class HistorialInvView(ctk.CTkFrame):
     ##brief History administration view class for projections
@@ -281,18 +282,28 @@ class HistorialInvView(ctk.CTkFrame):
         report_btn.pack(side="right", padx=10)
 
     def imprimir_proyeccion(self, id_proyeccion):
-        ##@brief Print the projection report
+        ##@brief Queue the projection report; it is rendered in a worker process
         try:
-            report_path = ProyeccionController.generate_projection_report(self.session, id_proyeccion)
+            get_report_queue().submit(self, id_proyeccion, on_update=self.actualizar_reporte)
+        except Exception as e:
+            self.mostrar_mensaje_personalizado(
+                "Error", 
+                f"No se pudo generar el reporte.\n\n{str(e)}", 
+                "#d9534f"
+            )
+
+    def actualizar_reporte(self, trabajo):
+        ##@brief Show the result of the report job once it finishes
+        if trabajo.estado == TERMINADO:
             self.mostrar_mensaje_personalizado(
                 "Reporte Generado", 
-                f"Se ha generado el reporte correctamente: {report_path}", 
+                f"Se ha generado el reporte correctamente: {trabajo.ruta_pdf}", 
                 "#b8191a"
             )
-        except Exception as e:
+        elif trabajo.estado == ERROR:
             self.mostrar_mensaje_personalizado(
                 "Error", 
-                f"No se pudo generar el reporte.\n\n{str(e)}", 
+                f"No se pudo generar el reporte.\n\n{str(trabajo.error)}", 
                 "#d9534f"
             )
     
@@ -0,0 +1,76 @@
+## @file maintenance.py
+## @brief Background refresh of the stale materialized projection totals.
+## @details A maintenance thread recomputes, every REFRESH_INTERVAL_SECONDS, the totals that the write paths
+## marked as stale (see src.Projections.totals), a few projections per pass, so the reports find them fresh.
+## It uses its own session borrowed from the shared pool and never touches Tk widgets.
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Projections import totals
+
+## @brief Seconds between two passes of the refresh
+REFRESH_INTERVAL_SECONDS = 30
+
+## @brief Projections recomputed at most per pass
+REFRESH_BATCH_SIZE = 50
+
+
+## @brief Build a session from the default Connector (database configured in the .env file)
+def _default_session_factory():
+    from src.database.connector import Connector
+    return Connector().get_session()
+
+
+## @brief Maintenance thread that keeps the materialized totals fresh until it is stopped
+class TotalsRefresh(threading.Thread):
+    ## @param session_factory Callable returning a new session for each pass
+    ## @param intervalo Seconds between two passes
+    ## @param lote Projections recomputed at most per pass
+    def __init__(self, session_factory=None, intervalo: float = REFRESH_INTERVAL_SECONDS,
+                 lote: int = REFRESH_BATCH_SIZE) -> None:
+        super().__init__(name="proyecciones-totales", daemon=True)
+        self.session_factory = session_factory or _default_session_factory
+        self.intervalo = intervalo
+        self.lote = lote
+        ## Projections recomputed since the thread started
+        self.recalculadas = 0
+        self.error = None
+        self.detener = threading.Event()
+
+    ## @brief Ask the refresh to stop after the projection in course; join() returns once it is committed
+    def stop(self) -> None:
+        self.detener.set()
+
+    ## @brief Recompute up to lote stale projections
+    ## @return Number of projections recomputed
+    def refresh_once(self) -> int:
+        session = self.session_factory()
+        try:
+            recalculadas = totals.refresh_stale(session, limite=self.lote)
+        finally:
+            session.close()
+        self.recalculadas += recalculadas
+        return recalculadas
+
+    def run(self) -> None:
+        while not self.detener.is_set():
+            try:
+                ## A full batch means more stale projections may be waiting: go on without sleeping
+                if self.refresh_once() == self.lote:
+                    continue
+            except Exception as e:
+                self.error = e
+                print(f"Error al recalcular los totales de las proyecciones: {e}")
+            self.detener.wait(self.intervalo)
+
+
+## @brief Start the background refresh of the projection totals
+## @return The started TotalsRefresh; stop() and join() it on exit
+def start_totals_refresh(session_factory=None, intervalo: float = REFRESH_INTERVAL_SECONDS,
+                         lote: int = REFRESH_BATCH_SIZE) -> TotalsRefresh:
+    refresco = TotalsRefresh(session_factory, intervalo, lote)
+    refresco.start()
+    return refresco
@@ -1,7 +1,7 @@
 import os
 import sys
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, Float, Index
 from sqlalchemy.orm import relationship
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
@@ -10,6 +10,11 @@ from src.database.connector import Base
 ## Data model for Proyecciones. This model is used to store the projections of the recipes.
 class Proyeccion(Base):
     __tablename__ = "proyecciones"
+    ## Filters of search_projections, the purchasing plans and the trash can purge
+    __table_args__ = (
+        Index("ix_proyecciones_estatus_fecha", "estatus", "fecha"),
+        Index("ix_proyecciones_estatus_fecha_eliminado", "estatus", "fecha_eliminado"),
+    )
 
     id_proyeccion = Column(Integer, primary_key=True, autoincrement=True)
     nombre = Column(String(100))
@@ -18,6 +23,8 @@ class Proyeccion(Base):
     fecha = Column(Date, nullable=False)
     estatus = Column(Boolean, default=True)
     fecha_eliminado = Column(Date, nullable=True)
+    ## True when an input of the totals changed after they were stored in proyeccion_ingredientes
+    totales_obsoletos = Column(Boolean, nullable=False, default=True, server_default="1")
 
     ## Relationship with Recetas and ProyeccionRecetas.
     proyeccion_recetas = relationship("ProyeccionReceta", back_populates="proyeccion", cascade="all, delete-orphan", passive_deletes=True)
@@ -89,3 +96,21 @@ class ProyeccionReceta(Base):
 
     def __repr__(self):
         return f"ProyeccionReceta: Proyeccion_ID={self.id_proyeccion}, Receta_ID={self.id_receta}"
+
+## Data model for ProyeccionIngredientes. Materialized ingredient totals of a projection, see src.Projections.totals.
+class ProyeccionIngrediente(Base):
+    __tablename__ = "proyeccion_ingredientes"
+
+    id_proyeccion = Column(Integer, ForeignKey("proyecciones.id_proyeccion", ondelete="CASCADE"), primary_key=True)
+    nombre = Column(String(100), primary_key=True)
+    unidad = Column(String(50), primary_key=True)
+    cantidad = Column(Float, nullable=False)
+
+    def __init__(self, id_proyeccion: int, nombre: str, unidad: str, cantidad: float) -> None:
+        self.id_proyeccion = id_proyeccion
+        self.nombre = nombre
+        self.unidad = unidad
+        self.cantidad = cantidad
+
+    def __repr__(self):
+        return f"ProyeccionIngrediente: Proyeccion_ID={self.id_proyeccion}, {self.nombre}: {self.cantidad} {self.unidad}"
@@ -10,6 +10,10 @@ from src.Recipes.model import Receta, Receta_Ingredientes
 from src.Ingredients.model import Ingrediente
 from src.Projections.controller import ProyeccionController
 from src.Projections.proyecciones_resultados import ProyeccionesResultadosView
+from src.database.worker import run_in_background
+
+## @brief Maximum number of ingredients listed in the live preview
+MAX_VISTA_PREVIA = 12
 
 ## @class PorcentajesProyeccionesView
 #  @brief A view class for managing recipe percentages for projections
@@ -47,7 +51,9 @@ class PorcentajesProyeccionesView(ctk.CTkFrame):
         if num_recetas > 0 and 100 % num_recetas != 0:
             self.porcentajes[self.recetas[0].id_receta] += 100 % num_recetas
         self.comensales = 100
+        self.motor = None
         self._crear_interfaz()
+        self._cargar_motor()
 
     ## @brief Creates dummy recipe data when no recipes are found in the database
     #
@@ -134,6 +140,15 @@ class PorcentajesProyeccionesView(ctk.CTkFrame):
             corner_radius=8,
             command=self.actualizar_ingredientes
         ).pack(side="right", padx=10)
+        self.comensales_entry.bind("<KeyRelease>", self.actualizar_vista_previa)
+
+        vista_previa = ctk.CTkFrame(contenedor, fg_color="white", corner_radius=12)
+        vista_previa.pack(padx=30, pady=(0, 20), fill="x")
+        ctk.CTkLabel(vista_previa, text="Vista previa de ingredientes", font=self.fuente_subtitulo,
+                     text_color="#b8191a").pack(pady=(10, 0))
+        self.vista_previa_label = ctk.CTkLabel(vista_previa, text="Cargando...", font=self.fuente_card,
+                                               text_color="black", justify="left")
+        self.vista_previa_label.pack(padx=20, pady=10)
 
     ## @brief Creates a recipe card with ingredient information
     ##@param parent The parent widget for this card
@@ -197,10 +212,49 @@ class PorcentajesProyeccionesView(ctk.CTkFrame):
         )
         entry.pack(pady=(10, 5))
         entry.insert(0, str(self.porcentajes[receta.id_receta]))
+        entry.bind("<KeyRelease>", self.actualizar_vista_previa)
         self.entries_porcentajes[receta.id_receta] = entry
 
         ctk.CTkLabel(card, text="%", font=self.fuente_card, text_color="black").pack()
 
+    ## @brief Load the quantities of the recipes once, on the database worker, for the live preview
+    def _cargar_motor(self):
+        run_in_background(
+            self, "porcentajes.motor", ProyeccionController.load_sweep, self.recetas_ids,
+            on_success=self._motor_cargado,
+            on_error=lambda e: self.vista_previa_label.configure(text=f"No se pudo cargar la vista previa\n{str(e)}")
+        )
+
+    ## @brief Keep the loaded engine and show the first preview
+    def _motor_cargado(self, motor):
+        self.motor = motor
+        self.actualizar_vista_previa()
+
+    ## @brief Recompute the totals of the current percentages and diners in memory, on every key press
+    def actualizar_vista_previa(self, event=None):
+        if self.motor is None:
+            return
+        comensales = self.comensales_entry.get().strip()
+        if not comensales.isdigit():
+            self.vista_previa_label.configure(text="Ingrese el número de comensales")
+            return
+        porcentajes = {
+            receta_id: int(entry.get()) if entry.get().isdigit() else 0
+            for receta_id, entry in self.entries_porcentajes.items()
+        }
+
+        escenario = self.motor.sweep_dicts([porcentajes], [int(comensales)])[0]
+        lineas = [
+            f"{nombre}: {total['cantidad']:.2f} {total['unidad']}"
+            for nombre, total in sorted(escenario["totales"].items(), key=lambda item: -item[1]["cantidad"])
+        ]
+        if len(lineas) > MAX_VISTA_PREVIA:
+            lineas = lineas[:MAX_VISTA_PREVIA] + [f"... y {len(lineas) - MAX_VISTA_PREVIA} ingredientes más"]
+        suma = sum(porcentajes.values())
+        if suma != 100:
+            lineas.insert(0, f"Los porcentajes suman {suma}%")
+        self.vista_previa_label.configure(text="\n".join(lineas) or "Sin ingredientes")
+
     ##@brief Updates ingredient quantities based on percentages and diners count
     #
     ##This method is called when the "Generate" button is clicked.
@@ -11,6 +11,21 @@ from src.database.connector import Connector
 from src.Recipes.model import Receta, Receta_Ingredientes
 from src.Ingredients.model import Ingrediente
 from src.Projections.controller import ProyeccionController
+from src.database.worker import run_in_background
+from src.Projections.report_jobs import get_report_queue, TERMINADO, ERROR
+
+
+## @brief Save the projection of the report, executed on a background worker
+## @return ID of the saved projection
+def guardar_proyeccion_reporte(session, nombre, periodo, comensales, recetas):
+    proyeccion = ProyeccionController.create_projection(
+        session,
+        nombre=nombre,
+        periodo=periodo,
+        comensales=comensales,
+        recetas=recetas
+    )
+    return proyeccion.id_proyeccion
 
 ## @class ProyeccionesResultadosView
 ## @brief A view class for displaying projection results
@@ -224,102 +239,108 @@ class ProyeccionesResultadosView(ctk.CTkFrame):
             )
             ok_btn.pack(padx=10)
 
-    ## @brief Generate projection report and show confirmation
+    ## @brief Generate projection report in the background and show confirmation
     def generar_reporte(self):
-        try:
-            nombre = f"Proyección para reporte {self.tipo_comida} - {date.today().strftime('%d/%m/%Y')}"
-            recetas_data = []
-            for receta_id in self.recetas_ids:
-                if receta_id in self.porcentajes:
-                    recetas_data.append({
-                        "id_receta": receta_id,
-                        "porcentaje": self.porcentajes[receta_id]
-                    })
-            
-            proyeccion = ProyeccionController.create_projection(
-                self.session,
-                nombre=nombre,
-                periodo=self.tipo_comida,
-                comensales=self.comensales,
-                recetas=recetas_data
-            )
-
-            report_filename = ProyeccionController.generate_projection_report(self.session, proyeccion.id_proyeccion)
-            
-            popup = tk.Toplevel(self)
-            popup.title("Reporte generado")
-            popup.configure(bg="white")
-            popup.resizable(False, False)
-            popup.geometry("370x170")
-            popup.update_idletasks()
-            screen_width = popup.winfo_screenwidth()
-            screen_height = popup.winfo_screenheight()
-            x = int((screen_width / 2) - (370 / 2))
-            y = int((screen_height / 2) - (170 / 2))
-            popup.geometry(f"370x170+{x}+{y}")
-            popup.grab_set()
-
-            tk.Label(popup, text="Reporte generado", font=("Arial", 16, "bold"),
-                    fg="#b8191a", bg="white").pack(pady=(15, 0))  
-
-            tk.Label(popup, text="El reporte se generó correctamente en formato PDF.",
-                    font=("Arial", 10), bg="white", fg="#666").pack(pady=10)
-
-            btn_frame = tk.Frame(popup, bg="white")
-            btn_frame.pack(pady=10)
-
-            style = {"font": ("Arial", 10, "bold"), "width": 10, "height": 1}
-
-            def cerrar_y_abrir_pdf():
-                popup.destroy()
-                try:
-                    pdf_path = os.path.join(os.getcwd(), f'proyeccion_report_{proyeccion.fecha}.pdf')
-                    if os.path.exists(pdf_path):
-                        if sys.platform == 'win32':
-                            os.startfile(pdf_path)
-                        elif sys.platform == 'darwin': 
-                            subprocess.run(['open', pdf_path])
-                        else:  
-                            subprocess.run(['xdg-open', pdf_path])
-                except Exception as e:
-                    print(f"Error al abrir el PDF: {e}")
-
-            self.after(500, cerrar_y_abrir_pdf)
-
-            ok_btn = tk.Button(
-                btn_frame, text="OK", bg="#b8191a", fg="white", bd=0, 
-                highlightthickness=0, command=cerrar_y_abrir_pdf, **style
-            )
-            ok_btn.pack(padx=10)
-
-        except Exception as e:
-            popup = tk.Toplevel(self)
-            popup.title("Error")
-            popup.configure(bg="white")
-            popup.resizable(False, False)
-            popup.geometry("370x170")
-            popup.update_idletasks()
-            screen_width = popup.winfo_screenwidth()
-            screen_height = popup.winfo_screenheight()
-            x = int((screen_width / 2) - (370 / 2))
-            y = int((screen_height / 2) - (170 / 2))
-            popup.geometry(f"370x170+{x}+{y}")
-            popup.grab_set()
-
-            tk.Label(popup, text="Error al generar", font=("Arial", 16, "bold"),
-                    fg="#b8191a", bg="white").pack(pady=(15, 0)) 
-
-            tk.Label(popup, text=str(e), font=("Arial", 10), bg="white", fg="#666").pack(pady=10)
-
-            btn_frame = tk.Frame(popup, bg="white")
-            btn_frame.pack(pady=10)
+        nombre = f"Proyección para reporte {self.tipo_comida} - {date.today().strftime('%d/%m/%Y')}"
+        recetas_data = []
+        for receta_id in self.recetas_ids:
+            if receta_id in self.porcentajes:
+                recetas_data.append({
+                    "id_receta": receta_id,
+                    "porcentaje": self.porcentajes[receta_id]
+                })
+
+        run_in_background(
+            self, "resultados.reporte", guardar_proyeccion_reporte,
+            nombre, self.tipo_comida, self.comensales, recetas_data,
+            on_success=lambda id_proyeccion: get_report_queue().submit(self, id_proyeccion, on_update=self._actualizar_reporte),
+            on_error=self._error_reporte
+        )
 
-            ok_btn = tk.Button(
-                btn_frame, text="Cerrar", bg="#b8191a", fg="white", bd=0,  
-                highlightthickness=0, command=popup.destroy,
-                font=("Arial", 10, "bold"), width=10, height=1
-            )
-            ok_btn.pack(padx=10)
+    ## @brief Progress of the report job; the popups are shown once it finishes
+    def _actualizar_reporte(self, trabajo):
+        if trabajo.estado == TERMINADO:
+            self._reporte_generado(trabajo.ruta_pdf)
+        elif trabajo.estado == ERROR:
+            self._error_reporte(trabajo.error)
+
+    ## @brief Show the confirmation popup of the generated report and open the PDF
+    def _reporte_generado(self, report_filename):
+        popup = tk.Toplevel(self)
+        popup.title("Reporte generado")
+        popup.configure(bg="white")
+        popup.resizable(False, False)
+        popup.geometry("370x170")
+        popup.update_idletasks()
+        screen_width = popup.winfo_screenwidth()
+        screen_height = popup.winfo_screenheight()
+        x = int((screen_width / 2) - (370 / 2))
+        y = int((screen_height / 2) - (170 / 2))
+        popup.geometry(f"370x170+{x}+{y}")
+        popup.grab_set()
+
+        tk.Label(popup, text="Reporte generado", font=("Arial", 16, "bold"),
+                fg="#b8191a", bg="white").pack(pady=(15, 0))  
+
+        tk.Label(popup, text="El reporte se generó correctamente en formato PDF.",
+                font=("Arial", 10), bg="white", fg="#666").pack(pady=10)
+
+        btn_frame = tk.Frame(popup, bg="white")
+        btn_frame.pack(pady=10)
+
+        style = {"font": ("Arial", 10, "bold"), "width": 10, "height": 1}
+
+        def cerrar_y_abrir_pdf():
+            popup.destroy()
+            try:
+                pdf_path = os.path.join(os.getcwd(), report_filename)
+                if os.path.exists(pdf_path):
+                    if sys.platform == 'win32':
+                        os.startfile(pdf_path)
+                    elif sys.platform == 'darwin': 
+                        subprocess.run(['open', pdf_path])
+                    else:  
+                        subprocess.run(['xdg-open', pdf_path])
+            except Exception as e:
+                print(f"Error al abrir el PDF: {e}")
+
+        self.after(500, cerrar_y_abrir_pdf)
+
+        ok_btn = tk.Button(
+            btn_frame, text="OK", bg="#b8191a", fg="white", bd=0, 
+            highlightthickness=0, command=cerrar_y_abrir_pdf, **style
+        )
+        ok_btn.pack(padx=10)
+
+    ## @brief Show the error raised while saving or rendering the report
+    def _error_reporte(self, e):
+        popup = tk.Toplevel(self)
+        popup.title("Error")
+        popup.configure(bg="white")
+        popup.resizable(False, False)
+        popup.geometry("370x170")
+        popup.update_idletasks()
+        screen_width = popup.winfo_screenwidth()
+        screen_height = popup.winfo_screenheight()
+        x = int((screen_width / 2) - (370 / 2))
+        y = int((screen_height / 2) - (170 / 2))
+        popup.geometry(f"370x170+{x}+{y}")
+        popup.grab_set()
+
+        tk.Label(popup, text="Error al generar", font=("Arial", 16, "bold"),
+                fg="#b8191a", bg="white").pack(pady=(15, 0)) 
+
+        tk.Label(popup, text=str(e), font=("Arial", 10), bg="white", fg="#666").pack(pady=10)
+
+        btn_frame = tk.Frame(popup, bg="white")
+        btn_frame.pack(pady=10)
+
+        ok_btn = tk.Button(
+            btn_frame, text="Cerrar", bg="#b8191a", fg="white", bd=0,  
+            highlightthickness=0, command=popup.destroy,
+            font=("Arial", 10, "bold"), width=10, height=1
+        )
+        ok_btn.pack(padx=10)
 
 
     ## @brief Go back to percentage selection view
@@ -9,6 +9,18 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 from src.Recipes.controller import RecetasController
 from src.database.connector import Connector
 from src.Projections.porcentajes_proyecciones import PorcentajesProyeccionesView
+from src.components.busqueda import DebouncedSearch
+from src.components.loading import mostrar_cargando, mostrar_error_carga
+
+
+## @brief Search executed on the database worker for the recipes of the selected meal time
+def buscar_recetas_periodo(session, texto, periodo):
+    return RecetasController.search_recipes(session, nombre=texto or None, periodo=periodo)
+
+
+## @brief Narrow an already loaded list of recipes with a longer search text
+def filtrar_recetas(recetas, texto):
+    return [r for r in recetas if texto in r["nombre_receta"].lower()]
 
 ## @class ProyeccionesSeleccionView
 ## @brief Interface for selecting 2-3 recipes for projections with DB connection.
@@ -35,6 +47,13 @@ class ProyeccionesSeleccionView(ctk.CTkFrame):
         self.recetas_seleccionadas = []
         
         self.crear_ui()
+        self.busqueda = DebouncedSearch(
+            self.recetas_frame, "seleccion.recetas", buscar_recetas_periodo,
+            on_results=self.mostrar_recetas,
+            local_filter=filtrar_recetas,
+            on_loading=lambda: mostrar_cargando(self.recetas_frame, self.fuente_card),
+            on_error=lambda e: mostrar_error_carga(self.recetas_frame, f"Error al cargar recetas\n{e}", self.fuente_card)
+        )
         self.cargar_recetas()
 
     def crear_ui(self):
@@ -114,14 +133,12 @@ class ProyeccionesSeleccionView(ctk.CTkFrame):
 
 
     def cargar_recetas(self):
+        self.busqueda.search_now(self.buscador.get(), periodo=self.tipo_comida)
+
+    def mostrar_recetas(self, recetas):
         for widget in self.recetas_frame.winfo_children():
             widget.destroy()
         
-        recetas = RecetasController.search_recipes(
-            self.session, 
-            periodo=self.tipo_comida
-        )
-        
         for index, receta in enumerate(recetas):
             self.crear_card_receta(index, receta)
             
@@ -135,8 +152,9 @@ class ProyeccionesSeleccionView(ctk.CTkFrame):
             sticky="nsew"
         )
 
-        receta["seleccionada"] = False
-        checkbox_var = ctk.StringVar(value="0")
+        seleccionada = any(r["id_receta"] == receta["id_receta"] for r in self.recetas_seleccionadas)
+        receta["seleccionada"] = seleccionada
+        checkbox_var = ctk.StringVar(value="1" if seleccionada else "0")
         receta["checkbox_var"] = checkbox_var
 
         interior = ctk.CTkFrame(card, fg_color="transparent")
@@ -199,18 +217,7 @@ class ProyeccionesSeleccionView(ctk.CTkFrame):
             self.boton_siguiente.configure(state="disabled")
 
     def buscar_recetas_auto(self, event=None):
-        texto_busqueda = self.buscador.get()
-        recetas = RecetasController.search_recipes(
-            self.session, 
-            nombre=texto_busqueda, 
-            periodo=self.tipo_comida
-        )
-        
-        for widget in self.recetas_frame.winfo_children():
-            widget.destroy()
-        
-        for index, receta in enumerate(recetas):
-            self.crear_card_receta(index, receta)
+        self.busqueda.schedule(self.buscador.get(), periodo=self.tipo_comida)
 
     def siguiente(self):
         if self.seleccionadas < self.min_seleccionadas:
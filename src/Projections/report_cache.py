@@ -0,0 +1,182 @@
+## @file report_cache.py
+## @brief Content-addressed disk cache of the projection reports and their charts.
+## @details The key of an entry is the sha256 of the data the file is rendered from (recipes, percentages,
+## comensales and ingredient quantities), so an unchanged projection finds its PDF and any edit of the
+## projection or of its recipes produces a new key; stale entries are never read again and age out.
+## Entries are plain files named after their key. A hit refreshes the modification time of the file, and the
+## least recently used entries are removed when the cache grows over its size limit.
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+
+## @brief Folder of the cache, inside the reports folder by default
+REPORT_CACHE_DIR = os.getenv(
+    "REPORT_CACHE_DIR", os.path.join(os.getenv("REPORTS_DIR", os.path.join(os.getcwd(), "reportes")), "cache")
+)
+
+## @brief Maximum size of the cache in bytes (REPORT_CACHE_MAX_MB megabytes, 200 by default)
+DEFAULT_MAX_BYTES = int(float(os.getenv("REPORT_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+## @brief Bumped when the way the reports are rendered changes, so the old entries are not used
+CACHE_VERSION = 1
+
+PDF = ".pdf"
+PNG = ".png"
+
+
+def _huella(valor) -> str:
+    contenido = json.dumps(valor, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+## @brief Key of the PDF of a projection
+## @param datos Data returned by ProyeccionController.load_report_data
+## @param extra Other inputs of the rendering, e.g. the fingerprint of the template
+def clave_reporte(datos: dict, *extra) -> str:
+    return _huella({
+        "version": CACHE_VERSION,
+        "report_data": datos.get("report_data"),
+        "pie_chart_data": datos.get("pie_chart_data"),
+        "extra": extra,
+    })
+
+
+## @brief Key of the pie chart of a projection; projections with the same percentages share the chart
+def clave_grafica(pie_chart_data: list) -> str:
+    return _huella({"version": CACHE_VERSION, "pie_chart_data": pie_chart_data})
+
+
+## @brief sha256 of the contents of a file, to include the template in the keys
+def huella_archivo(ruta: str) -> str:
+    with open(ruta, "rb") as archivo:
+        return hashlib.sha256(archivo.read()).hexdigest()
+
+
+## @brief Files of the rendered reports indexed by the hash of their data
+class ReportCache:
+    ## @param directorio Folder of the cache, created on the first write
+    ## @param max_bytes The least recently used entries are removed above this size
+    def __init__(self, directorio: str = REPORT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    ## The lock is not sent to the worker processes; every process creates its own
+    def __getstate__(self):
+        return {"directorio": self.directorio, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.Lock()
+
+    def ruta(self, clave: str, extension: str) -> str:
+        return os.path.join(self.directorio, clave + extension)
+
+    ## @brief Path of the entry, or None if it is not cached. A hit marks the entry as recently used.
+    def obtener(self, clave: str, extension: str) -> str | None:
+        ruta = self.ruta(clave, extension)
+        try:
+            os.utime(ruta)
+        except OSError:
+            return None
+        return ruta
+
+    ## @brief Copy the entry to destino
+    ## @return destino, or None if it is not cached
+    def copiar_a(self, clave: str, extension: str, destino: str) -> str | None:
+        origen = self.obtener(clave, extension)
+        if origen is None:
+            return None
+        try:
+            shutil.copyfile(origen, destino)
+        except FileNotFoundError:
+            ## Evicted by another process between the lookup and the copy
+            return None
+        return destino
+
+    ## @brief Store a copy of the file origen under clave and make room for it
+    ## @details The copy is written to a temporary name and renamed, so other processes never read half a file.
+    def guardar(self, clave: str, extension: str, origen: str) -> str:
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = self.ruta(clave, extension)
+        temporal = f"{ruta}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(origen, temporal)
+            os.replace(temporal, ruta)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+        self.evictar()
+        return ruta
+
+    ## @brief Entries of the cache as (modification time, size, path), least recently used first
+    def entradas(self) -> list:
+        entradas = []
+        try:
+            nombres = os.listdir(self.directorio)
+        except FileNotFoundError:
+            return entradas
+        for nombre in nombres:
+            if not nombre.endswith((PDF, PNG)):
+                continue
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                estado = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            entradas.append((estado.st_mtime, estado.st_size, ruta))
+        entradas.sort()
+        return entradas
+
+    ## @brief Total size of the entries in bytes
+    def tamano(self) -> int:
+        return sum(tamano for _, tamano, _ in self.entradas())
+
+    ## @brief Remove the least recently used entries until the cache fits in max_bytes
+    ## @return Number of entries removed
+    def evictar(self) -> int:
+        with self._lock:
+            entradas = self.entradas()
+            total = sum(tamano for _, tamano, _ in entradas)
+            eliminadas = 0
+            for _, tamano, ruta in entradas:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+                total -= tamano
+                eliminadas += 1
+            return eliminadas
+
+    ## @brief Remove every entry
+    def limpiar(self) -> None:
+        for _, _, ruta in self.entradas():
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+
+_cache: ReportCache | None = None
+_cache_lock = threading.Lock()
+
+
+## @brief Return the cache of this process, creating the default one on first use
+def get_report_cache() -> ReportCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache()
+        return _cache
+
+
+## @brief Use cache as the cache of this process (the worker processes get the one of their queue)
+def set_report_cache(cache: ReportCache) -> None:
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,370 @@
+## @file report_jobs.py
+## @brief Queue of report jobs rendered in worker processes, with progress and cancellation.
+## @details A job first loads the report data on the database worker (threads, one session per task) and then
+## renders the chart and the PDF in a process pool, so neither the Tk main thread nor the GIL of the UI process
+## is held by plotly/kaleido or the PDF engine. The worker processes report the stage they are in through a
+## multiprocessing queue; the Tk main thread drains it with after() and calls the on_update callback of each job.
+## Every job writes into its own folder (see src.Projections.reports), so concurrent jobs never share files.
+## Before using a worker process the queue looks the data up in the report cache, so a projection that did not
+## change since its last report finishes right away with a copy of the cached PDF.
+import os
+import sys
+import queue
+import shutil
+import threading
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.database.worker import get_worker, widget_exists
+from src.Projections.reports import (ReportCancelled, render_projection_report, render_projection_reports,
+                                     nueva_carpeta_reporte, solicitar_cancelacion, reporte_cacheado,
+                                     ETAPA_GRAFICA, ETAPA_PDF)
+from src.Projections.report_cache import ReportCache, get_report_cache, set_report_cache
+
+## @brief States of a job, in the order they happen
+CARGANDO = "cargando"
+EN_COLA = "en_cola"
+GRAFICA = ETAPA_GRAFICA
+PDF = ETAPA_PDF
+TERMINADO = "terminado"
+ERROR = "error"
+CANCELADO = "cancelado"
+
+## @brief States after which a job does not change anymore
+FINALES = (TERMINADO, ERROR, CANCELADO)
+
+## @brief Text shown to the user for each state
+DESCRIPCIONES = {
+    CARGANDO: "Cargando datos...",
+    EN_COLA: "En espera...",
+    GRAFICA: "Generando gráfica...",
+    PDF: "Generando PDF...",
+    TERMINADO: "Reporte generado",
+    ERROR: "Error al generar el reporte",
+    CANCELADO: "Reporte cancelado",
+}
+
+## @brief Default number of worker processes
+DEFAULT_PROCESSES = 2
+
+## @brief Milliseconds between two drains of the progress queue while jobs are running
+POLL_INTERVAL_MS = 100
+
+
+_avances = None
+
+
+## @brief Initializer of the worker processes: keep the queue where the stages are reported and share the cache
+def _init_proceso(avances, cache) -> None:
+    global _avances
+    _avances = avances
+    if cache is not None:
+        set_report_cache(cache)
+
+
+## @brief Entry point of a job in the worker process
+def _ejecutar_render(render, job_id, datos, carpeta):
+    def avance(etapa):
+        if _avances is not None:
+            _avances.put((job_id, etapa))
+    return render(datos, carpeta, avance)
+
+
+## @brief Default loader of the report data, executed on the database worker
+def _cargar_datos(session, id_proyeccion):
+    from src.Projections.controller import ProyeccionController
+    return ProyeccionController.load_report_data(session, id_proyeccion)
+
+
+## @brief Default loader of the data of a batch of reports, executed on the database worker
+def _cargar_lote(session, ids):
+    from src.Projections.controller import ProyeccionController
+    return ProyeccionController.load_reports_data(session, ids)
+
+
+## @brief A report (or a batch of reports) being generated
+class ReportJob:
+    ## @param id_proyeccion ID of the projection, or list of IDs for a batch
+    def __init__(self, job_id: str, id_proyeccion, carpeta: str, widget=None, on_update=None) -> None:
+        self.id = job_id
+        self.id_proyeccion = id_proyeccion
+        self.carpeta = carpeta
+        self.lote = isinstance(id_proyeccion, list)
+        self.estado = CARGANDO
+        ## Path of the PDF of a single report
+        self.ruta_pdf = None
+        ## (id_proyeccion, path or None, exception or None) of each report of a batch
+        self.resultados = None
+        self.error = None
+        self.widget = widget
+        self.on_update = on_update
+        self.future = None
+
+    ## @brief Whether the job reached a final state
+    @property
+    def terminado(self) -> bool:
+        return self.estado in FINALES
+
+    ## @brief Text of the current state for the user
+    @property
+    def descripcion(self) -> str:
+        return DESCRIPCIONES.get(self.estado, self.estado)
+
+    def __repr__(self) -> str:
+        return f"ReportJob({self.id}, proyeccion={self.id_proyeccion}, estado={self.estado})"
+
+
+## @brief Runs report jobs in a process pool and streams their progress back to the Tk main thread
+class ReportJobQueue:
+    ## @param max_workers Number of worker processes
+    ## @param output_dir Folder where the job folders are created, REPORTS_DIR by default
+    ## @param loader loader(session, id_proyeccion) -> data, executed on the database worker
+    ## @param render render(data, folder, avance) -> path, executed in a worker process (must be picklable)
+    ## @param batch_loader batch_loader(session, ids) -> list of data, for submit_batch
+    ## @param batch_render batch_render(list of data, folder, avance) -> results, for submit_batch (must be picklable)
+    ## @param worker DatabaseWorker used for the loading step, the shared one by default
+    ## @param cache ReportCache of the PDFs, the cache folder of output_dir (or the default one) if None
+    def __init__(self, max_workers: int = DEFAULT_PROCESSES, output_dir: str = None, loader=None,
+                 render=None, batch_loader=None, batch_render=None, worker=None, mp_context=None,
+                 cache: ReportCache = None) -> None:
+        self.max_workers = max_workers
+        self.output_dir = output_dir
+        if cache is None:
+            cache = ReportCache(os.path.join(output_dir, "cache")) if output_dir else get_report_cache()
+        self.cache = cache
+        self.loader = loader or _cargar_datos
+        self.render = render or render_projection_report
+        self.batch_loader = batch_loader or _cargar_lote
+        self.batch_render = batch_render or render_projection_reports
+        self.worker = worker or get_worker()
+        ## Read and written from the Tk thread and from the done callbacks of the pool, always under _jobs_lock
+        self.jobs: dict[str, ReportJob] = {}
+        self._jobs_lock = threading.Lock()
+
+        self._contexto = mp_context or multiprocessing.get_context()
+        self._avances = self._contexto.Queue()
+        self._terminados = queue.Queue()
+        self._pool = None
+        self._lock = threading.Lock()
+        self._poll_widget = None
+
+    ## @brief Start generating the report of a projection
+    ## @param widget Widget that receives the updates; on_update is skipped once it is destroyed
+    ## @param on_update on_update(job) called on the Tk thread every time the state of the job changes
+    ## @return The ReportJob
+    def submit(self, widget, id_proyeccion: int, on_update=None) -> ReportJob:
+        return self._encolar(widget, id_proyeccion, self.loader, on_update)
+
+    ## @brief Generate the reports of several projections as one job
+    ## @details The whole batch is rendered in one pass of a single worker process, so it pays the warm-up of
+    ## the renderer once. When it finishes, job.resultados has the result of each projection.
+    def submit_batch(self, widget, ids, on_update=None) -> ReportJob:
+        return self._encolar(widget, list(ids), self.batch_loader, on_update)
+
+    def _encolar(self, widget, id_proyeccion, loader, on_update) -> ReportJob:
+        job_id = uuid.uuid4().hex
+        job = ReportJob(job_id, id_proyeccion, nueva_carpeta_reporte(self.output_dir, job_id), widget, on_update)
+        with self._jobs_lock:
+            self.jobs[job_id] = job
+
+        self._notificar(job)
+        self.worker.submit(
+            widget.winfo_toplevel(), f"reportes.{job_id}", loader, id_proyeccion,
+            on_success=lambda datos: self._renderizar(job, datos),
+            on_error=lambda e: self._terminar(job, ERROR, error=e)
+        )
+        self._start_polling(widget)
+        return job
+
+    ## @brief Cancel a job. A job already rendering stops at its next stage and its files are removed.
+    ## @return False if the job does not exist or already finished
+    def cancel(self, job_id: str) -> bool:
+        job = self._job(job_id)
+        if job is None or job.terminado:
+            return False
+
+        self.worker.cancel(f"reportes.{job_id}")
+        if job.future is not None:
+            job.future.cancel()
+        solicitar_cancelacion(job.carpeta)
+        self._terminar(job, CANCELADO)
+        return True
+
+    ## @brief Jobs that did not reach a final state
+    def activos(self) -> list:
+        with self._jobs_lock:
+            return [job for job in self.jobs.values() if not job.terminado]
+
+    ## @brief Deliver the progress and the results of the jobs. Must be called from the Tk main thread.
+    ## @return Number of state changes delivered
+    def process_updates(self) -> int:
+        entregados = 0
+        while True:
+            try:
+                job_id, etapa = self._avances.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                break
+            job = self._job(job_id)
+            if job is not None and not job.terminado and job.estado != etapa:
+                job.estado = etapa
+                self._notificar(job)
+                entregados += 1
+
+        while True:
+            try:
+                job_id, future = self._terminados.get_nowait()
+            except queue.Empty:
+                break
+            job = self._job(job_id)
+            if job is None or job.terminado:
+                continue
+
+            if future.cancelled():
+                self._terminar(job, CANCELADO)
+            elif isinstance(future.exception(), ReportCancelled):
+                self._terminar(job, CANCELADO)
+            elif future.exception() is not None:
+                self._terminar(job, ERROR, error=future.exception())
+            else:
+                self._terminar(job, TERMINADO, resultado=future.result())
+            entregados += 1
+        return entregados
+
+    ## @brief Stop the worker processes, cancelling the jobs that did not finish
+    ## @details The jobs being rendered stop at their next stage; the pool is waited for so that their folders
+    ## are removed once the processes are done with them.
+    def shutdown(self) -> None:
+        for job in self.activos():
+            self.cancel(job.id)
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._contexto,
+                                                 initializer=_init_proceso, initargs=(self._avances, self.cache))
+            return self._pool
+
+    ## @brief Second step of a job: send the loaded data to a worker process
+    def _renderizar(self, job: ReportJob, datos) -> None:
+        if job.terminado:
+            return
+        try:
+            cacheado = self._cacheado(job, datos)
+        except Exception as e:
+            ## A broken cache only costs the rendering
+            print(f"No se pudo leer la cache de reportes: {e}")
+            cacheado = None
+        if cacheado is not None:
+            self._terminar(job, TERMINADO, resultado=cacheado)
+            return
+
+        job.estado = EN_COLA
+        self._notificar(job)
+        try:
+            render = self.batch_render if job.lote else self.render
+            job.future = self._get_pool().submit(_ejecutar_render, render, job.id, datos, job.carpeta)
+        except Exception as e:
+            self._terminar(job, ERROR, error=e)
+            return
+        job.future.add_done_callback(lambda future: self._render_terminado(job, future))
+        self._start_polling(job.widget)
+
+    ## @brief Done callback of the rendering, called from a thread of the pool
+    ## @details A job cancelled while rendering has nothing left to deliver, so its folder is removed here as
+    ## soon as the process is done with it, whether or not the Tk thread is still polling.
+    def _render_terminado(self, job: ReportJob, future) -> None:
+        if job.terminado:
+            shutil.rmtree(job.carpeta, ignore_errors=True)
+            self._quitar(job)
+        else:
+            self._terminados.put((job.id, future))
+
+    ## @brief Result of the job taken from the cache, or None if any of its reports has to be rendered
+    def _cacheado(self, job: ReportJob, datos):
+        if not job.lote:
+            return reporte_cacheado(self.cache, datos, job.carpeta)
+        resultados = []
+        for item in datos:
+            subcarpeta = os.path.join(job.carpeta, str(item["id_proyeccion"]))
+            os.makedirs(subcarpeta, exist_ok=True)
+            ruta = reporte_cacheado(self.cache, item, subcarpeta)
+            if ruta is None:
+                ## The worker process renders the batch and copies the cached ones again
+                return None
+            resultados.append((item["id_proyeccion"], ruta, None))
+        return resultados
+
+    def _terminar(self, job: ReportJob, estado: str, resultado=None, error=None) -> None:
+        job.estado = estado
+        if job.lote:
+            job.resultados = resultado
+        else:
+            job.ruta_pdf = resultado
+        job.error = error
+        if job.future is None or job.future.done():
+            if estado != TERMINADO:
+                shutil.rmtree(job.carpeta, ignore_errors=True)
+            self._quitar(job)
+        self._notificar(job)
+
+    def _job(self, job_id: str):
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+
+    def _quitar(self, job: ReportJob) -> None:
+        with self._jobs_lock:
+            self.jobs.pop(job.id, None)
+
+    def _notificar(self, job: ReportJob) -> None:
+        if job.on_update is None:
+            return
+        if job.widget is not None and not widget_exists(job.widget):
+            return
+        job.on_update(job)
+
+    ## @brief Schedule the drain of the progress queue on the toplevel window of widget
+    def _start_polling(self, widget) -> None:
+        if widget is None or (self._poll_widget is not None and widget_exists(self._poll_widget)):
+            return
+        if not widget_exists(widget):
+            return
+        self._poll_widget = widget.winfo_toplevel()
+        self._poll_widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self) -> None:
+        try:
+            self.process_updates()
+        finally:
+            if self.activos() and self._poll_widget is not None and widget_exists(self._poll_widget):
+                self._poll_widget.after(POLL_INTERVAL_MS, self._poll)
+            else:
+                self._poll_widget = None
+
+
+_cola: ReportJobQueue | None = None
+_cola_lock = threading.Lock()
+
+
+## @brief Return the process-wide ReportJobQueue, creating it on first use
+def get_report_queue() -> ReportJobQueue:
+    global _cola
+    with _cola_lock:
+        if _cola is None:
+            _cola = ReportJobQueue()
+        return _cola
+
+
+## @brief Shut down the process-wide report queue. Used on application exit.
+def shutdown_report_queue() -> None:
+    global _cola
+    with _cola_lock:
+        if _cola is not None:
+            _cola.shutdown()
+            _cola = None
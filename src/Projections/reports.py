@@ -0,0 +1,244 @@
+## @file reports.py
+## @brief Rendering of the projection PDF reports.
+## @details Rendering only needs the data loaded by ProyeccionController.load_report_data, which is plain
+## picklable data, so it can run in a worker process. Every report is written to its own folder, so reports
+## rendered at the same time never overwrite each other's chart or PDF.
+## ReportRenderer keeps the expensive state alive between reports: the compiled template, the parsed
+## stylesheets with their fonts and the kaleido process that exports the charts. There is one renderer per
+## process (see get_renderer), so the worker processes of the report queue only pay the warm-up once.
+## With a ReportCache, a projection whose data did not change gets a copy of its cached PDF without rendering,
+## and projections with the same percentages share the chart.
+import os
+import sys
+import uuid
+import threading
+from pathlib import Path
+import jinja2
+from pdf_reports.pdf_reports import HTML, CSS, GLOBALS, SEMANTIC_UI_CSS, STYLESHEET
+from plotly import graph_objects as go
+import plotly.io as pio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Projections.report_cache import ReportCache, get_report_cache, clave_reporte, clave_grafica, huella_archivo, PDF, PNG
+
+## @brief Folder where the reports are written, one subfolder per report
+REPORTS_DIR = os.getenv("REPORTS_DIR", os.path.join(os.getcwd(), "reportes"))
+
+## @brief Template of the projection report
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), 'templates', 'report.pug')
+
+## @brief Stages of the rendering, reported through the avance callback
+ETAPA_GRAFICA = "grafica"
+ETAPA_PDF = "pdf"
+
+_MARCA_CANCELACION = ".cancelado"
+
+
+## @brief Raised inside the rendering when the report was cancelled
+class ReportCancelled(Exception):
+    pass
+
+
+## @brief Copy the cached PDF of datos into carpeta
+## @param huella Fingerprint of the template the PDF was rendered with, the default template if None
+## @return Path of the copy, or None if the PDF is not cached
+def reporte_cacheado(cache: ReportCache, datos: dict, carpeta: str, huella: str = None) -> str | None:
+    clave = clave_reporte(datos, huella or huella_archivo(TEMPLATE_PATH))
+    if cache.obtener(clave, PDF) is None:
+        return None
+    return cache.copiar_a(clave, PDF, os.path.join(carpeta, nombre_reporte(datos)))
+
+
+## @brief Create a new, unique folder for the files of one report
+## @param base Parent folder, REPORTS_DIR by default
+## @param nombre Name of the folder, a random one by default
+def nueva_carpeta_reporte(base: str = None, nombre: str = None) -> str:
+    carpeta = os.path.join(base or REPORTS_DIR, nombre or uuid.uuid4().hex)
+    os.makedirs(carpeta, exist_ok=False)
+    return carpeta
+
+
+## @brief Ask the rendering that writes into carpeta to stop at the next stage
+def solicitar_cancelacion(carpeta: str) -> None:
+    try:
+        Path(carpeta, _MARCA_CANCELACION).touch()
+    except OSError:
+        pass
+
+
+## @brief Whether the report of carpeta was cancelled
+def cancelado(carpeta: str) -> bool:
+    return os.path.exists(os.path.join(carpeta, _MARCA_CANCELACION))
+
+
+## @brief File name of the PDF of a projection
+def nombre_reporte(datos: dict) -> str:
+    return f"proyeccion_report_{datos['id_proyeccion']}_{datos['fecha']}.pdf"
+
+
+## @brief Render the pie chart of the recipe percentages into a PNG
+def render_pie_chart(pie_chart_data: list, ruta: str) -> str:
+    fig = go.Figure(data=[
+        go.Pie(labels=[d["receta"] for d in pie_chart_data], values=[d["porcentaje"] for d in pie_chart_data])
+    ])
+    fig.update_layout(title_text="Distribución de Porcentajes por Receta")
+    fig.write_image(ruta)
+    return ruta
+
+
+## @brief Long-lived renderer of the projection reports
+class ReportRenderer:
+    ## @param template_path Pug template of the report, compiled once
+    ## @param cache ReportCache of the PDFs and charts, None to always render
+    def __init__(self, template_path: str = TEMPLATE_PATH, cache: ReportCache = None) -> None:
+        self.template_path = template_path
+        self.cache = cache
+        self.huella = huella_archivo(template_path)
+        self.env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(os.path.dirname(template_path)),
+            extensions=["pypugjs.ext.jinja.PyPugJSExtension"],
+        )
+        self.env.globals.update(GLOBALS)
+        self.template = self.env.get_template(os.path.basename(template_path))
+        self.font_config = None
+        self.estilos = None
+        self.caliente = False
+        self._lock = threading.Lock()
+
+    ## @brief Load the stylesheets and their fonts and start the chart exporter, once per renderer
+    def calentar(self) -> None:
+        with self._lock:
+            if self.caliente:
+                return
+            self._cargar_estilos()
+            self._iniciar_graficas()
+            self.caliente = True
+
+    def _cargar_estilos(self) -> None:
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+            self.font_config = FontConfiguration()
+        except Exception:
+            ## Without the fonts cache every PDF configures its own fonts, as write_report did
+            self.font_config = None
+        self.estilos = tuple(
+            CSS(filename=ruta, font_config=self.font_config) if self.font_config is not None else CSS(filename=ruta)
+            for ruta in (SEMANTIC_UI_CSS, STYLESHEET)
+        )
+
+    ## @brief kaleido keeps its browser process alive after the first export, so export a tiny chart now
+    def _iniciar_graficas(self) -> None:
+        try:
+            pio.to_image(go.Figure(), format="png", width=10, height=10)
+        except Exception as e:
+            print(f"No se pudo iniciar el exportador de graficas: {e}")
+
+    ## @brief HTML of the report of datos, with the chart at ruta_grafica
+    def html(self, datos: dict, ruta_grafica: str) -> str:
+        return self.template.render(report_data=datos["report_data"], title="Reporte de Proyeccion",
+                                    pie_chart=Path(ruta_grafica).as_uri())
+
+    def _grafica(self, datos: dict, ruta: str) -> str:
+        return render_pie_chart(datos["pie_chart_data"], ruta)
+
+    def _pdf(self, html: str, ruta: str) -> None:
+        documento = HTML(string=html)
+        if self.font_config is not None:
+            documento.write_pdf(ruta, stylesheets=self.estilos, font_config=self.font_config)
+        else:
+            documento.write_pdf(ruta, stylesheets=self.estilos)
+
+    ## @brief Render the PDF report of a projection
+    ## @param datos Data returned by ProyeccionController.load_report_data
+    ## @param carpeta Folder of this report, see nueva_carpeta_reporte
+    ## @param avance avance(etapa) called when each stage starts
+    ## @return Path of the PDF
+    ## @exception ReportCancelled If solicitar_cancelacion was called for carpeta before the PDF was written
+    def render(self, datos: dict, carpeta: str, avance=None) -> str:
+        return self._render(datos, carpeta, avance, carpeta)
+
+    ## @param carpeta_trabajo Folder checked for the cancellation mark (the batch folder in render_batch)
+    def _render(self, datos: dict, carpeta: str, avance, carpeta_trabajo: str) -> str:
+        def etapa(nombre):
+            if cancelado(carpeta_trabajo):
+                raise ReportCancelled()
+            if avance is not None:
+                avance(nombre)
+
+        if cancelado(carpeta_trabajo):
+            raise ReportCancelled()
+        if self.cache is not None:
+            ruta_pdf = reporte_cacheado(self.cache, datos, carpeta, self.huella)
+            if ruta_pdf is not None:
+                return ruta_pdf
+
+        self.calentar()
+        etapa(ETAPA_GRAFICA)
+        ruta_grafica = self._grafica_cacheada(datos, os.path.join(carpeta, "pie_chart.png"))
+
+        etapa(ETAPA_PDF)
+        ruta_pdf = os.path.join(carpeta, nombre_reporte(datos))
+        self._pdf(self.html(datos, ruta_grafica), ruta_pdf)
+        if self.cache is not None:
+            self.cache.guardar(clave_reporte(datos, self.huella), PDF, ruta_pdf)
+        return ruta_pdf
+
+    def _grafica_cacheada(self, datos: dict, ruta: str) -> str:
+        if self.cache is None:
+            return self._grafica(datos, ruta)
+        clave = clave_grafica(datos["pie_chart_data"])
+        if self.cache.copiar_a(clave, PNG, ruta) is not None:
+            return ruta
+        self._grafica(datos, ruta)
+        self.cache.guardar(clave, PNG, ruta)
+        return ruta
+
+    ## @brief Render the reports of several projections in one pass
+    ## @param lista_datos Data of each projection, as returned by ProyeccionController.load_report_data
+    ## @param carpeta Folder of the batch; each report goes into its own subfolder
+    ## @param avance avance(etapa) called when each stage of each report starts
+    ## @return List of (id_proyeccion, path of the PDF or None, exception or None), in the order of lista_datos
+    ## @details A report that fails does not stop the batch; cancelling the batch stops it at the next stage.
+    def render_batch(self, lista_datos: list, carpeta: str, avance=None) -> list:
+        self.calentar()
+        resultados = []
+        for datos in lista_datos:
+            if cancelado(carpeta):
+                raise ReportCancelled()
+            subcarpeta = os.path.join(carpeta, str(datos["id_proyeccion"]))
+            os.makedirs(subcarpeta, exist_ok=True)
+            try:
+                ruta = self._render(datos, subcarpeta, avance, carpeta)
+            except ReportCancelled:
+                raise
+            except Exception as e:
+                resultados.append((datos["id_proyeccion"], None, e))
+                continue
+            resultados.append((datos["id_proyeccion"], ruta, None))
+        return resultados
+
+
+_renderer: ReportRenderer | None = None
+_renderer_lock = threading.Lock()
+
+
+## @brief Return the renderer of this process, creating it on first use
+def get_renderer() -> ReportRenderer:
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ReportRenderer(cache=get_report_cache())
+        return _renderer
+
+
+## @brief Render the PDF report of a projection with the renderer of this process
+## @see ReportRenderer.render
+def render_projection_report(datos: dict, carpeta: str, avance=None) -> str:
+    return get_renderer().render(datos, carpeta, avance)
+
+
+## @brief Render the reports of several projections with the renderer of this process
+## @see ReportRenderer.render_batch
+def render_projection_reports(lista_datos: list, carpeta: str, avance=None) -> list:
+    return get_renderer().render_batch(lista_datos, carpeta, avance)
@@ -0,0 +1,154 @@
+## @file snapshot.py
+## @brief Immutable snapshot of the projections a report is built from.
+## @details A snapshot holds the projection, its recipe links, the recipes and their ingredients with the
+## quantities, loaded with three queries whatever the number of projections, recipes or ingredients.
+## The recipe tables, the ingredient totals and the chart data of the report are all derived from it in
+## memory, so they always describe the same state of the database.
+import os
+import sys
+from dataclasses import dataclass
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Projections.model import Proyeccion, ProyeccionReceta
+from src.Projections import totals
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+
+
+## @brief Ingredient of a recipe with its quantity for comensales_base diners
+@dataclass(frozen=True)
+class IngredienteSnapshot:
+    nombre: str
+    unidad: str
+    cantidad: float
+
+
+## @brief Recipe of a projection with its percentage and ingredients
+@dataclass(frozen=True)
+class RecetaSnapshot:
+    id_receta: int
+    nombre: str
+    comensales_base: int
+    porcentaje: int
+    ingredientes: tuple = ()
+
+    ## @brief Factor applied to the quantities of the recipe for the given comensales
+    def factor(self, comensales: int) -> float:
+        if not self.comensales_base:
+            return 0.0
+        return (comensales / self.comensales_base) * (float(self.porcentaje) / 100)
+
+
+## @brief A projection with everything its report needs
+@dataclass(frozen=True)
+class ProjectionSnapshot:
+    id_proyeccion: int
+    nombre: str
+    periodo: str
+    comensales: int
+    fecha: date
+    recetas: tuple = ()
+    ## Whether the materialized totals of the projection (src.Projections.totals) are stale
+    totales_obsoletos: bool = True
+
+    ## @brief Load the snapshot of a projection
+    ## @exception ValueError If the projection does not exist
+    @staticmethod
+    def load(session, id_proyeccion: int) -> "ProjectionSnapshot":
+        return ProjectionSnapshot.load_many(session, [id_proyeccion])[0]
+
+    ## @brief Load the snapshots of several projections with three queries, in the order of ids
+    ## @exception ValueError If any of the projections does not exist
+    @staticmethod
+    def load_many(session, ids) -> list["ProjectionSnapshot"]:
+        ids = list(ids)
+        if not ids:
+            return []
+
+        proyecciones = {
+            p.id_proyeccion: p
+            for p in session.query(Proyeccion).filter(Proyeccion.id_proyeccion.in_(set(ids))).all()
+        }
+        for id_proyeccion in ids:
+            if id_proyeccion not in proyecciones:
+                raise ValueError(f"No se encontro la proyeccion con ID {id_proyeccion}")
+
+        enlaces = session.query(
+            ProyeccionReceta.id_proyeccion,
+            ProyeccionReceta.porcentaje,
+            Receta.id_receta,
+            Receta.nombre_receta,
+            Receta.comensales_base
+        ).join(Receta, Receta.id_receta == ProyeccionReceta.id_receta)\
+            .filter(ProyeccionReceta.id_proyeccion.in_(proyecciones.keys()))\
+            .order_by(ProyeccionReceta.id_proyeccion, ProyeccionReceta.id_receta)\
+            .all()
+
+        ingredientes = {}
+        recetas_ids = {enlace.id_receta for enlace in enlaces}
+        if recetas_ids:
+            rows = session.query(
+                Receta_Ingredientes.id_receta,
+                Ingrediente.nombre,
+                Ingrediente.unidad_medida,
+                Receta_Ingredientes.cantidad
+            ).join(Ingrediente, Ingrediente.id_ingrediente == Receta_Ingredientes.id_ingrediente)\
+                .filter(Receta_Ingredientes.id_receta.in_(recetas_ids))\
+                .order_by(Receta_Ingredientes.id_receta, Receta_Ingredientes.id_ingrediente)\
+                .all()
+            for id_receta, nombre, unidad, cantidad in rows:
+                ingredientes.setdefault(id_receta, []).append(IngredienteSnapshot(nombre, unidad, float(cantidad)))
+
+        recetas = {}
+        for enlace in enlaces:
+            recetas.setdefault(enlace.id_proyeccion, []).append(RecetaSnapshot(
+                id_receta=enlace.id_receta,
+                nombre=enlace.nombre_receta,
+                comensales_base=enlace.comensales_base,
+                porcentaje=enlace.porcentaje,
+                ingredientes=tuple(ingredientes.get(enlace.id_receta, ()))
+            ))
+
+        return [
+            ProjectionSnapshot(
+                id_proyeccion=id_proyeccion,
+                nombre=proyecciones[id_proyeccion].nombre,
+                periodo=proyecciones[id_proyeccion].periodo,
+                comensales=proyecciones[id_proyeccion].comensales,
+                fecha=proyecciones[id_proyeccion].fecha,
+                recetas=tuple(recetas.get(id_proyeccion, ())),
+                totales_obsoletos=bool(proyecciones[id_proyeccion].totales_obsoletos)
+            )
+            for id_proyeccion in ids
+        ]
+
+    ## @brief Total of each ingredient as (nombre, unidad, cantidad) rows, sorted by totals.row_key
+    def totales(self) -> list[tuple]:
+        acumulado = {}
+        for receta in self.recetas:
+            factor = receta.factor(self.comensales)
+            for ingrediente in receta.ingredientes:
+                clave = (ingrediente.nombre, ingrediente.unidad)
+                acumulado[clave] = acumulado.get(clave, 0) + ingrediente.cantidad * factor
+        return sorted(((nombre, unidad, cantidad) for (nombre, unidad), cantidad in acumulado.items()), key=totals.row_key)
+
+    ## @brief Percentage of each recipe, for the pie chart of the report
+    def pie_chart_data(self) -> list[dict]:
+        return [{"receta": receta.nombre, "porcentaje": receta.porcentaje} for receta in self.recetas]
+
+    ## @brief Table of each recipe of the report, without the totals
+    def recipe_tables(self) -> list[dict]:
+        return [
+            {
+                "receta": receta.nombre,
+                "ingredientes": [
+                    {"nombre": i.nombre, "cantidad": i.cantidad, "unidad": i.unidad} for i in receta.ingredientes
+                ],
+                "porcentaje": receta.porcentaje,
+                "comensales": self.comensales,
+                "fecha": self.fecha
+            }
+            for receta in self.recetas
+        ]
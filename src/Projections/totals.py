@@ -0,0 +1,180 @@
+## @file totals.py
+## @brief Materialized ingredient totals of the projections.
+## @details The totals of each projection are stored in proyeccion_ingredientes. Proyeccion.totales_obsoletos
+## marks them as stale, and the write paths set it in the same transaction as the change, only for the
+## projections the change contributes to:
+## - a Receta_Ingredientes row added, changed or removed: the projections that use the recipe
+## - the comensales_base of a recipe: the projections that use the recipe
+## - the name or unit of an ingredient: the projections whose recipes use it
+## - the comensales or percentages of a projection: that projection
+## Stale totals are recomputed on the next read (get_totals) or in the background (refresh_stale, run
+## periodically by src.Projections.maintenance). The reports read the stored totals of the fresh projections
+## (stored_rows) and compute the stale ones in memory, without writing.
+import os
+import sys
+from sqlalchemy import select, update, delete, insert, or_, func, cast, Float
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Projections.model import Proyeccion, ProyeccionReceta, ProyeccionIngrediente
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+
+
+## @brief Sort key of the (nombre, unidad, cantidad) rows, the same for rows aggregated by the database and in memory
+def row_key(row) -> tuple:
+    return row[0], row[1]
+
+
+## @brief Build the {nombre: {cantidad, unidad}} totals from (nombre, unidad, cantidad) rows.
+## An ingredient registered with two different units keeps both totals, the second one keyed as "nombre (unidad)".
+## The rows are sorted with row_key first, so which unit keeps the bare name doesn't depend on the order
+## (or the collation) they were read in.
+def totals_by_name(rows) -> dict:
+    total_ingredientes = {}
+    for nombre, unidad, cantidad in sorted(rows, key=row_key):
+        clave = nombre
+        if clave in total_ingredientes and total_ingredientes[clave]["unidad"] != unidad:
+            clave = f"{nombre} ({unidad})"
+        if clave in total_ingredientes:
+            total_ingredientes[clave]["cantidad"] += float(cantidad)
+        else:
+            total_ingredientes[clave] = {
+                "cantidad": float(cantidad),
+                "unidad": unidad
+            }
+    return total_ingredientes
+
+
+## @brief (nombre, unidad, cantidad) rows of a projection aggregated by the database in a single query
+def compute_rows(session, id_proyeccion: int) -> list:
+    factor = (cast(Proyeccion.comensales, Float) / Receta.comensales_base) * ProyeccionReceta.porcentaje / 100.0
+    return session.query(
+        Ingrediente.nombre,
+        Ingrediente.unidad_medida,
+        func.sum(Receta_Ingredientes.cantidad * factor)
+    ).select_from(ProyeccionReceta)\
+        .join(Proyeccion, Proyeccion.id_proyeccion == ProyeccionReceta.id_proyeccion)\
+        .join(Receta, Receta.id_receta == ProyeccionReceta.id_receta)\
+        .join(Receta_Ingredientes, Receta_Ingredientes.id_receta == Receta.id_receta)\
+        .join(Ingrediente, Ingrediente.id_ingrediente == Receta_Ingredientes.id_ingrediente)\
+        .filter(ProyeccionReceta.id_proyeccion == id_proyeccion)\
+        .group_by(Ingrediente.nombre, Ingrediente.unidad_medida)\
+        .order_by(Ingrediente.nombre, Ingrediente.unidad_medida)\
+        .all()
+
+
+## @brief Mark as stale the totals of the projections affected by a change. Does not commit.
+## @param proyecciones IDs of projections whose comensales or percentages changed
+## @param recetas IDs of recipes whose ingredients or comensales_base changed
+## @param ingredientes IDs of ingredients whose name or unit changed
+def mark_stale(session, proyecciones=(), recetas=(), ingredientes=()) -> None:
+    condiciones = []
+    if proyecciones:
+        condiciones.append(Proyeccion.id_proyeccion.in_(list(proyecciones)))
+    if recetas:
+        condiciones.append(Proyeccion.id_proyeccion.in_(
+            select(ProyeccionReceta.id_proyeccion).where(ProyeccionReceta.id_receta.in_(list(recetas)))
+        ))
+    if ingredientes:
+        condiciones.append(Proyeccion.id_proyeccion.in_(
+            select(ProyeccionReceta.id_proyeccion)
+            .join(Receta_Ingredientes, Receta_Ingredientes.id_receta == ProyeccionReceta.id_receta)
+            .where(Receta_Ingredientes.id_ingrediente.in_(list(ingredientes)))
+        ))
+    if not condiciones:
+        return
+    session.execute(
+        update(Proyeccion).where(or_(*condiciones)).values(totales_obsoletos=True),
+        execution_options={"synchronize_session": "fetch"}
+    )
+
+
+## @brief Mark the totals of a projection as fresh before they are recomputed. Does not commit.
+## @details Called before the rows are read: the UPDATE takes the row lock of the projection, so a change committed
+## before it is visible to the read, and a change made meanwhile blocks on the lock in its own mark_stale and
+## sets the flag again once this transaction commits. Clearing the flag after the read would lose that change.
+def claim(session, id_proyeccion: int) -> None:
+    session.execute(
+        update(Proyeccion).where(Proyeccion.id_proyeccion == id_proyeccion).values(totales_obsoletos=False),
+        execution_options={"synchronize_session": "fetch"}
+    )
+
+
+## @brief Replace the stored totals of a projection with rows read after claim(). Does not commit.
+def store(session, id_proyeccion: int, rows) -> None:
+    session.execute(delete(ProyeccionIngrediente).where(ProyeccionIngrediente.id_proyeccion == id_proyeccion))
+    filas = [
+        {"id_proyeccion": id_proyeccion, "nombre": nombre, "unidad": unidad, "cantidad": float(cantidad)}
+        for nombre, unidad, cantidad in rows
+    ]
+    if filas:
+        session.execute(insert(ProyeccionIngrediente), filas)
+
+
+## @brief Recompute and store the totals of a projection
+## @return The (nombre, unidad, cantidad) rows
+def refresh(session, id_proyeccion: int, commit: bool = True) -> list:
+    try:
+        claim(session, id_proyeccion)
+        rows = compute_rows(session, id_proyeccion)
+        store(session, id_proyeccion, rows)
+        if commit:
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return rows
+
+
+## @brief Totals of a projection, recomputed only if they are stale
+## @return {nombre: {cantidad, unidad}}, as ProyeccionController.calculate_total_ingredients
+## @exception ValueError If the projection does not exist
+def get_totals(session, id_proyeccion: int) -> dict:
+    obsoletos = session.execute(
+        select(Proyeccion.totales_obsoletos).where(Proyeccion.id_proyeccion == id_proyeccion)
+    ).scalar_one_or_none()
+    if obsoletos is None:
+        raise ValueError(f"No se encontro la proyeccion con ID {id_proyeccion}")
+    if obsoletos:
+        return totals_by_name(refresh(session, id_proyeccion))
+
+    rows = session.execute(
+        select(ProyeccionIngrediente.nombre, ProyeccionIngrediente.unidad, ProyeccionIngrediente.cantidad)
+        .where(ProyeccionIngrediente.id_proyeccion == id_proyeccion)
+        .order_by(ProyeccionIngrediente.nombre, ProyeccionIngrediente.unidad)
+    ).all()
+    return totals_by_name(rows)
+
+
+## @brief Stored (nombre, unidad, cantidad) rows of several projections with a single query
+## @return {id_proyeccion: rows}; a projection without stored rows is missing
+def stored_rows(session, ids) -> dict:
+    ids = list(ids)
+    if not ids:
+        return {}
+    rows = session.execute(
+        select(ProyeccionIngrediente.id_proyeccion, ProyeccionIngrediente.nombre,
+               ProyeccionIngrediente.unidad, ProyeccionIngrediente.cantidad)
+        .where(ProyeccionIngrediente.id_proyeccion.in_(set(ids)))
+        .order_by(ProyeccionIngrediente.id_proyeccion, ProyeccionIngrediente.nombre, ProyeccionIngrediente.unidad)
+    ).all()
+    por_proyeccion = {}
+    for id_proyeccion, nombre, unidad, cantidad in rows:
+        por_proyeccion.setdefault(id_proyeccion, []).append((nombre, unidad, cantidad))
+    return por_proyeccion
+
+
+## @brief Recompute the stale totals of the active projections, e.g. from a background task
+## @param limite Maximum number of projections to recompute, all of them if None
+## @return Number of projections recomputed
+def refresh_stale(session, limite: int = None) -> int:
+    consulta = select(Proyeccion.id_proyeccion)\
+        .where(Proyeccion.totales_obsoletos == True, Proyeccion.estatus == True)\
+        .order_by(Proyeccion.id_proyeccion)
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    ids = session.execute(consulta).scalars().all()
+    for id_proyeccion in ids:
+        refresh(session, id_proyeccion)
+    return len(ids)
@@ -1,8 +1,6 @@
 from typing import Self
 from sqlalchemy import Column, Integer, String
-from sqlalchemy.orm import declarative_base
-
-Base = declarative_base()
+from src.database.connector import Base
 
 ##@brief Provider model class
 ##@details This class is used to represent a provider in the database
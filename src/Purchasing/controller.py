@@ -0,0 +1,105 @@
+import os
+import sys
+from datetime import date, timedelta
+from sqlalchemy import select, func, cast, Float, distinct
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Purchasing.model import ConversionUnidad
+from src.Purchasing.suppliers import SupplierMatrix
+from src.Projections.model import Proyeccion, ProyeccionReceta
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+
+
+## @brief Class for building the purchasing plans of several projections
+class PurchasingController:
+
+    ## @brief Consolidated shopping list of the selected projections, aggregated by the database in one query.
+    ## @details Each recipe contributes cantidad * comensales / comensales_base * porcentaje / 100, converted to
+    ## the canonical unit of conversion_unidades (e.g. kg and g are both added up in g). Ingredients are
+    ## grouped by name without case or surrounding spaces; units without a conversion are kept as written.
+    ## @param desde First date of the projections, inclusive
+    ## @param hasta Last date of the projections, inclusive
+    ## @param ids IDs of the projections; combined with the dates when both are given
+    ## @param solo_activas Leave out the projections in the trash can
+    ## @return List of {nombre, unidad, cantidad, proyecciones} sorted by name, where proyecciones is the
+    ## number of projections that need the ingredient
+    @staticmethod
+    def consolidate(session, desde: date = None, hasta: date = None, ids=None, solo_activas: bool = True) -> list[dict]:
+        if ids is not None and not ids:
+            return []
+
+        factor = (cast(Proyeccion.comensales, Float) / Receta.comensales_base) * ProyeccionReceta.porcentaje / 100.0
+        unidad_escrita = func.lower(func.trim(Ingrediente.unidad_medida))
+        unidad = func.coalesce(ConversionUnidad.unidad_canonica, unidad_escrita)
+        nombre = func.lower(func.trim(Ingrediente.nombre))
+
+        consulta = select(
+            func.min(Ingrediente.nombre),
+            unidad,
+            func.sum(Receta_Ingredientes.cantidad * factor * func.coalesce(ConversionUnidad.factor, 1.0)),
+            func.count(distinct(Proyeccion.id_proyeccion))
+        ).select_from(ProyeccionReceta)\
+            .join(Proyeccion, Proyeccion.id_proyeccion == ProyeccionReceta.id_proyeccion)\
+            .join(Receta, Receta.id_receta == ProyeccionReceta.id_receta)\
+            .join(Receta_Ingredientes, Receta_Ingredientes.id_receta == Receta.id_receta)\
+            .join(Ingrediente, Ingrediente.id_ingrediente == Receta_Ingredientes.id_ingrediente)\
+            .outerjoin(ConversionUnidad, ConversionUnidad.unidad == unidad_escrita)
+
+        if ids is not None:
+            consulta = consulta.where(Proyeccion.id_proyeccion.in_(list(ids)))
+        if desde is not None:
+            consulta = consulta.where(Proyeccion.fecha >= desde)
+        if hasta is not None:
+            consulta = consulta.where(Proyeccion.fecha <= hasta)
+        if solo_activas:
+            consulta = consulta.where(Proyeccion.estatus == True)
+
+        consulta = consulta.group_by(nombre, unidad).order_by(nombre, unidad)
+
+        return [
+            {"nombre": nombre_ingrediente, "unidad": unidad_canonica, "cantidad": float(cantidad or 0), "proyecciones": proyecciones}
+            for nombre_ingrediente, unidad_canonica, cantidad, proyecciones in session.execute(consulta).all()
+        ]
+
+    ## @brief Consolidated shopping list of the week (Monday to Sunday) that contains dia
+    @staticmethod
+    def weekly_plan(session, dia: date = None) -> list[dict]:
+        dia = dia or date.today()
+        lunes = dia - timedelta(days=dia.weekday())
+        return PurchasingController.consolidate(session, desde=lunes, hasta=lunes + timedelta(days=6))
+
+    ## @brief Costed purchase plan of the selected projections, buying each ingredient from the cheapest provider.
+    ## @details The projections are selected and consolidated as in consolidate (one query) and the price catalog
+    ## is reduced by the database to the best price of each provider per ingredient (one query); the assignment
+    ## is then solved in memory, see src.Purchasing.suppliers.
+    ## @param max_proveedores Maximum number of providers to buy from, no limit if None
+    ## @param preferidos IDs of the preferred providers
+    ## @param excluidos IDs of the providers that must not be used
+    ## @param tolerancia A preferred provider wins an ingredient it sells at most this fraction above the cheapest price
+    ## @return {"lineas": [{nombre, unidad, cantidad, id_proveedor, proveedor, precio_unitario, subtotal}],
+    ## "sin_proveedor": [{nombre, unidad, cantidad}], "proveedores": [{id_proveedor, proveedor, lineas, subtotal}],
+    ## "total": cost of the plan}
+    @staticmethod
+    def cheapest_plan(session, desde: date = None, hasta: date = None, ids=None, max_proveedores: int = None,
+                      preferidos=(), excluidos=(), tolerancia: float = 0.0) -> dict:
+        necesidades = PurchasingController.consolidate(session, desde=desde, hasta=hasta, ids=ids)
+        return SupplierMatrix.load(session, necesidades).solve(
+            max_proveedores=max_proveedores, preferidos=preferidos, excluidos=excluidos, tolerancia=tolerancia
+        )
+
+    ## @brief Register or replace the conversion of a unit into a canonical unit
+    @staticmethod
+    def set_conversion(session, unidad: str, unidad_canonica: str, factor: float) -> ConversionUnidad:
+        if not unidad or not unidad_canonica or factor is None or factor <= 0:
+            raise ValueError("La unidad, la unidad canónica y un factor mayor a 0 son obligatorios")
+        conversion = session.get(ConversionUnidad, unidad.strip().lower())
+        if conversion is None:
+            conversion = ConversionUnidad(unidad, unidad_canonica, factor)
+            session.add(conversion)
+        else:
+            conversion.unidad_canonica = unidad_canonica
+            conversion.factor = factor
+        session.commit()
+        return conversion
@@ -0,0 +1,82 @@
+import os
+import sys
+from sqlalchemy import Column, String, Float, select, insert
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.database.connector import Base
+
+## @brief Conversions loaded by the schema migration: (unit, canonical unit, factor to the canonical unit)
+## @details Units are stored in lower case; the recipes are matched with lower(trim(unidad_medida)).
+CONVERSIONES_BASE = [
+    ("g", "g", 1.0),
+    ("gr", "g", 1.0),
+    ("grs", "g", 1.0),
+    ("gramo", "g", 1.0),
+    ("gramos", "g", 1.0),
+    ("mg", "g", 0.001),
+    ("kg", "g", 1000.0),
+    ("kilo", "g", 1000.0),
+    ("kilos", "g", 1000.0),
+    ("kilogramo", "g", 1000.0),
+    ("kilogramos", "g", 1000.0),
+    ("lb", "g", 453.592),
+    ("oz", "g", 28.3495),
+    ("ml", "ml", 1.0),
+    ("mililitro", "ml", 1.0),
+    ("mililitros", "ml", 1.0),
+    ("cl", "ml", 10.0),
+    ("l", "ml", 1000.0),
+    ("lt", "ml", 1000.0),
+    ("lts", "ml", 1000.0),
+    ("litro", "ml", 1000.0),
+    ("litros", "ml", 1000.0),
+    ("taza", "ml", 240.0),
+    ("tazas", "ml", 240.0),
+    ("cda", "ml", 15.0),
+    ("cucharada", "ml", 15.0),
+    ("cdta", "ml", 5.0),
+    ("cucharadita", "ml", 5.0),
+    ("pza", "pza", 1.0),
+    ("pzas", "pza", 1.0),
+    ("pieza", "pza", 1.0),
+    ("piezas", "pza", 1.0),
+    ("docena", "pza", 12.0),
+]
+
+
+##@brief Unit conversion model class
+##@details Each row converts a unit into the canonical unit of its dimension (g, ml or pza)
+class ConversionUnidad(Base):
+
+    __tablename__ = "conversion_unidades"
+
+    unidad = Column(String(50), primary_key=True)
+    unidad_canonica = Column(String(50), nullable=False)
+    factor = Column(Float, nullable=False)
+
+    ##@brief Constructor for the unit conversion class
+    ##@param unidad Unit in lower case, as written in the ingredients
+    ##@param unidad_canonica Unit the quantities are converted to
+    ##@param factor Quantity of unidad_canonica in one unidad
+    def __init__(self, unidad: str, unidad_canonica: str, factor: float) -> None:
+        self.unidad = unidad.strip().lower()
+        self.unidad_canonica = unidad_canonica
+        self.factor = factor
+
+    def __repr__(self) -> str:
+        return f"ConversionUnidad({self.unidad} = {self.factor} {self.unidad_canonica})"
+
+
+##@brief Insert the conversions of CONVERSIONES_BASE that are not in the table yet
+##@param connection Connection (or session) inside the transaction of the caller
+##@return Number of conversions inserted
+def seed_conversions(connection) -> int:
+    existentes = set(connection.execute(select(ConversionUnidad.unidad)).scalars().all())
+    nuevas = [
+        {"unidad": unidad, "unidad_canonica": canonica, "factor": factor}
+        for unidad, canonica, factor in CONVERSIONES_BASE if unidad not in existentes
+    ]
+    if nuevas:
+        connection.execute(insert(ConversionUnidad), nuevas)
+    return len(nuevas)
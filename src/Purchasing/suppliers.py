@@ -0,0 +1,201 @@
+## @file suppliers.py
+## @brief Assignment of the cheapest providers to the ingredients of a purchasing plan.
+## @details The price catalog (Costos) is reduced by the database to the best price of each provider for each
+## needed ingredient, already converted to the canonical unit of the plan. Prices are per unit of the
+## ingredient with the same name, as in the cost catalog, and are converted with conversion_unidades. The result
+## is a dense (ingredients x providers) cost matrix, so every constraint is solved with NumPy in memory:
+## - without a limit of providers, each ingredient goes to its cheapest provider;
+## - preferred providers win any ingredient they offer within a tolerance of the cheapest price;
+## - with a maximum number of providers the set of providers is chosen greedily (most ingredients covered,
+##   then lowest cost) and improved by swapping providers in and out until no swap lowers the cost.
+import os
+import sys
+import numpy as np
+from sqlalchemy import select, func, cast, Float
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Costs.model import Costos
+from src.Providers.model import Proveedor
+from src.Ingredients.model import Ingrediente
+from src.Purchasing.model import ConversionUnidad
+
+## @brief Maximum number of improvement passes of the swap search
+MAX_PASADAS = 50
+
+
+def _clave(nombre: str) -> str:
+    return (nombre or "").strip().lower()
+
+
+## @brief Cost matrix of the needed ingredients against the providers that sell them
+class SupplierMatrix:
+
+    ## @param necesidades List of {nombre, unidad, cantidad} in canonical units, e.g. PurchasingController.consolidate
+    ## @param precios Rows of (nombre in lower case, unidad, id_proveedor, precio per unit)
+    ## @param proveedores {id_proveedor: nombre}
+    def __init__(self, necesidades: list[dict], precios, proveedores: dict) -> None:
+        self.necesidades = list(necesidades)
+        self.proveedores_ids = sorted({id_proveedor for _, _, id_proveedor, _ in precios})
+        self.proveedores = {id_proveedor: proveedores.get(id_proveedor, "Desconocido") for id_proveedor in self.proveedores_ids}
+        columnas = {id_proveedor: j for j, id_proveedor in enumerate(self.proveedores_ids)}
+        filas = {}
+        for i, necesidad in enumerate(self.necesidades):
+            filas.setdefault((_clave(necesidad["nombre"]), necesidad["unidad"]), []).append(i)
+
+        self.cantidades = np.array([float(n["cantidad"]) for n in self.necesidades])
+        self.precios = np.full((len(self.necesidades), len(self.proveedores_ids)), np.inf)
+        for nombre, unidad, id_proveedor, precio in precios:
+            for i in filas.get((nombre, unidad), ()):
+                j = columnas[id_proveedor]
+                self.precios[i, j] = min(self.precios[i, j], float(precio))
+        self.costos = self.precios * self.cantidades[:, None]
+
+    ## @brief Load the best price of every provider for each need, with a single query
+    @staticmethod
+    def load(session, necesidades: list[dict]) -> "SupplierMatrix":
+        nombres = sorted({_clave(n["nombre"]) for n in necesidades})
+        if not nombres:
+            return SupplierMatrix(necesidades, [], {})
+
+        ## Unit of each ingredient name, the one the catalog prices are written in
+        unidades = select(
+            func.lower(func.trim(Ingrediente.nombre)).label("nombre"),
+            func.min(Ingrediente.unidad_medida).label("unidad")
+        ).group_by(func.lower(func.trim(Ingrediente.nombre))).subquery()
+
+        nombre = func.lower(func.trim(Costos.nombre_ingrediente))
+        unidad_escrita = func.lower(func.trim(unidades.c.unidad))
+        unidad = func.coalesce(ConversionUnidad.unidad_canonica, unidad_escrita, "pza")
+        consulta = select(
+            nombre,
+            unidad,
+            Costos.id_proveedor,
+            func.min(cast(Costos.precio, Float) / func.coalesce(ConversionUnidad.factor, 1.0)),
+            func.min(Proveedor.nombre)
+        ).select_from(Costos)\
+            .outerjoin(Proveedor, Proveedor.id_proveedor == Costos.id_proveedor)\
+            .outerjoin(unidades, unidades.c.nombre == nombre)\
+            .outerjoin(ConversionUnidad, ConversionUnidad.unidad == unidad_escrita)\
+            .where(nombre.in_(nombres))\
+            .group_by(nombre, unidad, Costos.id_proveedor)
+
+        filas = session.execute(consulta).all()
+        proveedores = {id_proveedor: nombre_proveedor for _, _, id_proveedor, _, nombre_proveedor in filas}
+        return SupplierMatrix(necesidades, [fila[:4] for fila in filas], proveedores)
+
+    ## @brief Total cost of buying every coverable need from the providers of the columns, and the chosen column of each need
+    def _evaluar(self, columnas) -> tuple[float, np.ndarray, np.ndarray]:
+        costos = self.costos[:, columnas]
+        if costos.shape[1] == 0:
+            return 0.0, np.full(len(self.necesidades), -1), np.zeros(len(self.necesidades), dtype=bool)
+        mejor = np.argmin(costos, axis=1)
+        valores = costos[np.arange(len(self.necesidades)), mejor]
+        cubiertas = np.isfinite(valores)
+        return float(valores[cubiertas].sum()), np.asarray(columnas)[mejor], cubiertas
+
+    ## @brief Choose at most maximo providers: forced ones first, then greedy, then improving swaps
+    def _elegir_proveedores(self, maximo: int, forzadas: list[int], permitidas: list[int]) -> list[int]:
+        ofrecidas = np.isfinite(self.costos)
+        ## An uncovered need costs more than buying everything else, so coverage always comes first
+        finitos = self.costos[ofrecidas]
+        penalizacion = (finitos.max() if finitos.size else 1.0) * len(self.necesidades) + 1.0
+
+        def objetivo(mejor):
+            return np.where(np.isfinite(mejor), mejor, penalizacion).sum()
+
+        elegidas = list(forzadas)
+        mejor = self.costos[:, elegidas].min(axis=1) if elegidas else np.full(len(self.necesidades), np.inf)
+        candidatas = [j for j in permitidas if j not in elegidas]
+        while len(elegidas) < maximo and candidatas:
+            con_cada = np.minimum(mejor[:, None], self.costos[:, candidatas])
+            valores = np.where(np.isfinite(con_cada), con_cada, penalizacion).sum(axis=0)
+            k = int(np.argmin(valores))
+            if valores[k] >= objetivo(mejor):
+                break
+            elegidas.append(candidatas.pop(k))
+            mejor = self.costos[:, elegidas].min(axis=1)
+
+        for _ in range(MAX_PASADAS):
+            mejorado = False
+            actual = objetivo(mejor)
+            for posicion in range(len(forzadas), len(elegidas)):
+                resto = elegidas[:posicion] + elegidas[posicion + 1:]
+                base = self.costos[:, resto].min(axis=1) if resto else np.full(len(self.necesidades), np.inf)
+                fuera = [j for j in permitidas if j not in elegidas]
+                if not fuera:
+                    break
+                con_cada = np.minimum(base[:, None], self.costos[:, fuera])
+                valores = np.where(np.isfinite(con_cada), con_cada, penalizacion).sum(axis=0)
+                k = int(np.argmin(valores))
+                if valores[k] < actual - 1e-9:
+                    elegidas[posicion] = fuera[k]
+                    mejor = self.costos[:, elegidas].min(axis=1)
+                    actual = objetivo(mejor)
+                    mejorado = True
+            if not mejorado:
+                break
+        return elegidas
+
+    ## @brief Build the costed purchase plan
+    ## @param max_proveedores Maximum number of providers to buy from, no limit if None
+    ## @param preferidos IDs of preferred providers; with a limit they are always part of the chosen set
+    ## @param excluidos IDs of providers that must not be used
+    ## @param tolerancia A preferred provider wins an ingredient if it costs at most this fraction more than the cheapest
+    ## @return {"lineas", "sin_proveedor", "proveedores", "total"}, see PurchasingController.cheapest_plan
+    def solve(self, max_proveedores: int = None, preferidos=(), excluidos=(), tolerancia: float = 0.0) -> dict:
+        indice = {id_proveedor: j for j, id_proveedor in enumerate(self.proveedores_ids)}
+        excluidos = set(excluidos)
+        permitidas = [j for j, id_proveedor in enumerate(self.proveedores_ids) if id_proveedor not in excluidos]
+        preferidas = [indice[p] for p in dict.fromkeys(preferidos) if p in indice and p not in excluidos]
+
+        if max_proveedores is not None:
+            if max_proveedores < 1:
+                raise ValueError("El número máximo de proveedores debe ser mayor a 0")
+            if len(preferidas) > max_proveedores:
+                raise ValueError("Hay más proveedores preferidos que el máximo de proveedores")
+            columnas = self._elegir_proveedores(max_proveedores, preferidas, permitidas)
+        else:
+            columnas = permitidas
+
+        _, eleccion, cubiertas = self._evaluar(columnas)
+        if preferidas and tolerancia >= 0:
+            eleccion = self._preferir(eleccion, cubiertas, [j for j in preferidas if j in columnas], tolerancia)
+        return self._plan(eleccion, cubiertas)
+
+    def _preferir(self, eleccion, cubiertas, preferidas, tolerancia) -> np.ndarray:
+        if not preferidas:
+            return eleccion
+        filas = np.arange(len(self.necesidades))
+        costos_preferidos = self.costos[:, preferidas]
+        mejor_preferida = np.asarray(preferidas)[np.argmin(costos_preferidos, axis=1)]
+        costo_preferido = self.costos[filas, mejor_preferida]
+        costo_elegido = np.where(cubiertas, self.costos[filas, np.maximum(eleccion, 0)], np.inf)
+        usar = cubiertas & np.isfinite(costo_preferido) & (costo_preferido <= costo_elegido * (1 + tolerancia) + 1e-9)
+        return np.where(usar, mejor_preferida, eleccion)
+
+    def _plan(self, eleccion, cubiertas) -> dict:
+        lineas, sin_proveedor = [], []
+        proveedores = {}
+        for i, necesidad in enumerate(self.necesidades):
+            base = {"nombre": necesidad["nombre"], "unidad": necesidad["unidad"], "cantidad": float(necesidad["cantidad"])}
+            if not cubiertas[i]:
+                sin_proveedor.append(base)
+                continue
+            j = int(eleccion[i])
+            id_proveedor = self.proveedores_ids[j]
+            linea = dict(base, id_proveedor=id_proveedor, proveedor=self.proveedores[id_proveedor],
+                         precio_unitario=float(self.precios[i, j]), subtotal=float(self.costos[i, j]))
+            lineas.append(linea)
+            resumen = proveedores.setdefault(id_proveedor, {"id_proveedor": id_proveedor,
+                                                            "proveedor": self.proveedores[id_proveedor],
+                                                            "lineas": 0, "subtotal": 0.0})
+            resumen["lineas"] += 1
+            resumen["subtotal"] += linea["subtotal"]
+
+        return {
+            "lineas": lineas,
+            "sin_proveedor": sin_proveedor,
+            "proveedores": sorted(proveedores.values(), key=lambda p: -p["subtotal"]),
+            "total": sum(linea["subtotal"] for linea in lineas),
+        }
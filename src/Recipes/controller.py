@@ -1,16 +1,39 @@
 import sys
 import os
+import unicodedata
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from sqlalchemy import or_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, func, select, insert, update, delete, tuple_
+from sqlalchemy.orm import Session, selectinload
 from src.Recipes.model import Receta, Receta_Ingredientes
 from src.Ingredients.model import Ingrediente
 from src.Projections.model import ProyeccionReceta
+from src.Projections import totals
 from src.database.connector import Base
+from src.database.pagination import Page, paginate
 from datetime import date
 
+
+## @brief Key that compares ingredient names and units like the accent and case insensitive collation of MariaDB
+## @details "Azúcar", "azucar" and "AZUCAR " get the same key, so the rows the database matched for a requested
+## pair are mapped back to it, and lines that the unique index would consider the same are added up.
+def _clave_ingrediente(nombre: str, unidad: str) -> tuple:
+    return tuple(
+        "".join(c for c in unicodedata.normalize("NFKD", texto.strip()) if not unicodedata.combining(c)).casefold()
+        for texto in (nombre, unidad)
+    )
+
+
+## @brief Add up the quantities of the lines that resolved to the same ingredient
+## @return {id_ingrediente: cantidad}
+def _por_ingrediente(lineas: dict, ids: dict) -> dict:
+    cantidades = {}
+    for clave, cantidad in lineas.items():
+        cantidades[ids[clave]] = cantidades.get(ids[clave], 0) + cantidad
+    return cantidades
+
+
 class RecetasController:
     
     ## @brief Create a new recipe in the database.
@@ -35,6 +58,156 @@ class RecetasController:
         session.commit()
         return receta
     
+    ## @brief Create a recipe with its ingredients in a single transaction.
+    ## @details Every (name, unit) pair of the lines is resolved with one query, the missing ingredients are inserted
+    ## with one executemany and read back with one more query, the links are inserted with one executemany and
+    ## everything is committed once.
+    ## @param ingredientes Lines as dicts with nombre, unidad_medida and cantidad; lines with the same name and unit are added up
+    ## @param clasificacion_ingrediente Classification of the ingredients created for names that do not exist yet
+    @staticmethod
+    def create_recipe_with_ingredients(session: Session, nombre_receta: str, clasificacion: str, periodo: str,
+                                       comensales_base: int, ingredientes: list[dict],
+                                       clasificacion_ingrediente: str = "") -> Receta:
+        if not nombre_receta or not clasificacion or not periodo or comensales_base <= 0:
+            raise ValueError("Los campos nombre_receta, clasificacion, periodo y comensales_base son obligatorios y deben ser válidos.")
+        lineas = RecetasController._ingredient_lines(ingredientes)
+        if not lineas:
+            raise ValueError("La receta debe tener al menos un ingrediente.")
+
+        try:
+            receta = Receta(
+                nombre_receta=nombre_receta,
+                clasificacion=clasificacion,
+                periodo=periodo,
+                comensales_base=comensales_base,
+                estatus=True
+            )
+            session.add(receta)
+
+            session.flush()
+
+            ids = RecetasController._ensure_ingredients(session, lineas.keys(), clasificacion_ingrediente)
+            session.execute(insert(Receta_Ingredientes), [
+                {"id_receta": receta.id_receta, "id_ingrediente": id_ingrediente, "cantidad": cantidad}
+                for id_ingrediente, cantidad in _por_ingrediente(lineas, ids).items()
+            ])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return receta
+
+    ## @brief Replace the ingredients of a recipe with the submitted lines, writing only the differences.
+    ## @details The lines are compared with the stored Receta_Ingredientes: new ingredients are inserted, changed
+    ## quantities are updated and the missing ones are deleted, each group with one statement, in one transaction.
+    ## Ingredients that do not exist yet are created like in create_recipe_with_ingredients.
+    ## @param ingredientes Lines as dicts with nombre, unidad_medida and cantidad
+    ## @return Number of links inserted, updated and deleted, as {"agregados", "actualizados", "eliminados"}
+    @staticmethod
+    def replace_recipe_ingredients(session: Session, id_receta: int, ingredientes: list[dict],
+                                   clasificacion_ingrediente: str = "") -> dict:
+        lineas = RecetasController._ingredient_lines(ingredientes)
+        if not lineas:
+            raise ValueError("La receta debe tener al menos un ingrediente.")
+        if session.get(Receta, id_receta) is None:
+            raise ValueError(f"Receta con ID {id_receta} no encontrada.")
+
+        try:
+            ids = RecetasController._ensure_ingredients(session, lineas.keys(), clasificacion_ingrediente)
+            deseadas = _por_ingrediente(lineas, ids)
+            actuales = dict(session.execute(
+                select(Receta_Ingredientes.id_ingrediente, Receta_Ingredientes.cantidad)
+                .where(Receta_Ingredientes.id_receta == id_receta)
+            ).all())
+
+            agregados = [{"id_receta": id_receta, "id_ingrediente": id_ingrediente, "cantidad": cantidad}
+                         for id_ingrediente, cantidad in deseadas.items() if id_ingrediente not in actuales]
+            actualizados = [{"id_receta": id_receta, "id_ingrediente": id_ingrediente, "cantidad": cantidad}
+                            for id_ingrediente, cantidad in deseadas.items()
+                            if id_ingrediente in actuales and actuales[id_ingrediente] != cantidad]
+            eliminados = [id_ingrediente for id_ingrediente in actuales if id_ingrediente not in deseadas]
+
+            if eliminados:
+                session.execute(
+                    delete(Receta_Ingredientes).where(Receta_Ingredientes.id_receta == id_receta,
+                                                      Receta_Ingredientes.id_ingrediente.in_(eliminados)),
+                    execution_options={"synchronize_session": False}
+                )
+            if actualizados:
+                ## Bulk UPDATE by primary key, executed as one executemany
+                session.execute(update(Receta_Ingredientes), actualizados)
+            if agregados:
+                session.execute(insert(Receta_Ingredientes), agregados)
+            if agregados or actualizados or eliminados:
+                totals.mark_stale(session, recetas=[id_receta])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return {"agregados": len(agregados), "actualizados": len(actualizados), "eliminados": len(eliminados)}
+
+    ## @brief Validate the ingredient lines of a recipe and add up the ones with the same name and unit
+    ## @details Names and units are compared ignoring case and accents, the spelling of the first line is kept.
+    ## @return {(nombre, unidad_medida): cantidad} in the order of the lines
+    @staticmethod
+    def _ingredient_lines(ingredientes: list[dict]) -> dict:
+        lineas = {}
+        claves = {}
+        for linea in ingredientes:
+            nombre = (linea.get("nombre") or "").strip()
+            unidad = (linea.get("unidad_medida") or "").strip()
+            if not nombre or not unidad:
+                raise ValueError("Cada ingrediente necesita nombre y unidad de medida.")
+            try:
+                cantidad = float(linea.get("cantidad"))
+            except (TypeError, ValueError):
+                raise ValueError(f"La cantidad de {nombre} debe ser un número válido.")
+            if cantidad <= 0:
+                raise ValueError(f"La cantidad de {nombre} debe ser mayor a 0.")
+            clave = claves.setdefault(_clave_ingrediente(nombre, unidad), (nombre, unidad))
+            lineas[clave] = lineas.get(clave, 0) + cantidad
+        return lineas
+
+    ## @brief IDs of the ingredients of several (name, unit) pairs, inserting the missing ones. Does not commit.
+    ## @details One query resolves the existing pairs; the missing ingredients are inserted with one executemany and
+    ## read back with one more query, since INSERT ... RETURNING is not available on every MariaDB version.
+    ## @return {(nombre, unidad_medida): id_ingrediente} for every pair
+    @staticmethod
+    def _ensure_ingredients(session: Session, pares, clasificacion: str = "") -> dict:
+        pares = list(pares)
+        ids = RecetasController._resolve_ingredients(session, pares)
+        faltantes = [par for par in pares if par not in ids]
+        if faltantes:
+            session.execute(insert(Ingrediente), [
+                {"nombre": nombre, "clasificacion": clasificacion, "unidad_medida": unidad}
+                for nombre, unidad in faltantes
+            ])
+            ids.update(RecetasController._resolve_ingredients(session, faltantes))
+        return ids
+
+    ## @brief IDs of the ingredients that exist for several (name, unit) pairs, with one query
+    ## @details The names are compared with the collation of the database, so on MariaDB "azucar" finds "Azúcar";
+    ## the rows are mapped back to the requested pairs with _clave_ingrediente, which ignores case and accents
+    ## like that collation. With repeated rows the oldest one is used.
+    ## @return {(nombre, unidad_medida): id_ingrediente}, the pairs without an ingredient are missing
+    @staticmethod
+    def _resolve_ingredients(session: Session, pares) -> dict:
+        pares = list(pares)
+        if not pares:
+            return {}
+        filas = session.execute(
+            select(Ingrediente.nombre, Ingrediente.unidad_medida, Ingrediente.id_ingrediente)
+            .where(tuple_(Ingrediente.nombre, Ingrediente.unidad_medida).in_(pares))
+            .order_by(Ingrediente.id_ingrediente)
+        ).all()
+        encontrados = {}
+        for nombre, unidad, id_ingrediente in filas:
+            encontrados.setdefault(_clave_ingrediente(nombre, unidad), id_ingrediente)
+        return {
+            (nombre, unidad): encontrados[_clave_ingrediente(nombre, unidad)]
+            for nombre, unidad in pares if _clave_ingrediente(nombre, unidad) in encontrados
+        }
+
     ## @brief This method retrieves a recipe by its ID. This method is static and does not require an instance of the class to be called.
     @staticmethod
     def get_recipe_by_id(session: Session, id_receta: int) -> Receta:
@@ -56,8 +229,9 @@ class RecetasController:
             receta.clasificacion = clasificacion
         if periodo:
             receta.periodo = periodo
-        if comensales_base and comensales_base > 0:
+        if comensales_base and comensales_base > 0 and comensales_base != receta.comensales_base:
             receta.comensales_base = comensales_base
+            totals.mark_stale(session, recetas=[id_receta])
         if status is not None:
             receta.estatus = status
 
@@ -86,6 +260,7 @@ class RecetasController:
         )
         
         session.add(receta_ingrediente)
+        totals.mark_stale(session, recetas=[id_receta])
         session.commit()
         return receta_ingrediente
     
@@ -101,6 +276,7 @@ class RecetasController:
         
         if receta_ingrediente:
             session.delete(receta_ingrediente)
+            totals.mark_stale(session, recetas=[id_receta])
             session.commit()
             return True
         return False
@@ -128,6 +304,8 @@ class RecetasController:
         receta = session.query(Receta).filter(Receta.id_receta == numero_receta).first()
 
         if receta:
+            # The projections that use the recipe lose its share of the totals
+            totals.mark_stale(session, recetas=[numero_receta])
             # First delete all recipe-ingredient relationships
             session.query(Receta_Ingredientes).filter(Receta_Ingredientes.id_receta == numero_receta).delete()
             # Then delete the recipe
@@ -136,16 +314,14 @@ class RecetasController:
             return True
         return False
  
-    ## @brief List all active recipes along with their ingredients.
+    ## @brief Build the dict payload of a list of recipes whose ingredients were already eager loaded.
     @staticmethod
-    def list_all_recipes_with_ingredients(session: Session) -> list[dict]:
-        recetas = session.query(Receta).filter(Receta.estatus == True).all()
+    def _recipes_to_dicts(recetas: list[Receta]) -> list[dict]:
         listado = []
-
         for receta in recetas:
             ingredientes = []
             for ri in receta.receta_ingredientes:
-                ingrediente = session.query(Ingrediente).filter(Ingrediente.id_ingrediente == ri.id_ingrediente).first()
+                ingrediente = ri.ingrediente
                 ingredientes.append({
                     "nombre_ingrediente": ingrediente.nombre,
                     "clasificacion": ingrediente.clasificacion,
@@ -166,10 +342,27 @@ class RecetasController:
         
         return listado
 
+    ## @brief Query of active recipes that loads ingredient links and ingredients in one extra round trip.
+    @staticmethod
+    def _active_recipes_query(session: Session):
+        return session.query(Receta).filter(Receta.estatus == True).options(
+            selectinload(Receta.receta_ingredientes).joinedload(Receta_Ingredientes.ingrediente)
+        )
+ 
+    ## @brief List all active recipes along with their ingredients.
+    @staticmethod
+    def list_all_recipes_with_ingredients(session: Session) -> list[dict]:
+        recetas = RecetasController._active_recipes_query(session).all()
+        return RecetasController._recipes_to_dicts(recetas)
+
     ## Return list of recipes according to search filters
+    ## @details Recipes are sorted by name; with limite the result is one keyset page, see src.database.pagination.
+    ## @param despues Cursor of the last recipe already shown (Page.cursor of the previous page)
+    ## @param limite Number of recipes of the page, None for all of them
+    ## @param contar Also count every recipe matching the filters (Page.total)
     @staticmethod
-    def search_recipes(session, nombre=None, periodo=None, clasificacion=None) -> list[dict]:
-        query = session.query(Receta).filter(Receta.estatus == True)
+    def search_recipes(session, nombre=None, periodo=None, clasificacion=None, despues=None, limite=None, contar=False) -> Page:
+        query = RecetasController._active_recipes_query(session)
 
         if nombre:
             nombre = f"%{nombre.lower()}%"
@@ -181,29 +374,7 @@ class RecetasController:
         if clasificacion:
             query = query.filter(Receta.clasificacion == clasificacion)
 
-        recetas = query.all()
-
-        listado = []
-        for receta in recetas:
-            ingredientes = []
-            for ri in receta.receta_ingredientes:
-                ingrediente = session.query(Ingrediente).filter(Ingrediente.id_ingrediente == ri.id_ingrediente).first()
-                ingredientes.append({
-                    "nombre_ingrediente": ingrediente.nombre,
-                    "clasificacion": ingrediente.clasificacion,
-                    "id_ingrediente": ingrediente.id_ingrediente,
-                    "Cantidad": ri.cantidad,
-                    "Unidad": ingrediente.unidad_medida 
-                })
-            
-            receta_data = {
-                "id_receta": receta.id_receta,
-                "nombre_receta": receta.nombre_receta,
-                "clasificacion_receta": receta.clasificacion,
-                "periodo": receta.periodo,
-                "comensales_base": receta.comensales_base,
-                "ingredientes": ingredientes
-            }
-            listado.append(receta_data)
-        
-        return listado
\ No newline at end of file
+        pagina = paginate(session, query, [(Receta.nombre_receta, False), (Receta.id_receta, False)],
+                          lambda receta: (receta.nombre_receta, receta.id_receta),
+                          despues=despues, limite=limite, contar=contar)
+        return pagina.con_items(RecetasController._recipes_to_dicts(pagina))
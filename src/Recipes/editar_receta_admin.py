@@ -3,7 +3,6 @@
 
 import customtkinter as ctk
 from src.Recipes.controller import RecetasController
-from src.Ingredients.controller import IngredienteController
 from src.database.connector import Connector
 from src.Recipes.nueva_receta_admin import NuevaRecetaView
 
@@ -113,20 +112,7 @@ class EditarRecetaView(NuevaRecetaView):
                 self.mostrar_error("Debe seleccionar una categoría")
                 return
 
-            RecetasController.update_recipe(
-                session=self.session,
-                id_receta=self.id_receta,
-                nombre_receta=nombre,
-                clasificacion=clasificacion,
-                periodo=periodo,
-                comensales_base=comensales
-            )
-
-            receta_actualizada = RecetasController.get_recipe_by_id(self.session, self.id_receta)
-
-            for ri in receta_actualizada.receta_ingredientes:
-                RecetasController.remove_ingredient_from_recipe(self.session, self.id_receta, ri.id_ingrediente)
-
+            ingredientes = []
             ingredientes_agregados = set()
 
             for fila in self.filas_ingredientes:
@@ -147,13 +133,25 @@ class EditarRecetaView(NuevaRecetaView):
                         self.mostrar_error(f"Cantidad inválida para '{nombre_valor}'")
                         return
 
-                    ing = IngredienteController.get_ingrediente_by_name_and_unit(self.session, nombre_valor, unidad_valor)
-                    if not ing:
-                        ing = IngredienteController.create_ingrediente(self.session, nombre_valor, "", unidad_valor)
+                    ingredientes.append({
+                        "nombre": nombre_valor,
+                        "cantidad": cantidad_valor,
+                        "unidad_medida": unidad_valor
+                    })
+
+            # Only the ingredients that changed are written, in one transaction; the rows are validated
+            # before anything is written, so an invalid row no longer leaves the recipe half updated
+            RecetasController.replace_recipe_ingredients(self.session, self.id_receta, ingredientes)
 
-                    RecetasController.add_ingredient_to_recipe(self.session, self.id_receta, ing.id_ingrediente, cantidad_valor)
+            RecetasController.update_recipe(
+                session=self.session,
+                id_receta=self.id_receta,
+                nombre_receta=nombre,
+                clasificacion=clasificacion,
+                periodo=periodo,
+                comensales_base=comensales
+            )
 
-            self.session.commit()
             self.session.close()
             self.mostrar_exito("Receta actualizada correctamente")
             self.volver_a_recetas()
@@ -3,7 +3,7 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Boolean, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Boolean, Date, Index
 from sqlalchemy.orm import relationship
 from src.database.connector import Base
 
@@ -11,6 +11,11 @@ from src.database.connector import Base
 ## @brief Recipes model class, this class is used to represent a recipe in the database
 class Receta(Base): 
     __tablename__ = "recetas" 
+    ## Filters of search_recipes and of the trash can purge
+    __table_args__ = (
+        Index("ix_recetas_estatus_periodo_clasificacion", "estatus", "periodo", "clasificacion"),
+        Index("ix_recetas_estatus_fecha_eliminado", "estatus", "fecha_eliminado"),
+    )
 
     id_receta = Column(Integer, primary_key=True, autoincrement=True)
     nombre_receta = Column(String(100), nullable=False)
@@ -4,11 +4,25 @@ from pathlib import Path
 from PIL import Image
 from src.Recipes.controller import RecetasController
 from src.database.connector import Connector
+from src.components.busqueda import DebouncedSearch
+from src.components.virtual_list import VirtualList
+from src.database.pagination import PAGE_SIZE
 from src.Recipes.nueva_receta_admin import NuevaRecetaView
 from src.Recipes.editar_receta_admin import EditarRecetaView
 import os
 import ctypes
 
+## @brief Search executed on the database worker for the recipes list
+def buscar_recetas(session, texto, periodo=None, clasificacion=None, despues=None, limite=None):
+    return RecetasController.search_recipes(session, nombre=texto or None, periodo=periodo, clasificacion=clasificacion,
+                                            despues=despues, limite=limite)
+
+
+## @brief Narrow an already loaded list of recipes with a longer search text
+def filtrar_recetas(recetas, texto):
+    return [r for r in recetas if texto in r["nombre_receta"].lower()]
+
+
 ## @class RecetasAdminView
 ## @brief Admin interface for managing recipes
 class RecetasAdminView(ctk.CTkFrame):
@@ -61,7 +75,7 @@ class RecetasAdminView(ctk.CTkFrame):
                                         height=35, fg_color="#dcd1cd", text_color="black", 
                                         border_color="#C82333", border_width=1)
         self.input_busqueda.pack(side="left", padx=(0, 10), fill="x", expand=True)
-        self.input_busqueda.bind("<KeyRelease>", lambda e: self.cargar_recetas())
+        self.input_busqueda.bind("<KeyRelease>", lambda e: self.busqueda.schedule(self.input_busqueda.get(), **self.filtros_actuales()))
 
         self.filtro_tiempo = ctk.CTkComboBox(busqueda_frame, values=["Todos", "Desayuno", "Comida"],
                                      height=35, width=180,fg_color="#dcd1cd", text_color="black", 
@@ -93,9 +107,22 @@ class RecetasAdminView(ctk.CTkFrame):
             
             encabezado.grid_columnconfigure(i, weight=0, minsize=col_widths[i])
                     
-        self.recetas_scroll_frame = ctk.CTkScrollableFrame(self.contenedor, fg_color="#dcd1cd", corner_radius=0)
+        self.recetas_scroll_frame = VirtualList(
+            self.contenedor, self.crear_card_receta, self.llenar_card_receta,
+            altura_de=self.altura_card_receta, mensaje_vacio="No hay recetas guardadas.", fuente=self.fuente_card,
+            on_end_reached=lambda: self.busqueda.load_more()
+        )
         self.recetas_scroll_frame.pack(fill="both", expand=True, padx=20, pady=10)
 
+        self.busqueda = DebouncedSearch(
+            self.recetas_scroll_frame, "recetas.busqueda", buscar_recetas,
+            on_results=self.mostrar_recetas,
+            local_filter=filtrar_recetas,
+            on_loading=lambda: self.recetas_scroll_frame.mostrar_mensaje("Cargando..."),
+            on_error=lambda e: self.recetas_scroll_frame.mostrar_mensaje(f"Error al cargar recetas\n{e}", "#b8191a"),
+            page_size=PAGE_SIZE,
+            on_more=self.recetas_scroll_frame.append_rows
+        )
         self.cargar_recetas()
 
     ## @brief Opens the add new recipe view
@@ -112,138 +139,115 @@ class RecetasAdminView(ctk.CTkFrame):
         )
         nueva_vista.pack(fill="both", expand=True)
 
-    ## @brief Loads all recipes into the scrollable frame
-    def cargar_recetas(self):
-        for widget in self.recetas_scroll_frame.winfo_children():
-            widget.destroy()
-
-        nombre = self.input_busqueda.get().strip()
+    ## @brief Combo box filters in the form expected by RecetasController.search_recipes
+    def filtros_actuales(self):
         periodo = self.filtro_tiempo.get()
         clasificacion = self.filtro_categoria.get()
+        return {
+            "periodo": periodo if periodo != "Todos" and periodo != "Tiempo" else None,
+            "clasificacion": clasificacion if clasificacion != "Todos" and clasificacion != "Categoría" else None
+        }
 
-        recetas = RecetasController.search_recipes(
-            self.session,
-            nombre=nombre if nombre else None,
-            periodo=periodo if periodo != "Todos" and periodo != "Tiempo" else None,
-            clasificacion=clasificacion if clasificacion != "Todos" and clasificacion != "Categoría" else None
-        )
+    ## @brief Loads the recipes matching the search box and filters right away
+    ## @details The search runs on a background worker; a newer search supersedes the one in flight.
+    def cargar_recetas(self):
+        self.busqueda.search_now(self.input_busqueda.get(), **self.filtros_actuales())
 
-        if not recetas:
-            ctk.CTkLabel(self.recetas_scroll_frame, text="No hay recetas guardadas.", font=self.fuente_card).pack(pady=20)
-            return
+    ## @brief Renders the recipes returned by the search
+    ## @param recetas List of recipe dicts from RecetasController.search_recipes
+    def mostrar_recetas(self, recetas):
+        self.recetas_scroll_frame.set_rows(recetas)
+
+    ## @brief Height of the card of a recipe, one line per ingredient
+    def altura_card_receta(self, receta):
+        return max(40, 25 * len(receta["ingredientes"]) + 10)
 
-        for receta in recetas:
-            nombres = [i["nombre_ingrediente"] for i in receta["ingredientes"]]
-            cantidades = [i["Cantidad"] for i in receta["ingredientes"]]
-            unidades = [i["Unidad"] for i in receta["ingredientes"]]
-
-            self.crear_card_receta(
-                receta["id_receta"],
-                receta["nombre_receta"],
-                nombres,
-                cantidades,
-                unidades,
-                receta["comensales_base"],
-                receta["periodo"],
-                receta["clasificacion_receta"]
-            )
-
-
-    ## @brief Creates a recipe card
-    ## @param nombre Recipe name
-    ## @param ingredientes List of ingredients
-    ## @param cantidades List of quantities
-    ## @param unidades List of units
-    ## @param comensales Number of servings
-    ## @param tiempo Meal time
-    ## @param categoria Recipe category
-    def crear_card_receta(self, id_receta, nombre, ingredientes, cantidades, unidades, comensales, tiempo, categoria):
-        card = ctk.CTkFrame(self.recetas_scroll_frame, fg_color="white", corner_radius=12)
-        card.pack(fill="x", pady=8, padx=25)
+    ## @brief Creates an empty recipe card, filled and recycled by llenar_card_receta
+    ## @param parent Canvas of the virtual list
+    def crear_card_receta(self, parent):
+        card = ctk.CTkFrame(parent, fg_color="white", corner_radius=12)
         
         col_widths = [30, 250, 250, 120, 120, 120, 150, 150, 80]
+        card.col_widths = col_widths
 
         for i, width in enumerate(col_widths):
             card.grid_columnconfigure(i, weight=0, minsize=width)
-        
-        nombre_frame = ctk.CTkFrame(card, width=col_widths[1], height=25, fg_color="white")
+
+        def celda(columna, wraplength=None):
+            frame = ctk.CTkFrame(card, width=col_widths[columna], height=25, fg_color="white")
+            frame.grid_propagate(False)  # Evita que el frame cambie de tamaño
+            label = ctk.CTkLabel(frame, text="", text_color="black", font=self.fuente_card, anchor="w",
+                                 wraplength=wraplength or 0)
+            label.pack(side="left", fill="both", expand=True, padx=5)
+            return frame, label
+
+        nombre_frame, card.nombre_label = celda(1, col_widths[1]-10)
         nombre_frame.grid(row=0, column=1, sticky="w")
-        nombre_frame.grid_propagate(False)  # Evita que el frame cambie de tamaño
-        
-        nombre_label = ctk.CTkLabel(nombre_frame, text=nombre, text_color="black", 
-                                    font=self.fuente_card, anchor="w", 
-                                    wraplength=col_widths[1]-10)
-        nombre_label.pack(side="left", fill="both", expand=True, padx=5)
-        
-        for idx in range(len(ingredientes)):
-            if idx > 0:
-                ctk.CTkFrame(card, width=col_widths[1], height=25, fg_color="white").grid(row=idx, column=1, sticky="w")
-            
-            
-            ing_frame = ctk.CTkFrame(card, width=col_widths[2], height=25, fg_color="white")
-            ing_frame.grid(row=idx, column=2, sticky="w")
-            ing_frame.grid_propagate(False)
-            
-            ing_label = ctk.CTkLabel(ing_frame, text=ingredientes[idx], text_color="black", 
-                                    font=self.fuente_card, anchor="w", 
-                                    wraplength=col_widths[2]-10)
-            ing_label.pack(side="left", fill="both", expand=True, padx=5)
-            
-            
-            cant_frame = ctk.CTkFrame(card, width=col_widths[3], height=25, fg_color="white")
-            cant_frame.grid(row=idx, column=3, sticky="w")
-            cant_frame.grid_propagate(False)
-            
-            cant_label = ctk.CTkLabel(cant_frame, text=cantidades[idx], text_color="black", font=self.fuente_card, anchor="w")
-            cant_label.pack(side="left", fill="both", expand=True, padx=5)
-            
-            unid_frame = ctk.CTkFrame(card, width=col_widths[4], height=25, fg_color="white")
-            unid_frame.grid(row=idx, column=4, sticky="w")
-            unid_frame.grid_propagate(False)
-            
-            unid_label = ctk.CTkLabel(unid_frame, text=unidades[idx], text_color="black", font=self.fuente_card, anchor="w")
-            unid_label.pack(side="left", fill="both", expand=True, padx=5)
-        
 
-        com_frame = ctk.CTkFrame(card, width=col_widths[5], height=25, fg_color="white")
+        com_frame, card.com_label = celda(5)
         com_frame.grid(row=0, column=5, sticky="w")
-        com_frame.grid_propagate(False)
-        
-        com_label = ctk.CTkLabel(com_frame, text=str(comensales), text_color="black", font=self.fuente_card, anchor="w")
-        com_label.pack(side="left", fill="both", expand=True, padx=5)
-        
-        tiempo_frame = ctk.CTkFrame(card, width=col_widths[6], height=25, fg_color="white")
+
+        tiempo_frame, card.tiempo_label = celda(6)
         tiempo_frame.grid(row=0, column=6, sticky="w")
-        tiempo_frame.grid_propagate(False)
-        
-        tiempo_label = ctk.CTkLabel(tiempo_frame, text=str(tiempo), text_color="black", font=self.fuente_card, anchor="w")
-        tiempo_label.pack(side="left", fill="both", expand=True, padx=5)
-        
-        cat_frame = ctk.CTkFrame(card, width=col_widths[7], height=25, fg_color="white")
+
+        cat_frame, card.cat_label = celda(7)
         cat_frame.grid(row=0, column=7, sticky="w")
-        cat_frame.grid_propagate(False)
-        
-        cat_label = ctk.CTkLabel(cat_frame, text=str(categoria), text_color="black", font=self.fuente_card, anchor="w")
-        cat_label.pack(side="left", fill="both", expand=True, padx=5)
-        
+
+        ## Ingredient lines are created on demand and reused between recipes
+        card.celda = celda
+        card.lineas = []
+
         acciones_frame = ctk.CTkFrame(card, fg_color="white", width=col_widths[8], height=25)
         acciones_frame.grid(row=0, column=8, sticky="e")
         
-        btn_editar = ctk.CTkButton(
+        card.btn_editar = ctk.CTkButton(
             acciones_frame, image=self.img_pen, text="", width=30, height=30,
-            fg_color="white", hover_color="#E8E8E8", corner_radius=5,
-            command=lambda: self.abrir_editar_receta(id_receta)
+            fg_color="white", hover_color="#E8E8E8", corner_radius=5
         )
-        btn_editar.pack(side="left", padx=(5, 2))
+        card.btn_editar.pack(side="left", padx=(5, 2))
 
-        btn_eliminar = ctk.CTkButton(
+        card.btn_eliminar = ctk.CTkButton(
             acciones_frame,
             image=self.img_bote,
             text="", width=30, height=30,
-            fg_color="white", hover_color="#E8E8E8", corner_radius=5,
-            command=lambda rid=id_receta, card=card: self.confirmar_eliminacion(rid, card)
+            fg_color="white", hover_color="#E8E8E8", corner_radius=5
         )
-        btn_eliminar.pack(side="left", padx=2)
+        card.btn_eliminar.pack(side="left", padx=2)
+        return card
+
+    ## @brief Fills a recipe card with the data of a recipe
+    ## @param card Card created by crear_card_receta
+    ## @param receta Recipe dict from RecetasController.search_recipes
+    ## @param index Position of the recipe in the list
+    def llenar_card_receta(self, card, receta, index):
+        ingredientes = receta["ingredientes"]
+        id_receta = receta["id_receta"]
+
+        card.nombre_label.configure(text=receta["nombre_receta"])
+        card.com_label.configure(text=str(receta["comensales_base"]))
+        card.tiempo_label.configure(text=str(receta["periodo"]))
+        card.cat_label.configure(text=str(receta["clasificacion_receta"]))
+
+        while len(card.lineas) < len(ingredientes):
+            idx = len(card.lineas)
+            linea = [card.celda(2, card.col_widths[2]-10), card.celda(3), card.celda(4)]
+            for columna, (frame, _) in zip((2, 3, 4), linea):
+                frame.grid(row=idx, column=columna, sticky="w")
+            card.lineas.append(linea)
+
+        for idx, linea in enumerate(card.lineas):
+            if idx < len(ingredientes):
+                ingrediente = ingredientes[idx]
+                textos = (ingrediente["nombre_ingrediente"], ingrediente["Cantidad"], ingrediente["Unidad"])
+                for (frame, label), texto in zip(linea, textos):
+                    label.configure(text=texto)
+                    frame.grid()
+            else:
+                for frame, _ in linea:
+                    frame.grid_remove()
+
+        card.btn_editar.configure(command=lambda: self.abrir_editar_receta(id_receta))
+        card.btn_eliminar.configure(command=lambda: self.confirmar_eliminacion(id_receta))
 
     ## @brief Handles recipe edit action
     def abrir_editar_receta(self, id_receta):
@@ -255,8 +259,7 @@ class RecetasAdminView(ctk.CTkFrame):
 
     ## @brief Confirms and deletes a recipe
     ## @param id_receta Recipe ID
-    ## @param card_widget Widget to destroy
-    def confirmar_eliminacion(self, id_receta, card_widget):
+    def confirmar_eliminacion(self, id_receta):
         if RecetasController.recipe_in_projection(self.session, id_receta):
             self.mostrar_error("No se puede eliminar \nLa receta está siendo utilizada en una proyección activa.")
             return
@@ -283,8 +286,8 @@ class RecetasAdminView(ctk.CTkFrame):
             try:
                 success = RecetasController.deactivate_recipe(self.session, id_receta)
                 if success:
-                    card_widget.destroy()
-                    print(f"Receta eliminada con ID: {id_receta}")
+                    self.recetas_scroll_frame.remove_where(lambda r: r["id_receta"] == id_receta)
+                    self.busqueda.remove_where(lambda r: r["id_receta"] == id_receta)
                 else:
                     self.mostrar_error("No se encontró la receta para eliminar.")
             except Exception as e:
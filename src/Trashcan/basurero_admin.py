@@ -6,13 +6,35 @@ from tkcalendar import DateEntry
 import tkinter as tk
 import os, ctypes
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Union
 from PIL import Image
 from src.database.connector import Connector
-from src.Trashcan.controller import TrashcanController
+from src.Trashcan.controller import TrashcanController, retention_weeks, purge_date
 from src.Recipes.model import Receta
-from src.Projections.model import Proyeccion
+from src.components.busqueda import DebouncedSearch
+from src.components.virtual_list import VirtualList
+from src.database.pagination import PAGE_SIZE
+
+
+## @brief Narrow a list of deleted recipes or projections (dicts of search_deleted_projections) with the search text
+def filtrar_basurero(items, texto):
+    return [
+        item for item in items
+        if (isinstance(item, Receta) and texto in item.nombre_receta.lower()) or
+           (isinstance(item, dict) and ((item["nombre"] and texto in item["nombre"].lower()) or
+                                        (str(item["fecha"]) and texto in str(item["fecha"]))))
+    ]
+
+
+## @brief Search executed on the database worker for the trashcan view
+## @details The text and the date are filtered by the database and the items are loaded one page at a time.
+## The date is the deletion date of the recipes and the date of the projections.
+def buscar_en_basurero(session, texto, vista, fecha=None, despues=None, limite=None):
+    if vista == "recetas":
+        return TrashcanController.search_deleted_recipes(session, texto, fecha_eliminado=fecha,
+                                                         despues=despues, limite=limite)
+    return TrashcanController.search_deleted_projections(session, texto, fecha=fecha, despues=despues, limite=limite)
 
 
 class AdminTrashcanView(ctk.CTkFrame):
@@ -25,6 +47,12 @@ class AdminTrashcanView(ctk.CTkFrame):
         self.session = self.connector.get_session()
         
         self.current_view = "recetas"  
+        ## Date picked in the calendar, None until a date is selected
+        self.fecha = None
+        ## Weeks before the items are purged, to show the date of the permanent deletion
+        self.semanas_retencion = retention_weeks()
+        ## IDs of the recipes or projections of the current view checked for the bulk actions
+        self.seleccion = set()
 
         BASE_DIR = Path(__file__).resolve()
         font_path = BASE_DIR.parents[2] / "res" / "fonts" / "PortLligatSlab-Regular.ttf"
@@ -90,6 +118,18 @@ class AdminTrashcanView(ctk.CTkFrame):
         self.date_entry.pack(fill="x", padx=5, pady=4)
         self.date_entry.bind("<<DateEntrySelected>>", self.filtrar_por_fecha)
 
+        # Botón para limpiar filtros
+        self.btn_limpiar = ctk.CTkButton(
+            filtros,
+            text="Limpiar filtros",
+            font=self.fuente_small,
+            fg_color="#b8191a",
+            hover_color="#a71718",
+            corner_radius=8,
+            command=self.limpiar_filtros
+        )
+        self.btn_limpiar.grid(row=1, column=0, columnspan=2, pady=(5, 0), sticky="e")
+
         botones = ctk.CTkFrame(self.contenedor, fg_color="transparent")
         botones.pack(fill="x", padx=30, pady=(10, 5))
 
@@ -110,9 +150,44 @@ class AdminTrashcanView(ctk.CTkFrame):
         )
         self.btn_proyecciones.pack(side="left", expand=True, padx=(10, 0), fill="x")
 
-        self.cards_scroll = ctk.CTkScrollableFrame(self.contenedor, fg_color="#dcd1cd", corner_radius=0)
+        acciones = ctk.CTkFrame(self.contenedor, fg_color="transparent")
+        acciones.pack(fill="x", padx=30, pady=(5, 0))
+
+        self.lbl_seleccion = ctk.CTkLabel(acciones, text="", font=self.fuente_small, text_color="#b8191a")
+        self.lbl_seleccion.pack(side="left")
+
+        self.btn_eliminar_seleccion = ctk.CTkButton(
+            acciones, text="Eliminar seleccionados", image=self.img_eliminar, font=self.fuente_small,
+            fg_color="transparent", border_color="#b8191a", border_width=1,
+            text_color="#b8191a", hover_color="#cccccc", corner_radius=8,
+            command=self.eliminar_seleccion
+        )
+        self.btn_eliminar_seleccion.pack(side="right", padx=(10, 0))
+
+        self.btn_restaurar_seleccion = ctk.CTkButton(
+            acciones, text="Restaurar seleccionados", image=self.img_restaurar, font=self.fuente_small,
+            fg_color="transparent", border_color="#b8191a", border_width=1,
+            text_color="#b8191a", hover_color="#cccccc", corner_radius=8,
+            command=self.restaurar_seleccion
+        )
+        self.btn_restaurar_seleccion.pack(side="right")
+
+        self.cards_scroll = VirtualList(
+            self.contenedor, self.crear_card, self.llenar_card, altura_de=self.altura_card,
+            espaciado=10, margen_x=10, mensaje_vacio="El basurero está vacío", fuente=self.fuente_card,
+            on_end_reached=lambda: self.busqueda.load_more()
+        )
         self.cards_scroll.pack(fill="both", expand=True, padx=20, pady=10)
-        
+
+        self.busqueda = DebouncedSearch(
+            self.cards_scroll, "basurero.busqueda", buscar_en_basurero,
+            on_results=self.mostrar_items,
+            local_filter=filtrar_basurero,
+            on_loading=lambda: self.cards_scroll.mostrar_mensaje("Cargando..."),
+            on_error=lambda e: self.cards_scroll.mostrar_mensaje(f"Error al cargar el basurero\n{e}", "#b8191a"),
+            page_size=PAGE_SIZE,
+            on_more=self.cards_scroll.append_rows
+        )
         self.cargar_datos()
 
     def __del__(self):
@@ -140,6 +215,7 @@ class AdminTrashcanView(ctk.CTkFrame):
         self.btn_recetas.configure(fg_color="#b8191a", text_color="white", border_width=0)
         self.btn_proyecciones.configure(fg_color="transparent", text_color="#b8191a", border_color="#b8191a", border_width=2)
         self.current_view = "recetas"
+        self.limpiar_seleccion()
         self.cargar_datos()
 
     ## @brief Handles "Proyecciones" button selection style and loads projection data
@@ -147,177 +223,146 @@ class AdminTrashcanView(ctk.CTkFrame):
         self.btn_proyecciones.configure(fg_color="#b8191a", text_color="white", border_width=0)
         self.btn_recetas.configure(fg_color="transparent", text_color="#b8191a", border_color="#b8191a", border_width=2)
         self.current_view = "proyecciones"
+        self.limpiar_seleccion()
         self.cargar_datos()
         
     ## @brief Load data based on the current view (recipes or projections)
     def cargar_datos(self):
-        for widget in self.cards_scroll.winfo_children():
-            widget.destroy()
-            
-        if self.current_view == "recetas":
-            items = TrashcanController.get_deleted_recipes(self.session)
-            self.mostrar_recetas(items)
-        else:
-            items = TrashcanController.get_deleted_projections(self.session)
-            self.mostrar_proyecciones(items)
+        self.busqueda.refresh(self.entry_buscar.get(), vista=self.current_view, fecha=self.fecha)
+
+    ## @brief Display the items returned by the search of the current view
+    def mostrar_items(self, items):
+        self.cards_scroll.set_rows(items)
             
     ## @brief Display deleted recipes as cards
     def mostrar_recetas(self, recetas: List[Receta]):
-        for receta in recetas:
-            self.crear_card_receta(receta)
+        self.cards_scroll.set_rows(recetas)
             
-    ## @brief Display deleted projections as cards
-    def mostrar_proyecciones(self, proyecciones: List[Proyeccion]):
-        for proyeccion in proyecciones:
-            self.crear_card_proyeccion(proyeccion)
+    ## @brief Display deleted projections (dicts of search_deleted_projections) as cards
+    def mostrar_proyecciones(self, proyecciones: List[dict]):
+        self.cards_scroll.set_rows(proyecciones)
+
+    ## @brief Height of the card of a deleted recipe or projection
+    def altura_card(self, item: Union[Receta, dict]):
+        return 130 if isinstance(item, Receta) else 150
     
-    ## @brief Create a card for a deleted recipe
-    def crear_card_receta(self, receta: Receta):
-        card = ctk.CTkFrame(self.cards_scroll, fg_color="white", corner_radius=15)
-        card.pack(fill="x", padx=10, pady=5, ipadx=10, ipady=5)
+    ## @brief Create an empty card, filled and recycled by llenar_card for recipes and projections
+    def crear_card(self, parent):
+        card = ctk.CTkFrame(parent, fg_color="white", corner_radius=15)
         
         main_container = ctk.CTkFrame(card, fg_color="transparent")
-        main_container.pack(fill="both", expand=True, padx=10, pady=5)
+        main_container.pack(fill="both", expand=True, padx=20, pady=10)
         main_container.grid_columnconfigure(0, weight=1)
         main_container.grid_columnconfigure(1, weight=0)
         
-        fecha_eliminado_str = "No disponible"
-        fecha_eliminacion_final_str = "No disponible"
-        
-        if receta.fecha_eliminado:
-            fecha_eliminado_str = receta.fecha_eliminado.strftime("%d/%m/%Y")
-            fecha_eliminacion_final = receta.fecha_eliminado + timedelta(weeks=12)
-            fecha_eliminacion_final_str = fecha_eliminacion_final.strftime("%d/%m/%Y")
-        
         info_container = ctk.CTkFrame(main_container, fg_color="transparent")
         info_container.grid(row=0, column=0, sticky="nsew")
             
-        titulo = ctk.CTkLabel(
+        card.titulo = ctk.CTkLabel(
             info_container, 
-            text=f"Receta: {receta.nombre_receta}",
+            text="",
             font=self.fuente_card,
             text_color="#b8191a",
             anchor="w"
         )
-        titulo.pack(fill="x", pady=(0, 5), anchor="w")
+        card.titulo.pack(fill="x", pady=(0, 5), anchor="w")
         
-        info = ctk.CTkLabel(
+        card.info = ctk.CTkLabel(
             info_container,
-            text=f"Clasificación: {receta.clasificacion}\nPeriodo: {receta.periodo}\nFecha de eliminación: {fecha_eliminado_str}\nEliminación permanente: {fecha_eliminacion_final_str}",
+            text="",
             font=self.fuente_small,
             text_color="black",
             anchor="w",
             justify="left"
         )
-        info.pack(fill="x", anchor="w")
+        card.info.pack(fill="x", anchor="w")
         
         btn_container = ctk.CTkFrame(main_container, fg_color="transparent")
         btn_container.grid(row=0, column=1, sticky="ns", padx=(10, 0))
+
+        card.seleccionado = ctk.CTkCheckBox(
+            btn_container,
+            text="",
+            width=24,
+            checkbox_width=20, checkbox_height=20,
+            fg_color="#b8191a", hover_color="#a71718", border_color="#b8191a"
+        )
+        card.seleccionado.pack(side="left", padx=3, pady=(5, 0))
         
-        
-        
-        btn_restaurar = ctk.CTkButton(
+        card.btn_restaurar = ctk.CTkButton(
             btn_container,
             text="",
             image=self.img_restaurar,
             fg_color="transparent", 
             hover_color="#dfdfdf",
-            width=30, height=30,
-            command=lambda r_id=receta.id_receta: self.restaurar_receta(r_id)
+            width=30, height=30
         )
-        btn_restaurar.pack(side="left", padx=3, pady=(5, 0))
+        card.btn_restaurar.pack(side="left", padx=3, pady=(5, 0))
         
-        btn_eliminar = ctk.CTkButton(
+        card.btn_eliminar = ctk.CTkButton(
             btn_container,
             text="",
             image=self.img_eliminar,
             fg_color="transparent", 
             hover_color="#dfdfdf",
-            width=30, height=30,
-            command=lambda r_id=receta.id_receta: self.eliminar_receta(r_id)
+            width=30, height=30
         )
-        btn_eliminar.pack(side="left", padx=3, pady=(5, 0))
+        card.btn_eliminar.pack(side="left", padx=3, pady=(5, 0))
+        return card
+
+    ## @brief Fill a card with a deleted recipe or projection
+    def llenar_card(self, card, item: Union[Receta, dict], index):
+        if isinstance(item, Receta):
+            self.llenar_card_receta(card, item)
+            id_item = item.id_receta
+        else:
+            self.llenar_card_proyeccion(card, item)
+            id_item = item["id_proyeccion"]
+
+        ## Cards are recycled, so the check box shows the selection of the item it displays now
+        if id_item in self.seleccion:
+            card.seleccionado.select()
+        else:
+            card.seleccionado.deselect()
+        card.seleccionado.configure(command=lambda c=card, i=id_item: self.alternar_seleccion(i, c.seleccionado.get()))
     
-    ## @brief Create a card for a deleted projection
-    def crear_card_proyeccion(self, proyeccion: Proyeccion):
-        card = ctk.CTkFrame(self.cards_scroll, fg_color="white", corner_radius=15)
-        card.pack(fill="x", padx=10, pady=5, ipadx=10, ipady=5)
-        
-        # Creamos un contenedor principal con grid para mejor control del layout
-        main_container = ctk.CTkFrame(card, fg_color="transparent")
-        main_container.pack(fill="both", expand=True, padx=10, pady=5)
-        main_container.grid_columnconfigure(0, weight=1)
-        main_container.grid_columnconfigure(1, weight=0)
-        
-        # Fechas
+    ## @brief Fill a card with a deleted recipe
+    def llenar_card_receta(self, card, receta: Receta):
         fecha_eliminado_str = "No disponible"
         fecha_eliminacion_final_str = "No disponible"
         
-        if proyeccion.fecha_eliminado:
-            fecha_eliminado_str = proyeccion.fecha_eliminado.strftime("%d/%m/%Y")
-            fecha_eliminacion_final = proyeccion.fecha_eliminado + timedelta(weeks=12)
+        if receta.fecha_eliminado:
+            fecha_eliminado_str = receta.fecha_eliminado.strftime("%d/%m/%Y")
+            fecha_eliminacion_final = purge_date(receta.fecha_eliminado, self.semanas_retencion)
             fecha_eliminacion_final_str = fecha_eliminacion_final.strftime("%d/%m/%Y")
-            
-        fecha_proyeccion_str = ""
-        if proyeccion.fecha:
-            fecha_proyeccion_str = proyeccion.fecha.strftime("%d/%m/%Y")
-
-    
-        info_container = ctk.CTkFrame(main_container, fg_color="transparent")
-        info_container.grid(row=0, column=0, sticky="nsew")
-            
-        titulo = ctk.CTkLabel(
-            info_container, 
-            text=f"Proyección {proyeccion.nombre} ",
-            font=self.fuente_card,
-            text_color="#b8191a",
-            anchor="w"
+        
+        card.titulo.configure(text=f"Receta: {receta.nombre_receta}")
+        card.info.configure(
+            text=f"Clasificación: {receta.clasificacion}\nPeriodo: {receta.periodo}\nFecha de eliminación: {fecha_eliminado_str}\nEliminación permanente: {fecha_eliminacion_final_str}"
         )
-        titulo.pack(fill="x", pady=(0, 5), anchor="w")
+        card.btn_restaurar.configure(command=lambda r_id=receta.id_receta: self.restaurar_receta(r_id))
+        card.btn_eliminar.configure(command=lambda r_id=receta.id_receta: self.eliminar_receta(r_id))
+    
+    ## @brief Fill a card with a deleted projection, its recipe names come with the page
+    def llenar_card_proyeccion(self, card, proyeccion: dict):
+        fecha_eliminado_str = "No disponible"
+        fecha_eliminacion_final_str = "No disponible"
+        if proyeccion["fecha_eliminado"]:
+            fecha_eliminado_str = proyeccion["fecha_eliminado"].strftime("%d/%m/%Y")
+            fecha_eliminacion_final = purge_date(proyeccion["fecha_eliminado"], self.semanas_retencion)
+            fecha_eliminacion_final_str = fecha_eliminacion_final.strftime("%d/%m/%Y")
 
-        recetas = TrashcanController.get_recipes_by_projection(
-            self.session, 
-            proyeccion.id_proyeccion
-        )
-        if recetas:  
-            recetas_str = ", ".join([receta.nombre_receta for receta in recetas])
+        if proyeccion["recetas"]:  
+            recetas_str = ", ".join(proyeccion["recetas"])
         else:  
             recetas_str = "No hay recetas asociadas"
 
-        info = ctk.CTkLabel(
-            info_container,
-            text=f"Periodo: {proyeccion.periodo}\nRecetas: {recetas_str} \nComensales: {proyeccion.comensales} \nFecha de eliminación: {proyeccion.fecha}\nEliminación permanente: {fecha_proyeccion_str}",
-            font=self.fuente_small,
-            text_color="black",
-            anchor="w",
-            justify="left"
-        )
-        info.pack(fill="x", anchor="w")
-        
-        btn_container = ctk.CTkFrame(main_container, fg_color="transparent")
-        btn_container.grid(row=0, column=1, sticky="ns", padx=(10, 0))
-
-        btn_restaurar = ctk.CTkButton(
-            btn_container,
-            text="",
-            image=self.img_restaurar,
-            fg_color="transparent", 
-            hover_color="#dfdfdf",
-            width=30, height=30,
-            command=lambda p_id=proyeccion.id_proyeccion: self.restaurar_proyeccion(p_id)
-        )
-        btn_restaurar.pack(side="left", padx=3)
-        
-        btn_eliminar = ctk.CTkButton(
-            btn_container,
-            text="",
-            image=self.img_eliminar,
-            fg_color="transparent", 
-            hover_color="#dfdfdf",
-            width=30, height=30,
-            command=lambda p_id=proyeccion.id_proyeccion: self.eliminar_proyeccion(p_id)
+        card.titulo.configure(text=f"Proyección {proyeccion['nombre']} ")
+        card.info.configure(
+            text=f"Periodo: {proyeccion['periodo']}\nRecetas: {recetas_str} \nComensales: {proyeccion['comensales']} \nFecha de eliminación: {fecha_eliminado_str}\nEliminación permanente: {fecha_eliminacion_final_str}"
         )
-        btn_eliminar.pack(side="left", padx=3)
+        card.btn_restaurar.configure(command=lambda p_id=proyeccion["id_proyeccion"]: self.restaurar_proyeccion(p_id))
+        card.btn_eliminar.configure(command=lambda p_id=proyeccion["id_proyeccion"]: self.eliminar_proyeccion(p_id))
     
     ## @brief Get corresponding icon
     def load_icon(self, icon_name):
@@ -361,6 +406,45 @@ class AdminTrashcanView(ctk.CTkFrame):
             if TrashcanController.delete_projection_from_trashcan(self.session, id_proyeccion):
                 self.cargar_datos()  
                 
+    ## @brief Check or uncheck an item for the bulk actions
+    def alternar_seleccion(self, id_item, marcado):
+        if marcado:
+            self.seleccion.add(id_item)
+        else:
+            self.seleccion.discard(id_item)
+        self.actualizar_seleccion()
+
+    ## @brief Uncheck every item
+    def limpiar_seleccion(self):
+        self.seleccion.clear()
+        self.actualizar_seleccion()
+        self.cards_scroll.refrescar()
+
+    ## @brief Show how many items are checked
+    def actualizar_seleccion(self):
+        self.lbl_seleccion.configure(text=f"{len(self.seleccion)} seleccionados" if self.seleccion else "")
+
+    ## @brief IDs of the checked items as arguments of restore_items / delete_items_from_trashcan
+    def argumentos_seleccion(self):
+        return {self.current_view: list(self.seleccion)}
+
+    ## @brief Restore every checked item in one transaction
+    def restaurar_seleccion(self):
+        if not self.seleccion:
+            return
+        TrashcanController.restore_items(self.session, **self.argumentos_seleccion())
+        self.limpiar_seleccion()
+        self.cargar_datos()
+
+    ## @brief Permanently delete every checked item in one transaction
+    def eliminar_seleccion(self):
+        if not self.seleccion:
+            return
+        if self.mostrar_dialogo_confirmacion(f"¿Está seguro de eliminar permanentemente {len(self.seleccion)} elementos?"):
+            TrashcanController.delete_items_from_trashcan(self.session, **self.argumentos_seleccion())
+            self.limpiar_seleccion()
+            self.cargar_datos()
+
     ## @brief Display confirmation dialog
     def mostrar_dialogo_confirmacion(self, mensaje):
         popup = tk.Toplevel(self)
@@ -417,37 +501,19 @@ class AdminTrashcanView(ctk.CTkFrame):
         
     ## @brief Filter data based on search entry
     def filtrar_datos(self, event=None):
-        busqueda = self.entry_buscar.get().lower()
-        
-        for widget in self.cards_scroll.winfo_children():
-            widget.destroy()
-            
-        if self.current_view == "recetas":
-            items = TrashcanController.get_deleted_recipes(self.session)
-            items = [r for r in items if busqueda in r.nombre_receta.lower()]
-            self.mostrar_recetas(items)
-        else:
-            items = TrashcanController.get_deleted_projections(self.session)
-
-            items = [p for p in items if (p.nombre and busqueda in p.nombre.lower()) or 
-                    (str(p.fecha) and busqueda in str(p.fecha))]
-            self.mostrar_proyecciones(items)
+        self.busqueda.schedule(self.entry_buscar.get(), vista=self.current_view, fecha=self.fecha)
             
-    ## @brief Filter data based on selected date
+    ## @brief Filter data based on selected date, together with the search text
     def filtrar_por_fecha(self, event=None):
-        fecha_seleccionada = self.date_entry.get_date()
-        
-        for widget in self.cards_scroll.winfo_children():
-            widget.destroy()
-            
-        if self.current_view == "recetas":
-            items = TrashcanController.get_deleted_recipes(self.session)
-            items = [r for r in items if r.fecha_eliminado and r.fecha_eliminado == fecha_seleccionada]
-            self.mostrar_recetas(items)
-        else:
-            items = TrashcanController.get_deleted_projections(self.session)
-            items = [p for p in items if p.fecha and p.fecha == fecha_seleccionada]
-            self.mostrar_proyecciones(items)
+        self.fecha = self.date_entry.get_date()
+        self.busqueda.search_now(self.entry_buscar.get(), vista=self.current_view, fecha=self.fecha)
+
+    ## @brief Clear the search text and the date filter, which otherwise stays set while typing
+    def limpiar_filtros(self):
+        self.entry_buscar.delete(0, tk.END)
+        self.date_entry.set_date(datetime.now().date())
+        self.fecha = None
+        self.cargar_datos()
 
 if __name__ == "__main__":
     root = ctk.CTk()
@@ -6,13 +6,12 @@ from tkcalendar import DateEntry
 import tkinter as tk
 import os, ctypes
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Union
 from PIL import Image
 from src.database.connector import Connector
-from src.Trashcan.controller import TrashcanController
+from src.Trashcan.controller import TrashcanController, retention_weeks, purge_date
 from src.Recipes.model import Receta
-from src.Projections.model import Proyeccion
 
 
 class InvitTrashcanView(ctk.CTkFrame):
@@ -23,6 +22,10 @@ class InvitTrashcanView(ctk.CTkFrame):
         
         self.connector = Connector()
         self.session = self.connector.get_session()
+        ## Weeks before the items are purged, to show the date of the permanent deletion
+        self.semanas_retencion = retention_weeks()
+        ## IDs of the projections checked for the bulk actions
+        self.seleccion = set()
 
         BASE_DIR = Path(__file__).resolve()
         font_path = BASE_DIR.parents[2] / "res" / "fonts" / "PortLligatSlab-Regular.ttf"
@@ -100,6 +103,40 @@ class InvitTrashcanView(ctk.CTkFrame):
         )
         self.btn_limpiar.grid(row=1, column=0, columnspan=2, pady=(5, 0), sticky="e")
 
+        # Acciones sobre las proyecciones seleccionadas
+        acciones = ctk.CTkFrame(filtros, fg_color="transparent")
+        acciones.grid(row=1, column=0, pady=(5, 0), sticky="w")
+
+        self.btn_restaurar_seleccion = ctk.CTkButton(
+            acciones,
+            text="Restaurar seleccionadas",
+            image=self.img_restaurar,
+            font=self.fuente_small,
+            fg_color="transparent",
+            border_color="#b8191a",
+            border_width=1,
+            text_color="#b8191a",
+            hover_color="#cccccc",
+            corner_radius=8,
+            command=self.restaurar_seleccion
+        )
+        self.btn_restaurar_seleccion.pack(side="left")
+
+        self.btn_eliminar_seleccion = ctk.CTkButton(
+            acciones,
+            text="Eliminar seleccionadas",
+            image=self.img_eliminar,
+            font=self.fuente_small,
+            fg_color="transparent",
+            border_color="#b8191a",
+            border_width=1,
+            text_color="#b8191a",
+            hover_color="#cccccc",
+            corner_radius=8,
+            command=self.eliminar_seleccion
+        )
+        self.btn_eliminar_seleccion.pack(side="left", padx=(10, 0))
+
         self.cards_scroll = ctk.CTkScrollableFrame(self.contenedor, fg_color="#dcd1cd", corner_radius=0)
         self.cards_scroll.pack(fill="both", expand=True, padx=20, pady=10)
         
@@ -130,11 +167,14 @@ class InvitTrashcanView(ctk.CTkFrame):
         for widget in self.cards_scroll.winfo_children():
             widget.destroy()
             
-        items = TrashcanController.get_deleted_projections(self.session)
+        items = TrashcanController.search_deleted_projections(self.session)
         self.mostrar_proyecciones(items)
         
-    ## @brief Display deleted projections as cards
-    def mostrar_proyecciones(self, proyecciones: List[Proyeccion]):
+    ## @brief Display deleted projections (dicts of search_deleted_projections) as cards
+    def mostrar_proyecciones(self, proyecciones: List[dict]):
+        # Las cards se crean de nuevo, así que se olvida la selección
+        self.seleccion.clear()
+
         # Limpiamos primero las cards existentes
         for widget in self.cards_scroll.winfo_children():
             widget.destroy()
@@ -153,8 +193,8 @@ class InvitTrashcanView(ctk.CTkFrame):
         for proyeccion in proyecciones:
             self.crear_card_proyeccion(proyeccion)
 
-    ## @brief Create a card for a deleted projection
-    def crear_card_proyeccion(self, proyeccion: Proyeccion):
+    ## @brief Create a card for a deleted projection, its recipe names come with the search
+    def crear_card_proyeccion(self, proyeccion: dict):
         card = ctk.CTkFrame(self.cards_scroll, fg_color="white", corner_radius=15)
         card.pack(fill="x", padx=10, pady=5, ipadx=10, ipady=5)
         
@@ -168,14 +208,14 @@ class InvitTrashcanView(ctk.CTkFrame):
         fecha_eliminado_str = "No disponible"
         fecha_eliminacion_final_str = "No disponible"
         
-        if proyeccion.fecha_eliminado:
-            fecha_eliminado_str = proyeccion.fecha_eliminado.strftime("%d/%m/%Y")
-            fecha_eliminacion_final = proyeccion.fecha_eliminado + timedelta(weeks=12)
+        if proyeccion["fecha_eliminado"]:
+            fecha_eliminado_str = proyeccion["fecha_eliminado"].strftime("%d/%m/%Y")
+            fecha_eliminacion_final = purge_date(proyeccion["fecha_eliminado"], self.semanas_retencion)
             fecha_eliminacion_final_str = fecha_eliminacion_final.strftime("%d/%m/%Y")
             
         fecha_proyeccion_str = ""
-        if proyeccion.fecha:
-            fecha_proyeccion_str = proyeccion.fecha.strftime("%d/%m/%Y")
+        if proyeccion["fecha"]:
+            fecha_proyeccion_str = proyeccion["fecha"].strftime("%d/%m/%Y")
 
     
         info_container = ctk.CTkFrame(main_container, fg_color="transparent")
@@ -183,25 +223,21 @@ class InvitTrashcanView(ctk.CTkFrame):
             
         titulo = ctk.CTkLabel(
             info_container, 
-            text=f"Proyección {proyeccion.nombre} ",
+            text=f"Proyección {proyeccion['nombre']} ",
             font=self.fuente_card,
             text_color="#b8191a",
             anchor="w"
         )
         titulo.pack(fill="x", pady=(0, 5), anchor="w")
 
-        recetas = TrashcanController.get_recipes_by_projection(
-            self.session, 
-            proyeccion.id_proyeccion
-        )
-        if recetas:  
-            recetas_str = ", ".join([receta.nombre_receta for receta in recetas])
+        if proyeccion["recetas"]:  
+            recetas_str = ", ".join(proyeccion["recetas"])
         else:  
             recetas_str = "No hay recetas asociadas"
 
         info = ctk.CTkLabel(
             info_container,
-            text=f"Periodo: {proyeccion.periodo}\nRecetas: {recetas_str} \nComensales: {proyeccion.comensales} \nFecha de proyección: {fecha_proyeccion_str}\nFecha de eliminación: {fecha_eliminado_str}\nEliminación permanente: {fecha_eliminacion_final_str}",
+            text=f"Periodo: {proyeccion['periodo']}\nRecetas: {recetas_str} \nComensales: {proyeccion['comensales']} \nFecha de proyección: {fecha_proyeccion_str}\nFecha de eliminación: {fecha_eliminado_str}\nEliminación permanente: {fecha_eliminacion_final_str}",
             font=self.fuente_small,
             text_color="black",
             anchor="w",
@@ -212,6 +248,16 @@ class InvitTrashcanView(ctk.CTkFrame):
         btn_container = ctk.CTkFrame(main_container, fg_color="transparent")
         btn_container.grid(row=0, column=1, sticky="ns", padx=(10, 0))
 
+        seleccionado = ctk.CTkCheckBox(
+            btn_container,
+            text="",
+            width=24,
+            checkbox_width=20, checkbox_height=20,
+            fg_color="#b8191a", hover_color="#a71718", border_color="#b8191a"
+        )
+        seleccionado.configure(command=lambda p_id=proyeccion["id_proyeccion"]: self.alternar_seleccion(p_id, seleccionado.get()))
+        seleccionado.pack(side="left", padx=3)
+
         btn_restaurar = ctk.CTkButton(
             btn_container,
             text="",
@@ -219,7 +265,7 @@ class InvitTrashcanView(ctk.CTkFrame):
             fg_color="transparent", 
             hover_color="#dfdfdf",
             width=30, height=30,
-            command=lambda p_id=proyeccion.id_proyeccion: self.restaurar_proyeccion(p_id)
+            command=lambda p_id=proyeccion["id_proyeccion"]: self.restaurar_proyeccion(p_id)
         )
         btn_restaurar.pack(side="left", padx=3)
         
@@ -230,7 +276,7 @@ class InvitTrashcanView(ctk.CTkFrame):
             fg_color="transparent", 
             hover_color="#dfdfdf",
             width=30, height=30,
-            command=lambda p_id=proyeccion.id_proyeccion: self.eliminar_proyeccion(p_id)
+            command=lambda p_id=proyeccion["id_proyeccion"]: self.eliminar_proyeccion(p_id)
         )
         btn_eliminar.pack(side="left", padx=3)
     
@@ -257,6 +303,28 @@ class InvitTrashcanView(ctk.CTkFrame):
             if TrashcanController.delete_projection_from_trashcan(self.session, id_proyeccion):
                 self.cargar_datos()  
                 
+    ## @brief Check or uncheck a projection for the bulk actions
+    def alternar_seleccion(self, id_proyeccion, marcado):
+        if marcado:
+            self.seleccion.add(id_proyeccion)
+        else:
+            self.seleccion.discard(id_proyeccion)
+
+    ## @brief Restore every checked projection in one transaction
+    def restaurar_seleccion(self):
+        if not self.seleccion:
+            return
+        TrashcanController.restore_items(self.session, proyecciones=list(self.seleccion))
+        self.cargar_datos()
+
+    ## @brief Permanently delete every checked projection in one transaction
+    def eliminar_seleccion(self):
+        if not self.seleccion:
+            return
+        if self.mostrar_dialogo_confirmacion(f"¿Está seguro de eliminar permanentemente {len(self.seleccion)} proyecciones?"):
+            TrashcanController.delete_items_from_trashcan(self.session, proyecciones=list(self.seleccion))
+            self.cargar_datos()
+
     ## @brief Display confirmation dialog
     def mostrar_dialogo_confirmacion(self, mensaje):
         popup = tk.Toplevel(self)
@@ -313,10 +381,9 @@ class InvitTrashcanView(ctk.CTkFrame):
     ## @brief Filter data based on search entry
     def filtrar_datos(self, event=None):
         busqueda = self.entry_buscar.get().lower()
-        proyecciones = TrashcanController.get_deleted_projections(self.session)
         
-        # Filtrar proyecciones por nombre
-        filtradas = [p for p in proyecciones if busqueda in p.nombre.lower()]
+        # Filtrar proyecciones por nombre en la base de datos
+        filtradas = TrashcanController.search_deleted_projections(self.session, texto=busqueda)
         
         # Actualizar la vista con las proyecciones filtradas
         self.mostrar_proyecciones(filtradas)
@@ -324,17 +391,9 @@ class InvitTrashcanView(ctk.CTkFrame):
     ## @brief Filter data based on selected date
     def filtrar_por_fecha(self, event=None):
         fecha_seleccionada = self.date_entry.get_date()
-        proyecciones = TrashcanController.get_deleted_projections(self.session)
         
-        # Filtrar proyecciones por fecha
-        filtradas = []
-        for p in proyecciones:
-            if p.fecha:
-                # Convertir fecha de proyección a string para compararla
-                fecha_str = p.fecha.strftime("%Y-%m-%d")
-                fecha_seleccionada_str = fecha_seleccionada.strftime("%Y-%m-%d")
-                if fecha_str == fecha_seleccionada_str:
-                    filtradas.append(p)
+        # Filtrar proyecciones por fecha en la base de datos
+        filtradas = TrashcanController.search_deleted_projections(self.session, fecha=fecha_seleccionada)
         
         # Actualizar la vista con las proyecciones filtradas
         self.mostrar_proyecciones(filtradas)
@@ -4,25 +4,128 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from datetime import date, timedelta
+from sqlalchemy import select, update, delete, func, or_, cast, String
 from sqlalchemy.orm import Session
-from src.Recipes.model import Receta
+from src.Recipes.model import Receta, Receta_Ingredientes
 from src.Recipes.controller import RecetasController
-from src.Projections.model import Proyeccion
+from src.Projections.model import Proyeccion, ProyeccionIngrediente
 from src.Projections.controller import ProyeccionController, ProyeccionReceta
+from src.Projections import totals
+from src.database.pagination import Page, paginate
+from src.database.like import ESCAPE_LIKE, contains_pattern
+
+## Weeks a deleted recipe or projection stays in the trash can when TRASH_RETENTION_WEEKS is not set
+DEFAULT_RETENTION_WEEKS = 12
+
+## Rows deleted per transaction by clear_trashcan
+PURGE_BATCH_SIZE = 500
+
+
+## Weeks a deleted recipe or projection stays in the trash can, from the TRASH_RETENTION_WEEKS variable
+def retention_weeks() -> int:
+    try:
+        return max(0, int(os.getenv("TRASH_RETENTION_WEEKS", DEFAULT_RETENTION_WEEKS)))
+    except ValueError:
+        print(f"TRASH_RETENTION_WEEKS no es un número, se usan {DEFAULT_RETENTION_WEEKS} semanas")
+        return DEFAULT_RETENTION_WEEKS
+
+
+## Date on which an item deleted on fecha_eliminado is purged, with the given retention or retention_weeks()
+def purge_date(fecha_eliminado: date, semanas: int = None) -> date:
+    return fecha_eliminado + timedelta(weeks=retention_weeks() if semanas is None else semanas)
+
+
+## Split a list of IDs in lists of at most PURGE_BATCH_SIZE, to keep the IN lists of the statements short
+def _lotes(ids):
+    ids = list(dict.fromkeys(ids))
+    for inicio in range(0, len(ids), PURGE_BATCH_SIZE):
+        yield ids[inicio:inicio + PURGE_BATCH_SIZE]
+
 
 ## Class used to manage the trashcan in the database
 class TrashcanController:
     ## Return all deleted recipes.
-    def get_deleted_recipes(session: Session):
-        return session.query(Receta).filter(
+    ## With limite only one page is returned, sorted by id; pass its cursor as despues to get the next one.
+    def get_deleted_recipes(session: Session, despues=None, limite=None, contar=False) -> Page:
+        query = session.query(Receta).filter(
             Receta.estatus == False
-        ).all()
+        )
+        return paginate(session, query, [(Receta.id_receta, False)], lambda receta: (receta.id_receta,),
+                        despues=despues, limite=limite, contar=contar)
 
     ## Return all deleted projections.
-    def get_deleted_projections(session: Session):
-        return session.query(Proyeccion).filter(
+    ## Same pagination parameters as get_deleted_recipes.
+    def get_deleted_projections(session: Session, despues=None, limite=None, contar=False) -> Page:
+        query = session.query(Proyeccion).filter(
             Proyeccion.estatus == False
+        )
+        return paginate(session, query, [(Proyeccion.id_proyeccion, False)], lambda proyeccion: (proyeccion.id_proyeccion,),
+                        despues=despues, limite=limite, contar=contar)
+
+    ## Search the deleted recipes by name and deletion date in the database.
+    ## @param texto Text contained in the name of the recipe, case-insensitive
+    ## @param fecha_eliminado Only the recipes deleted that day
+    ## @details Same pagination parameters as get_deleted_recipes; the date filter uses ix_recetas_estatus_fecha_eliminado.
+    @staticmethod
+    def search_deleted_recipes(session: Session, texto: str = None, fecha_eliminado: date = None,
+                               despues=None, limite=None, contar=False) -> Page:
+        query = session.query(Receta).filter(Receta.estatus == False)
+        if texto:
+            query = query.filter(func.lower(Receta.nombre_receta).like(contains_pattern(texto.lower()), escape=ESCAPE_LIKE))
+        if fecha_eliminado:
+            query = query.filter(Receta.fecha_eliminado == fecha_eliminado)
+        return paginate(session, query, [(Receta.id_receta, False)], lambda receta: (receta.id_receta,),
+                        despues=despues, limite=limite, contar=contar)
+
+    ## Search the deleted projections by name or date and by deletion date in the database.
+    ## @param texto Text contained in the name of the projection or in its date (YYYY-MM-DD), case-insensitive
+    ## @param fecha Only the projections of that day, uses ix_proyecciones_estatus_fecha
+    ## @param fecha_eliminado Only the projections deleted that day, uses ix_proyecciones_estatus_fecha_eliminado
+    ## @return Page of dicts with the data of the projection and the names of its recipes in "recetas",
+    ## loaded with one query for the whole page
+    @staticmethod
+    def search_deleted_projections(session: Session, texto: str = None, fecha: date = None, fecha_eliminado: date = None,
+                                   despues=None, limite=None, contar=False) -> Page:
+        query = session.query(Proyeccion).filter(Proyeccion.estatus == False)
+        if texto:
+            patron = contains_pattern(texto.lower())
+            query = query.filter(or_(func.lower(Proyeccion.nombre).like(patron, escape=ESCAPE_LIKE),
+                                     cast(Proyeccion.fecha, String).like(patron, escape=ESCAPE_LIKE)))
+        if fecha:
+            query = query.filter(Proyeccion.fecha == fecha)
+        if fecha_eliminado:
+            query = query.filter(Proyeccion.fecha_eliminado == fecha_eliminado)
+        pagina = paginate(session, query, [(Proyeccion.id_proyeccion, False)], lambda proyeccion: (proyeccion.id_proyeccion,),
+                          despues=despues, limite=limite, contar=contar)
+
+        nombres = TrashcanController.get_recipe_names_by_projections(session, [p.id_proyeccion for p in pagina])
+        return pagina.con_items([{
+            "id_proyeccion": proyeccion.id_proyeccion,
+            "nombre": proyeccion.nombre,
+            "periodo": proyeccion.periodo,
+            "comensales": proyeccion.comensales,
+            "fecha": proyeccion.fecha,
+            "fecha_eliminado": proyeccion.fecha_eliminado,
+            "recetas": nombres.get(proyeccion.id_proyeccion, [])
+        } for proyeccion in pagina])
+
+    ## Names of the recipes of several projections with a single query.
+    ## @return {id_proyeccion: [nombre_receta, ...]}, projections without recipes are missing
+    @staticmethod
+    def get_recipe_names_by_projections(session: Session, ids_proyeccion) -> dict:
+        ids_proyeccion = list(ids_proyeccion)
+        if not ids_proyeccion:
+            return {}
+        filas = session.execute(
+            select(ProyeccionReceta.id_proyeccion, Receta.nombre_receta)
+            .join(Receta, Receta.id_receta == ProyeccionReceta.id_receta)
+            .where(ProyeccionReceta.id_proyeccion.in_(ids_proyeccion))
+            .order_by(ProyeccionReceta.id_proyeccion, ProyeccionReceta.id_receta)
         ).all()
+        nombres = {}
+        for id_proyeccion, nombre_receta in filas:
+            nombres.setdefault(id_proyeccion, []).append(nombre_receta)
+        return nombres
 
     ## Restore a recepie (remove from trashcan)
     def restore_recipe(session: Session, id_receta: int) -> bool:
@@ -68,30 +171,135 @@ class TrashcanController:
             return ProyeccionController.delete_projection(session, id_proyeccion)
         return False # note for later: deletions in recipes and projections work diferently so this might be wrong bc it doesnt return anything
 
+    ## Restore several deleted recipes and projections with one UPDATE per table and a single commit.
+    ## @param recetas IDs of the recipes to restore, the ones not in the trash can are ignored
+    ## @param proyecciones IDs of the projections to restore, the ones not in the trash can are ignored
+    ## @return Number of recipes and projections restored, as {"recetas": n, "proyecciones": n}
+    @staticmethod
+    def restore_items(session: Session, recetas=(), proyecciones=()) -> dict:
+        restaurados = {Receta.__tablename__: 0, Proyeccion.__tablename__: 0}
+        try:
+            for modelo, id_columna, ids in ((Receta, Receta.id_receta, recetas),
+                                            (Proyeccion, Proyeccion.id_proyeccion, proyecciones)):
+                for lote in _lotes(ids):
+                    resultado = session.execute(
+                        update(modelo)
+                        .where(id_columna.in_(lote), modelo.estatus == False)
+                        .values(estatus=True, fecha_eliminado=None),
+                        execution_options={"synchronize_session": "fetch"}
+                    )
+                    restaurados[modelo.__tablename__] += resultado.rowcount or 0
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return restaurados
+
+    ## Permanently delete several recipes and projections of the trash can in a single transaction.
+    ## The rows are removed with bulk DELETE statements, link tables first; IDs of active items are ignored.
+    ## @param recetas IDs of the deleted recipes to remove
+    ## @param proyecciones IDs of the deleted projections to remove
+    ## @return Number of rows deleted per table
+    @staticmethod
+    def delete_items_from_trashcan(session: Session, recetas=(), proyecciones=()) -> dict:
+        borrados = TrashcanController._contadores()
+        try:
+            for lote in _lotes(recetas):
+                ids = TrashcanController._en_basurero(session, Receta, Receta.id_receta, lote)
+                TrashcanController._purge_recipes(session, ids, borrados)
+            for lote in _lotes(proyecciones):
+                ids = TrashcanController._en_basurero(session, Proyeccion, Proyeccion.id_proyeccion, lote)
+                TrashcanController._purge_projections(session, ids, borrados)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        session.expire_all()
+        return borrados
+
     ## Clear trash can every session (if needed)
-    def clear_trashcan(session: Session):
-        today = date.today()
-        limit = today - timedelta(weeks=12)
-
-        deleted_recipes = session.query(Receta).filter(
-            Receta.estatus == False,
-            Receta.fecha_eliminado != None,
-            Receta.fecha_eliminado <= limit
-        ).all()
+    ## The expired rows are removed with bulk DELETE statements, link tables first, one transaction per batch,
+    ## so a purge interrupted halfway leaves the database consistent and the next one continues it.
+    ## @param semanas Weeks in the trash can before an item is purged, retention_weeks() by default
+    ## @param lote Number of recipes or projections removed per transaction
+    ## @param detener threading.Event checked between batches; once set the purge stops after the batch in course
+    ## @return Number of rows deleted per table
+    def clear_trashcan(session: Session, semanas: int = None, lote: int = PURGE_BATCH_SIZE, detener=None) -> dict:
+        limit = date.today() - timedelta(weeks=retention_weeks() if semanas is None else semanas)
+        borrados = TrashcanController._contadores()
 
-        deleted_projections = session.query(Proyeccion).filter(
-            Proyeccion.estatus == False,
-            Proyeccion.fecha_eliminado != None,
-            Proyeccion.fecha_eliminado <= limit
-        ).all()
+        def vencidos(modelo, id_columna):
+            if detener is not None and detener.is_set():
+                return []
+            return session.execute(
+                select(id_columna).where(
+                    modelo.estatus == False,
+                    modelo.fecha_eliminado != None,
+                    modelo.fecha_eliminado <= limit
+                ).order_by(id_columna).limit(lote)
+            ).scalars().all()
 
-        for recipe in deleted_recipes:
-            session.delete(recipe)
+        try:
+            while True:
+                ids = vencidos(Receta, Receta.id_receta)
+                if not ids:
+                    break
+                TrashcanController._purge_recipes(session, ids, borrados)
+                session.commit()
 
-        for projection in deleted_projections:
-            session.delete(projection)
-        
-        session.commit()
+            while True:
+                ids = vencidos(Proyeccion, Proyeccion.id_proyeccion)
+                if not ids:
+                    break
+                TrashcanController._purge_projections(session, ids, borrados)
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        ## Objects of the purged rows loaded before are stale now
+        session.expire_all()
+        return borrados
+
+    ## Rows deleted per table, all at zero
+    @staticmethod
+    def _contadores() -> dict:
+        return {tabla: 0 for tabla in (
+            Receta_Ingredientes.__tablename__, ProyeccionReceta.__tablename__, Receta.__tablename__,
+            ProyeccionIngrediente.__tablename__, Proyeccion.__tablename__
+        )}
+
+    ## The IDs of the list that are in the trash can
+    @staticmethod
+    def _en_basurero(session: Session, modelo, id_columna, ids) -> list:
+        return session.execute(
+            select(id_columna).where(id_columna.in_(ids), modelo.estatus == False)
+        ).scalars().all()
+
+    ## Delete the rows of a table that match a condition, adding them to the counters. Does not commit.
+    @staticmethod
+    def _borrar(session: Session, modelo, condicion, borrados: dict) -> None:
+        resultado = session.execute(delete(modelo).where(condicion), execution_options={"synchronize_session": False})
+        borrados[modelo.__tablename__] += resultado.rowcount or 0
+
+    ## Delete recipes with their ingredients and their links to projections. Does not commit.
+    @staticmethod
+    def _purge_recipes(session: Session, ids, borrados: dict) -> None:
+        if not ids:
+            return
+        ## The projections that still use the recipes lose them, so their totals change
+        totals.mark_stale(session, recetas=ids)
+        TrashcanController._borrar(session, ProyeccionReceta, ProyeccionReceta.id_receta.in_(ids), borrados)
+        TrashcanController._borrar(session, Receta_Ingredientes, Receta_Ingredientes.id_receta.in_(ids), borrados)
+        TrashcanController._borrar(session, Receta, Receta.id_receta.in_(ids), borrados)
+
+    ## Delete projections with their stored totals and their recipe links. Does not commit.
+    @staticmethod
+    def _purge_projections(session: Session, ids, borrados: dict) -> None:
+        if not ids:
+            return
+        TrashcanController._borrar(session, ProyeccionIngrediente, ProyeccionIngrediente.id_proyeccion.in_(ids), borrados)
+        TrashcanController._borrar(session, ProyeccionReceta, ProyeccionReceta.id_proyeccion.in_(ids), borrados)
+        TrashcanController._borrar(session, Proyeccion, Proyeccion.id_proyeccion.in_(ids), borrados)
 
     @staticmethod
     def get_recipes_by_projection(session, projection_id):
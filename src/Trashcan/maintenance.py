@@ -0,0 +1,59 @@
+## @file maintenance.py
+## @brief Purge of the expired trash can items on a background maintenance thread.
+## @details The purge runs once per session after the dashboard is shown, with its own session borrowed from
+## the shared pool, so opening the application never waits for it. Tk widgets are not touched from the thread;
+## the result is only printed.
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.Trashcan.controller import TrashcanController, PURGE_BATCH_SIZE
+
+
+## @brief Build a session from the default Connector (database configured in the .env file)
+def _default_session_factory():
+    from src.database.connector import Connector
+    return Connector().get_session()
+
+
+## @brief Maintenance thread that purges the trash can once
+class TrashPurge(threading.Thread):
+    ## @param session_factory Callable returning a new session for the purge
+    ## @param semanas Retention in weeks, TRASH_RETENTION_WEEKS (or 12) when None
+    ## @param lote Number of recipes or projections removed per transaction
+    def __init__(self, session_factory=None, semanas: int = None, lote: int = PURGE_BATCH_SIZE) -> None:
+        super().__init__(name="basurero-purga", daemon=True)
+        self.session_factory = session_factory or _default_session_factory
+        self.semanas = semanas
+        self.lote = lote
+        ## Rows deleted per table once the purge finished
+        self.borrados = None
+        self.error = None
+        self.detener = threading.Event()
+
+    ## @brief Ask the purge to stop after the batch in course; join() returns once that batch is committed
+    def stop(self) -> None:
+        self.detener.set()
+
+    def run(self) -> None:
+        session = self.session_factory()
+        try:
+            self.borrados = TrashcanController.clear_trashcan(session, semanas=self.semanas, lote=self.lote,
+                                                              detener=self.detener)
+            resumen = ", ".join(f"{tabla}: {filas}" for tabla, filas in self.borrados.items() if filas)
+            print(f"Basurero depurado ({resumen})" if resumen else "Basurero depurado, no había elementos vencidos")
+        except Exception as e:
+            self.error = e
+            print(f"Error al depurar el basurero: {e}")
+        finally:
+            session.close()
+
+
+## @brief Start the purge of the trash can on a maintenance thread
+## @return The started TrashPurge; join() it to wait for the result
+def start_trash_purge(session_factory=None, semanas: int = None, lote: int = PURGE_BATCH_SIZE) -> TrashPurge:
+    purga = TrashPurge(session_factory, semanas, lote)
+    purga.start()
+    return purga
@@ -3,7 +3,7 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from Users.model import Usuario
+from src.Users.model import Usuario
 from src.security.password_utils import Security
 from src.database.connector import Connector
 
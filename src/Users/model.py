@@ -4,19 +4,20 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
  
 from typing import Self
-from sqlalchemy import Column, Integer, String
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import create_engine
+from sqlalchemy import Column, Integer, String, Index
+from src.database.connector import Base
 from src.security.password_utils import Security
 
-Base = declarative_base()
-
 ## @brief User model class, this class is used to represent a user in the database
 class Usuario(Base):  
     """@brief User model class
     @details This class is used to represent a user in the database
     """
     __tablename__ = "Usuarios"  # Correct table name
+    ## Login reads the user by its name
+    __table_args__ = (
+        Index("ux_usuarios_nombre_usuario", "nombre_usuario", unique=True),
+    )
 
     numero_usuario = Column(Integer, primary_key=True, autoincrement=True)
     nombre_usuario = Column(String(50), nullable=False)
@@ -0,0 +1,191 @@
+## @file busqueda.py
+## @brief Debounced search-as-you-type shared by the listing views.
+## @details Keystrokes are coalesced: the query only runs once the user stops typing for delay_ms.
+## The query runs on the background database worker and a newer search supersedes the one in flight.
+## When the new text narrows the previous one (same filters and the previous text is a prefix of the new
+## one) the cached result set is filtered locally instead of querying the database again.
+## With page_size the results are fetched one keyset page at a time (src.database.pagination): load_more fetches
+## the page after the rows shown, and a result set with pages still to load is never narrowed locally.
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.database.worker import get_worker
+from src.database.pagination import Page
+
+## @brief Default debounce window in milliseconds
+DEFAULT_DELAY_MS = 250
+
+## @brief Seconds a cached result set can be narrowed locally before the database is queried again
+DEFAULT_MAX_AGE_S = 60
+
+
+## @brief Normalize the search text the same way the controllers do (case-insensitive, no outer spaces)
+def normalizar(texto) -> str:
+    return (texto or "").strip().lower()
+
+
+## @brief Coalesces keystrokes of a search box into background queries
+class DebouncedSearch:
+    ## @param widget Widget used for after() and as the receiver of the results
+    ## @param key Key of the searches in the database worker (one in flight per key)
+    ## @param fetch fetch(session, texto, **filtros) -> list, executed on a worker thread
+    ## @param on_results on_results(items) called on the Tk thread with the rows to display
+    ## @param local_filter local_filter(items, texto) -> list, narrows a cached result set; None disables the reuse
+    ## @param on_loading Called on the Tk thread when a database query starts
+    ## @param on_error on_error(exception) called on the Tk thread when the query fails
+    ## @param page_size Rows of a page, passed to fetch as limite (with despues for the next pages); None loads every row
+    ## @param on_more on_more(items) called on the Tk thread with the rows of the next page
+    def __init__(self, widget, key, fetch, on_results, local_filter=None, on_loading=None, on_error=None,
+                 delay_ms: int = DEFAULT_DELAY_MS, max_age_s: float = DEFAULT_MAX_AGE_S, worker=None,
+                 page_size: int = None, on_more=None) -> None:
+        self.widget = widget
+        self.key = key
+        self.fetch = fetch
+        self.on_results = on_results
+        self.local_filter = local_filter
+        self.on_loading = on_loading
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.max_age_s = max_age_s
+        self.worker = worker or get_worker()
+        self.page_size = page_size
+        self.on_more = on_more
+
+        self._after_id = None
+        self._solicitud = None
+        self._cache = None
+        self._mostrado = None
+
+    ## @brief Schedule a search, restarting the debounce window (bind it to <KeyRelease>)
+    def schedule(self, texto, **filtros) -> None:
+        self._cancel_timer()
+        self._after_id = self.widget.after(self.delay_ms, lambda: self._ejecutar(texto, filtros))
+
+    ## @brief Search right away, skipping the debounce window (filters changed from a combo box, first load...)
+    def search_now(self, texto="", **filtros) -> None:
+        self._cancel_timer()
+        self._ejecutar(texto, filtros)
+
+    ## @brief Forget the cached results and search again (after inserts, deletes or restores)
+    def refresh(self, texto="", **filtros) -> None:
+        self.invalidate()
+        self.search_now(texto, **filtros)
+
+    ## @brief Forget the cached result set so the next search queries the database
+    def invalidate(self) -> None:
+        self._cache = None
+        self._mostrado = None
+
+    ## @brief Drop rows from the cached result set (after deleting them), keeping the cursor of the next page
+    def remove_where(self, predicado) -> None:
+        if self._cache is None:
+            return
+        texto, filtros, items, cargado = self._cache
+        restantes = [item for item in items if not predicado(item)]
+        total = getattr(items, "total", None)
+        if total is not None:
+            total -= len(items) - len(restantes)
+        self._cache = (texto, filtros, Page(restantes, getattr(items, "cursor", None), total), cargado)
+
+    ## @brief Cancel the pending search and the query in flight
+    def cancel(self) -> None:
+        self._cancel_timer()
+        self._solicitud = None
+        self.worker.cancel(self.key)
+        self.worker.cancel(self._key_pagina)
+
+    ## @brief Fetch the page after the rows shown (bind it to the on_end_reached of the VirtualList)
+    def load_more(self) -> None:
+        if self._cache is None or self.page_size is None:
+            return
+        texto, filtros, items, _ = self._cache
+        cursor = getattr(items, "cursor", None)
+        if cursor is None or (texto, filtros) != self._mostrado:
+            return
+        self.worker.submit(
+            self.widget, self._key_pagina, self.fetch, texto,
+            on_success=lambda pagina: self._anexar((texto, filtros), cursor, pagina),
+            on_error=self._error,
+            despues=cursor, limite=self.page_size, **dict(filtros)
+        )
+
+    @property
+    def _key_pagina(self) -> str:
+        return f"{self.key}.pagina"
+
+    def _cancel_timer(self) -> None:
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _ejecutar(self, texto, filtros: dict) -> None:
+        self._after_id = None
+        solicitud = (normalizar(texto), tuple(sorted(filtros.items())))
+        if solicitud == self._mostrado:
+            ## Back to the text on screen: the query in flight for another text must not replace it
+            self._solicitud = solicitud
+            self.worker.cancel(self.key)
+            self.worker.cancel(self._key_pagina)
+            return
+        self._solicitud = solicitud
+
+        reutilizable = self._reutilizable(solicitud)
+        if reutilizable is not None:
+            self.worker.cancel(self.key)
+            self._mostrado = solicitud
+            self.on_results(reutilizable)
+            return
+
+        if self.on_loading is not None:
+            self.on_loading()
+        self.worker.cancel(self._key_pagina)
+        paginacion = {} if self.page_size is None else {"limite": self.page_size}
+        self.worker.submit(
+            self.widget, self.key, self.fetch, solicitud[0],
+            on_success=lambda items: self._entregar(solicitud, items),
+            on_error=self._error,
+            **filtros, **paginacion
+        )
+
+    ## @brief Return the cached rows narrowed to solicitud, or None if the database has to be queried
+    def _reutilizable(self, solicitud):
+        if self._cache is None or self.local_filter is None:
+            return None
+        texto_cache, filtros_cache, items, cargado = self._cache
+        texto, filtros = solicitud
+        if filtros != filtros_cache or not texto.startswith(texto_cache):
+            return None
+        if texto != texto_cache and getattr(items, "cursor", None) is not None:
+            ## The rows of the pages not loaded yet could match the longer text too
+            return None
+        if time.monotonic() - cargado > self.max_age_s:
+            return None
+        return items if texto == texto_cache else self.local_filter(items, texto)
+
+    def _entregar(self, solicitud, items) -> None:
+        if solicitud != self._solicitud:
+            return
+        self._cache = (solicitud[0], solicitud[1], items, time.monotonic())
+        self._mostrado = solicitud
+        self.on_results(items)
+
+    def _anexar(self, solicitud, cursor, pagina) -> None:
+        if self._cache is None or self._cache[:2] != solicitud or getattr(self._cache[2], "cursor", None) != cursor:
+            return
+        texto, filtros, items, cargado = self._cache
+        self._cache = (texto, filtros, Page(list(items) + list(pagina), getattr(pagina, "cursor", None), items.total), cargado)
+        if self.on_more is not None:
+            self.on_more(list(pagina))
+
+    def _error(self, error) -> None:
+        self._mostrado = None
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            print(f"Error en la busqueda '{self.key}': {error}")
@@ -0,0 +1,21 @@
+import customtkinter as ctk
+
+## @brief Replace the content of a list container with a loading placeholder while a background query runs
+## @param contenedor Frame whose children are replaced
+## @param fuente Font of the placeholder label
+## @param texto Text of the placeholder
+def mostrar_cargando(contenedor, fuente=None, texto="Cargando..."):
+    for widget in contenedor.winfo_children():
+        widget.destroy()
+    label = ctk.CTkLabel(contenedor, text=texto, font=fuente, text_color="#3A3A3A")
+    label.pack(pady=50)
+    return label
+
+
+## @brief Replace the content of a list container with an error message
+def mostrar_error_carga(contenedor, mensaje, fuente=None):
+    for widget in contenedor.winfo_children():
+        widget.destroy()
+    label = ctk.CTkLabel(contenedor, text=mensaje, font=fuente, text_color="#b8191a")
+    label.pack(pady=50)
+    return label
@@ -0,0 +1,265 @@
+## @file virtual_list.py
+## @brief Virtualized list of cards for the listing views.
+## @details Only the rows inside the visible area (plus a few rows of overscan) exist as widgets. Rows are
+## placed on a canvas at offsets computed from prefix sums of their heights, so variable row heights are
+## supported and finding the visible rows is a binary search. Row widgets are created once by a factory and
+## recycled: when a row scrolls out of view its widget is refilled with the data of a row scrolling in.
+import bisect
+import sys
+import weakref
+import tkinter as tk
+import customtkinter as ctk
+
+## @brief Lists alive that scroll with the mouse wheel; removed when their widget is destroyed
+_listas_rueda = weakref.WeakSet()
+## @brief Tk roots that already have the global mouse wheel bindings
+_raices_rueda = weakref.WeakSet()
+
+
+## @brief Single global mouse wheel handler per Tk root, it forwards the event to the lists alive
+def _despachar_rueda(event) -> None:
+    for lista in list(_listas_rueda):
+        lista._on_rueda(event)
+
+
+## @brief Prefix sums of the row heights, used to place rows and find the visible ones
+class RowLayout:
+    ## @param alturas Height of each row in pixels
+    ## @param espaciado Gap between two rows in pixels
+    def __init__(self, alturas=(), espaciado: int = 0) -> None:
+        self.espaciado = espaciado
+        self.offsets = [0]
+        self.append(alturas)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    ## @brief Add rows at the end
+    def append(self, alturas) -> None:
+        for altura in alturas:
+            self.offsets.append(self.offsets[-1] + altura + self.espaciado)
+
+    ## @brief Total height of the content
+    @property
+    def total(self) -> int:
+        return self.offsets[-1]
+
+    ## @brief Y coordinate of the top of row i
+    def top(self, i: int) -> int:
+        return self.offsets[i]
+
+    ## @brief Height of row i, without the gap
+    def altura(self, i: int) -> int:
+        return self.offsets[i + 1] - self.offsets[i] - self.espaciado
+
+    ## @brief Indexes of the rows that intersect the band [y0, y1)
+    def visible_range(self, y0: float, y1: float) -> range:
+        n = len(self)
+        if n == 0 or y1 <= y0:
+            return range(0)
+        primero = max(0, min(n - 1, bisect.bisect_right(self.offsets, y0) - 1))
+        ultimo = max(0, min(n - 1, bisect.bisect_left(self.offsets, y1) - 1))
+        return range(primero, ultimo + 1)
+
+
+## @brief Scrollable list that materializes only the visible rows and recycles their widgets
+class VirtualList(ctk.CTkFrame):
+    ## @param crear_fila crear_fila(parent) -> widget, builds an empty row widget
+    ## @param llenar_fila llenar_fila(widget, item, index) fills a (new or recycled) row widget with the data of item
+    ## @param altura_fila Height of every row when altura_de is not given
+    ## @param altura_de altura_de(item) -> height of the row of item, for variable heights
+    ## @param espaciado Vertical gap between rows
+    ## @param margen_x Horizontal margin of the rows
+    ## @param overscan Rows materialized above and below the visible area
+    ## @param on_end_reached Called once when the last rows become visible, to load the next page
+    ## @param mensaje_vacio Text shown when the list has no rows
+    def __init__(self, master, crear_fila, llenar_fila, altura_fila: int = 60, altura_de=None, espaciado: int = 8,
+                 margen_x: int = 25, overscan: int = 3, on_end_reached=None, umbral_final: int = 5,
+                 mensaje_vacio: str = "", fuente=None, fg_color="#dcd1cd", **kwargs):
+        super().__init__(master, fg_color=fg_color, corner_radius=0, **kwargs)
+        self.crear_fila = crear_fila
+        self.llenar_fila = llenar_fila
+        self.altura_fila = altura_fila
+        self.altura_de = altura_de
+        self.espaciado = espaciado
+        self.margen_x = margen_x
+        self.overscan = overscan
+        self.on_end_reached = on_end_reached
+        self.umbral_final = umbral_final
+        self.mensaje_vacio = mensaje_vacio
+        self.fuente = fuente
+
+        self.rows = []
+        self._layout = RowLayout()
+        self._activos = {}
+        self._libres = []
+        self._refresco_pendiente = False
+        self._fin_notificado = False
+
+        self.canvas = tk.Canvas(self, highlightthickness=0, bd=0, yscrollincrement=20,
+                                bg=self._apply_appearance_mode(fg_color))
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.mensaje = ctk.CTkLabel(self, text="", font=fuente, text_color="#3A3A3A")
+
+        self.canvas.bind("<Configure>", lambda e: self._actualizar_geometria())
+        ## The wheel is bound once per root: a binding per list would outlive the list and keep it alive
+        raiz = self._root()
+        if raiz not in _raices_rueda:
+            _raices_rueda.add(raiz)
+            for secuencia in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                raiz.bind_all(secuencia, _despachar_rueda, add="+")
+        _listas_rueda.add(self)
+        ## CTkFrame.bind forwards to its inner canvas; the <Destroy> of the frame itself is bound with tk.Frame.bind
+        tk.Frame.bind(self, "<Destroy>", self._on_destroy, add="+")
+
+    ## @brief Replace the rows of the list
+    ## @param conservar_posicion Keep the scroll position (after removing or updating a row)
+    def set_rows(self, rows, conservar_posicion: bool = False) -> None:
+        self.rows = list(rows)
+        self._layout = RowLayout(self._alturas(self.rows), self._escalar(self.espaciado))
+        self._liberar_activos()
+        self._fin_notificado = False
+
+        if self.rows:
+            self.mensaje.place_forget()
+        elif self.mensaje_vacio:
+            self.mostrar_mensaje(self.mensaje_vacio)
+
+        self._actualizar_scrollregion()
+        if not conservar_posicion:
+            self.canvas.yview_moveto(0)
+        self._programar_refresco()
+
+    ## @brief Add rows at the end of the list (next page)
+    def append_rows(self, rows) -> None:
+        rows = list(rows)
+        if not rows:
+            return
+        self.rows.extend(rows)
+        self._layout.append(self._alturas(rows))
+        self._fin_notificado = False
+        self.mensaje.place_forget()
+        self._actualizar_scrollregion()
+        self._programar_refresco()
+
+    ## @brief Remove the rows for which predicado(item) is true, keeping the scroll position
+    def remove_where(self, predicado) -> None:
+        self.set_rows([r for r in self.rows if not predicado(r)], conservar_posicion=True)
+
+    ## @brief Clear the rows and show a message (loading placeholder, errors...)
+    def mostrar_mensaje(self, texto: str, color: str = "#3A3A3A") -> None:
+        if self.rows:
+            self.rows = []
+            self._layout = RowLayout((), self._escalar(self.espaciado))
+            self._liberar_activos()
+            self._actualizar_scrollregion()
+        self.mensaje.configure(text=texto, text_color=color)
+        self.mensaje.place(relx=0.5, y=50, anchor="n")
+
+    ## @brief Rebuild the visible rows from self.rows (after modifying an item in place)
+    def refrescar(self) -> None:
+        self._liberar_activos()
+        self._programar_refresco()
+
+    def _alturas(self, rows):
+        if self.altura_de is None:
+            altura = self._escalar(self.altura_fila)
+            return [altura] * len(rows)
+        return [self._escalar(self.altura_de(item)) for item in rows]
+
+    def _escalar(self, valor) -> int:
+        return int(round(valor * self._get_widget_scaling()))
+
+    def _liberar_activos(self) -> None:
+        for widget, item_id in self._activos.values():
+            self.canvas.itemconfigure(item_id, state="hidden")
+            self._libres.append((widget, item_id))
+        self._activos = {}
+
+    def _ancho_filas(self) -> int:
+        return max(1, self.canvas.winfo_width() - 2 * self._escalar(self.margen_x))
+
+    def _actualizar_scrollregion(self) -> None:
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), self._layout.total + self._layout.espaciado))
+
+    def _actualizar_geometria(self) -> None:
+        ancho = self._ancho_filas()
+        for _, item_id in self._activos.values():
+            self.canvas.itemconfigure(item_id, width=ancho)
+        self._actualizar_scrollregion()
+        self._programar_refresco()
+
+    def _on_yscroll(self, primero, ultimo) -> None:
+        self.scrollbar.set(primero, ultimo)
+        self._programar_refresco()
+
+    def _programar_refresco(self) -> None:
+        if not self._refresco_pendiente:
+            self._refresco_pendiente = True
+            self.after_idle(self._refrescar_visibles)
+
+    ## @brief Materialize the rows in the visible band, recycling the widgets of the rows that left it
+    def _refrescar_visibles(self) -> None:
+        self._refresco_pendiente = False
+        if not self.winfo_exists():
+            return
+
+        arriba = self.canvas.canvasy(0)
+        abajo = arriba + self.canvas.winfo_height()
+        visibles = self._layout.visible_range(arriba, abajo)
+        if len(visibles) > 0:
+            visibles = range(max(0, visibles.start - self.overscan), min(len(self.rows), visibles.stop + self.overscan))
+
+        for index in [i for i in self._activos if i not in visibles]:
+            widget, item_id = self._activos.pop(index)
+            self.canvas.itemconfigure(item_id, state="hidden")
+            self._libres.append((widget, item_id))
+
+        ancho = self._ancho_filas()
+        for index in visibles:
+            if index in self._activos:
+                continue
+            if self._libres:
+                widget, item_id = self._libres.pop()
+            else:
+                widget = self.crear_fila(self.canvas)
+                item_id = self.canvas.create_window(0, 0, window=widget, anchor="nw")
+            self.llenar_fila(widget, self.rows[index], index)
+            self.canvas.coords(item_id, self._escalar(self.margen_x), self._layout.top(index) + self._layout.espaciado)
+            self.canvas.itemconfigure(item_id, width=ancho, height=self._layout.altura(index), state="normal")
+            self._activos[index] = (widget, item_id)
+
+        if (self.on_end_reached is not None and not self._fin_notificado and len(visibles) > 0
+                and visibles.stop >= len(self.rows) - self.umbral_final):
+            self._fin_notificado = True
+            self.after_idle(self.on_end_reached)
+
+    ## @brief Whether widget is this list or one of its descendants
+    def _contiene(self, widget) -> bool:
+        ruta, propia = str(widget), str(self)
+        return ruta == propia or ruta.startswith(propia + ".")
+
+    def _on_destroy(self, event) -> None:
+        if str(event.widget) == str(self):
+            _listas_rueda.discard(self)
+
+    def _on_rueda(self, event) -> None:
+        try:
+            if not self.winfo_exists() or not self._contiene(event.widget):
+                return
+        except tk.TclError:
+            return
+
+        if event.num == 4:
+            pasos = -3
+        elif event.num == 5:
+            pasos = 3
+        elif sys.platform == "darwin":
+            pasos = -event.delta
+        else:
+            pasos = -int(event.delta / 40)
+        self.canvas.yview_scroll(pasos, "units")
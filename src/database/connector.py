@@ -1,33 +1,106 @@
+import os
+import threading
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.engine import Engine
 from sqlalchemy.engine.base import Connection
 from src.utils.enviroment_load import load_enviroment
 from src.utils.constants import env
 
 Base = declarative_base()
 
+## @brief Default pool settings, each one can be overridden from the .env file
+POOL_DEFAULTS = {
+    "DB_POOL_SIZE": 5,
+    "DB_MAX_OVERFLOW": 5,
+    "DB_POOL_RECYCLE": 1800,
+    "DB_POOL_PRE_PING": True,
+}
+
+## @brief Process-wide registry of engines (and their session factories) keyed by database URL
+_engines: dict[str, tuple[Engine, sessionmaker]] = {}
+_engines_lock = threading.Lock()
+
+
+## @brief Read the pool settings from the environment, falling back to POOL_DEFAULTS
+def pool_settings() -> dict:
+    settings = {}
+    for key, default in POOL_DEFAULTS.items():
+        value = os.getenv(key)
+        if value is None or value.strip() == "":
+            settings[key] = default
+        elif isinstance(default, bool):
+            settings[key] = value.strip().strip('"').lower() in ("1", "true", "yes", "si")
+        else:
+            settings[key] = int(value.strip().strip('"'))
+    return settings
+
+
+## @brief Build a pooled engine for db_url. SQLite URLs ignore the sizing options because they use their own pool classes.
+def _create_pooled_engine(db_url: str, **overrides) -> Engine:
+    settings = pool_settings()
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+
+    options = {"pool_pre_ping": settings["DB_POOL_PRE_PING"]}
+    if not db_url.startswith("sqlite"):
+        options["pool_size"] = settings["DB_POOL_SIZE"]
+        options["max_overflow"] = settings["DB_MAX_OVERFLOW"]
+        options["pool_recycle"] = settings["DB_POOL_RECYCLE"]
+    return create_engine(db_url, **options)
+
+
+## @brief Return the shared (engine, sessionmaker) pair for db_url, creating it on first use
+def get_engine(db_url: str, **overrides) -> tuple[Engine, sessionmaker]:
+    with _engines_lock:
+        if db_url not in _engines:
+            engine = _create_pooled_engine(db_url, **overrides)
+            _engines[db_url] = (engine, sessionmaker(bind=engine))
+        return _engines[db_url]
+
+
+## @brief Dispose every pooled engine (closes all idle connections). Used on shutdown and in tests.
+def dispose_engines() -> None:
+    with _engines_lock:
+        for engine, _ in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+## @brief Hands out sessions and connections borrowed from the shared pool of a database URL.
+## @details Creating a Connector is cheap: every instance pointing to the same URL reuses the same
+## engine and pool, so views can create one each time they are opened. The schema is not touched here,
+## it is bootstrapped once at startup by src.database.migrations.bootstrap_schema.
 class Connector:
-    def __init__(self, db_url=None):
-        load_enviroment()
+    def __init__(self, db_url=None, pool_size: int | None = None, max_overflow: int | None = None,
+                 pool_recycle: int | None = None, pool_pre_ping: bool | None = None):
         if not db_url:
+            load_enviroment()
             db_url = f"mariadb://{env['DB_USER']}:{env['DB_PASSWORD']}@{env['DB_HOST']}:{env['DB_PORT']}/{env['DB_DATABASE']}"
-        
-        print(db_url)  
-        self.engine = create_engine(db_url)
-        Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
-        self.connection = self.engine.connect()  
 
+        self.engine, self.Session = get_engine(
+            db_url,
+            DB_POOL_SIZE=pool_size,
+            DB_MAX_OVERFLOW=max_overflow,
+            DB_POOL_RECYCLE=pool_recycle,
+            DB_POOL_PRE_PING=pool_pre_ping,
+        )
+        self.connection = None
+
+    ## @brief Borrow a connection from the pool. It is returned to the pool with close_connection().
     def get_connection(self) -> Connection:
+        if self.connection is None or self.connection.closed:
+            self.connection = self.engine.connect()
         return self.connection
 
     def close_connection(self):
-        self.connection.close()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
 
     def execute_query(self, query):
         stmt = text(query)
-        result = self.connection.execute(stmt)
+        result = self.get_connection().execute(stmt)
         return result.fetchall()
 
     def get_session(self):
@@ -0,0 +1,17 @@
+## @file like.py
+## @brief LIKE patterns for the text filters of the searches.
+## @details The text typed by the user is matched literally: its % and _ are escaped, so "100%" or "menu_1"
+## don't act as wildcards. Use the pattern with like(..., escape=ESCAPE_LIKE) or ilike(..., escape=ESCAPE_LIKE).
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+## @brief Escape character of the LIKE patterns; not a backslash, which MariaDB and SQLite read differently in literals
+ESCAPE_LIKE = "/"
+
+
+## @brief LIKE pattern that matches the text anywhere, with its % and _ escaped so they are matched literally
+def contains_pattern(texto: str) -> str:
+    texto = texto.replace(ESCAPE_LIKE, ESCAPE_LIKE * 2).replace("%", ESCAPE_LIKE + "%").replace("_", ESCAPE_LIKE + "_")
+    return f"%{texto}%"
@@ -0,0 +1,149 @@
+## @file migrations.py
+## @brief Versioned schema bootstrap, executed once at application startup.
+## @details The current schema version is stored in the schema_version table. When it already matches
+## the latest migration, startup costs a single SELECT and no DDL or catalog introspection is executed.
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from datetime import date
+from sqlalchemy import Column, Integer, String, Date, select, func, insert, inspect, text
+from sqlalchemy.engine import Engine, Connection
+from sqlalchemy.exc import DBAPIError
+from src.database.connector import Base
+
+
+## @brief Registry row of an applied migration
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    descripcion = Column(String(200), nullable=False)
+    fecha_aplicada = Column(Date, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"SchemaVersion: {self.version}, {self.descripcion}, {self.fecha_aplicada}"
+
+
+## @brief Import every model module so all tables are registered in the unified Base.metadata
+def load_models() -> None:
+    import src.Users.model  # noqa: F401
+    import src.Providers.model  # noqa: F401
+    import src.Costs.model  # noqa: F401
+    import src.Ingredients.model  # noqa: F401
+    import src.Recipes.model  # noqa: F401
+    import src.Projections.model  # noqa: F401
+    import src.Purchasing.model  # noqa: F401
+
+
+## @brief Version 1: create every table that does not exist yet (databases created with db_init.sql keep their tables)
+def _create_base_schema(connection: Connection) -> None:
+    Base.metadata.create_all(connection)
+
+
+## @brief Version 2: table of materialized projection totals and the flag that marks them as stale
+def _materialize_projection_totals(connection: Connection) -> None:
+    from src.Projections.model import Proyeccion, ProyeccionIngrediente
+
+    tabla = Proyeccion.__tablename__
+    columnas = {columna["name"] for columna in inspect(connection).get_columns(tabla)}
+    if "totales_obsoletos" not in columnas:
+        connection.execute(text(f"ALTER TABLE {tabla} ADD COLUMN totales_obsoletos BOOLEAN NOT NULL DEFAULT 1"))
+    ProyeccionIngrediente.__table__.create(connection, checkfirst=True)
+
+
+## @brief Version 3: unit conversion table of the purchasing plans, with the common kitchen units
+def _create_unit_conversions(connection: Connection) -> None:
+    from src.Purchasing.model import ConversionUnidad, seed_conversions
+
+    ConversionUnidad.__table__.create(connection, checkfirst=True)
+    seed_conversions(connection)
+
+
+## @brief Version 4: indexes declared in the models for the filters of the searches, the login and the trash can.
+## @details A unique index is created as a plain index when the table already has repeated values, so the
+## upgrade never fails on existing data; the repeated rows are reported to be cleaned up by hand.
+## @return A warning for every unique index created without UNIQUE
+def _create_indexes(connection: Connection) -> list:
+    from src.Recipes.model import Receta
+    from src.Projections.model import Proyeccion
+    from src.Costs.model import Costos
+    from src.Ingredients.model import Ingrediente
+    from src.Users.model import Usuario
+
+    avisos = []
+    inspector = inspect(connection)
+    for modelo in (Receta, Proyeccion, Costos, Ingrediente, Usuario):
+        tabla = modelo.__table__
+        if not inspector.has_table(tabla.name):
+            continue
+        existentes = {indice["name"] for indice in inspector.get_indexes(tabla.name)}
+        for indice in tabla.indexes:
+            if indice.name in existentes:
+                continue
+            if indice.unique:
+                columnas = list(indice.columns)
+                repetidos = connection.execute(
+                    select(func.count()).select_from(
+                        select(*columnas).group_by(*columnas).having(func.count() > 1).subquery()
+                    )
+                ).scalar()
+                if repetidos:
+                    avisos.append(f"{tabla.name} tiene {repetidos} valores repetidos, {indice.name} se crea sin UNIQUE")
+                    quote = connection.dialect.identifier_preparer.quote
+                    connection.execute(text(
+                        f"CREATE INDEX {quote(indice.name)} ON {quote(tabla.name)} "
+                        f"({', '.join(quote(columna.name) for columna in columnas)})"
+                    ))
+                    continue
+            indice.create(connection)
+    return avisos
+
+
+## @brief Ordered list of (version, description, upgrade function). New migrations are appended at the end.
+## An upgrade function may return a list of warnings about the data it could not migrate as expected.
+MIGRATIONS = [
+    (1, "Esquema inicial con metadata unificada", _create_base_schema),
+    (2, "Totales materializados de las proyecciones", _materialize_projection_totals),
+    (3, "Conversiones de unidades para compras", _create_unit_conversions),
+    (4, "Indices de busquedas, login y papelera", _create_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+## @brief Return the schema version recorded in the database, 0 if it was never bootstrapped
+def current_version(engine: Engine) -> int:
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    except DBAPIError:
+        ## The schema_version table does not exist yet
+        return 0
+
+
+## @brief Apply every pending migration in order and record it in schema_version
+## @param avisos List that receives the warnings returned by the migrations applied
+## @return The schema version after the bootstrap
+def bootstrap_schema(engine: Engine, avisos: list = None) -> int:
+    load_models()
+    version = current_version(engine)
+    if version >= LATEST_VERSION:
+        return version
+
+    with engine.begin() as connection:
+        SchemaVersion.__table__.create(connection, checkfirst=True)
+        for numero, descripcion, upgrade in MIGRATIONS:
+            if numero <= version:
+                continue
+            resultado = upgrade(connection)
+            if resultado and avisos is not None:
+                avisos.extend(resultado)
+            connection.execute(insert(SchemaVersion).values(
+                version=numero,
+                descripcion=descripcion,
+                fecha_aplicada=date.today()
+            ))
+            version = numero
+    return version
@@ -0,0 +1,83 @@
+## @file pagination.py
+## @brief Keyset pagination shared by the listing controllers.
+## @details A page is requested with the cursor of the last row already shown (despues) and a limit. The next
+## rows are selected with a condition on the ordering columns instead of an OFFSET, so every page costs the
+## same whatever its position, and rows inserted or removed meanwhile never shift the following pages.
+## The ordering columns must be NOT NULL and end with the primary key, so the order is total and stable.
+import os
+import sys
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.orm import Query
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+## @brief Default number of rows of a page in the listing views
+PAGE_SIZE = 50
+
+
+## @brief Rows of a page. It is a list, so the callers that expect every row keep working.
+class Page(list):
+    ## @param items Rows of the page
+    ## @param cursor Cursor of the last row, to pass as despues for the next page; None when there are no more rows
+    ## @param total Number of rows of the whole listing, when it was requested
+    def __init__(self, items=(), cursor=None, total=None) -> None:
+        super().__init__(items)
+        self.cursor = cursor
+        self.total = total
+
+    ## @brief Whether there are more rows after this page
+    @property
+    def hay_mas(self) -> bool:
+        return self.cursor is not None
+
+    ## @brief Same page with its rows converted (ORM objects to dicts...)
+    def con_items(self, items) -> "Page":
+        return Page(items, self.cursor, self.total)
+
+
+## @brief ORDER BY clauses of an ordering given as [(column, descending), ...]
+def order_by(orden) -> list:
+    return [columna.desc() if descendente else columna.asc() for columna, descendente in orden]
+
+
+## @brief Condition that selects the rows after the cursor in the given ordering
+## @details (a, b, id) > (x, y, z) is written as a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z),
+## with < for the descending columns, so mixed directions are supported.
+def after(orden, cursor):
+    condiciones = []
+    for i, (columna, descendente) in enumerate(orden):
+        iguales = [anterior == valor for (anterior, _), valor in zip(orden[:i], cursor[:i])]
+        siguiente = columna < cursor[i] if descendente else columna > cursor[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+
+## @brief Execute a listing query one page at a time
+## @param query ORM Query (rows are objects) or Core Select (rows are Row), without ORDER BY
+## @param orden Ordering as [(column, descending), ...], NOT NULL columns ending with the primary key
+## @param clave clave(row) -> tuple with the values of the ordering columns of a row, used as the cursor
+## @param despues Cursor of the last row already shown, None for the first page
+## @param limite Rows of the page, None for every remaining row
+## @param contar Also count the rows of the whole listing (one more query)
+## @return Page with the rows
+def paginate(session, query, orden, clave, despues=None, limite: int = None, contar: bool = False) -> Page:
+    total = None
+    if contar:
+        if isinstance(query, Query):
+            total = query.order_by(None).count()
+        else:
+            total = session.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar()
+
+    if despues is not None:
+        query = query.filter(after(orden, despues)) if isinstance(query, Query) else query.where(after(orden, despues))
+    query = query.order_by(*order_by(orden))
+    if limite is not None:
+        ## One more row tells whether there is a next page without counting
+        query = query.limit(limite + 1)
+
+    filas = query.all() if isinstance(query, Query) else session.execute(query).all()
+    cursor = None
+    if limite is not None and len(filas) > limite:
+        filas = filas[:limite]
+        cursor = tuple(clave(filas[-1]))
+    return Page(filas, cursor, total)
@@ -0,0 +1,180 @@
+## @file worker.py
+## @brief Shared background executor for the database calls made from the Tk views.
+## @details Controller calls run on a small thread pool, each task with its own session borrowed from the
+## shared pool of the Connector. Tk widgets are not thread safe, so the workers never touch them: results
+## are put in a queue that is drained on the Tk main thread with after(). Every task may carry a key
+## (for example "recetas.busqueda"); submitting a new task with the same key supersedes the previous one,
+## which is cancelled if it did not start yet and whose result is dropped otherwise.
+import os
+import sys
+import queue
+import itertools
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor, Future
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+## @brief Milliseconds between two drains of the results queue while tasks are in flight
+POLL_INTERVAL_MS = 30
+
+## @brief Default number of worker threads, kept below DB_POOL_SIZE so the views never exhaust the pool
+DEFAULT_WORKERS = 3
+
+
+## @brief Build a session from the default Connector (database configured in the .env file)
+def _default_session_factory():
+    from src.database.connector import Connector
+    return Connector().get_session()
+
+
+## @brief Runs controller calls on worker threads and hands the results back to the Tk main thread
+class DatabaseWorker:
+    ## @param max_workers Number of worker threads
+    ## @param session_factory Callable returning a new session for each task
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, session_factory=None) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self.session_factory = session_factory or _default_session_factory
+        self.results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generations: dict[str, int] = {}
+        self._futures: dict[str, Future] = {}
+        self._anonymous = itertools.count()
+        self._poll_widget = None
+
+    ## @brief Run fn(session, *args, **kwargs) on a worker thread
+    ## @param widget Widget that receives the result; callbacks are skipped if it was destroyed meanwhile.
+    ##        When given, the results queue is drained automatically with widget.after().
+    ## @param key Requests with the same key supersede each other, None for an independent task
+    ## @param on_success Called on the Tk thread with the return value of fn
+    ## @param on_error Called on the Tk thread with the exception raised by fn
+    ## @return The Future of the task
+    def submit(self, widget, key, fn, *args, on_success=None, on_error=None, **kwargs) -> Future:
+        with self._lock:
+            if key is None:
+                key = f"__tarea_{next(self._anonymous)}"
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            previous = self._futures.get(key)
+            if previous is not None:
+                previous.cancel()
+            future = self.executor.submit(self._run, key, generation, widget, on_success, on_error, fn, args, kwargs)
+            self._futures[key] = future
+
+        if widget is not None:
+            self._start_polling(widget)
+        return future
+
+    ## @brief Supersede the task with the given key, its result will not be delivered
+    def cancel(self, key: str) -> None:
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    ## @brief Whether generation is still the latest request submitted for key
+    def is_current(self, key: str, generation: int) -> bool:
+        with self._lock:
+            return self._generations.get(key) == generation
+
+    ## @brief Whether there are tasks running or results waiting to be delivered
+    def busy(self) -> bool:
+        with self._lock:
+            pending = any(not f.done() for f in self._futures.values())
+        return pending or not self.results.empty()
+
+    ## @brief Body of a task, executed on a worker thread
+    def _run(self, key, generation, widget, on_success, on_error, fn, args, kwargs):
+        if not self.is_current(key, generation):
+            return
+        session = self.session_factory()
+        try:
+            result = fn(session, *args, **kwargs)
+            self.results.put((key, generation, widget, on_success, None, result))
+        except Exception as e:
+            session.rollback()
+            self.results.put((key, generation, widget, on_error, e, None))
+        finally:
+            session.close()
+
+    ## @brief Deliver the finished results. Must be called from the Tk main thread.
+    ## @return Number of callbacks executed
+    def process_results(self) -> int:
+        delivered = 0
+        while True:
+            try:
+                key, generation, widget, callback, error, result = self.results.get_nowait()
+            except queue.Empty:
+                return delivered
+
+            if not self.is_current(key, generation):
+                continue
+            with self._lock:
+                self._futures.pop(key, None)
+            if widget is not None and not widget_exists(widget):
+                continue
+
+            if error is not None:
+                if callback is not None:
+                    callback(error)
+                else:
+                    print(f"Error en tarea de base de datos '{key}': {error}")
+            elif callback is not None:
+                callback(result)
+            delivered += 1
+
+    ## @brief Schedule the drain of the results queue on the toplevel window of widget
+    def _start_polling(self, widget) -> None:
+        if self._poll_widget is not None and widget_exists(self._poll_widget):
+            return
+        self._poll_widget = widget.winfo_toplevel()
+        self._poll_widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self) -> None:
+        try:
+            self.process_results()
+        finally:
+            if self.busy() and self._poll_widget is not None and widget_exists(self._poll_widget):
+                self._poll_widget.after(POLL_INTERVAL_MS, self._poll)
+            else:
+                self._poll_widget = None
+
+    ## @brief Stop accepting tasks and cancel the ones that did not start
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+## @brief Whether a Tk widget still exists; False once it (or the Tk interpreter) was destroyed
+def widget_exists(widget) -> bool:
+    try:
+        return bool(widget.winfo_exists())
+    except (tk.TclError, RuntimeError):
+        return False
+
+
+_worker: DatabaseWorker | None = None
+_worker_lock = threading.Lock()
+
+
+## @brief Return the process-wide DatabaseWorker, creating it on first use
+def get_worker() -> DatabaseWorker:
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = DatabaseWorker()
+        return _worker
+
+
+## @brief Shortcut for get_worker().submit(...)
+def run_in_background(widget, key, fn, *args, on_success=None, on_error=None, **kwargs) -> Future:
+    return get_worker().submit(widget, key, fn, *args, on_success=on_success, on_error=on_error, **kwargs)
+
+
+## @brief Shut down the process-wide worker. Used on application exit.
+def shutdown_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            _worker.shutdown()
+            _worker = None
@@ -0,0 +1,202 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.components.busqueda import DebouncedSearch
+from src.database.pagination import Page
+
+
+## @brief Stand-in for a Tk widget whose after() timers are fired manually
+class FakeWidget:
+    def __init__(self):
+        self.timers = {}
+        self.siguiente_id = 0
+
+    def after(self, ms, callback):
+        self.siguiente_id += 1
+        self.timers[self.siguiente_id] = callback
+        return self.siguiente_id
+
+    def after_cancel(self, after_id):
+        self.timers.pop(after_id, None)
+
+    ## @brief Fire every pending timer, like the Tk loop would once the debounce window elapses
+    def fire(self):
+        timers, self.timers = self.timers, {}
+        for callback in timers.values():
+            callback()
+
+
+## @brief Stand-in for DatabaseWorker that keeps the submitted tasks until the test completes them
+class FakeWorker:
+    def __init__(self):
+        self.pendientes = []
+        self.cancelados = []
+
+    def submit(self, widget, key, fn, *args, on_success=None, on_error=None, **kwargs):
+        self.pendientes.append((fn, args, kwargs, on_success, on_error))
+
+    def cancel(self, key):
+        self.cancelados.append(key)
+
+    ## @brief Run the pending task at index and deliver its result
+    def completar(self, index=0):
+        fn, args, kwargs, on_success, on_error = self.pendientes.pop(index)
+        try:
+            resultado = fn(None, *args, **kwargs)
+        except Exception as e:
+            on_error(e)
+            return
+        on_success(resultado)
+
+
+RECETAS = ["Pollo en mole", "Pollo a la crema", "Molletes", "Pozole", "Enchiladas"]
+
+
+## @brief Test class for the debounced search controller
+class TestDebouncedSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.worker = FakeWorker()
+        self.consultas = []
+        self.mostrados = []
+
+        def fetch(session, texto, periodo=None):
+            self.consultas.append((texto, periodo))
+            return [r for r in RECETAS if texto in r.lower()]
+
+        self.busqueda = DebouncedSearch(
+            self.widget, "recetas", fetch,
+            on_results=self.mostrados.append,
+            local_filter=lambda items, texto: [r for r in items if texto in r.lower()],
+            worker=self.worker
+        )
+
+    ## @brief Typing a word within the debounce window launches a single query
+    def test_keystrokes_are_coalesced(self):
+        for i in range(1, len("pollo") + 1):
+            self.busqueda.schedule("pollo"[:i])
+        self.assertEqual(len(self.widget.timers), 1)
+
+        self.widget.fire()
+        self.worker.completar()
+
+        self.assertEqual(self.consultas, [("pollo", None)])
+        self.assertEqual(self.mostrados, [["Pollo en mole", "Pollo a la crema"]])
+
+    ## @brief A text that extends the previous one is filtered locally from the cached results
+    def test_prefix_narrowing_reuses_results(self):
+        self.busqueda.search_now("po")
+        self.worker.completar()
+
+        self.busqueda.search_now("Pol")
+        self.busqueda.search_now("pollo a")
+
+        self.assertEqual(self.consultas, [("po", None)])
+        self.assertEqual(self.mostrados[-1], ["Pollo a la crema"])
+        self.assertEqual(self.worker.pendientes, [])
+
+    ## @brief Shorter texts and different filters go to the database again
+    def test_broader_query_or_new_filters_query_again(self):
+        self.busqueda.search_now("pollo")
+        self.worker.completar()
+
+        self.busqueda.search_now("po")
+        self.worker.completar()
+        self.busqueda.search_now("pol", periodo="Comida")
+        self.worker.completar()
+
+        self.assertEqual(self.consultas, [("pollo", None), ("po", None), ("pol", "Comida")])
+
+    ## @brief A result that arrives after a newer search was issued is dropped
+    def test_stale_results_are_dropped(self):
+        self.busqueda.search_now("mo")
+        self.busqueda.search_now("en")
+
+        self.worker.completar(1)
+        self.worker.completar(0)
+
+        self.assertEqual(self.mostrados, [["Pollo en mole", "Enchiladas"]])
+
+    ## @brief Going back to the text on screen drops the query in flight for the longer text
+    def test_returning_to_shown_text_drops_query_in_flight(self):
+        busqueda = DebouncedSearch(
+            self.widget, "recetas", lambda session, texto: [r for r in RECETAS if texto in r.lower()],
+            on_results=self.mostrados.append, worker=self.worker
+        )
+        busqueda.search_now("po")
+        self.worker.completar()
+
+        busqueda.search_now("pol")
+        busqueda.search_now("po")
+        self.worker.completar()
+
+        self.assertEqual(self.mostrados, [["Pollo en mole", "Pollo a la crema", "Pozole"]])
+        self.assertIn("recetas", self.worker.cancelados)
+
+    ## @brief refresh() forgets the cache so data changes are visible
+    def test_refresh_queries_again(self):
+        self.busqueda.search_now("po")
+        self.worker.completar()
+        self.busqueda.refresh("po")
+        self.worker.completar()
+
+        self.assertEqual(self.consultas, [("po", None), ("po", None)])
+
+    ## @brief With page_size the next pages are appended and a partial result set is not narrowed locally
+    def test_pages_are_loaded_on_demand(self):
+        mas = []
+
+        def fetch(session, texto, despues=None, limite=None):
+            self.consultas.append((texto, despues))
+            filas = [r for r in RECETAS if texto in r.lower()]
+            inicio = 0 if despues is None else despues[0] + 1
+            pagina = filas[inicio:inicio + limite]
+            return Page(pagina, (inicio + limite - 1,) if inicio + limite < len(filas) else None)
+
+        busqueda = DebouncedSearch(self.widget, "recetas", fetch, on_results=self.mostrados.append,
+                                   local_filter=lambda items, texto: [r for r in items if texto in r.lower()],
+                                   worker=self.worker, page_size=2, on_more=mas.append)
+        busqueda.search_now("e")
+        self.worker.completar()
+        self.assertEqual(self.mostrados, [["Pollo en mole", "Pollo a la crema"]])
+
+        busqueda.load_more()
+        self.worker.completar()
+        self.assertEqual(mas, [["Molletes", "Pozole"]])
+
+        ## "Enchiladas" is not loaded yet, so a longer text queries the database
+        busqueda.search_now("en")
+        self.assertEqual(len(self.worker.pendientes), 1)
+        self.worker.completar()
+        self.assertEqual(self.mostrados[-1], ["Pollo en mole", "Enchiladas"])
+
+        ## Every row of "en" fits in one page, so a longer text is filtered locally
+        busqueda.search_now("enc")
+        self.assertEqual(self.worker.pendientes, [])
+        self.assertEqual(self.mostrados[-1], ["Enchiladas"])
+        self.assertEqual(self.consultas, [("e", None), ("e", (1,)), ("en", None)])
+
+    ## @brief Dropping a deleted row keeps the cursor, so the next pages still load
+    def test_removed_rows_keep_loading_pages(self):
+        mas = []
+
+        def fetch(session, texto, despues=None, limite=None):
+            inicio = 0 if despues is None else despues[0] + 1
+            return Page(RECETAS[inicio:inicio + limite], (inicio + limite - 1,) if inicio + limite < len(RECETAS) else None)
+
+        busqueda = DebouncedSearch(self.widget, "recetas", fetch, on_results=self.mostrados.append,
+                                   worker=self.worker, page_size=2, on_more=mas.append)
+        busqueda.search_now("")
+        self.worker.completar()
+        busqueda.remove_where(lambda receta: receta == "Pollo a la crema")
+
+        busqueda.load_more()
+        self.worker.completar()
+        self.assertEqual(mas, [["Molletes", "Pozole"]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.components.virtual_list import RowLayout
+
+
+## @brief Test class for the row layout behind VirtualList
+class TestRowLayout(unittest.TestCase):
+
+    ## @brief Offsets are the prefix sums of the heights plus the gap
+    def test_offsets(self):
+        layout = RowLayout([40, 60, 100], espaciado=10)
+
+        self.assertEqual(len(layout), 3)
+        self.assertEqual(layout.offsets, [0, 50, 120, 230])
+        self.assertEqual(layout.total, 230)
+        self.assertEqual(layout.top(2), 120)
+        self.assertEqual(layout.altura(1), 60)
+
+    ## @brief Only the rows that intersect the visible band are returned
+    def test_visible_range(self):
+        layout = RowLayout([40, 60, 100, 30, 30], espaciado=10)
+
+        self.assertEqual(list(layout.visible_range(0, 45)), [0])
+        self.assertEqual(list(layout.visible_range(45, 125)), [0, 1, 2])
+        self.assertEqual(list(layout.visible_range(230, 260)), [3])
+        self.assertEqual(list(layout.visible_range(250, 10000)), [3, 4])
+        self.assertEqual(list(layout.visible_range(-50, 10)), [0])
+
+    ## @brief Empty layouts and empty bands have no visible rows
+    def test_empty(self):
+        self.assertEqual(list(RowLayout().visible_range(0, 500)), [])
+        self.assertEqual(list(RowLayout([50]).visible_range(20, 20)), [])
+
+    ## @brief Large lists resolve the visible window without touching the rest of the rows
+    def test_large_list(self):
+        layout = RowLayout([50] * 10000, espaciado=8)
+        layout.append([120] * 10)
+
+        visibles = layout.visible_range(58 * 5000, 58 * 5000 + 600)
+        self.assertEqual(visibles.start, 5000)
+        self.assertEqual(len(visibles), 11)
+        self.assertEqual(len(layout), 10010)
+        self.assertEqual(layout.altura(10005), 120)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -114,15 +114,18 @@ class TestCostController(unittest.TestCase):
             MagicMock(spec=Costos, nombre="Cost 1", precio=50, id_proveedor=1),
             MagicMock(spec=Costos, nombre="Cost 2", precio=75, id_proveedor=2)
         ]
-        self.session.query.return_value.all.return_value = mock_costs
+        ## The query goes through paginate, sorted by id, even without a page size
+        self.session.execute.return_value.all.return_value = mock_costs
 
         # Act
         costs = CostController.get_all_costs(self.session)
 
         # Assert
         self.assertEqual(len(costs), len(mock_costs))
-        self.session.query.assert_called_once()
-        self.session.query.return_value.all.assert_called_once()
+        self.assertIsNone(costs.cursor)
+        self.session.query.assert_called_once_with(Costos)
+        self.session.query.return_value.order_by.assert_called_once()
+        self.session.execute.assert_called_once()
     ## Test for fetch_costs_by_provider
     def test_fetch_costs_by_provider(self):
         # Arrange
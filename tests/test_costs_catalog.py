@@ -0,0 +1,91 @@
+import unittest
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Costs.model import Costos
+from src.Costs.controller import CostController
+from src.Providers.model import Proveedor
+from src.Ingredients.model import Ingrediente
+
+## Test class for the cost catalog read API, using SQLite in-memory database
+class TestCostCatalog(unittest.TestCase):
+    ## Set up two providers, their costs and the ingredients that give the units
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()
+
+        self.abarrotes = Proveedor(nombre="Abarrotes Lupita", categoria="Abarrotes")
+        self.lacteos = Proveedor(nombre="Lacteos del Norte", categoria="Lacteos")
+        self.session.add_all([self.abarrotes, self.lacteos])
+        self.session.add_all([
+            Ingrediente(nombre="Arroz", clasificacion="Cereal", unidad_medida="kg"),
+            Ingrediente(nombre="Leche", clasificacion="Lacteo", unidad_medida="l"),
+        ])
+        self.session.commit()
+
+        self.session.add_all([
+            Costos(nombre_ingrediente="Arroz", precio=32.5, id_proveedor=self.abarrotes.id_proveedor),
+            Costos(nombre_ingrediente="Leche", precio=28, id_proveedor=self.lacteos.id_proveedor),
+            Costos(nombre_ingrediente="Leche deslactosada", precio=35, id_proveedor=self.lacteos.id_proveedor),
+        ])
+        self.session.commit()
+
+    ## Tear down the in-memory database after each test
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    ## Test that the catalog resolves provider and unit, with the defaults for missing ingredients
+    def test_catalog_rows(self):
+        catalogo = CostController.list_cost_catalog(self.session)
+
+        self.assertEqual([c["ingrediente"] for c in catalogo], ["Leche", "Arroz", "Leche deslactosada"])
+        self.assertEqual(catalogo[0]["proveedor"], "Lacteos del Norte")
+        self.assertEqual(catalogo[0]["unidad"], "l")
+        self.assertEqual(catalogo[1]["id_proveedor"], self.abarrotes.id_proveedor)
+        self.assertEqual(catalogo[1]["unidad"], "kg")
+        self.assertEqual(Decimal(str(catalogo[1]["precio"])), Decimal("32.50"))
+        self.assertEqual(catalogo[2]["unidad"], "PZA")
+
+    ## Test the text filter and the descending price order
+    def test_catalog_filter_and_order(self):
+        catalogo = CostController.list_cost_catalog(self.session, "LECHE", descendente=True)
+
+        self.assertEqual([c["ingrediente"] for c in catalogo], ["Leche deslactosada", "Leche"])
+        self.assertEqual(CostController.list_cost_catalog(self.session, "pan"), [])
+
+    ## Test that % and _ in the filter are matched literally and that a name with several units shows the oldest one
+    def test_catalog_literal_filter_and_stable_unit(self):
+        self.session.add_all([
+            Ingrediente(nombre="Arroz", clasificacion="Cereal", unidad_medida="costal"),
+            Costos(nombre_ingrediente="Jugo 100% natural", precio=20, id_proveedor=self.abarrotes.id_proveedor),
+        ])
+        self.session.commit()
+
+        self.assertEqual([c["ingrediente"] for c in CostController.list_cost_catalog(self.session, "0%")],
+                         ["Jugo 100% natural"])
+        self.assertEqual(CostController.list_cost_catalog(self.session, "_"), [])
+        arroz = [c for c in CostController.list_cost_catalog(self.session, "arroz")]
+        self.assertEqual([c["unidad"] for c in arroz], ["kg"])
+
+    ## Test that the whole catalog is read with a single statement
+    def test_catalog_single_query(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        catalogo = CostController.list_cost_catalog(self.session)
+
+        self.assertEqual(len(catalogo), 3)
+        self.assertEqual(len(statements), 1)
+
+if __name__ == '__main__':
+    unittest.main()
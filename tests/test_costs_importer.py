@@ -0,0 +1,110 @@
+import unittest
+import io
+import os
+import sys
+import tempfile
+import pandas as pd
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Costs.model import Costos
+from src.Costs.controller import CostController
+from src.Costs.importer import normalizar_precios, leer_lista_precios, importar_lista_precios
+from src.Providers.model import Proveedor
+
+## Test class for the bulk price list import, using SQLite in-memory database
+class TestPriceListImport(unittest.TestCase):
+    ## Set up the in-memory SQLite database with a provider
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()
+
+        self.proveedor = Proveedor(nombre="Abarrotes Lupita", categoria="Abarrotes")
+        self.session.add(self.proveedor)
+        self.session.commit()
+
+    ## Tear down the in-memory database after each test
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def costos(self):
+        return {c.nombre_ingrediente: float(c.precio) for c in self.session.query(Costos).all()}
+
+    ## Test the price formats accepted from spreadsheets
+    def test_normalize_prices(self):
+        precios = normalizar_precios(pd.Series(["$ 45", "12,5", "1,234.50", "1.234,50", "abc", "", "  7.999 "]))
+
+        self.assertEqual(precios.tolist()[:4], [45.0, 12.5, 1234.5, 1234.5])
+        self.assertTrue(pd.isna(precios[4]))
+        self.assertTrue(pd.isna(precios[5]))
+        self.assertEqual(precios[6], 8.0)
+
+    ## Test a csv file with header: valid rows are inserted and the rest reported with their line
+    def test_import_csv_with_header(self):
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = os.path.join(carpeta, "lista.csv")
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write("Producto,Unidad,Precio\nArroz,kg,32.50\nFrijol,kg,gratis\n,kg,10\nLeche,l,$28\n")
+
+            reporte = CostController.add_costs_for_provider_from_excel(self.session, self.proveedor.id_proveedor, ruta)
+
+        self.assertEqual(reporte.insertadas, 2)
+        self.assertEqual(self.costos(), {"Arroz": 32.5, "Leche": 28.0})
+        self.assertEqual([(fila, motivo) for fila, motivo, _ in reporte.rechazos],
+                         [(3, "Precio no numérico"), (4, "Producto sin nombre")])
+
+    ## Test text pasted from a spreadsheet, without header, streamed in small chunks
+    def test_import_pasted_text_in_chunks(self):
+        lineas = [f"Producto {i}\tpza\t{i},50" for i in range(1, 26)]
+        lineas.insert(10, "Producto malo\tpza\t-3")
+        texto = "\n".join(lineas) + "\n\n"
+
+        inserts = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: inserts.append(statement) if statement.startswith("INSERT") else None)
+        progreso = []
+
+        reporte = CostController.import_price_list(self.session, self.proveedor.id_proveedor, io.StringIO(texto), "tsv",
+                                                   on_progress=lambda r: progreso.append(r.leidas))
+
+        self.assertEqual(reporte.insertadas, 25)
+        self.assertEqual(reporte.rechazos[0][:2], (11, "Precio fuera de rango"))
+        self.assertEqual(self.costos()["Producto 7"], 7.5)
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(progreso[-1], reporte.leidas)
+
+        bloques = list(leer_lista_precios(io.StringIO(texto), "tsv", chunksize=10))
+        self.assertEqual([primera for _, primera in bloques], [1, 11, 21])
+
+    ## Test that lines with more fields than the header are reported with their line instead of dropped
+    def test_lines_with_extra_fields_are_rejected(self):
+        texto = "Producto,Precio\nArroz,32\nFrijol,1,250.00\nLeche,28\nAzucar,sin precio\n"
+
+        reporte = importar_lista_precios(self.session, self.proveedor.id_proveedor, io.StringIO(texto), "csv", chunksize=2)
+
+        self.assertEqual(self.costos(), {"Arroz": 32.0, "Leche": 28.0})
+        self.assertEqual(reporte.rechazos, [(3, "Tiene 3 columnas, se esperaban 2", "Frijol\t1\t250.00"),
+                                            (5, "Precio no numérico", "Azucar\tsin precio")])
+
+    ## Test that a failure halfway rolls back the whole list
+    def test_import_is_all_or_nothing(self):
+        texto = "\n".join(f"Producto {i}\t{i}" for i in range(1, 6))
+
+        def fallar(reporte):
+            raise RuntimeError("conexion perdida")
+
+        with self.assertRaises(RuntimeError):
+            CostController.import_price_list(self.session, self.proveedor.id_proveedor, io.StringIO(texto), "tsv",
+                                             on_progress=fallar)
+
+        self.assertEqual(self.costos(), {})
+
+if __name__ == '__main__':
+    unittest.main()
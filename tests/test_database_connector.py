@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Connector, dispose_engines, pool_settings, POOL_DEFAULTS
+
+## @brief Test class for the pooled engine registry behind Connector
+class TestConnector(unittest.TestCase):
+
+    ## @brief Start every test with an empty engine registry
+    def setUp(self):
+        dispose_engines()
+
+    ## @brief Close every pooled engine created by the test
+    def tearDown(self):
+        dispose_engines()
+
+    ## @brief Two connectors for the same URL share the engine and the session factory
+    def test_same_url_shares_engine(self):
+        a = Connector('sqlite:///:memory:')
+        b = Connector('sqlite:///:memory:')
+
+        self.assertIs(a.engine, b.engine)
+        self.assertIs(a.Session, b.Session)
+
+    ## @brief Different URLs get different engines
+    def test_different_url_different_engine(self):
+        a = Connector('sqlite:///:memory:')
+        b = Connector('sqlite://')
+
+        self.assertIsNot(a.engine, b.engine)
+
+    ## @brief Sessions are bound to the shared engine
+    def test_session_uses_shared_engine(self):
+        connector = Connector('sqlite:///:memory:')
+        session = connector.get_session()
+
+        self.assertIs(session.get_bind(), connector.engine)
+        session.close()
+
+    ## @brief The connection is only borrowed on demand and returned on close
+    def test_connection_is_lazy(self):
+        connector = Connector('sqlite:///:memory:')
+        self.assertIsNone(connector.connection)
+
+        result = connector.execute_query("SELECT 1")
+        self.assertEqual(result[0][0], 1)
+
+        connector.close_connection()
+        self.assertIsNone(connector.connection)
+
+    ## @brief Pool settings are read from the environment
+    @patch.dict(os.environ, {"DB_POOL_SIZE": "12", "DB_MAX_OVERFLOW": "3", "DB_POOL_RECYCLE": "60", "DB_POOL_PRE_PING": "false"})
+    def test_pool_settings_from_env(self):
+        settings = pool_settings()
+
+        self.assertEqual(settings["DB_POOL_SIZE"], 12)
+        self.assertEqual(settings["DB_MAX_OVERFLOW"], 3)
+        self.assertEqual(settings["DB_POOL_RECYCLE"], 60)
+        self.assertFalse(settings["DB_POOL_PRE_PING"])
+
+    ## @brief Missing settings fall back to the defaults
+    @patch.dict(os.environ, {}, clear=True)
+    def test_pool_settings_defaults(self):
+        self.assertEqual(pool_settings(), POOL_DEFAULTS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+from sqlalchemy import create_engine, event, inspect, text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.database.migrations import bootstrap_schema, current_version, load_models, LATEST_VERSION
+
+## @brief Test class for the versioned schema bootstrap
+class TestMigrations(unittest.TestCase):
+
+    ## @brief Set up an empty in-memory SQLite database
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+
+    ## @brief Drop every table after each test
+    def tearDown(self):
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    ## @brief A new database starts without a version
+    def test_empty_database_has_no_version(self):
+        self.assertEqual(current_version(self.engine), 0)
+
+    ## @brief The bootstrap creates every table, including the ones that used their own declarative_base before
+    def test_bootstrap_creates_all_tables(self):
+        version = bootstrap_schema(self.engine)
+
+        self.assertEqual(version, LATEST_VERSION)
+        self.assertEqual(current_version(self.engine), LATEST_VERSION)
+        tablas = inspect(self.engine).get_table_names()
+        for tabla in ["Usuarios", "Costos", "Proveedores", "ingredientes", "recetas",
+                      "receta_ingredientes", "proyecciones", "Proyeccion_Recetas", "schema_version",
+                      "proyeccion_ingredientes", "conversion_unidades"]:
+            self.assertIn(tabla, tablas)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("SELECT factor FROM conversion_unidades WHERE unidad = 'kg'")).scalar(), 1000)
+
+    ## @brief When the version already matches, the bootstrap runs a single query and no DDL
+    def test_bootstrap_is_skipped_when_up_to_date(self):
+        bootstrap_schema(self.engine)
+
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        version = bootstrap_schema(self.engine)
+
+        self.assertEqual(version, LATEST_VERSION)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].lstrip().upper().startswith("SELECT"))
+
+    ## @brief A database bootstrapped at version 1 gets the materialized projection totals
+    def test_upgrade_from_version_1(self):
+        with self.engine.begin() as connection:
+            connection.execute(text("CREATE TABLE proyecciones (id_proyeccion INTEGER PRIMARY KEY, nombre VARCHAR(100), "
+                                    "periodo VARCHAR(50), comensales INTEGER NOT NULL, fecha DATE NOT NULL, "
+                                    "estatus BOOLEAN, fecha_eliminado DATE)"))
+            connection.execute(text("INSERT INTO proyecciones VALUES (1, 'Lunes', 'Comida', 50, '2025-05-05', 1, NULL)"))
+            connection.execute(text("CREATE TABLE schema_version (version INTEGER PRIMARY KEY, "
+                                    "descripcion VARCHAR(200) NOT NULL, fecha_aplicada DATE NOT NULL)"))
+            connection.execute(text("INSERT INTO schema_version VALUES (1, 'Esquema inicial', '2025-05-01')"))
+
+        version = bootstrap_schema(self.engine)
+
+        self.assertEqual(version, LATEST_VERSION)
+        columnas = {columna["name"] for columna in inspect(self.engine).get_columns("proyecciones")}
+        self.assertIn("totales_obsoletos", columnas)
+        self.assertIn("proyeccion_ingredientes", inspect(self.engine).get_table_names())
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("SELECT totales_obsoletos FROM proyecciones")).scalar(), 1)
+
+    ## @brief Version 4 adds the indexes of the models to a database at version 3, and a unique index never fails on repeated values
+    def test_upgrade_creates_indexes(self):
+        load_models()
+        with self.engine.begin() as connection:
+            Base.metadata.create_all(connection)
+            for tabla in Base.metadata.sorted_tables:
+                for indice in tabla.indexes:
+                    indice.drop(connection)
+            connection.execute(text("INSERT INTO Usuarios (nombre_usuario, nombre_completo) VALUES ('admin', 'Admin'), ('admin', 'Otro')"))
+            for version in (1, 2, 3):
+                connection.execute(text(f"INSERT INTO schema_version VALUES ({version}, 'Anterior', '2025-05-01')"))
+
+        avisos = []
+        self.assertEqual(bootstrap_schema(self.engine, avisos), LATEST_VERSION)
+        self.assertEqual(avisos, ["Usuarios tiene 1 valores repetidos, ux_usuarios_nombre_usuario se crea sin UNIQUE"])
+
+        inspector = inspect(self.engine)
+        usuarios = {indice["name"]: indice["unique"] for indice in inspector.get_indexes("Usuarios")}
+        self.assertEqual(usuarios["ux_usuarios_nombre_usuario"], 0)
+        ingredientes = {indice["name"]: indice["unique"] for indice in inspector.get_indexes("ingredientes")}
+        self.assertEqual(ingredientes["ux_ingredientes_nombre_unidad"], 1)
+        for tabla, nombre in [("recetas", "ix_recetas_estatus_periodo_clasificacion"),
+                              ("recetas", "ix_recetas_estatus_fecha_eliminado"),
+                              ("proyecciones", "ix_proyecciones_estatus_fecha"),
+                              ("Costos", "ix_costos_nombre_ingrediente_proveedor")]:
+            self.assertIn(nombre, {indice["name"] for indice in inspector.get_indexes(tabla)})
+
+if __name__ == '__main__':
+    unittest.main()
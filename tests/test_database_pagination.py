@@ -0,0 +1,107 @@
+import unittest
+import os
+import sys
+from datetime import date, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta
+from src.Recipes.controller import RecetasController
+from src.Projections.model import Proyeccion, ProyeccionReceta
+from src.Projections.controller import ProyeccionController
+from src.Providers.model import Proveedor
+from src.Costs.model import Costos
+from src.Costs.controller import CostController
+from src.Trashcan.controller import TrashcanController
+
+## Test class for the keyset pagination of the listings, using SQLite in-memory database
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        ## Repeated names and prices make the primary key decide the order
+        self.recetas = [Receta(nombre_receta=f"Receta {i % 7}", clasificacion="Guisado", periodo="Comida",
+                               comensales_base=4, estatus=i % 5 != 0) for i in range(23)]
+        proveedor = Proveedor(nombre="Central", categoria="Abarrotes")
+        self.session.add_all(self.recetas + [proveedor])
+        self.session.commit()
+        self.session.add_all([Costos(f"Ingrediente {i % 4}", 10 + i % 3, proveedor.id_proveedor) for i in range(17)])
+        for i in range(9):
+            proyeccion = Proyeccion(numero_usuario=1, nombre=f"Proyeccion {i}", periodo="Comida", comensales=10,
+                                    fecha=date(2025, 5, 1) + timedelta(days=i % 3), estatus=True)
+            self.session.add(proyeccion)
+            self.session.flush()
+            self.session.add(ProyeccionReceta(id_proyeccion=proyeccion.id_proyeccion,
+                                              id_receta=self.recetas[1].id_receta, porcentaje=100))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    ## Follow the cursors from the first page to the last one
+    def todas_las_paginas(self, listar, limite):
+        filas, despues, paginas = [], None, 0
+        while True:
+            pagina = listar(despues=despues, limite=limite)
+            self.assertLessEqual(len(pagina), limite)
+            filas.extend(pagina)
+            paginas += 1
+            if not pagina.hay_mas:
+                return filas, paginas
+            despues = pagina.cursor
+
+    ## The pages of the recipes add up to the full listing, in a stable order, without repeated rows
+    def test_recipes_pages(self):
+        completo = RecetasController.search_recipes(self.session)
+        filas, paginas = self.todas_las_paginas(lambda **kw: RecetasController.search_recipes(self.session, **kw), 5)
+
+        self.assertEqual([r["id_receta"] for r in filas], [r["id_receta"] for r in completo])
+        self.assertEqual(len(filas), 18)
+        self.assertEqual(paginas, 4)
+        self.assertEqual([r["nombre_receta"] for r in filas], sorted(r["nombre_receta"] for r in filas))
+        self.assertEqual(RecetasController.search_recipes(self.session, limite=5, contar=True).total, 18)
+
+    ## A page costs the same queries whatever its position
+    def test_pages_do_not_grow_with_position(self):
+        primera = RecetasController.search_recipes(self.session, limite=5)
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        siguiente = RecetasController.search_recipes(self.session, despues=primera.cursor, limite=5)
+
+        self.assertEqual(len(siguiente), 5)
+        self.assertLessEqual(len(statements), 2)
+        self.assertIn("recetas.nombre_receta > ?", statements[0])
+
+    ## Descending prices with ascending names and ids page correctly
+    def test_cost_catalog_pages(self):
+        completo = CostController.list_cost_catalog(self.session, descendente=True)
+        filas, _ = self.todas_las_paginas(
+            lambda **kw: CostController.list_cost_catalog(self.session, descendente=True, **kw), 4)
+        self.assertEqual([c["id_costo"] for c in filas], [c["id_costo"] for c in completo])
+        self.assertEqual(len(filas), 17)
+
+        todos, _ = self.todas_las_paginas(lambda **kw: CostController.get_all_costs(self.session, **kw), 6)
+        self.assertEqual([c.id_costo for c in todos], sorted(c.id_costo for c in todos))
+
+    ## Projections are paged by date and the trash can by id
+    def test_projections_and_trashcan_pages(self):
+        filas, _ = self.todas_las_paginas(lambda **kw: ProyeccionController.list_all_projections(self.session, **kw), 2)
+        self.assertEqual(len(filas), 9)
+        self.assertEqual([p["fecha"] for p in filas], sorted(p["fecha"] for p in filas))
+        self.assertEqual(filas[0]["recetas"][0]["id_receta"], self.recetas[1].id_receta)
+
+        fecha = ProyeccionController.search_projections(self.session, fecha=date(2025, 5, 2), limite=2, contar=True)
+        self.assertEqual(fecha.total, 3)
+
+        borradas, _ = self.todas_las_paginas(lambda **kw: TrashcanController.get_deleted_recipes(self.session, **kw), 2)
+        self.assertEqual([r.id_receta for r in borradas], [r.id_receta for r in self.recetas if not r.estatus])
+
+if __name__ == '__main__':
+    unittest.main()
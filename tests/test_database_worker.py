@@ -0,0 +1,127 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import wait
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base, Connector, dispose_engines
+from src.database.worker import DatabaseWorker
+from src.Recipes.model import Receta
+from src.Recipes.controller import RecetasController
+
+
+## @brief Stand-in for a Tk widget; after() only records the poll, the tests drain the queue themselves
+class FakeWidget:
+    def __init__(self, exists=True):
+        self.exists = exists
+        self.programados = []
+
+    def winfo_exists(self):
+        return 1 if self.exists else 0
+
+    def winfo_toplevel(self):
+        return self
+
+    def after(self, ms, callback):
+        self.programados.append(callback)
+
+
+## @brief Test class for DatabaseWorker, using a temporary SQLite file shared by the worker threads
+class TestDatabaseWorker(unittest.TestCase):
+
+    def setUp(self):
+        dispose_engines()
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.connector = Connector(f"sqlite:///{self.db_path}")
+        Base.metadata.create_all(self.connector.engine)
+
+        session = self.connector.get_session()
+        session.add_all([
+            Receta(nombre_receta="Pollo en mole", clasificacion="Guisado", periodo="Comida", comensales_base=4, estatus=True),
+            Receta(nombre_receta="Pollo a la crema", clasificacion="Guisado", periodo="Comida", comensales_base=4, estatus=True),
+            Receta(nombre_receta="Molletes", clasificacion="Antojos", periodo="Desayuno", comensales_base=2, estatus=True),
+        ])
+        session.commit()
+        session.close()
+
+        self.worker = DatabaseWorker(max_workers=2, session_factory=self.connector.get_session)
+
+    def tearDown(self):
+        self.worker.shutdown()
+        dispose_engines()
+        os.remove(self.db_path)
+
+    ## @brief Wait for every submitted task and deliver the results like the Tk poll would
+    def drain(self, *futures):
+        wait(futures, timeout=5)
+        return self.worker.process_results()
+
+    ## @brief The controller runs on a worker thread and the result is delivered by process_results
+    def test_result_is_delivered(self):
+        resultados = []
+        hilos = []
+
+        def buscar(session, nombre):
+            hilos.append(threading.current_thread().name)
+            return RecetasController.search_recipes(session, nombre=nombre)
+
+        future = self.worker.submit(FakeWidget(), "busqueda", buscar, "Pollo", on_success=resultados.append)
+        self.assertEqual(resultados, [])
+
+        self.assertEqual(self.drain(future), 1)
+        self.assertEqual(len(resultados[0]), 2)
+        self.assertTrue(hilos[0].startswith("db-worker"))
+
+    ## @brief A newer request with the same key supersedes the one in flight
+    def test_superseded_result_is_dropped(self):
+        bloqueo = threading.Event()
+        resultados = []
+
+        def lenta(session):
+            bloqueo.wait(5)
+            return "vieja"
+
+        primera = self.worker.submit(FakeWidget(), "busqueda", lenta, on_success=resultados.append)
+        segunda = self.worker.submit(FakeWidget(), "busqueda", lambda session: "nueva", on_success=resultados.append)
+        bloqueo.set()
+
+        self.drain(primera, segunda)
+        self.assertEqual(resultados, ["nueva"])
+
+    ## @brief Cancelled keys and destroyed widgets do not receive callbacks
+    def test_cancel_and_destroyed_widget(self):
+        resultados = []
+
+        cancelada = self.worker.submit(FakeWidget(), "historial", lambda session: 1, on_success=resultados.append)
+        self.worker.cancel("historial")
+        destruida = self.worker.submit(FakeWidget(exists=False), "recetas", lambda session: 2, on_success=resultados.append)
+
+        self.drain(cancelada, destruida)
+        self.assertEqual(resultados, [])
+        self.assertFalse(self.worker.busy())
+
+    ## @brief Exceptions are delivered to on_error and the session is usable again afterwards
+    def test_error_is_delivered(self):
+        errores = []
+
+        def falla(session):
+            session.query(Receta).count()
+            raise ValueError("fallo")
+
+        future = self.worker.submit(FakeWidget(), None, falla, on_error=errores.append)
+        self.drain(future)
+
+        self.assertEqual(len(errores), 1)
+        self.assertIsInstance(errores[0], ValueError)
+
+        conteo = []
+        future = self.worker.submit(FakeWidget(), None, lambda session: session.query(Receta).count(), on_success=conteo.append)
+        self.drain(future)
+        self.assertEqual(conteo, [3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import unittest
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+from src.Projections.controller import ProyeccionController
+from src.Projections.engine import ProjectionEngine
+
+## Test class for ProjectionEngine, using SQLite in-memory database
+class TestProjectionEngine(unittest.TestCase):
+    ## Set up the in-memory SQLite database with two recipes that share ingredients
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()
+
+        self.receta1 = Receta(nombre_receta="Chilaquiles", clasificacion="Platillo principal",
+                              periodo="Desayuno", comensales_base=4, estatus=True)
+        self.receta2 = Receta(nombre_receta="Enchiladas", clasificacion="Platillo principal",
+                              periodo="Comida", comensales_base=2, estatus=True)
+        self.receta3 = Receta(nombre_receta="Pozole", clasificacion="Platillo principal",
+                              periodo="Comida", comensales_base=10, estatus=False)
+        self.session.add_all([self.receta1, self.receta2, self.receta3])
+
+        self.totopos = Ingrediente(nombre="Totopos", clasificacion="Cereal", unidad_medida="g")
+        self.salsa = Ingrediente(nombre="Salsa", clasificacion="Salsa", unidad_medida="ml")
+        self.queso = Ingrediente(nombre="Queso", clasificacion="Lacteo", unidad_medida="g")
+        self.tortillas = Ingrediente(nombre="Tortillas", clasificacion="Cereal", unidad_medida="g")
+        self.session.add_all([self.totopos, self.salsa, self.queso, self.tortillas])
+        self.session.commit()
+
+        self.session.add_all([
+            Receta_Ingredientes(id_receta=self.receta1.id_receta, id_ingrediente=self.totopos.id_ingrediente, cantidad=200),
+            Receta_Ingredientes(id_receta=self.receta1.id_receta, id_ingrediente=self.salsa.id_ingrediente, cantidad=150),
+            Receta_Ingredientes(id_receta=self.receta1.id_receta, id_ingrediente=self.queso.id_ingrediente, cantidad=100),
+            Receta_Ingredientes(id_receta=self.receta2.id_receta, id_ingrediente=self.tortillas.id_ingrediente, cantidad=250),
+            Receta_Ingredientes(id_receta=self.receta2.id_receta, id_ingrediente=self.salsa.id_ingrediente, cantidad=200),
+            Receta_Ingredientes(id_receta=self.receta2.id_receta, id_ingrediente=self.queso.id_ingrediente, cantidad=150),
+            Receta_Ingredientes(id_receta=self.receta3.id_receta, id_ingrediente=self.queso.id_ingrediente, cantidad=500),
+        ])
+        self.session.commit()
+
+    ## Tear down the in-memory database after each test
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    ## Test that only active recipes are loaded and quantities are normalized per comensales_base
+    def test_load_active_normalizes_per_diner(self):
+        motor = ProjectionEngine.load_active(self.session)
+
+        self.assertEqual(motor.recetas_ids, [self.receta1.id_receta, self.receta2.id_receta])
+        self.assertEqual(motor.matriz.shape, (2, 4))
+        columna_salsa = motor.ingredientes.index(("Salsa", "ml"))
+        np.testing.assert_allclose(motor.matriz[:, columna_salsa], [150 / 4, 200 / 2])
+
+    ## Test that a recipe with 0 diners contributes nothing instead of dividing by zero
+    def test_zero_diners_recipe_is_skipped(self):
+        self.receta2.comensales_base = 0
+        self.session.commit()
+
+        motor = ProjectionEngine.load(self.session, [self.receta1.id_receta, self.receta2.id_receta])
+        totales = motor.totals({self.receta1.id_receta: 50, self.receta2.id_receta: 50}, 8)
+
+        self.assertNotIn("Tortillas", totales)
+        self.assertAlmostEqual(totales["Salsa"]["cantidad"], 150 / 4 * 8 * 0.5)
+
+    ## Test that a batch of scenarios matches calculate_total_ingredients for each stored projection
+    def test_batch_matches_calculate_total_ingredients(self):
+        escenarios = [(70, 30, 12), (45, 55, 35), (10, 90, 7), (50, 50, 100)]
+        motor = ProjectionEngine.load_active(self.session)
+
+        pesos = [{self.receta1.id_receta: p1, self.receta2.id_receta: p2} for p1, p2, _ in escenarios]
+        comensales = np.array([c for _, _, c in escenarios])
+        resultados = motor.to_dicts(motor.evaluate(pesos, comensales), pesos)
+
+        for (p1, p2, c), resultado in zip(escenarios, resultados):
+            proyeccion = ProyeccionController.create_projection(
+                self.session, f"Proyeccion {c}", "Semanal", c,
+                [
+                    {"id_receta": self.receta1.id_receta, "porcentaje": p1},
+                    {"id_receta": self.receta2.id_receta, "porcentaje": p2}
+                ]
+            )
+            esperado = ProyeccionController.calculate_total_ingredients(self.session, proyeccion.id_proyeccion)
+
+            self.assertEqual(set(resultado.keys()), set(esperado.keys()))
+            for nombre in esperado:
+                self.assertAlmostEqual(resultado[nombre]["cantidad"], esperado[nombre]["cantidad"])
+                self.assertEqual(resultado[nombre]["unidad"], esperado[nombre]["unidad"])
+
+    ## Test that the matrix is loaded with a single query and evaluating scenarios does not hit the database
+    def test_evaluate_does_not_query(self):
+        recetas_ids = [self.receta1.id_receta, self.receta2.id_receta]
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        motor = ProjectionEngine.load(self.session, recetas_ids)
+        self.assertEqual(len(statements), 1)
+
+        pesos = np.random.default_rng(0).uniform(0, 100, size=(500, 2))
+        totales = motor.evaluate(pesos, np.arange(1, 501))
+        self.assertEqual(totales.shape, (500, 4))
+        self.assertEqual(len(statements), 1)
+
+    ## Test that a sweep over splits and diner counts matches evaluating each scenario on its own
+    def test_sweep_matches_single_scenarios(self):
+        recetas_ids = [self.receta1.id_receta, self.receta2.id_receta]
+        motor = ProjectionEngine.load(self.session, recetas_ids)
+        repartos = ProjectionEngine.percentage_splits(recetas_ids, paso=25)
+        comensales = [10, 40, 75]
+
+        barrido = motor.sweep(repartos, comensales)
+        self.assertEqual(barrido.shape, (5, 3, 4))
+        for p, reparto in enumerate(repartos):
+            for c, numero in enumerate(comensales):
+                np.testing.assert_allclose(barrido[p, c], motor.evaluate([reparto], numero)[0])
+
+        self.assertTrue(all(sum(reparto.values()) == 100 for reparto in repartos))
+        self.assertEqual(repartos[0], {self.receta1.id_receta: 0, self.receta2.id_receta: 100})
+
+    ## Test that the controller sweep loads the data once and returns the totals of every scenario
+    def test_controller_sweep_single_load(self):
+        recetas_ids = [self.receta1.id_receta, self.receta2.id_receta]
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        repartos = [{self.receta1.id_receta: 70, self.receta2.id_receta: 30},
+                    {self.receta1.id_receta: 100, self.receta2.id_receta: 0}]
+        escenarios = ProyeccionController.sweep_projection(self.session, recetas_ids, repartos, [12, 24])
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual([(e["porcentajes"], e["comensales"]) for e in escenarios],
+                         [(repartos[0], 12), (repartos[0], 24), (repartos[1], 12), (repartos[1], 24)])
+        self.assertAlmostEqual(escenarios[0]["totales"]["Totopos"]["cantidad"], 420)
+        self.assertAlmostEqual(escenarios[1]["totales"]["Salsa"]["cantidad"], 1350)
+        ## A recipe at 0% does not list its ingredients
+        self.assertNotIn("Tortillas", escenarios[3]["totales"])
+
+    ## Test loading the stored scenario of a saved projection
+    def test_from_projection(self):
+        proyeccion = ProyeccionController.create_projection(
+            self.session, "Proyeccion guardada", "Semanal", 12,
+            [
+                {"id_receta": self.receta1.id_receta, "porcentaje": 70},
+                {"id_receta": self.receta2.id_receta, "porcentaje": 30}
+            ]
+        )
+
+        motor, porcentajes, comensales = ProjectionEngine.from_projection(self.session, proyeccion.id_proyeccion)
+        totales = motor.totals(porcentajes, comensales)
+
+        self.assertAlmostEqual(totales["Totopos"]["cantidad"], 420)
+        self.assertAlmostEqual(totales["Salsa"]["cantidad"], 675)
+        self.assertAlmostEqual(totales["Queso"]["cantidad"], 480)
+        self.assertAlmostEqual(totales["Tortillas"]["cantidad"], 450)
+
+        with self.assertRaises(ValueError):
+            ProjectionEngine.from_projection(self.session, 999)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import os
+import sys
+import copy
+import time
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.Projections.report_cache import ReportCache, clave_reporte, PDF
+from src.Projections.report_jobs import ReportJobQueue, TERMINADO
+from test_projections_reports import RendererFalso, datos_proyeccion
+from test_projections_report_jobs import FakeWidget, FakeWorker
+
+
+## Renderer of the tests that counts the charts and PDFs it really renders
+class RendererContador(RendererFalso):
+    def __init__(self, cache):
+        super().__init__()
+        self.cache = cache
+        self.graficas = 0
+        self.pdfs = 0
+
+    def _grafica(self, datos, ruta):
+        self.graficas += 1
+        return super()._grafica(datos, ruta)
+
+    def _pdf(self, html, ruta):
+        self.pdfs += 1
+        super()._pdf(html, ruta)
+
+
+## Test class for the content-addressed report cache
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.cache = ReportCache(os.path.join(self.carpeta.name, "cache"))
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def nueva_carpeta(self, nombre):
+        carpeta = os.path.join(self.carpeta.name, nombre)
+        os.makedirs(carpeta)
+        return carpeta
+
+    ## The key only changes when the rendered data changes
+    def test_key_follows_the_data(self):
+        datos = datos_proyeccion(1)
+        mismo = copy.deepcopy(datos)
+        mismo["nombre"] = "Otro nombre"
+        otra_cantidad = copy.deepcopy(datos)
+        otra_cantidad["report_data"][0]["ingredientes"][0]["cantidad"] = 151
+        otro_porcentaje = copy.deepcopy(datos)
+        otro_porcentaje["pie_chart_data"][0]["porcentaje"] = 90
+
+        self.assertEqual(clave_reporte(datos), clave_reporte(mismo))
+        self.assertNotEqual(clave_reporte(datos), clave_reporte(otra_cantidad))
+        self.assertNotEqual(clave_reporte(datos), clave_reporte(otro_porcentaje))
+        self.assertNotEqual(clave_reporte(datos, "plantilla 1"), clave_reporte(datos, "plantilla 2"))
+
+    ## An unchanged projection gets a copy of the cached PDF; an edited one is rendered again
+    def test_renderer_reuses_cached_pdf(self):
+        renderer = RendererContador(self.cache)
+        primero = renderer.render(datos_proyeccion(1), self.nueva_carpeta("a"))
+        segundo = renderer.render(datos_proyeccion(1), self.nueva_carpeta("b"))
+
+        self.assertEqual((renderer.graficas, renderer.pdfs), (1, 1))
+        self.assertNotEqual(primero, segundo)
+        with open(primero) as uno, open(segundo) as dos:
+            self.assertEqual(uno.read(), dos.read())
+
+        editada = datos_proyeccion(1)
+        editada["report_data"][0]["comensales"] = 60
+        renderer.render(editada, self.nueva_carpeta("c"))
+
+        ## Same percentages: the chart comes from the cache, the PDF does not
+        self.assertEqual((renderer.graficas, renderer.pdfs), (1, 2))
+
+    ## The least recently used entries are removed when the cache is over its size
+    def test_eviction_removes_least_recently_used(self):
+        cache = ReportCache(self.cache.directorio, max_bytes=250)
+        origen = os.path.join(self.carpeta.name, "origen.pdf")
+        with open(origen, "w") as archivo:
+            archivo.write("x" * 100)
+
+        for i, clave in enumerate(["a", "b"]):
+            cache.guardar(clave, PDF, origen)
+            os.utime(cache.ruta(clave, PDF), (time.time() - 100 + i, time.time() - 100 + i))
+        self.assertIsNotNone(cache.obtener("a", PDF))
+        cache.guardar("c", PDF, origen)
+
+        self.assertIsNotNone(cache.obtener("a", PDF))
+        self.assertIsNone(cache.obtener("b", PDF))
+        self.assertIsNotNone(cache.obtener("c", PDF))
+        self.assertLessEqual(cache.tamano(), 250)
+
+    ## The queue finishes a cached report without using a worker process
+    def test_queue_hit_skips_the_pool(self):
+        renderer = RendererContador(self.cache)
+        renderer.render(datos_proyeccion(2), self.nueva_carpeta("a"))
+
+        worker = FakeWorker()
+        cola = ReportJobQueue(output_dir=self.carpeta.name, loader=lambda session, id_proyeccion: datos_proyeccion(id_proyeccion),
+                              worker=worker, cache=self.cache)
+        try:
+            trabajo = cola.submit(FakeWidget(), 2)
+            worker.completar()
+
+            self.assertEqual(trabajo.estado, TERMINADO)
+            self.assertIsNone(trabajo.future)
+            self.assertIsNone(cola._pool)
+            self.assertEqual(os.path.dirname(trabajo.ruta_pdf), trabajo.carpeta)
+            self.assertTrue(os.path.exists(trabajo.ruta_pdf))
+        finally:
+            cola.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
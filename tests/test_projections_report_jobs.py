@@ -0,0 +1,244 @@
+import unittest
+import os
+import sys
+import time
+import pickle
+import tempfile
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+from src.Projections.model import Proyeccion, ProyeccionReceta
+from src.Projections.controller import ProyeccionController
+from src.Projections.reports import ReportCancelled, cancelado
+from src.Projections.report_jobs import ReportJobQueue, CARGANDO, TERMINADO, CANCELADO, ERROR
+
+
+## Render used in the worker processes of the tests: writes a small file instead of the PDF
+def render_falso(datos, carpeta, avance):
+    avance("pdf")
+    ruta = os.path.join(carpeta, f"reporte_{datos['id_proyeccion']}.pdf")
+    with open(ruta, "w") as archivo:
+        archivo.write(datos["nombre"])
+    return ruta
+
+
+## Render that keeps running until the job is cancelled
+def render_lento(datos, carpeta, avance):
+    avance("grafica")
+    limite = time.monotonic() + 10
+    while time.monotonic() < limite:
+        if cancelado(carpeta):
+            raise ReportCancelled()
+        time.sleep(0.01)
+    return None
+
+
+## Batch render used in the worker processes of the tests
+def render_lote_falso(lista_datos, carpeta, avance):
+    return [(datos["id_proyeccion"], render_falso(datos, carpeta, avance), None) for datos in lista_datos]
+
+
+## Stand-in for a Tk widget
+class FakeWidget:
+    def winfo_exists(self):
+        return True
+
+    def winfo_toplevel(self):
+        return self
+
+    def after(self, ms, callback):
+        return None
+
+
+## Stand-in for DatabaseWorker that keeps the loads until the test completes them
+class FakeWorker:
+    def __init__(self):
+        self.pendientes = []
+
+    def submit(self, widget, key, fn, *args, on_success=None, on_error=None, **kwargs):
+        self.pendientes.append((key, fn, args, on_success, on_error))
+
+    def cancel(self, key):
+        self.pendientes = [p for p in self.pendientes if p[0] != key]
+
+    def completar(self):
+        key, fn, args, on_success, on_error = self.pendientes.pop(0)
+        try:
+            resultado = fn(None, *args)
+        except Exception as e:
+            on_error(e)
+            return
+        on_success(resultado)
+
+
+def cargar_lote_falso(session, ids):
+    return [cargar_falso(session, id_proyeccion) for id_proyeccion in ids]
+
+
+def cargar_falso(session, id_proyeccion):
+    if id_proyeccion < 0:
+        raise ValueError("No se encontro la proyeccion")
+    return {"id_proyeccion": id_proyeccion, "nombre": f"Proyeccion {id_proyeccion}"}
+
+
+## Test class for the report data loading step
+class TestLoadReportData(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        receta = Receta(nombre_receta="Chilaquiles", clasificacion="Platillo principal",
+                        periodo="Desayuno", comensales_base=4, estatus=True)
+        salsa = Ingrediente(nombre="Salsa", clasificacion="Salsa", unidad_medida="ml")
+        self.session.add_all([receta, salsa])
+        self.session.commit()
+        self.session.add(Receta_Ingredientes(id_receta=receta.id_receta, id_ingrediente=salsa.id_ingrediente, cantidad=100))
+        proyeccion = Proyeccion(numero_usuario=1, nombre="Desayuno lunes", periodo="Desayuno",
+                                comensales=8, fecha=date(2025, 5, 5))
+        self.session.add(proyeccion)
+        self.session.commit()
+        self.session.add(ProyeccionReceta(id_proyeccion=proyeccion.id_proyeccion, id_receta=receta.id_receta, porcentaje=100))
+        self.session.commit()
+        self.id_proyeccion = proyeccion.id_proyeccion
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    ## The loaded data has everything the render needs and can be sent to another process
+    def test_load_report_data(self):
+        datos = ProyeccionController.load_report_data(self.session, self.id_proyeccion)
+
+        self.assertEqual(datos["nombre"], "Desayuno lunes")
+        self.assertEqual(datos["pie_chart_data"], [{"receta": "Chilaquiles", "porcentaje": 100}])
+        self.assertEqual(datos["report_data"][0]["ingredientes"][0]["nombre"], "Salsa")
+        self.assertIn("total_ingredientes", datos["report_data"][-1])
+        self.assertEqual(pickle.loads(pickle.dumps(datos)), datos)
+
+    def test_load_missing_projection(self):
+        with self.assertRaises(ValueError):
+            ProyeccionController.load_report_data(self.session, 999)
+
+
+## Test class for the report job queue, rendering in real worker processes
+class TestReportJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.worker = FakeWorker()
+        self.widget = FakeWidget()
+        self.estados = []
+
+    def tearDown(self):
+        self.cola.shutdown()
+        self.carpeta.cleanup()
+
+    def crear_cola(self, render):
+        self.cola = ReportJobQueue(max_workers=2, output_dir=self.carpeta.name, loader=cargar_falso,
+                                   render=render, batch_loader=cargar_lote_falso, batch_render=render_lote_falso,
+                                   worker=self.worker)
+        return self.cola
+
+    def esperar(self, trabajos, segundos=20):
+        limite = time.monotonic() + segundos
+        while any(not t.terminado for t in trabajos) and time.monotonic() < limite:
+            self.cola.process_updates()
+            time.sleep(0.02)
+        self.cola.process_updates()
+
+    ## Two reports of the same projection are written to different files
+    def test_jobs_write_unique_files(self):
+        cola = self.crear_cola(render_falso)
+        trabajos = [cola.submit(self.widget, 7, on_update=lambda t: self.estados.append(t.estado)) for _ in range(2)]
+        self.assertEqual(self.estados, [CARGANDO, CARGANDO])
+
+        self.worker.completar()
+        self.worker.completar()
+        self.esperar(trabajos)
+
+        self.assertEqual([t.estado for t in trabajos], [TERMINADO, TERMINADO])
+        self.assertNotEqual(trabajos[0].ruta_pdf, trabajos[1].ruta_pdf)
+        for trabajo in trabajos:
+            with open(trabajo.ruta_pdf) as archivo:
+                self.assertEqual(archivo.read(), "Proyeccion 7")
+        self.assertEqual(cola.activos(), [])
+
+    ## A batch is a single job that returns the result of every projection
+    def test_batch_job(self):
+        cola = self.crear_cola(render_falso)
+        trabajo = cola.submit_batch(self.widget, [4, 5, 6])
+        self.worker.completar()
+        self.esperar([trabajo])
+
+        self.assertEqual(trabajo.estado, TERMINADO)
+        self.assertIsNone(trabajo.ruta_pdf)
+        self.assertEqual([r[0] for r in trabajo.resultados], [4, 5, 6])
+        self.assertTrue(all(os.path.exists(r[1]) for r in trabajo.resultados))
+
+    ## A failure while loading finishes the job with the error
+    def test_load_error(self):
+        cola = self.crear_cola(render_falso)
+        trabajo = cola.submit(self.widget, -1)
+        self.worker.completar()
+
+        self.assertEqual(trabajo.estado, ERROR)
+        self.assertIsInstance(trabajo.error, ValueError)
+        self.assertFalse(os.path.exists(trabajo.carpeta))
+
+    ## A job cancelled while loading never reaches the worker processes
+    def test_cancel_while_loading(self):
+        cola = self.crear_cola(render_falso)
+        trabajo = cola.submit(self.widget, 3)
+
+        self.assertTrue(cola.cancel(trabajo.id))
+        self.assertEqual(self.worker.pendientes, [])
+        self.assertEqual(trabajo.estado, CANCELADO)
+        self.assertIsNone(trabajo.future)
+        self.assertFalse(cola.cancel(trabajo.id))
+
+    ## A job cancelled while rendering stops and its files are removed
+    def test_cancel_while_rendering(self):
+        cola = self.crear_cola(render_lento)
+        trabajo = cola.submit(self.widget, 3)
+        self.worker.completar()
+
+        limite = time.monotonic() + 20
+        while not trabajo.future.running() and time.monotonic() < limite:
+            time.sleep(0.02)
+        cola.cancel(trabajo.id)
+
+        ## The folder is removed without waiting for the Tk thread to poll
+        limite = time.monotonic() + 20
+        while cola.jobs and time.monotonic() < limite:
+            time.sleep(0.02)
+
+        self.assertEqual(trabajo.estado, CANCELADO)
+        self.assertIsInstance(trabajo.future.exception(), ReportCancelled)
+        self.assertFalse(os.path.exists(trabajo.carpeta))
+        self.assertEqual(cola.jobs, {})
+        self.assertEqual(cola.process_updates(), 0)
+
+    ## Shutting the queue down stops the jobs being rendered and removes their folders
+    def test_shutdown_while_rendering(self):
+        cola = self.crear_cola(render_lento)
+        trabajo = cola.submit(self.widget, 3)
+        self.worker.completar()
+
+        limite = time.monotonic() + 20
+        while not trabajo.future.running() and time.monotonic() < limite:
+            time.sleep(0.02)
+        cola.shutdown()
+
+        self.assertEqual(trabajo.estado, CANCELADO)
+        self.assertFalse(os.path.exists(trabajo.carpeta))
+        self.assertEqual(cola.jobs, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.Projections.reports import ReportRenderer, ReportCancelled, solicitar_cancelacion, nueva_carpeta_reporte
+
+
+def datos_proyeccion(id_proyeccion, receta="Chilaquiles"):
+    return {
+        "id_proyeccion": id_proyeccion,
+        "nombre": f"Proyeccion {id_proyeccion}",
+        "fecha": date(2025, 5, id_proyeccion),
+        "report_data": [
+            {"receta": receta, "porcentaje": 100, "comensales": 50, "fecha": date(2025, 5, id_proyeccion),
+             "ingredientes": [{"nombre": "Salsa", "cantidad": 150, "unidad": "ml"}]},
+            {"total_ingredientes": {"Salsa": {"cantidad": 1875.0, "unidad": "ml"}}},
+        ],
+        "pie_chart_data": [{"receta": receta, "porcentaje": 100}],
+    }
+
+
+## Renderer that writes text files instead of the chart and the PDF, and counts the warm-ups
+class RendererFalso(ReportRenderer):
+    def __init__(self):
+        super().__init__()
+        self.calentamientos = 0
+        self.cancelar_en = None
+
+    def _cargar_estilos(self):
+        self.calentamientos += 1
+
+    def _iniciar_graficas(self):
+        pass
+
+    def _grafica(self, datos, ruta):
+        if datos["pie_chart_data"][0]["receta"] == "Falla":
+            raise RuntimeError("kaleido no responde")
+        with open(ruta, "w") as archivo:
+            archivo.write("png")
+        return ruta
+
+    def _pdf(self, html, ruta):
+        with open(ruta, "w") as archivo:
+            archivo.write(html)
+
+
+## Test class for the long-lived report renderer
+class TestReportRenderer(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    ## The template is compiled once and reused for every report
+    def test_template_compiled_once(self):
+        renderer = ReportRenderer()
+        plantilla = renderer.template
+
+        html_1 = renderer.html(datos_proyeccion(1), "/tmp/uno/pie_chart.png")
+        html_2 = renderer.html(datos_proyeccion(2, receta="Enchiladas"), "/tmp/dos/pie_chart.png")
+
+        self.assertIs(renderer.template, plantilla)
+        self.assertIn("Chilaquiles", html_1)
+        self.assertIn("file:///tmp/uno/pie_chart.png", html_1)
+        self.assertIn("Enchiladas", html_2)
+        self.assertIn("1875.0", html_2)
+
+    ## A batch warms up once, writes every report to its own folder and keeps going after a failure
+    def test_render_batch(self):
+        renderer = RendererFalso()
+        carpeta = nueva_carpeta_reporte(self.carpeta.name)
+        etapas = []
+
+        resultados = renderer.render_batch(
+            [datos_proyeccion(1), datos_proyeccion(2, receta="Falla"), datos_proyeccion(3)], carpeta, etapas.append
+        )
+        renderer.render(datos_proyeccion(4), nueva_carpeta_reporte(self.carpeta.name))
+
+        self.assertEqual(renderer.calentamientos, 1)
+        self.assertEqual([r[0] for r in resultados], [1, 2, 3])
+        self.assertEqual(os.path.dirname(resultados[0][1]), os.path.join(carpeta, "1"))
+        self.assertTrue(os.path.exists(resultados[2][1]))
+        self.assertIsNone(resultados[1][1])
+        self.assertIsInstance(resultados[1][2], RuntimeError)
+        self.assertEqual(etapas.count("pdf"), 2)
+
+    ## Cancelling the batch folder stops the batch at the next stage
+    def test_cancel_batch(self):
+        renderer = RendererFalso()
+        carpeta = nueva_carpeta_reporte(self.carpeta.name)
+
+        def avance(etapa):
+            if etapa == "pdf":
+                solicitar_cancelacion(carpeta)
+
+        with self.assertRaises(ReportCancelled):
+            renderer.render_batch([datos_proyeccion(1), datos_proyeccion(2)], carpeta, avance)
+        self.assertFalse(os.path.exists(os.path.join(carpeta, "2")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import dataclasses
+from datetime import date
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+from src.Projections.model import Proyeccion, ProyeccionReceta
+from src.Projections.controller import ProyeccionController
+from src.Projections.snapshot import ProjectionSnapshot
+
+## Test class for the projection snapshot used by the reports, using SQLite in-memory database
+class TestProjectionSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        ingredientes = [Ingrediente(nombre=n, clasificacion="Varios", unidad_medida=u)
+                        for n, u in [("Tortilla", "pza"), ("Salsa", "ml"), ("Pollo", "g"), ("Queso", "g")]]
+        recetas = [Receta(nombre_receta=f"Receta {i}", clasificacion="Platillo principal", periodo="Comida",
+                          comensales_base=4, estatus=True) for i in range(1, 5)]
+        self.session.add_all(ingredientes + recetas)
+        self.session.commit()
+        for i, receta in enumerate(recetas):
+            for j, ingrediente in enumerate(ingredientes):
+                if (i + j) % 2 == 0:
+                    self.session.add(Receta_Ingredientes(id_receta=receta.id_receta,
+                                                         id_ingrediente=ingrediente.id_ingrediente,
+                                                         cantidad=10 * (i + 1) + j))
+
+        self.ids = []
+        for k in range(3):
+            proyeccion = Proyeccion(numero_usuario=1, nombre=f"Proyeccion {k}", periodo="Comida",
+                                    comensales=20 + k, fecha=date(2025, 5, k + 1))
+            self.session.add(proyeccion)
+            self.session.commit()
+            for receta, porcentaje in zip(recetas[k:k + 2], (60, 40)):
+                self.session.add(ProyeccionReceta(id_proyeccion=proyeccion.id_proyeccion,
+                                                  id_receta=receta.id_receta, porcentaje=porcentaje))
+            self.ids.append(proyeccion.id_proyeccion)
+        self.session.commit()
+        self.session.expire_all()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def contar_consultas(self, fn):
+        consultas = []
+        escuchar = lambda conn, cursor, statement, *args: consultas.append(statement) if statement.lstrip().upper().startswith("SELECT") else None
+        event.listen(self.engine, "before_cursor_execute", escuchar)
+        try:
+            resultado = fn()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", escuchar)
+        return resultado, len(consultas)
+
+    ## The number of queries does not depend on the number of projections, recipes or ingredients
+    ## (the totals of these projections are stale, so they are computed from the snapshot, not read)
+    def test_constant_number_of_queries(self):
+        _, una = self.contar_consultas(lambda: ProyeccionController.load_report_data(self.session, self.ids[0]))
+        self.session.expire_all()
+        lote, varias = self.contar_consultas(lambda: ProyeccionController.load_reports_data(self.session, self.ids))
+
+        self.assertEqual(una, 3)
+        self.assertEqual(varias, 3)
+        self.assertEqual([d["id_proyeccion"] for d in lote], self.ids)
+
+    ## The totals derived from the snapshot match the aggregation of the database
+    def test_totals_match_database(self):
+        for id_proyeccion in self.ids:
+            datos = ProyeccionController.load_report_data(self.session, id_proyeccion)
+            en_bd = ProyeccionController.calculate_total_ingredients(self.session, id_proyeccion)
+            totales = datos["report_data"][-1]["total_ingredientes"]
+
+            self.assertEqual(totales.keys(), en_bd.keys())
+            for nombre, total in totales.items():
+                self.assertAlmostEqual(total["cantidad"], en_bd[nombre]["cantidad"])
+                self.assertEqual(total["unidad"], en_bd[nombre]["unidad"])
+
+    ## The recipe tables and the chart data come from the same snapshot, and the snapshot cannot change
+    def test_snapshot_is_immutable(self):
+        snapshot = ProjectionSnapshot.load(self.session, self.ids[1])
+
+        self.assertEqual(snapshot.pie_chart_data(), [{"receta": "Receta 2", "porcentaje": 60},
+                                                     {"receta": "Receta 3", "porcentaje": 40}])
+        self.assertEqual([t["receta"] for t in snapshot.recipe_tables()], ["Receta 2", "Receta 3"])
+        self.assertIsInstance(snapshot.recetas, tuple)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            snapshot.comensales = 100
+        with self.assertRaises(ValueError):
+            ProjectionSnapshot.load_many(self.session, [self.ids[0], 999])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import unittest
+import os
+import sys
+import time
+from datetime import date
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Recipes.controller import RecetasController
+from src.Ingredients.model import Ingrediente
+from src.Ingredients.controller import IngredienteController
+from src.Projections.model import Proyeccion, ProyeccionReceta, ProyeccionIngrediente
+from src.Projections.controller import ProyeccionController
+from src.Projections import totals
+from src.Projections.maintenance import start_totals_refresh
+
+## Test class for the materialized projection totals, using SQLite in-memory database
+class TestProjectionTotals(unittest.TestCase):
+    def setUp(self):
+        ## A single shared connection, so the maintenance thread sees the same in-memory database
+        self.engine = create_engine('sqlite:///:memory:', poolclass=StaticPool,
+                                    connect_args={"check_same_thread": False})
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()
+
+        self.tortilla = Ingrediente(nombre="Tortilla", clasificacion="Maiz", unidad_medida="pza")
+        self.salsa = Ingrediente(nombre="Salsa", clasificacion="Salsa", unidad_medida="ml")
+        self.queso = Ingrediente(nombre="Queso", clasificacion="Lacteo", unidad_medida="g")
+        self.chilaquiles = Receta(nombre_receta="Chilaquiles", clasificacion="Platillo principal",
+                                  periodo="Desayuno", comensales_base=4, estatus=True)
+        self.enchiladas = Receta(nombre_receta="Enchiladas", clasificacion="Platillo principal",
+                                 periodo="Comida", comensales_base=2, estatus=True)
+        self.molletes = Receta(nombre_receta="Molletes", clasificacion="Platillo principal",
+                               periodo="Desayuno", comensales_base=2, estatus=True)
+        self.session.add_all([self.tortilla, self.salsa, self.queso, self.chilaquiles, self.enchiladas, self.molletes])
+        self.session.commit()
+        self.session.add_all([
+            Receta_Ingredientes(id_receta=self.chilaquiles.id_receta, id_ingrediente=self.tortilla.id_ingrediente, cantidad=8),
+            Receta_Ingredientes(id_receta=self.chilaquiles.id_receta, id_ingrediente=self.salsa.id_ingrediente, cantidad=200),
+            Receta_Ingredientes(id_receta=self.enchiladas.id_receta, id_ingrediente=self.tortilla.id_ingrediente, cantidad=6),
+            Receta_Ingredientes(id_receta=self.molletes.id_receta, id_ingrediente=self.queso.id_ingrediente, cantidad=50),
+        ])
+        self.session.commit()
+
+        self.desayuno = ProyeccionController.create_projection(self.session, "Desayuno", "Desayuno", 40, [
+            {"id_receta": self.chilaquiles.id_receta, "porcentaje": 50},
+            {"id_receta": self.molletes.id_receta, "porcentaje": 50},
+        ]).id_proyeccion
+        self.comida = ProyeccionController.create_projection(self.session, "Comida", "Comida", 20, [
+            {"id_receta": self.enchiladas.id_receta, "porcentaje": 60},
+            {"id_receta": self.molletes.id_receta, "porcentaje": 40},
+        ]).id_proyeccion
+        for id_proyeccion in (self.desayuno, self.comida):
+            ProyeccionController.get_total_ingredients(self.session, id_proyeccion)
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def obsoletas(self):
+        self.session.expire_all()
+        return {p.id_proyeccion for p in self.session.query(Proyeccion).filter(Proyeccion.totales_obsoletos == True)}
+
+    ## The totals are stored once and then read from proyeccion_ingredientes
+    def test_totals_are_materialized(self):
+        self.assertEqual(self.obsoletas(), set())
+        esperado = ProyeccionController.calculate_total_ingredients(self.session, self.desayuno)
+
+        ## A stored value that only the table has proves the second read does not recompute
+        fila = self.session.get(ProyeccionIngrediente, (self.desayuno, "Queso", "g"))
+        fila.cantidad = 1.0
+        self.session.commit()
+
+        totales = ProyeccionController.get_total_ingredients(self.session, self.desayuno)
+        self.assertEqual(totales["Queso"]["cantidad"], 1.0)
+        self.assertEqual(totales["Tortilla"], esperado["Tortilla"])
+
+    ## Changing the ingredients of a recipe only invalidates the projections that use it
+    def test_recipe_ingredients_invalidate_their_projections(self):
+        RecetasController.add_ingredient_to_recipe(self.session, self.chilaquiles.id_receta, self.queso.id_ingrediente, 30)
+        self.assertEqual(self.obsoletas(), {self.desayuno})
+
+        totales = ProyeccionController.get_total_ingredients(self.session, self.desayuno)
+        self.assertAlmostEqual(totales["Queso"]["cantidad"], 30 * 40 / 4 * 0.5 + 50 * 40 / 2 * 0.5)
+        self.assertEqual(self.obsoletas(), set())
+
+        RecetasController.remove_ingredient_from_recipe(self.session, self.molletes.id_receta, self.queso.id_ingrediente)
+        self.assertEqual(self.obsoletas(), {self.desayuno, self.comida})
+
+    ## comensales_base only invalidates when it really changes
+    def test_comensales_base_invalidates(self):
+        RecetasController.update_recipe(self.session, self.enchiladas.id_receta, nombre_receta="Enchiladas verdes",
+                                        comensales_base=2)
+        self.assertEqual(self.obsoletas(), set())
+
+        RecetasController.update_recipe(self.session, self.enchiladas.id_receta, comensales_base=4)
+        self.assertEqual(self.obsoletas(), {self.comida})
+        totales = ProyeccionController.get_total_ingredients(self.session, self.comida)
+        self.assertAlmostEqual(totales["Tortilla"]["cantidad"], 6 * 20 / 4 * 0.6)
+
+    ## Updating a projection or renaming an ingredient invalidates the totals that depend on them
+    def test_projection_and_ingredient_changes_invalidate(self):
+        ProyeccionController.update_projection(self.session, self.comida, "Comida", 30, [
+            {"id_receta": self.enchiladas.id_receta, "porcentaje": 50},
+            {"id_receta": self.molletes.id_receta, "porcentaje": 50},
+        ])
+        self.assertEqual(self.obsoletas(), {self.comida})
+        ProyeccionController.get_total_ingredients(self.session, self.comida)
+
+        IngredienteController.update_ingrediente(self.session, self.salsa.id_ingrediente, nombre="Salsa verde")
+        self.assertEqual(self.obsoletas(), {self.desayuno})
+        self.assertIn("Salsa verde", ProyeccionController.get_total_ingredients(self.session, self.desayuno))
+
+    ## An ingredient with two units gets the same keys from the database, the snapshot and any row order
+    def test_duplicate_names_share_keys(self):
+        salsa_litros = Ingrediente(nombre="Salsa", clasificacion="Salsa", unidad_medida="l")
+        self.session.add(salsa_litros)
+        self.session.flush()
+        self.session.add(Receta_Ingredientes(id_receta=self.molletes.id_receta,
+                                             id_ingrediente=salsa_litros.id_ingrediente, cantidad=1))
+        totals.mark_stale(self.session, recetas=[self.molletes.id_receta])
+        self.session.commit()
+
+        en_bd = ProyeccionController.calculate_total_ingredients(self.session, self.desayuno)
+        reporte = ProyeccionController.load_report_data(self.session, self.desayuno)["report_data"][-1]
+        self.assertEqual(en_bd["Salsa"]["unidad"], "l")
+        self.assertEqual(en_bd["Salsa (ml)"]["unidad"], "ml")
+        self.assertEqual(reporte["total_ingredientes"].keys(), en_bd.keys())
+
+        filas = totals.compute_rows(self.session, self.desayuno)
+        self.assertEqual(totals.totals_by_name(reversed(filas)), totals.totals_by_name(filas))
+
+    ## The stale totals can be refreshed in the background
+    def test_refresh_stale(self):
+        RecetasController.add_ingredient_to_recipe(self.session, self.molletes.id_receta, self.salsa.id_ingrediente, 20)
+        self.assertEqual(self.obsoletas(), {self.desayuno, self.comida})
+
+        self.assertEqual(totals.refresh_stale(self.session), 2)
+        self.assertEqual(self.obsoletas(), set())
+        self.assertEqual(self.session.query(ProyeccionIngrediente).filter_by(id_proyeccion=self.comida, nombre="Salsa").count(), 1)
+
+    ## The maintenance thread recomputes the stale totals until it is stopped
+    def test_background_refresh(self):
+        RecetasController.add_ingredient_to_recipe(self.session, self.molletes.id_receta, self.salsa.id_ingrediente, 20)
+        self.session.close()
+
+        refresco = start_totals_refresh(session_factory=self.Session, intervalo=0.01, lote=1)
+        limite = time.monotonic() + 10
+        while self.obsoletas() and time.monotonic() < limite:
+            time.sleep(0.01)
+        refresco.stop()
+        refresco.join(timeout=10)
+
+        self.assertFalse(refresco.is_alive())
+        self.assertIsNone(refresco.error)
+        self.assertEqual(refresco.recalculadas, 2)
+        self.assertEqual(self.obsoletas(), set())
+
+    ## The reports read the stored totals of a fresh projection and compute the stale ones in memory
+    def test_report_data_reads_fresh_totals(self):
+        fila = self.session.get(ProyeccionIngrediente, (self.desayuno, "Queso", "g"))
+        fila.cantidad = 1.0
+        self.session.commit()
+        RecetasController.add_ingredient_to_recipe(self.session, self.enchiladas.id_receta, self.queso.id_ingrediente, 10)
+
+        desayuno, comida = ProyeccionController.load_reports_data(self.session, [self.desayuno, self.comida])
+        self.assertEqual(desayuno["report_data"][-1]["total_ingredientes"]["Queso"]["cantidad"], 1.0)
+        self.assertEqual(comida["report_data"][-1]["total_ingredientes"],
+                         ProyeccionController.calculate_total_ingredients(self.session, self.comida))
+
+    ## A change marked while the rows are being read keeps the projection stale
+    def test_change_during_refresh_stays_stale(self):
+        RecetasController.add_ingredient_to_recipe(self.session, self.molletes.id_receta, self.salsa.id_ingrediente, 20)
+        compute_rows = totals.compute_rows
+
+        def leer_y_cambiar(session, id_proyeccion):
+            rows = compute_rows(session, id_proyeccion)
+            totals.mark_stale(session, recetas=[self.molletes.id_receta])
+            return rows
+
+        with patch.object(totals, "compute_rows", side_effect=leer_y_cambiar):
+            totals.refresh(self.session, self.desayuno)
+        self.assertIn(self.desayuno, self.obsoletas())
+
+    ## Loading the data of a report only reads: stale totals stay stale and nothing is committed
+    def test_report_data_is_read_only(self):
+        RecetasController.add_ingredient_to_recipe(self.session, self.molletes.id_receta, self.salsa.id_ingrediente, 20)
+        commits = []
+        event.listen(self.session, "after_commit", lambda session: commits.append(session))
+
+        datos = ProyeccionController.load_report_data(self.session, self.desayuno)
+        ProyeccionController.load_reports_data(self.session, [self.desayuno, self.comida])
+
+        self.assertEqual(commits, [])
+        self.assertEqual(self.obsoletas(), {self.desayuno, self.comida})
+        self.assertTrue(datos)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -188,6 +188,52 @@ class TestProyeccionController(unittest.TestCase):
         self.print_projection_details(proyeccion, "CALCULO DE INGREDIENTES")
         self.print_ingredients_list(total_ingredientes)
     
+    ## Test that the totals apply comensales / comensales_base * porcentaje / 100 for each recipe.
+    def test_calculate_total_ingredients_uses_percentages(self):
+        proyeccion = ProyeccionController.create_projection(
+            self.session,
+            "Proyeccion con porcentajes",
+            "Semanal",
+            12,
+            [
+                {"id_receta": self.receta1.id_receta, "porcentaje": 70},
+                {"id_receta": self.receta2.id_receta, "porcentaje": 30}
+            ]
+        )
+
+        total_ingredientes = ProyeccionController.calculate_total_ingredients(
+            self.session, proyeccion.id_proyeccion
+        )
+
+        self.assertAlmostEqual(total_ingredientes["Totopos"]["cantidad"], 420)
+        self.assertAlmostEqual(total_ingredientes["Salsa"]["cantidad"], 675)
+        self.assertAlmostEqual(total_ingredientes["Queso"]["cantidad"], 480)
+        self.assertAlmostEqual(total_ingredientes["Tortillas"]["cantidad"], 450)
+        self.assertEqual(total_ingredientes["Salsa"]["unidad"], "ml")
+
+    ## Test that the database aggregation matches the ORM computation.
+    def test_calculate_total_ingredients_sql_matches_orm(self):
+        proyeccion = ProyeccionController.create_projection(
+            self.session,
+            "Proyeccion SQL",
+            "Semanal",
+            35,
+            [
+                {"id_receta": self.receta1.id_receta, "porcentaje": 45},
+                {"id_receta": self.receta2.id_receta, "porcentaje": 55}
+            ]
+        )
+
+        en_bd = ProyeccionController.calculate_total_ingredients(self.session, proyeccion.id_proyeccion)
+        en_python = ProyeccionController.calculate_total_ingredients(
+            self.session, proyeccion.id_proyeccion, in_database=False
+        )
+
+        self.assertEqual(set(en_bd.keys()), set(en_python.keys()))
+        for nombre in en_bd:
+            self.assertAlmostEqual(en_bd[nombre]["cantidad"], en_python[nombre]["cantidad"])
+            self.assertEqual(en_bd[nombre]["unidad"], en_python[nombre]["unidad"])
+
     ## Test creating a projection with invalid data.
     def test_invalid_projection_creation(self):
         try:
@@ -0,0 +1,105 @@
+import unittest
+import os
+import sys
+from datetime import date
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+from src.Projections.model import Proyeccion, ProyeccionReceta
+from src.Purchasing.model import seed_conversions
+from src.Purchasing.controller import PurchasingController
+
+## Test class for the consolidated purchasing plan, using SQLite in-memory database
+class TestPurchasingController(unittest.TestCase):
+    ## Two recipes that write rice in kg and in g, and three projections in two weeks
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        seed_conversions(self.session)
+
+        arroz_kg = Ingrediente(nombre="Arroz", clasificacion="Cereal", unidad_medida="kg")
+        arroz_g = Ingrediente(nombre="arroz ", clasificacion="Cereal", unidad_medida="g")
+        leche = Ingrediente(nombre="Leche", clasificacion="Lacteo", unidad_medida="L")
+        huevo = Ingrediente(nombre="Huevo", clasificacion="Proteina", unidad_medida="pza")
+        canela = Ingrediente(nombre="Canela", clasificacion="Especia", unidad_medida="raja")
+        arroz_rojo = Receta(nombre_receta="Arroz rojo", clasificacion="Guarnicion", periodo="Comida",
+                            comensales_base=10, estatus=True)
+        arroz_leche = Receta(nombre_receta="Arroz con leche", clasificacion="Postre", periodo="Comida",
+                             comensales_base=4, estatus=True)
+        self.session.add_all([arroz_kg, arroz_g, leche, huevo, canela, arroz_rojo, arroz_leche])
+        self.session.commit()
+        self.session.add_all([
+            Receta_Ingredientes(id_receta=arroz_rojo.id_receta, id_ingrediente=arroz_kg.id_ingrediente, cantidad=1),
+            Receta_Ingredientes(id_receta=arroz_rojo.id_receta, id_ingrediente=huevo.id_ingrediente, cantidad=2),
+            Receta_Ingredientes(id_receta=arroz_leche.id_receta, id_ingrediente=arroz_g.id_ingrediente, cantidad=200),
+            Receta_Ingredientes(id_receta=arroz_leche.id_receta, id_ingrediente=leche.id_ingrediente, cantidad=1),
+            Receta_Ingredientes(id_receta=arroz_leche.id_receta, id_ingrediente=canela.id_ingrediente, cantidad=1),
+        ])
+
+        self.ids = []
+        for fecha, comensales, estatus in [(date(2025, 5, 5), 20, True), (date(2025, 5, 9), 40, True),
+                                           (date(2025, 5, 14), 100, True), (date(2025, 5, 6), 1000, False)]:
+            proyeccion = Proyeccion(numero_usuario=1, nombre=f"Proyeccion {fecha}", periodo="Comida",
+                                    comensales=comensales, fecha=fecha, estatus=estatus)
+            self.session.add(proyeccion)
+            self.session.flush()
+            self.session.add_all([
+                ProyeccionReceta(id_proyeccion=proyeccion.id_proyeccion, id_receta=arroz_rojo.id_receta, porcentaje=50),
+                ProyeccionReceta(id_proyeccion=proyeccion.id_proyeccion, id_receta=arroz_leche.id_receta, porcentaje=50),
+            ])
+            self.ids.append(proyeccion.id_proyeccion)
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def por_nombre(self, lista):
+        return {(item["nombre"].strip().lower(), item["unidad"]): item for item in lista}
+
+    ## kg and g of the same ingredient are added up in g, in a single query
+    def test_units_are_normalized(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        lista = PurchasingController.consolidate(self.session, ids=self.ids[:2])
+        self.assertEqual(len(statements), 1)
+
+        totales = self.por_nombre(lista)
+        ## 60 diners: 30 of arroz rojo (3 kg) and 30 of arroz con leche (1500 g)
+        self.assertAlmostEqual(totales[("arroz", "g")]["cantidad"], 3000 + 1500)
+        self.assertEqual(totales[("arroz", "g")]["proyecciones"], 2)
+        self.assertAlmostEqual(totales[("leche", "ml")]["cantidad"], 7500)
+        self.assertAlmostEqual(totales[("huevo", "pza")]["cantidad"], 6)
+        ## A unit without conversion is kept as written
+        self.assertAlmostEqual(totales[("canela", "raja")]["cantidad"], 7.5)
+        self.assertEqual(len(lista), 4)
+
+    ## The dates select the projections of a range and leave out the ones in the trash can
+    def test_date_range(self):
+        semana = self.por_nombre(PurchasingController.weekly_plan(self.session, date(2025, 5, 7)))
+        self.assertAlmostEqual(semana[("huevo", "pza")]["cantidad"], 6)
+
+        todo = self.por_nombre(PurchasingController.consolidate(self.session, desde=date(2025, 5, 1),
+                                                                hasta=date(2025, 5, 31)))
+        self.assertAlmostEqual(todo[("huevo", "pza")]["cantidad"], 16)
+        self.assertEqual(PurchasingController.consolidate(self.session, ids=[]), [])
+
+    ## A new conversion changes the plan without touching the recipes
+    def test_set_conversion(self):
+        PurchasingController.set_conversion(self.session, "Raja", "g", 5)
+
+        totales = self.por_nombre(PurchasingController.consolidate(self.session, ids=self.ids[:1]))
+        self.assertAlmostEqual(totales[("canela", "g")]["cantidad"], 2.5 * 5)
+        with self.assertRaises(ValueError):
+            PurchasingController.set_conversion(self.session, "lata", "g", 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import os
+import sys
+import time
+from datetime import date
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+from src.Providers.model import Proveedor
+from src.Costs.model import Costos
+from src.Projections.model import Proyeccion, ProyeccionReceta
+from src.Purchasing.model import seed_conversions
+from src.Purchasing.controller import PurchasingController
+from src.Purchasing.suppliers import SupplierMatrix
+
+## Test class for the cheapest supplier plan, using SQLite in-memory database
+class TestSuppliers(unittest.TestCase):
+    ## One projection of 10 diners that needs 2 kg of rice, 1 L of milk and 20 eggs
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        seed_conversions(self.session)
+
+        arroz = Ingrediente(nombre="Arroz", clasificacion="Cereal", unidad_medida="kg")
+        leche = Ingrediente(nombre="Leche", clasificacion="Lacteo", unidad_medida="L")
+        huevo = Ingrediente(nombre="Huevo", clasificacion="Proteina", unidad_medida="pza")
+        receta = Receta(nombre_receta="Arroz con leche", clasificacion="Postre", periodo="Comida",
+                        comensales_base=10, estatus=True)
+        self.central = Proveedor(nombre="Central", categoria="Abarrotes")
+        self.granja = Proveedor(nombre="Granja", categoria="Huevo")
+        self.lacteos = Proveedor(nombre="Lacteos", categoria="Lacteos")
+        self.session.add_all([arroz, leche, huevo, receta, self.central, self.granja, self.lacteos])
+        self.session.commit()
+        self.session.add_all([
+            Receta_Ingredientes(id_receta=receta.id_receta, id_ingrediente=arroz.id_ingrediente, cantidad=2),
+            Receta_Ingredientes(id_receta=receta.id_receta, id_ingrediente=leche.id_ingrediente, cantidad=1),
+            Receta_Ingredientes(id_receta=receta.id_receta, id_ingrediente=huevo.id_ingrediente, cantidad=20),
+        ])
+        proyeccion = Proyeccion(numero_usuario=1, nombre="Postres", periodo="Comida", comensales=10,
+                                fecha=date(2025, 5, 5), estatus=True)
+        self.session.add(proyeccion)
+        self.session.flush()
+        self.session.add(ProyeccionReceta(id_proyeccion=proyeccion.id_proyeccion, id_receta=receta.id_receta, porcentaje=100))
+        self.id_proyeccion = proyeccion.id_proyeccion
+
+        ## Prices are per unit of the ingredient: kg of rice, L of milk, piece of egg
+        self.session.add_all([
+            Costos("arroz", 30, self.central.id_proveedor),
+            Costos("Leche", 22, self.central.id_proveedor),
+            Costos("Huevo", 3, self.central.id_proveedor),
+            Costos("Huevo", 2.5, self.granja.id_proveedor),
+            Costos("Leche ", 20, self.lacteos.id_proveedor),
+            Costos("Leche", 25, self.lacteos.id_proveedor),
+        ])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def por_nombre(self, plan):
+        return {linea["nombre"]: linea for linea in plan["lineas"]}
+
+    ## Each ingredient goes to its cheapest provider, with prices converted to the canonical unit
+    def test_cheapest_provider(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        plan = PurchasingController.cheapest_plan(self.session, ids=[self.id_proyeccion])
+        self.assertEqual(len(statements), 2)
+
+        lineas = self.por_nombre(plan)
+        self.assertEqual(lineas["Arroz"]["proveedor"], "Central")
+        self.assertAlmostEqual(lineas["Arroz"]["precio_unitario"], 30 / 1000)
+        self.assertAlmostEqual(lineas["Arroz"]["subtotal"], 60)
+        self.assertEqual(lineas["Leche"]["proveedor"], "Lacteos")
+        self.assertAlmostEqual(lineas["Leche"]["subtotal"], 20)
+        self.assertEqual(lineas["Huevo"]["proveedor"], "Granja")
+        self.assertAlmostEqual(plan["total"], 60 + 20 + 50)
+        self.assertEqual(plan["sin_proveedor"], [])
+        self.assertEqual(sum(p["lineas"] for p in plan["proveedores"]), 3)
+
+    ## The number of providers, the preferred and the excluded ones constrain the plan
+    def test_constraints(self):
+        uno = PurchasingController.cheapest_plan(self.session, ids=[self.id_proyeccion], max_proveedores=1)
+        self.assertEqual({p["proveedor"] for p in uno["proveedores"]}, {"Central"})
+        self.assertAlmostEqual(uno["total"], 60 + 22 + 60)
+
+        dos = PurchasingController.cheapest_plan(self.session, ids=[self.id_proyeccion], max_proveedores=2)
+        self.assertEqual({p["proveedor"] for p in dos["proveedores"]}, {"Central", "Granja"})
+        self.assertAlmostEqual(dos["total"], 60 + 22 + 50)
+
+        ## 22 is within 10 % of 20, so the milk stays with the preferred provider
+        preferido = PurchasingController.cheapest_plan(self.session, ids=[self.id_proyeccion],
+                                                       preferidos=[self.central.id_proveedor], tolerancia=0.1)
+        lineas = self.por_nombre(preferido)
+        self.assertEqual(lineas["Leche"]["proveedor"], "Central")
+        self.assertEqual(lineas["Huevo"]["proveedor"], "Granja")
+
+        sin_central = PurchasingController.cheapest_plan(self.session, ids=[self.id_proyeccion],
+                                                         excluidos=[self.central.id_proveedor])
+        self.assertEqual([linea["nombre"] for linea in sin_central["sin_proveedor"]], ["Arroz"])
+        self.assertAlmostEqual(sin_central["total"], 20 + 50)
+
+        with self.assertRaises(ValueError):
+            PurchasingController.cheapest_plan(self.session, ids=[self.id_proyeccion], max_proveedores=1,
+                                               preferidos=[self.granja.id_proveedor, self.lacteos.id_proveedor])
+
+    ## The selection with a limit stays fast on a large catalog
+    def test_large_catalog(self):
+        generador = np.random.default_rng(7)
+        necesidades = [{"nombre": f"ingrediente {i}", "unidad": "g", "cantidad": 1.0} for i in range(1000)]
+        precios = [(f"ingrediente {i}", "g", p, float(generador.uniform(1, 100)))
+                   for i in range(1000) for p in range(100)]
+        matriz = SupplierMatrix(necesidades, precios, {})
+
+        inicio = time.perf_counter()
+        plan = matriz.solve(max_proveedores=5)
+        self.assertLess(time.perf_counter() - inicio, 5)
+        self.assertLessEqual(len(plan["proveedores"]), 5)
+        self.assertEqual(len(plan["lineas"]), 1000)
+        ## Five providers are never worse than the best single one
+        self.assertLess(plan["total"], matriz.costos.sum(axis=0).min())
+
+if __name__ == '__main__':
+    unittest.main()
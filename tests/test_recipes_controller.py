@@ -0,0 +1,222 @@
+import unittest
+import unicodedata
+from datetime import date
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Recipes.controller import RecetasController
+from src.Ingredients.model import Ingrediente
+from src.Projections.model import Proyeccion, ProyeccionReceta
+
+## Test class for RecetasController, using SQLite in-memory database
+class TestRecetasController(unittest.TestCase):
+    ## Set up the in-memory SQLite database with several recipes and ingredients
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()
+
+        self.ingredientes = [Ingrediente(nombre=f"Ingrediente {i}", clasificacion="Varios", unidad_medida="g") for i in range(6)]
+        self.session.add_all(self.ingredientes)
+        self.session.commit()
+
+        for r in range(20):
+            receta = Receta(nombre_receta=f"Receta {r}", clasificacion="Guisado",
+                            periodo="Desayuno" if r % 2 else "Comida", comensales_base=10, estatus=True)
+            self.session.add(receta)
+            self.session.flush()
+            for i, ingrediente in enumerate(self.ingredientes[:5]):
+                self.session.add(Receta_Ingredientes(id_receta=receta.id_receta,
+                                                     id_ingrediente=ingrediente.id_ingrediente,
+                                                     cantidad=10 * (i + 1)))
+        self.session.commit()
+        ## Start from a clean identity map so nothing is served from memory
+        self.session.expunge_all()
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.count_statement)
+
+    ## Tear down the in-memory database after each test
+    def tearDown(self):
+        event.remove(self.engine, "before_cursor_execute", self.count_statement)
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    ## Helper that records every statement sent to the database
+    def count_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    ## Listing every recipe uses a constant number of queries
+    def test_list_all_recipes_query_count(self):
+        listado = RecetasController.list_all_recipes_with_ingredients(self.session)
+
+        self.assertEqual(len(listado), 20)
+        self.assertLessEqual(len(self.statements), 2)
+
+    ## Searching uses a constant number of queries and keeps the same payload
+    def test_search_recipes_query_count(self):
+        listado = RecetasController.search_recipes(self.session, nombre="receta", periodo="Desayuno")
+
+        self.assertEqual(len(listado), 10)
+        self.assertLessEqual(len(self.statements), 2)
+
+        receta = listado[0]
+        self.assertEqual(set(receta.keys()), {"id_receta", "nombre_receta", "clasificacion_receta",
+                                              "periodo", "comensales_base", "ingredientes"})
+        self.assertEqual(len(receta["ingredientes"]), 5)
+        self.assertEqual(set(receta["ingredientes"][0].keys()), {"nombre_ingrediente", "clasificacion",
+                                                                 "id_ingrediente", "Cantidad", "Unidad"})
+        self.assertEqual(receta["ingredientes"][0]["Unidad"], "g")
+
+    ## Saving a recipe resolves every ingredient with one query, inserts in batches and commits once
+    def test_create_recipe_with_ingredients(self):
+        commits = []
+        event.listen(self.session, "after_commit", lambda session: commits.append(session))
+        lineas = [{"nombre": f"Ingrediente {i}", "unidad_medida": "g", "cantidad": "15"} for i in range(6)]
+        lineas += [{"nombre": f" Nuevo {i} ", "unidad_medida": "kg", "cantidad": 1.5} for i in range(20)]
+        lineas += [{"nombre": "nuevo 0", "unidad_medida": "KG", "cantidad": "0.5"}]
+
+        receta = RecetasController.create_recipe_with_ingredients(self.session, "Pozole", "Platillo principal",
+                                                                  "Comida", 8, lineas)
+
+        self.assertEqual(len(commits), 1)
+        self.assertLessEqual(len(self.statements), 5)
+        self.assertEqual(self.session.query(Ingrediente).count(), 26)
+        cantidades = {ri.ingrediente.nombre: ri.cantidad for ri in
+                      self.session.query(Receta_Ingredientes).filter_by(id_receta=receta.id_receta)}
+        self.assertEqual(len(cantidades), 26)
+        self.assertEqual(cantidades["Ingrediente 3"], 15)
+        self.assertEqual(cantidades["Nuevo 0"], 2)
+
+    ## Invalid lines are rejected before anything is written
+    def test_create_recipe_with_invalid_ingredients(self):
+        for lineas in ([], [{"nombre": "Sal", "unidad_medida": "g", "cantidad": "mucha"}],
+                       [{"nombre": "Sal", "unidad_medida": "", "cantidad": 1}],
+                       [{"nombre": "Sal", "unidad_medida": "g", "cantidad": 0}]):
+            with self.assertRaises(ValueError):
+                RecetasController.create_recipe_with_ingredients(self.session, "Caldo", "Sopa", "Comida", 4, lineas)
+        self.assertEqual(self.session.query(Receta).count(), 20)
+        self.assertEqual(self.session.query(Ingrediente).count(), 6)
+
+    ## Editing the ingredients writes only the differences, in one transaction, and marks the projections stale
+    def test_replace_recipe_ingredients(self):
+        receta = self.session.query(Receta).filter_by(nombre_receta="Receta 0").one()
+        proyeccion = Proyeccion(numero_usuario=1, nombre="Semana", periodo="Comida", comensales=50, fecha=date(2025, 5, 5))
+        self.session.add(proyeccion)
+        self.session.flush()
+        self.session.add(ProyeccionReceta(proyeccion.id_proyeccion, receta.id_receta, 100))
+        proyeccion.totales_obsoletos = False
+        self.session.commit()
+        commits = []
+        event.listen(self.session, "after_commit", lambda session: commits.append(session))
+
+        ## Ingrediente 0 keeps its quantity, 1 changes, 2 to 4 are removed, 5 and a new one are added
+        lineas = [{"nombre": "Ingrediente 0", "unidad_medida": "g", "cantidad": "10"},
+                  {"nombre": "Ingrediente 1", "unidad_medida": "g", "cantidad": 25},
+                  {"nombre": "Ingrediente 5", "unidad_medida": "g", "cantidad": 5},
+                  {"nombre": "Chile", "unidad_medida": "pza", "cantidad": 3}]
+        self.statements.clear()
+        cambios = RecetasController.replace_recipe_ingredients(self.session, receta.id_receta, lineas)
+
+        self.assertEqual(cambios, {"agregados": 2, "actualizados": 1, "eliminados": 3})
+        self.assertEqual(len(commits), 1)
+        escrituras = [s for s in self.statements if s.lstrip().split()[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+        ## Chile, the removed links, the changed quantity, the new links and the stale projections
+        self.assertEqual(len(escrituras), 5)
+        cantidades = {ri.ingrediente.nombre: ri.cantidad for ri in
+                      self.session.query(Receta_Ingredientes).filter_by(id_receta=receta.id_receta)}
+        self.assertEqual(cantidades, {"Ingrediente 0": 10, "Ingrediente 1": 25, "Ingrediente 5": 5, "Chile": 3})
+        self.assertTrue(self.session.get(Proyeccion, proyeccion.id_proyeccion).totales_obsoletos)
+
+        ## Submitting the same lines again writes nothing
+        self.statements.clear()
+        self.assertEqual(RecetasController.replace_recipe_ingredients(self.session, receta.id_receta, lineas),
+                         {"agregados": 0, "actualizados": 0, "eliminados": 0})
+        self.assertFalse([s for s in self.statements if s.lstrip().split()[0].upper() in ("INSERT", "UPDATE", "DELETE")])
+
+    ## Invalid lines or an unknown recipe leave the stored ingredients untouched
+    def test_replace_recipe_ingredients_invalid(self):
+        receta = self.session.query(Receta).filter_by(nombre_receta="Receta 1").one()
+        with self.assertRaises(ValueError):
+            RecetasController.replace_recipe_ingredients(self.session, receta.id_receta,
+                                                         [{"nombre": "Sal", "unidad_medida": "g", "cantidad": "x"}])
+        with self.assertRaises(ValueError):
+            RecetasController.replace_recipe_ingredients(self.session, 999,
+                                                         [{"nombre": "Sal", "unidad_medida": "g", "cantidad": 1}])
+        self.assertEqual(self.session.query(Receta_Ingredientes).filter_by(id_receta=receta.id_receta).count(), 5)
+        self.assertIsNone(self.session.query(Ingrediente).filter_by(nombre="Sal").first())
+
+
+## Collation of the test database: compares ignoring case and accents, like utf8mb4_general_ci on MariaDB
+def comparar_sin_acentos(a, b):
+    normalizar = lambda texto: "".join(c for c in unicodedata.normalize("NFKD", texto)
+                                       if not unicodedata.combining(c)).lower()
+    a, b = normalizar(a), normalizar(b)
+    return (a > b) - (a < b)
+
+
+## Test class for the ingredients of the recipes on a database that ignores case and accents when comparing names
+class TestRecetasControllerCollation(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        event.listen(self.engine, "connect",
+                     lambda conexion, registro: conexion.create_collation("sin_acentos", comparar_sin_acentos))
+        with self.engine.begin() as connection:
+            connection.execute(text("CREATE TABLE ingredientes (id_ingrediente INTEGER PRIMARY KEY, "
+                                    "nombre VARCHAR(100) COLLATE sin_acentos NOT NULL, clasificacion VARCHAR(50), "
+                                    "unidad_medida VARCHAR(20) COLLATE sin_acentos NOT NULL)"))
+            connection.execute(text("CREATE UNIQUE INDEX ux_ingredientes_nombre_unidad ON ingredientes (nombre, unidad_medida)"))
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        self.azucar = Ingrediente(nombre="Azúcar", clasificacion="Endulzante", unidad_medida="g")
+        self.limon = Ingrediente(nombre="Limón", clasificacion="Fruta", unidad_medida="pza")
+        self.session.add_all([self.azucar, self.limon])
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def cantidades(self, receta):
+        self.session.expire_all()
+        return {ri.ingrediente.nombre: ri.cantidad for ri in
+                self.session.query(Receta_Ingredientes).filter_by(id_receta=receta.id_receta)}
+
+    ## A line written without the accent uses the stored ingredient instead of inserting a duplicate
+    def test_create_recipe_with_accented_ingredient(self):
+        lineas = [{"nombre": "azucar", "unidad_medida": "G", "cantidad": 100},
+                  {"nombre": "AZÚCAR", "unidad_medida": "g", "cantidad": 50},
+                  {"nombre": "Limon", "unidad_medida": "pza", "cantidad": 2}]
+
+        receta = RecetasController.create_recipe_with_ingredients(self.session, "Limonada", "Bebida", "Comida", 4, lineas)
+
+        self.assertEqual(self.cantidades(receta), {"Azúcar": 150, "Limón": 2})
+        self.assertEqual(self.session.query(Ingrediente).count(), 2)
+
+    ## Editing a recipe with lines that differ from the stored names only by accent or case keeps the ingredients
+    def test_replace_recipe_ingredients_with_accented_ingredient(self):
+        receta = RecetasController.create_recipe_with_ingredients(
+            self.session, "Limonada", "Bebida", "Comida", 4,
+            [{"nombre": "Azúcar", "unidad_medida": "g", "cantidad": 100}])
+
+        cambios = RecetasController.replace_recipe_ingredients(self.session, receta.id_receta, [
+            {"nombre": "azucar", "unidad_medida": "g", "cantidad": 80},
+            {"nombre": "LIMON", "unidad_medida": "pza", "cantidad": 3},
+        ])
+
+        self.assertEqual(cambios, {"agregados": 1, "actualizados": 1, "eliminados": 0})
+        self.assertEqual(self.cantidades(receta), {"Azúcar": 80, "Limón": 3})
+        self.assertEqual(self.session.query(Ingrediente).count(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+from datetime import date
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+from src.Projections.model import Proyeccion, ProyeccionReceta, ProyeccionIngrediente
+from src.Trashcan import controller
+from src.Trashcan.controller import TrashcanController
+
+## Test class for the bulk restore and permanent delete of the trash can, using SQLite in-memory database
+class TestTrashcanBulk(unittest.TestCase):
+    ## Five deleted recipes, one active, three deleted projections and one active that uses a deleted recipe
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        ingrediente = Ingrediente(nombre="Frijol", clasificacion="Leguminosa", unidad_medida="g")
+        self.recetas = [Receta(nombre_receta=f"Receta {i}", clasificacion="Guisado", periodo="Comida", comensales_base=4,
+                               estatus=i == 5, fecha_eliminado=None if i == 5 else date(2025, 6, 1)) for i in range(6)]
+        self.session.add_all([ingrediente] + self.recetas)
+        self.session.flush()
+        self.session.add_all([Receta_Ingredientes(receta.id_receta, ingrediente.id_ingrediente, 50) for receta in self.recetas])
+
+        self.proyecciones = [Proyeccion(numero_usuario=1, nombre=f"Menu {i}", periodo="Comida", comensales=10,
+                                        fecha=date(2025, 6, 1), estatus=i == 3,
+                                        fecha_eliminado=None if i == 3 else date(2025, 6, 2)) for i in range(4)]
+        self.session.add_all(self.proyecciones)
+        self.session.flush()
+        for proyeccion in self.proyecciones:
+            self.session.add(ProyeccionReceta(proyeccion.id_proyeccion, self.recetas[0].id_receta, 100))
+            self.session.add(ProyeccionIngrediente(proyeccion.id_proyeccion, "Frijol", "g", 500))
+        self.proyecciones[3].totales_obsoletos = False
+        self.session.commit()
+
+        self.ids_recetas = [receta.id_receta for receta in self.recetas]
+        self.ids_proyecciones = [proyeccion.id_proyeccion for proyeccion in self.proyecciones]
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def contar_commits(self):
+        commits = []
+        event.listen(self.session, "after_commit", lambda session: commits.append(session))
+        return commits
+
+    ## Recipes and projections are restored together with one commit; active IDs are ignored
+    def test_restore_items(self):
+        commits = self.contar_commits()
+
+        restaurados = TrashcanController.restore_items(self.session, recetas=self.ids_recetas[:3] + [self.ids_recetas[5]],
+                                                       proyecciones=self.ids_proyecciones)
+
+        self.assertEqual(restaurados, {"recetas": 3, "proyecciones": 3})
+        self.assertEqual(len(commits), 1)
+        self.assertEqual([r.estatus for r in self.recetas], [True, True, True, False, False, True])
+        self.assertTrue(all(p.estatus and p.fecha_eliminado is None for p in self.proyecciones))
+
+    ## Recipes and projections are deleted with their links in one transaction, with one statement per table
+    def test_delete_items_from_trashcan(self):
+        commits = self.contar_commits()
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        borrados = TrashcanController.delete_items_from_trashcan(
+            self.session, recetas=self.ids_recetas, proyecciones=self.ids_proyecciones[:2] + [self.ids_proyecciones[3]])
+
+        self.assertEqual(borrados, {"receta_ingredientes": 5, "Proyeccion_Recetas": 4, "recetas": 5,
+                                    "proyeccion_ingredientes": 2, "proyecciones": 2})
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(len([s for s in statements if s.lstrip().upper().startswith("DELETE")]), 6)
+        self.assertEqual(self.session.query(Receta).count(), 1)
+        self.assertEqual(sorted(p.nombre for p in self.session.query(Proyeccion)), ["Menu 2", "Menu 3"])
+        ## The active projection used a deleted recipe
+        self.assertTrue(self.session.get(Proyeccion, self.ids_proyecciones[3]).totales_obsoletos)
+
+    ## Long lists are split in batches but still committed once
+    def test_batches_share_one_transaction(self):
+        commits = self.contar_commits()
+        with patch.object(controller, "PURGE_BATCH_SIZE", 2):
+            borrados = TrashcanController.delete_items_from_trashcan(self.session, recetas=self.ids_recetas * 2)
+        self.assertEqual(borrados["recetas"], 5)
+        self.assertEqual(len(commits), 1)
+
+    ## A failure rolls back every batch
+    def test_failure_rolls_back(self):
+        with patch.object(controller, "PURGE_BATCH_SIZE", 2), \
+             patch.object(TrashcanController, "_purge_projections", side_effect=RuntimeError("fallo")):
+            with self.assertRaises(RuntimeError):
+                TrashcanController.delete_items_from_trashcan(self.session, recetas=self.ids_recetas,
+                                                              proyecciones=self.ids_proyecciones)
+        self.assertEqual(self.session.query(Receta).count(), 6)
+        self.assertEqual(self.session.query(Receta_Ingredientes).count(), 6)
+
+if __name__ == '__main__':
+    unittest.main()
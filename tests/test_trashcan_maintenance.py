@@ -0,0 +1,129 @@
+import unittest
+import os
+import sys
+import threading
+from datetime import date, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta, Receta_Ingredientes
+from src.Ingredients.model import Ingrediente
+from src.Projections.model import Proyeccion, ProyeccionReceta, ProyeccionIngrediente
+from src.Trashcan.controller import TrashcanController, retention_weeks, purge_date
+from src.Trashcan.maintenance import start_trash_purge
+
+## Test class for the set-based purge of the trash can, using SQLite in-memory database
+class TestTrashPurge(unittest.TestCase):
+    ## Three expired recipes, one recent one, and an expired projection that uses an active recipe
+    def setUp(self):
+        ## A single shared connection, so the maintenance thread sees the same in-memory database
+        self.engine = create_engine('sqlite:///:memory:', poolclass=StaticPool,
+                                    connect_args={"check_same_thread": False})
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()
+
+        hace = lambda semanas: date.today() - timedelta(weeks=semanas)
+        self.ingrediente = Ingrediente(nombre="Arroz", clasificacion="Cereal", unidad_medida="g")
+        self.activa = Receta(nombre_receta="Activa", clasificacion="Guisado", periodo="Comida", comensales_base=4, estatus=True)
+        self.vencidas = [Receta(nombre_receta=f"Vencida {i}", clasificacion="Guisado", periodo="Comida",
+                                comensales_base=4, estatus=False, fecha_eliminado=hace(13 + i)) for i in range(3)]
+        self.reciente = Receta(nombre_receta="Reciente", clasificacion="Guisado", periodo="Comida", comensales_base=4,
+                               estatus=False, fecha_eliminado=hace(2))
+        self.session.add_all([self.ingrediente, self.activa, self.reciente] + self.vencidas)
+        self.session.commit()
+        self.session.add_all([Receta_Ingredientes(receta.id_receta, self.ingrediente.id_ingrediente, 100)
+                              for receta in [self.activa, self.reciente] + self.vencidas])
+
+        self.vigente = Proyeccion(numero_usuario=1, nombre="Vigente", periodo="Comida", comensales=10,
+                                  fecha=date.today(), estatus=True)
+        self.vencida = Proyeccion(numero_usuario=1, nombre="Vencida", periodo="Comida", comensales=10,
+                                  fecha=hace(20), estatus=False, fecha_eliminado=hace(20))
+        self.session.add_all([self.vigente, self.vencida])
+        self.session.flush()
+        self.session.add_all([
+            ProyeccionReceta(self.vigente.id_proyeccion, self.activa.id_receta, 50),
+            ProyeccionReceta(self.vigente.id_proyeccion, self.vencidas[0].id_receta, 50),
+            ProyeccionReceta(self.vencida.id_proyeccion, self.activa.id_receta, 100),
+            ProyeccionIngrediente(self.vencida.id_proyeccion, "Arroz", "g", 250),
+        ])
+        self.vigente.totales_obsoletos = False
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    def nombres(self, modelo, columna):
+        self.session.expire_all()
+        return sorted(getattr(fila, columna) for fila in self.session.query(modelo).all())
+
+    ## Expired items and their links are removed with bulk deletes, in batches, and counted per table
+    def test_purge_in_batches(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        borrados = TrashcanController.clear_trashcan(self.session, semanas=12, lote=2)
+
+        self.assertEqual(borrados, {"receta_ingredientes": 3, "Proyeccion_Recetas": 2, "recetas": 3,
+                                    "proyeccion_ingredientes": 1, "proyecciones": 1})
+        self.assertEqual(self.nombres(Receta, "nombre_receta"), ["Activa", "Reciente"])
+        self.assertEqual(self.nombres(Proyeccion, "nombre"), ["Vigente"])
+        self.assertEqual(self.session.query(Receta_Ingredientes).count(), 2)
+        ## The active projection lost a purged recipe, so its totals are stale
+        self.assertTrue(self.session.get(Proyeccion, self.vigente.id_proyeccion).totales_obsoletos)
+
+        deletes = [s for s in statements if s.lstrip().upper().startswith("DELETE")]
+        self.assertEqual(len(deletes), 2 * 3 + 3)
+
+    ## The retention comes from TRASH_RETENTION_WEEKS and nothing is purged twice
+    def test_retention_from_environment(self):
+        with patch.dict(os.environ, {"TRASH_RETENTION_WEEKS": "14"}):
+            self.assertEqual(retention_weeks(), 14)
+            borrados = TrashcanController.clear_trashcan(self.session)
+        self.assertEqual(borrados["recetas"], 2)
+        self.assertIn("Vencida 0", self.nombres(Receta, "nombre_receta"))
+
+        with patch.dict(os.environ, {"TRASH_RETENTION_WEEKS": "varias"}):
+            self.assertEqual(retention_weeks(), 12)
+        ## The date shown in the trash can views follows the same retention
+        with patch.dict(os.environ, {"TRASH_RETENTION_WEEKS": "2"}):
+            self.assertEqual(purge_date(date(2025, 6, 1)), date(2025, 6, 15))
+        self.assertEqual(purge_date(date(2025, 6, 1), semanas=1), date(2025, 6, 8))
+        self.assertEqual(sum(TrashcanController.clear_trashcan(self.session, semanas=14).values()), 0)
+
+    ## The maintenance thread purges with its own session and keeps the counts
+    def test_background_purge(self):
+        purga = start_trash_purge(session_factory=self.Session, semanas=1)
+        purga.join(timeout=10)
+
+        self.assertFalse(purga.is_alive())
+        self.assertIsNone(purga.error)
+        self.assertEqual(purga.borrados["recetas"], 4)
+        self.assertEqual(self.nombres(Receta, "nombre_receta"), ["Activa"])
+
+    ## A purge asked to stop ends after the batch in course, and the next one continues it
+    def test_stop_between_batches(self):
+        detener = threading.Event()
+        purge_recipes = TrashcanController._purge_recipes
+
+        def purgar_y_detener(session, ids, borrados):
+            purge_recipes(session, ids, borrados)
+            detener.set()
+
+        with patch.object(TrashcanController, "_purge_recipes", side_effect=purgar_y_detener):
+            borrados = TrashcanController.clear_trashcan(self.session, semanas=12, lote=2, detener=detener)
+        self.assertEqual(borrados["recetas"], 2)
+        self.assertEqual(borrados["proyecciones"], 0)
+
+        borrados = TrashcanController.clear_trashcan(self.session, semanas=12, lote=2)
+        self.assertEqual((borrados["recetas"], borrados["proyecciones"]), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
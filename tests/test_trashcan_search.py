@@ -0,0 +1,119 @@
+import unittest
+import os
+import sys
+from datetime import date
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.connector import Base
+from src.Recipes.model import Receta
+from src.Projections.model import Proyeccion, ProyeccionReceta
+from src.Trashcan.controller import TrashcanController
+
+## Test class for the database searches of the trash can, using SQLite in-memory database
+class TestTrashcanSearch(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+        self.recetas = [
+            Receta(nombre_receta="Arroz rojo", clasificacion="Guarnicion", periodo="Comida", comensales_base=4,
+                   estatus=False, fecha_eliminado=date(2025, 3, 1)),
+            Receta(nombre_receta="Arroz con leche", clasificacion="Postre", periodo="Cena", comensales_base=4,
+                   estatus=False, fecha_eliminado=date(2025, 3, 2)),
+            Receta(nombre_receta="Arroz blanco", clasificacion="Guarnicion", periodo="Comida", comensales_base=4,
+                   estatus=True),
+            Receta(nombre_receta="Sopa de fideo", clasificacion="Sopa", periodo="Comida", comensales_base=4,
+                   estatus=False, fecha_eliminado=date(2025, 3, 1)),
+        ]
+        self.session.add_all(self.recetas)
+        self.proyecciones = [
+            Proyeccion(numero_usuario=1, nombre=f"Semana {i}", periodo="Comida", comensales=10,
+                       fecha=date(2025, 4, 1 + i % 2), estatus=i == 5, fecha_eliminado=date(2025, 4, 10))
+            for i in range(6)
+        ]
+        self.session.add_all(self.proyecciones)
+        self.session.flush()
+        for i, proyeccion in enumerate(self.proyecciones[:4]):
+            self.session.add(ProyeccionReceta(proyeccion.id_proyeccion, self.recetas[0].id_receta, 50))
+            if i % 2:
+                self.session.add(ProyeccionReceta(proyeccion.id_proyeccion, self.recetas[3].id_receta, 50))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
+
+    ## Deleted recipes are filtered by name, case-insensitive, and by deletion date
+    def test_search_deleted_recipes(self):
+        nombres = lambda recetas: [receta.nombre_receta for receta in recetas]
+
+        self.assertEqual(nombres(TrashcanController.search_deleted_recipes(self.session, "ARROZ")),
+                         ["Arroz rojo", "Arroz con leche"])
+        self.assertEqual(nombres(TrashcanController.search_deleted_recipes(self.session, fecha_eliminado=date(2025, 3, 1))),
+                         ["Arroz rojo", "Sopa de fideo"])
+        self.assertEqual(nombres(TrashcanController.search_deleted_recipes(self.session, "arroz", date(2025, 3, 1))),
+                         ["Arroz rojo"])
+
+        pagina = TrashcanController.search_deleted_recipes(self.session, limite=2, contar=True)
+        self.assertEqual(pagina.total, 3)
+        self.assertTrue(pagina.hay_mas)
+
+    ## Deleted projections are filtered by name, date text and date, and carry the names of their recipes
+    def test_search_deleted_projections(self):
+        semana_1 = TrashcanController.search_deleted_projections(self.session, "semana 1")
+        self.assertEqual(len(semana_1), 1)
+        self.assertEqual(semana_1[0]["recetas"], ["Arroz rojo", "Sopa de fideo"])
+        self.assertEqual(semana_1[0]["fecha_eliminado"], date(2025, 4, 10))
+
+        self.assertEqual(len(TrashcanController.search_deleted_projections(self.session, "2025-04-02")), 2)
+        del_dia = TrashcanController.search_deleted_projections(self.session, fecha=date(2025, 4, 1))
+        self.assertEqual([p["nombre"] for p in del_dia], ["Semana 0", "Semana 2", "Semana 4"])
+        self.assertEqual(del_dia[-1]["recetas"], [])
+
+    ## The % and _ typed in the search are matched literally, not as wildcards
+    def test_wildcards_are_escaped(self):
+        self.session.add_all([
+            Receta(nombre_receta="Agua 100% natural", clasificacion="Bebida", periodo="Comida", comensales_base=4,
+                   estatus=False, fecha_eliminado=date(2025, 3, 3)),
+            Proyeccion(numero_usuario=1, nombre="menu_especial", periodo="Comida", comensales=10,
+                       fecha=date(2025, 4, 3), estatus=False, fecha_eliminado=date(2025, 4, 10)),
+        ])
+        self.session.commit()
+
+        nombres = lambda recetas: [receta.nombre_receta for receta in recetas]
+        self.assertEqual(nombres(TrashcanController.search_deleted_recipes(self.session, "%")), ["Agua 100% natural"])
+        self.assertEqual(nombres(TrashcanController.search_deleted_recipes(self.session, "_")), [])
+        self.assertEqual(nombres(TrashcanController.search_deleted_recipes(self.session, "0/")), [])
+        self.assertEqual([p["nombre"] for p in TrashcanController.search_deleted_projections(self.session, "_")],
+                         ["menu_especial"])
+
+    ## The recipe names of a page are loaded with one query, whatever the number of projections
+    def test_recipe_names_are_batched(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        pagina = TrashcanController.search_deleted_projections(self.session, limite=3)
+
+        self.assertEqual(len(pagina), 3)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(TrashcanController.get_recipe_names_by_projections(self.session, []), {})
+
+    ## The date filters use the indexes on (estatus, fecha_eliminado) and (estatus, fecha)
+    def test_date_filters_use_indexes(self):
+        with self.engine.connect() as connection:
+            recetas = connection.execute(text(
+                "EXPLAIN QUERY PLAN SELECT id_receta FROM recetas WHERE estatus = 0 AND fecha_eliminado = '2025-03-01'"
+            )).all()
+            proyecciones = connection.execute(text(
+                "EXPLAIN QUERY PLAN SELECT id_proyeccion FROM proyecciones WHERE estatus = 0 AND fecha = '2025-04-01'"
+            )).all()
+        self.assertIn("ix_recetas_estatus_fecha_eliminado", recetas[0][-1])
+        self.assertIn("ix_proyecciones_estatus_fecha (", proyecciones[0][-1])
+
+if __name__ == '__main__':
+    unittest.main()